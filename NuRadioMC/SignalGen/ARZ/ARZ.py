@@ -456,6 +456,20 @@ class ARZ(object):
         """
         self._random_generator.seed(seed)
 
+    def get_random_state(self):
+        """
+        returns the state of the random number generator and the last selected shower profiles
+        """
+        return self._random_generator.get_state(), dict(self._random_numbers)
+
+    def set_random_state(self, state):
+        """
+        restores the state of the random number generator and the last selected shower profiles
+        (as returned by `get_random_state`)
+        """
+        self._random_generator.set_state(state[0])
+        self._random_numbers = dict(state[1])
+
     def set_interpolation_factor(self, interp_factor):
         """
         set interpolation factor of charge-excess profiles
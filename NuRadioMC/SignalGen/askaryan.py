@@ -11,6 +11,72 @@ def set_log_level(level):
     par.set_log_level(level)
 
 
+def set_seed(model, seed):
+    """
+    (re)sets the random number generator of an Askaryan model with a new seed
+
+    The ARZ models draw a random charge excess profile and the Alvarez2009 model draws a random k_L parameter for
+    every shower. The random number generators of these models are global, i.e., they are shared by all showers
+    that are simulated in one process.
+
+    Parameters
+    ----------
+    model: string
+        the name of the Askaryan model
+    seed: None or int
+        the random seed
+    """
+    if model in par.get_parametrizations():
+        par.set_seed(model, seed)
+    elif(model == 'ARZ2019' or model == 'ARZ2020'):
+        from NuRadioMC.SignalGen.ARZ import ARZ
+        ARZ.ARZ(arz_version=model, seed=seed).set_seed(seed)
+
+
+def get_random_state(model):
+    """
+    returns the state of the random number generator of an Askaryan model, e.g. to continue an
+    interrupted simulation with the same random numbers
+
+    Parameters
+    ----------
+    model: string
+        the name of the Askaryan model
+
+    Returns
+    -------
+    the state that can be passed to `set_random_state`, None if the model does not use random numbers
+    or was not used yet
+    """
+    if model in par.get_parametrizations():
+        return par.get_random_state(model)
+    elif(model == 'ARZ2019' or model == 'ARZ2020'):
+        from NuRadioMC.SignalGen.ARZ import ARZ
+        from NuRadioReco.utilities.metaclasses import Singleton
+        if(Singleton._instances.get(ARZ.ARZ, None) is None):  # do not load the shower library if ARZ was not used yet
+            return None
+        return ARZ.ARZ().get_random_state()
+    return None
+
+
+def set_random_state(model, state):
+    """
+    restores the state of the random number generator of an Askaryan model (as returned by `get_random_state`)
+
+    Parameters
+    ----------
+    model: string
+        the name of the Askaryan model
+    state: object
+        the state returned by `get_random_state`
+    """
+    if model in par.get_parametrizations():
+        par.set_random_state(model, state)
+    elif((model == 'ARZ2019' or model == 'ARZ2020') and state is not None):
+        from NuRadioMC.SignalGen.ARZ import ARZ
+        ARZ.ARZ(arz_version=model).set_random_state(state)
+
+
 def get_time_trace(energy, theta, N, dt, shower_type, n_index, R, model, interp_factor=None, interp_factor2=None,
                    same_shower=False, seed=None, full_output=False, **kwargs):
     """
@@ -163,3 +229,112 @@ def get_frequency_spectrum(energy, theta, N, dt, shower_type, n_index, R, model,
         return fft.time2freq(tmp[0], 1 / dt), tmp[1]
     else:
         return fft.time2freq(tmp, 1 / dt)
+
+
+class frequency_spectrum_cache(object):
+    """
+    caches the Askaryan frequency spectra of a single shower
+
+    Within one shower, the signal of the parametrizations only depends on the viewing angle and on the distance R
+    between vertex and observer (the shower realization is fixed after the first call), and the distance dependence
+    is a pure 1/R scaling. Channels that are close to each other (e.g. the antennas of a phased array) see the shower
+    under almost the same viewing angle. Instead of recalculating the spectrum for every channel and ray tracing
+    solution, the spectra of viewing angles that are within `tolerance` of an already calculated viewing angle (and
+    of distances that are within `distance_tolerance` of the distance of that calculation) are obtained by
+    interpolating the logarithm of the amplitude and the phase linearly between the closest calculated viewing angles (or by
+    taking the closest one) and rescaling the amplitude with 1/R to the requested distance.
+
+    The ARZ models calculate the vector potential of the shower in the near field, where neither the 1/R scaling nor
+    the interpolation in viewing angle holds. For these models, a cached spectrum is only reused if it was
+    calculated for the same viewing angle and distance, i.e., the vector potential of the pinned shower profile is
+    reused for channels that see the shower identically.
+    """
+
+    def __init__(self, tolerance=None, distance_tolerance=0.1):
+        """
+        Parameters
+        ----------
+        tolerance: float or None
+            the maximum difference in viewing angle between the requested viewing angle and a cached viewing angle.
+            If None, the cache is disabled, i.e., all spectra are calculated.
+        distance_tolerance: float
+            the maximum relative difference between the requested distance and the distance of a cached spectrum
+        """
+        self._tolerance = tolerance
+        self._distance_tolerance = distance_tolerance
+        self.n_calls = 0
+        self.n_hits = 0
+        self.reset()
+
+    def reset(self):
+        """
+        clears the cache, needs to be called before a new shower is simulated
+        """
+        self._key = None
+        self._viewing_angles = []
+        self._distances = []
+        self._spectra = []
+        self._additional_output = {}
+
+    def _get_cached_spectrum(self, theta, R, model):
+        """
+        returns the spectrum obtained from the cached spectra or None if no cached spectrum is close enough
+        """
+        viewing_angles = np.array(self._viewing_angles)
+        distances = np.array(self._distances)
+        if(model in ['ARZ2019', 'ARZ2020']):
+            exact = np.flatnonzero((viewing_angles == theta) & (distances == R))
+            if(len(exact)):
+                return self._spectra[exact[0]]
+            return None
+
+        delta = viewing_angles - theta
+        valid = np.abs(distances / R - 1) <= self._distance_tolerance
+        below = np.flatnonzero(valid & (delta <= 0) & (delta >= -self._tolerance))
+        above = np.flatnonzero(valid & (delta > 0) & (delta <= self._tolerance))
+        if(len(below) and len(above)):
+            i1 = below[np.argmax(delta[below])]
+            i2 = above[np.argmin(delta[above])]
+            w = -delta[i1] / (delta[i2] - delta[i1])
+            spectrum1 = self._spectra[i1]
+            spectrum2 = self._spectra[i2]
+            # interpolate the logarithm of the amplitude and the phase separately. The amplitude falls off
+            # exponentially with the distance to the Cherenkov angle at high frequencies, and a linear interpolation
+            # of the complex amplitudes would reduce the amplitude if the phases differ
+            amplitude = (np.abs(spectrum1) * distances[i1]) ** (1 - w) * (np.abs(spectrum2) * distances[i2]) ** w
+            phase = np.angle(spectrum1) + w * np.angle(spectrum2 * np.conj(spectrum1))
+            return amplitude * np.exp(1j * phase) / R
+        if(len(below) or len(above)):
+            indices = np.append(below, above)
+            i1 = indices[np.argmin(np.abs(delta[indices]))]
+            return self._spectra[i1] * distances[i1] / R
+        return None
+
+    def get_frequency_spectrum(self, energy, theta, N, dt, shower_type, n_index, R, model, full_output=False, **kwargs):
+        """
+        returns the complex amplitudes of the frequency spectrum of the neutrino radio signal, see
+        `askaryan.get_frequency_spectrum` for a description of the parameters.
+        """
+        self.n_calls += 1
+        key = (energy, N, dt, shower_type, n_index, model)
+        if(self._tolerance is not None and key == self._key and len(self._viewing_angles)):
+            spectrum = self._get_cached_spectrum(theta, R, model)
+            if(spectrum is not None):
+                self.n_hits += 1
+                if(full_output):
+                    return spectrum, dict(self._additional_output)
+                return spectrum
+
+        spectrum, additional_output = get_frequency_spectrum(energy, theta, N, dt, shower_type, n_index, R, model,
+                                                             full_output=True, **kwargs)
+        if(self._tolerance is not None):
+            if(key != self._key):
+                self.reset()
+                self._key = key
+                self._additional_output = additional_output
+            self._viewing_angles.append(theta)
+            self._distances.append(R)
+            self._spectra.append(spectrum)
+        if(full_output):
+            return spectrum, additional_output
+        return spectrum
@@ -30,6 +30,43 @@ def get_parametrizations():
     return ['ZHS1992', 'Alvarez2000', 'Alvarez2009', 'Alvarez2012']
 
 
+def set_seed(model, seed):
+    """
+    (re)sets the random number generator of a parametrization with a new seed
+
+    Parameters
+    ----------
+    model: string
+        the name of the parametrization
+    seed: None or int
+        the random seed
+    """
+    _random_generators[model] = np.random.RandomState(seed)
+
+
+def get_random_state(model):
+    """
+    returns the state of the random number generator of a parametrization and the last drawn k_L parameter of
+    the Alvarez2009 model, or None if the parametrization was not used yet
+    """
+    if(model not in _random_generators):
+        return None
+    return _random_generators[model].get_state(), _Alvarez2009_k_L
+
+
+def set_random_state(model, state):
+    """
+    restores the state of the random number generator of a parametrization (as returned by `get_random_state`)
+    """
+    global _Alvarez2009_k_L
+    if(state is None):
+        _random_generators.pop(model, None)
+        return
+    _random_generators[model] = np.random.RandomState()
+    _random_generators[model].set_state(state[0])
+    _Alvarez2009_k_L = state[1]
+
+
 def get_time_trace(energy, theta, N, dt, shower_type, n_index, R, model, seed=None, same_shower=False,
                    k_L=None, full_output=False, average_shower=False):
     """
@@ -71,7 +71,8 @@ class ray_tracing_2D(ray_tracing_base):
     def __init__(self, medium, attenuation_model="SP1",
                  log_level=logging.WARNING,
                  n_frequencies_integration=25,
-                 use_optimized_start_values=False):
+                 use_optimized_start_values=False,
+                 n_points_integration=50):
         """
         initialize 2D analytic ray tracing class
 
@@ -88,6 +89,9 @@ class ray_tracing_2D(ray_tracing_base):
         use_optimized_start_value: bool
             if True, the initial C_0 paramter (launch angle) is set to the ray that skims the surface
             (default: False)
+        n_points_integration: int
+            order of the Gauss-Legendre quadrature that is used to integrate the attenuation along
+            the path (per side of the turning point, default: 50)
 
         """
         self.medium = medium
@@ -103,6 +107,7 @@ class ray_tracing_2D(ray_tracing_base):
         self.__logger.setLevel(log_level)
         self.__n_frequencies_integration = n_frequencies_integration
         self.__use_optimized_start_values = use_optimized_start_values
+        self.__quadrature_nodes, self.__quadrature_weights = np.polynomial.legendre.leggauss(n_points_integration)
 
     def n(self, z):
         """
@@ -224,7 +229,9 @@ class ray_tracing_2D(ray_tracing_base):
         res = (-np.sqrt(c) * np.exp(z / self.medium.z_0) * self.__b * self.medium.delta_n + 0.2e1 * np.sqrt(-self.__b * self.medium.delta_n * np.exp(z /
                                                                                                                                                      self.medium.z_0) + self.medium.delta_n ** 2 * np.exp(0.2e1 * z / self.medium.z_0) + c) * c + 0.2e1 * c ** 1.5) / B * E ** -0.5 * (D ** (-0.5))
 
-        if(z != z_raw):
+        if(hasattr(z_raw, '__len__')):
+            res = np.where(z != z_raw, -res, res)
+        elif(z != z_raw):
             res *= -1
         return res
 
@@ -290,6 +297,8 @@ class ray_tracing_2D(ray_tracing_base):
         """
         c = self.medium.n_ice ** 2 - C_0 ** -2
         gamma_turn, z_turn = self.get_turning_point(c)
+        if(hasattr(z, '__len__')):
+            return np.where(z > z_turn, 2 * z_turn - z, z)
         z_unmirrored = z
         if(z > z_turn):
             z_unmirrored = 2 * z_turn - z
@@ -555,6 +564,54 @@ class ray_tracing_2D(ray_tracing_base):
             self.__logger.debug(f"calculating attenuation for frequencies {freqs}")
             return freqs
 
+    def get_attenuation_integral(self, x1, x2, C_0, frequency):
+        """
+        calculates the integral of ds / L(z, f) along an upward going ray path for many frequencies at once
+
+        The line integral is calculated with a fixed order Gauss-Legendre quadrature in (mirrored) z. The path is split
+        at the turning point and each part is integrated in the variable u = sqrt(|z_turn - z|) which removes
+        the 1/sqrt singularity of ds/dz at the turning point. The attenuation length is evaluated
+        for all quadrature nodes and frequencies as one 2D array.
+
+        Parameters
+        ----------
+        x1: tuple
+            (y, z) start position of the ray path segment
+        x2: tuple
+            (y, z) stop position of the ray path segment
+        C_0: float
+            C_0 parameter of analytic ray path function
+        frequency: array of floats
+            the frequencies for which the integral is calculated
+
+        Returns
+        -------
+        array of floats: the integral of ds / L for each frequency (the attenuation factor is exp(-integral))
+        """
+        frequency = np.atleast_1d(frequency)
+        x2_mirrored = self.get_z_mirrored(x1, x2, C_0)
+        gamma_turn, z_turn = self.get_turning_point(self.medium.n_ice ** 2 - C_0 ** -2)
+        z_start = x1[1]
+        z_stop = x2_mirrored[1]
+
+        # integration intervals in u = sqrt(|z_turn - z|) below and above the turning point
+        intervals = [(np.abs(z_turn - z_start) ** 0.5, np.abs(z_turn - min(z_stop, z_turn)) ** 0.5, -1)]
+        if(z_stop > z_turn):
+            intervals.append((0, (z_stop - z_turn) ** 0.5, 1))
+        zz = []
+        ww = []
+        for u_a, u_b, sign in intervals:
+            u = 0.5 * (u_b - u_a) * self.__quadrature_nodes + 0.5 * (u_a + u_b)
+            zz.append(z_turn + sign * u ** 2)
+            # dz = 2 u du, the sign is absorbed by the orientation of the u interval
+            ww.append(0.5 * np.abs(u_b - u_a) * self.__quadrature_weights * 2 * u)
+        zz = np.concatenate(zz)
+        ww = np.concatenate(ww)
+        ds = self.ds(zz, C_0)
+        att_length = attenuation_util.get_attenuation_length(self.get_z_unmirrored(zz, C_0)[:, np.newaxis],
+                                                             frequency[np.newaxis, :], self.attenuation_model)
+        return np.sum((ww * ds)[:, np.newaxis] / att_length, axis=0)
+
     def get_attenuation_along_path(self, x1, x2, C_0, frequency, max_detector_freq, reflection=0, reflection_case=1):
         tmp_attenuation = None
         output = f"calculating attenuation for n_ref = {int(reflection):d}: "
@@ -570,40 +627,15 @@ class ray_tracing_2D(ray_tracing_base):
             else:
                 x11, x1, x22, x2, C_0, C_1 = segment
 
-            if(cpp_available):
-                mask = frequency > 0
-                freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
-                tmp = np.zeros_like(freqs)
-                for i, f in enumerate(freqs):
-                    tmp[i] = wrapper.get_attenuation_along_path(
-                        x1, x2, C_0, f, self.medium.n_ice, self.medium.delta_n, self.medium.z_0, self.attenuation_model_int)
-                self.__logger.debug(tmp)
-                attenuation = np.ones_like(frequency)
-                attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
-            else:
-
-                x2_mirrored = self.get_z_mirrored(x1, x2, C_0)
-
-                def dt(t, C_0, frequency):
-                    z = self.get_z_unmirrored(t, C_0)
-                    return self.ds(t, C_0) / attenuation_util.get_attenuation_length(z, frequency, self.attenuation_model)
-
-                # to speed up things we only calculate the attenuation for a few frequencies
-                # and interpolate linearly between them
-                mask = frequency > 0
-                freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
-                gamma_turn, z_turn = self.get_turning_point(self.medium.n_ice ** 2 - C_0 ** -2)
-                points = None
-                if(x1[1] < z_turn and z_turn < x2_mirrored[1]):
-                    points = [z_turn]
-                tmp = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(
-                    C_0, f), epsrel=1e-2, points=points)[0] for f in freqs])
-                tmp = np.exp(-1 * tmp)
-        #         tmp = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(C_0, f), epsrel=0.05)[0] for f in frequency[mask]])
-                attenuation = np.ones_like(frequency)
-                attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
-                self.__logger.info("calculating attenuation from ({:.0f}, {:.0f}) to ({:.0f}, {:.0f}) = ({:.0f}, {:.0f}) =  a factor {}".format(
-                    x1[0], x1[1], x2[0], x2[1], x2_mirrored[0], x2_mirrored[1], 1 / attenuation))
+            # to speed up things we only calculate the attenuation for a few frequencies
+            # and interpolate linearly between them
+            mask = frequency > 0
+            freqs = self.__get_frequencies_for_attenuation(frequency, max_detector_freq)
+            tmp = np.exp(-1 * self.get_attenuation_integral(x1, x2, C_0, freqs))
+            attenuation = np.ones_like(frequency)
+            attenuation[mask] = np.interp(frequency[mask], freqs, tmp)
+            self.__logger.debug("calculating attenuation from ({:.0f}, {:.0f}) to ({:.0f}, {:.0f}) = a factor {}".format(
+                x1[0], x1[1], x2[0], x2[1], 1 / attenuation))
             iF = len(frequency) // 3
             output += f"adding attenuation for path segment {iS:d} -> {attenuation[iF]:.2g} at {frequency[iF]/units.MHz:.0f} MHz, "
             if(tmp_attenuation is None):
@@ -1667,15 +1699,109 @@ class ray_tracing(ray_tracing_base):
         """
         find all solutions between x1 and x2
         """
-        self._results = self._r2d.find_solutions(self._x1, self._x2)
+        self._results = self._find_solutions_2d(self._x1, self._x2)
+
+    def _find_solutions_2d(self, x1, x2):
+        """
+        finds all solutions (including bottom reflections) between the 2D points x1 and x2
+        """
+        results = self._r2d.find_solutions(x1, x2)
         for i in range(self._n_reflections):
             for j in range(2):
-                self._results.extend(self._r2d.find_solutions(self._x1, self._x2, reflection=i + 1, reflection_case=j + 1))
+                results.extend(self._r2d.find_solutions(x1, x2, reflection=i + 1, reflection_case=j + 1))
 
         # check if not too many solutions were found (the same solution can potentially found twice because of numerical imprecision)
-        if(self.get_number_of_solutions() > self.get_number_of_raytracing_solutions()):
-            self.__logger.error(f"{self.get_number_of_solutions()} were found but only {self.get_number_of_raytracing_solutions()} are allowed! Returning zero solutions")
-            self._results = []
+        if(len(results) > self.get_number_of_raytracing_solutions()):
+            self.__logger.error(f"{len(results)} were found but only {self.get_number_of_raytracing_solutions()} are allowed! Returning zero solutions")
+            results = []
+        return results
+
+    def find_solutions_vectorized(self, x1, x2):
+        """
+        finds the ray tracing solutions for many pairs of start and end points in one call
+
+        The start and end points are broadcast against each other, e.g., passing `x1[:, None]` (all vertices)
+        and `x2[None, :]` (all channels of a station) solves all vertex-channel combinations at once.
+        The transformation into the 2D ray tracing plane and back is done for all pairs at once and
+        every quantity is calculated only once per solution, which avoids most of the per-pair overhead
+        of calling `set_start_and_end_point`, `find_solutions` and the `get_*` functions.
+
+        Parameters
+        ----------
+        x1: np.array of shape (..., 3), default unit
+            start points of the rays
+        x2: np.array of shape (..., 3), default unit
+            stop points of the rays
+
+        Returns
+        -------
+        results: dict of np.arrays
+            all arrays have the shape (N..., n_solutions) where N... is the broadcast shape of x1 and x2
+            (without the last axis) and n_solutions is given by `get_number_of_raytracing_solutions()`.
+            Entries of non-existing solutions are NaN.
+
+            * 'n_solutions': the number of solutions per pair (shape N...)
+            * 'solution_type': the solution type (see `solution_types`)
+            * 'launch_vector': the launch vectors (shape (N..., n_solutions, 3))
+            * 'receive_vector': the receive vectors (shape (N..., n_solutions, 3))
+            * 'travel_distance': the path lengths
+            * 'travel_time': the travel times
+            * 'C0', 'C1', 'reflection', 'reflection_case': the parameters of the analytic ray tracing solution
+        """
+        X1, X2, shape = self._broadcast_points(x1, x2)
+        results = self._create_vectorized_results(len(X1), additional_keys=['C0', 'C1', 'reflection', 'reflection_case'])
+        if(self._n_reflections):
+            if(np.any(X1[:, 2] < self._medium.reflection) or np.any(X2[:, 2] < self._medium.reflection)):
+                self.__logger.error("start or stop point is below the reflective bottom layer at {:.1f}m".format(
+                    self._medium.reflection / units.m))
+                raise AttributeError("start or stop point is below the reflective bottom layer at {:.1f}m".format(
+                    self._medium.reflection / units.m))
+
+        # the 2D ray tracer expects the start point to be below the stop point (same convention as in set_start_and_end_point)
+        swap = X2[:, 2] < X1[:, 2]
+        lower = np.where(swap[:, None], X2, X1)
+        upper = np.where(swap[:, None], X1, X2)
+        dX = upper - lower
+        phi = np.arctan2(dX[:, 1], dX[:, 0])  # rotation angle of the 2D ray tracing plane
+        x1_2d = np.array([lower[:, 0], lower[:, 2]]).T
+        x2_2d = np.array([lower[:, 0] + np.hypot(dX[:, 0], dX[:, 1]), upper[:, 2]]).T
+
+        alpha_launch = np.full(results['C0'].shape, np.nan)
+        alpha_receive = np.full(results['C0'].shape, np.nan)
+        for i in range(len(X1)):
+            solutions = self._find_solutions_2d(x1_2d[i], x2_2d[i])
+            results['n_solutions'][i] = len(solutions)
+            for iS, solution in enumerate(solutions):
+                C_0 = solution['C0']
+                kwargs = {'reflection': solution['reflection'], 'reflection_case': solution['reflection_case']}
+                results['C0'][i, iS] = C_0
+                results['C1'][i, iS] = solution['C1']
+                results['reflection'][i, iS] = solution['reflection']
+                results['reflection_case'][i, iS] = solution['reflection_case']
+                results['solution_type'][i, iS] = self._r2d.determine_solution_type(x1_2d[i], x2_2d[i], C_0)
+                alpha_launch[i, iS] = self._r2d.get_launch_angle(x1_2d[i], C_0, **kwargs)
+                alpha_receive[i, iS] = self._r2d.get_receive_angle(x1_2d[i], x2_2d[i], C_0, **kwargs)
+                for key, func_analytic, func_numeric in [
+                        ['travel_distance', self._r2d.get_path_length_analytic, self._r2d.get_path_length],
+                        ['travel_time', self._r2d.get_travel_time_analytic, self._r2d.get_travel_time]]:
+                    try:
+                        value = func_analytic(x1_2d[i], x2_2d[i], C_0, **kwargs)
+                    except:
+                        self.__logger.warning("analytic calculation of {} failed, switching to numerical integration".format(key))
+                        value = func_numeric(x1_2d[i], x2_2d[i], C_0, **kwargs)
+                    results[key][i, iS] = np.nan if value is None else value
+
+        # convert the 2D launch and receive angles into 3D vectors. If start and stop point were swapped, the launch
+        # vector of the 2D problem is the receive vector of the 3D problem and vice versa.
+        launch_2d = np.stack([np.sin(alpha_launch), np.cos(alpha_launch)], axis=-1)
+        receive_2d = np.stack([-np.sin(alpha_receive), np.cos(alpha_receive)], axis=-1)
+        launch = np.where(swap[:, None, None], receive_2d, launch_2d)
+        receive = np.where(swap[:, None, None], launch_2d, receive_2d)
+        for key, vector_2d in [['launch_vector', launch], ['receive_vector', receive]]:
+            results[key][..., 0] = vector_2d[..., 0] * np.cos(phi)[:, None]
+            results[key][..., 1] = vector_2d[..., 0] * np.sin(phi)[:, None]
+            results[key][..., 2] = vector_2d[..., 1]
+        return self._reshape_vectorized_results(results, shape)
 
     def get_solution_type(self, iS):
         """ returns the type of the solution
@@ -7,7 +7,8 @@ solution_types_revert = {v:k for k, v in solution_types.items()}
 
 available_modules = ['analytic',
                      'radiopropa',
-                     'direct_ray']
+                     'direct_ray',
+                     'tabulated']
 
 reflection_case = {1: 'upwards launch vector',
                    2: 'downward launch vector'}
@@ -30,6 +31,8 @@ def get_propagation_module(name=None):
           index of refraction, but requires that RadioPropa is installed.
         * "direct_ray" : a dummy ray tracer that draws straight lines and 
           ignores refraction. Useful for debugging.
+        * "tabulated" : interpolates precomputed tables of the analytic ray tracer.
+          The tables are created once per receiver depth and ice model.
 
     """
     if name is None:
@@ -44,6 +47,9 @@ def get_propagation_module(name=None):
     elif(name==available_modules[1]):
         from NuRadioMC.SignalProp.radioproparaytracing import radiopropa_ray_tracing
         return radiopropa_ray_tracing
+    elif(name==available_modules[3]):
+        from NuRadioMC.SignalProp.tabulatedraytracing import tabulated_ray_tracing
+        return tabulated_ray_tracing
         
     else:
         msg = "Module \'{}\' not implemented. Available modules: {}".format(
@@ -134,6 +134,86 @@ class ray_tracing_base:
         self.__logger.error('function not defined')
         raise NotImplementedError
 
+    def find_solutions_vectorized(self, x1, x2):
+        """
+        finds the ray tracing solutions for many pairs of start and end points in one call
+
+        The start and end points are broadcast against each other, e.g., passing `x1[:, None]` (all vertices)
+        and `x2[None, :]` (all channels of a station) solves all vertex-channel combinations at once.
+        This generic implementation loops over all pairs and works for every propagation module. Ray tracers
+        can overwrite it with a faster implementation.
+
+        Note that the solutions of the last pair are left in the ray tracer afterwards.
+
+        Parameters
+        ----------
+        x1: np.array of shape (..., 3), default unit
+            start points of the rays
+        x2: np.array of shape (..., 3), default unit
+            stop points of the rays
+
+        Returns
+        -------
+        results: dict of np.arrays
+            all arrays have the shape (N..., n_solutions) where N... is the broadcast shape of x1 and x2
+            (without the last axis) and n_solutions is given by `get_number_of_raytracing_solutions()`.
+            Entries of non-existing solutions are NaN.
+
+            * 'n_solutions': the number of solutions per pair (shape N...)
+            * 'solution_type': the solution type (see `solution_types`)
+            * 'launch_vector': the launch vectors (shape (N..., n_solutions, 3))
+            * 'receive_vector': the receive vectors (shape (N..., n_solutions, 3))
+            * 'travel_distance': the path lengths
+            * 'travel_time': the travel times
+        """
+        X1, X2, shape = self._broadcast_points(x1, x2)
+        results = self._create_vectorized_results(len(X1))
+        for i in range(len(X1)):
+            self.set_start_and_end_point(X1[i], X2[i])
+            self.find_solutions()
+            n = self.get_number_of_solutions()
+            results['n_solutions'][i] = n
+            for iS in range(n):
+                results['solution_type'][i, iS] = self.get_solution_type(iS)
+                results['launch_vector'][i, iS] = self.get_launch_vector(iS)
+                results['receive_vector'][i, iS] = self.get_receive_vector(iS)
+                R = self.get_path_length(iS)
+                T = self.get_travel_time(iS)
+                results['travel_distance'][i, iS] = np.nan if R is None else R
+                results['travel_time'][i, iS] = np.nan if T is None else T
+        return self._reshape_vectorized_results(results, shape)
+
+    def _broadcast_points(self, x1, x2):
+        """
+        broadcasts start and stop points against each other and flattens them to arrays of shape (n, 3)
+        """
+        X1, X2 = np.broadcast_arrays(np.array(x1, dtype=float), np.array(x2, dtype=float))
+        if X1.shape[-1] != 3:
+            self.__logger.error("start and stop points need to have 3 coordinates in the last axis")
+            raise ValueError("start and stop points need to have 3 coordinates in the last axis")
+        shape = X1.shape[:-1]
+        return X1.reshape(-1, 3), X2.reshape(-1, 3), shape
+
+    def _create_vectorized_results(self, n_pairs, additional_keys=()):
+        """
+        creates the output data structure of `find_solutions_vectorized`, all solutions are initialized with NaN
+        """
+        nS = self.get_number_of_raytracing_solutions()
+        results = {'n_solutions': np.zeros(n_pairs, dtype=int)}
+        for key in ['solution_type', 'travel_distance', 'travel_time'] + list(additional_keys):
+            results[key] = np.full((n_pairs, nS), np.nan)
+        for key in ['launch_vector', 'receive_vector']:
+            results[key] = np.full((n_pairs, nS, 3), np.nan)
+        return results
+
+    def _reshape_vectorized_results(self, results, shape):
+        """
+        brings the flat output of `find_solutions_vectorized` back to the broadcast shape of the input points
+        """
+        for key, value in results.items():
+            results[key] = value.reshape(shape + value.shape[1:])
+        return results
+
     def has_solution(self):
         """
         checks if ray tracing solution exists
@@ -0,0 +1,524 @@
+from __future__ import absolute_import, division, print_function
+import numpy as np
+import os
+import pickle
+import hashlib
+import time
+from NuRadioReco.utilities import units
+from NuRadioReco.utilities import io_utilities
+from NuRadioMC.SignalProp.analyticraytracing import ray_tracing
+import logging
+logging.basicConfig()
+
+"""
+ray tracing from precomputed lookup tables
+
+The results of the analytic ray tracer are tabulated once per receiver depth and ice model on a 2D grid of
+horizontal distance and emitter depth. At runtime, all quantities are obtained via bilinear interpolation.
+If a pair of points is outside of the table, or if the number or type of ray tracing solutions changes
+within the grid cell, the analytic ray tracer is used instead.
+"""
+
+default_table_config = {
+    'table_location': None,
+    'd_min': 1. * units.m,
+    'd_max': 4 * units.km,
+    'd_step': 10 * units.m,
+    'z_min': -3 * units.km,
+    'z_max': -1 * units.m,
+    'z_step': 10 * units.m,
+    'f_min': 10 * units.MHz,
+    'f_max': 2.5 * units.GHz,
+    'n_validation': 100
+}
+
+
+class tabulated_ray_tracing(ray_tracing):
+    """
+    ray tracer that interpolates precomputed tables of the analytic ray tracing solutions
+
+    The table settings are read from the `propagation: tabulated` section of the config. The tables are created
+    on the fly the first time a receiver depth is requested and stored on disk for later use.
+    """
+
+    def __init__(self, medium, attenuation_model="SP1", log_level=logging.WARNING,
+                 n_frequencies_integration=100, n_reflections=0, config=None,
+                 detector=None):
+        """
+        class initilization
+
+        Parameters
+        ----------
+        medium: medium class
+            class describing the index-of-refraction profile
+        attenuation_model: string
+            signal attenuation model
+        log_level: logging object
+            specify the log level of the ray tracing class
+
+            * logging.ERROR
+            * logging.WARNING
+            * logging.INFO
+            * logging.DEBUG
+
+            default is WARNING
+        n_frequencies_integration: int
+            the number of frequencies for which the attenuation is stored in the table. The attenuation
+            for all other frequencies is obtained via linear interpolation.
+        n_reflections: int (default 0)
+            bottom reflections are not supported by the tabulated ray tracer, only 0 is allowed
+        config: dict
+            a dictionary with the optional config settings. The table settings are read from
+            config['propagation']['tabulated'], missing settings are replaced by the default values
+
+                * table_location: folder in which the tables are stored (default: NuRadioMC/SignalProp/tables)
+                * d_min, d_max, d_step: range and step size of the horizontal distance
+                * z_min, z_max, z_step: range and step size of the emitter depth
+                * f_min, f_max: frequency range for which the attenuation is tabulated
+                * n_validation: number of random points at which the interpolation is compared to the analytic solution
+
+        detector: detector object
+        """
+        self.__logger = logging.getLogger('ray_tracing_tabulated')
+        self.__logger.setLevel(log_level)
+        super().__init__(medium=medium,
+                         attenuation_model=attenuation_model,
+                         log_level=log_level,
+                         n_frequencies_integration=n_frequencies_integration,
+                         n_reflections=n_reflections,
+                         config=config,
+                         detector=detector)
+        if(self._n_reflections):
+            self.__logger.error("the tabulated ray tracer does not support bottom reflections")
+            raise NotImplementedError("the tabulated ray tracer does not support bottom reflections")
+
+        # the config file specifies distances in meter and frequencies in GHz
+        config_units = {'d_min': units.m, 'd_max': units.m, 'd_step': units.m,
+                        'z_min': units.m, 'z_max': units.m, 'z_step': units.m,
+                        'f_min': units.GHz, 'f_max': units.GHz}
+        self._table_config = dict(default_table_config)
+        if('tabulated' in self._config['propagation'] and self._config['propagation']['tabulated'] is not None):
+            for key, value in self._config['propagation']['tabulated'].items():
+                if value is not None:
+                    if key in config_units:
+                        value = float(value) * config_units[key]
+                    self._table_config[key] = value
+        if(self._table_config['table_location'] is None):
+            self._table_config['table_location'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+        self._table_config['n_validation'] = int(self._table_config['n_validation'])
+
+        self._tables = {}
+        self._table_results = None
+        self._x1_input = None
+        self._x2_input = None
+        self._n_interpolated = 0
+        self._n_fallback = 0
+
+    def reset_solutions(self):
+        """
+        Resets the raytracing solutions back to None.
+        """
+        super().reset_solutions()
+        self._table_results = None
+        self._x1_input = None
+        self._x2_input = None
+
+    def set_start_and_end_point(self, x1, x2):
+        """
+        Set the start and end points of the raytracing
+
+        Parameters
+        ----------
+        x1: 3dim np.array
+            start point of the ray
+        x2: 3dim np.array
+            stop point of the ray (the receiver)
+        """
+        super().set_start_and_end_point(x1, x2)
+        self._x1_input = np.array(x1, dtype=float)
+        self._x2_input = np.array(x2, dtype=float)
+
+    def set_solution(self, raytracing_results):
+        """
+        Read an already calculated raytracing solution from the input array. All quantities are then
+        calculated with the analytic ray tracer.
+        """
+        super().set_solution(raytracing_results)
+        self._table_results = None
+
+    def get_table_grid(self):
+        """
+        returns the horizontal distances and emitter depths of the table grid
+        """
+        c = self._table_config
+        n_d = int(np.round((c['d_max'] - c['d_min']) / c['d_step'])) + 1
+        n_z = int(np.round((c['z_max'] - c['z_min']) / c['z_step'])) + 1
+        return np.linspace(c['d_min'], c['d_max'], n_d), np.linspace(c['z_min'], c['z_max'], n_z)
+
+    def get_table_frequencies(self):
+        """
+        returns the frequencies for which the attenuation is tabulated
+        """
+        return np.linspace(self._table_config['f_min'], self._table_config['f_max'], self._n_frequencies_integration)
+
+    def _get_table_filename(self, receiver_depth):
+        """
+        the file name of a table encodes the ice model, the attenuation model and a hash of all table settings
+        """
+        settings = [self._medium.__class__.__name__, self._medium.n_ice, self._medium.delta_n, self._medium.z_0,
+                    self._attenuation_model, self._n_frequencies_integration, bool(self._config['propagation']['focusing']),
+                    np.round(receiver_depth / units.cm)]
+        for key in sorted(self._table_config.keys()):
+            if key != 'table_location':
+                settings.append(self._table_config[key])
+        settings_hash = hashlib.md5(str(settings).encode()).hexdigest()[:10]
+        filename = "raytracing_table_{}_{}_z{:.2f}m_{}.pkl".format(self._medium.__class__.__name__, self._attenuation_model,
+                                                                 receiver_depth / units.m, settings_hash)
+        return os.path.join(self._table_config['table_location'], filename)
+
+    def get_table(self, receiver_depth):
+        """
+        returns the ray tracing table for a given receiver depth. The table is read from disk if it was created
+        before, otherwise it is created and saved to disk.
+
+        Parameters
+        ----------
+        receiver_depth: float
+            the z coordinate of the receiver
+        """
+        key = np.round(receiver_depth / units.cm)
+        if key not in self._tables:
+            filename = self._get_table_filename(key * units.cm)
+            if os.path.exists(filename):
+                self.__logger.info(f"reading ray tracing table {filename}")
+                self._tables[key] = io_utilities.read_pickle(filename)
+            else:
+                self._tables[key] = self.create_table(key * units.cm)
+                if not os.path.exists(self._table_config['table_location']):
+                    os.makedirs(self._table_config['table_location'])
+                # the table is written to a temporary file first and then renamed, so that processes that
+                # create the same table at the same time do not read incomplete files
+                tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+                with open(tmp_filename, 'wb') as fout:
+                    pickle.dump(self._tables[key], fout, protocol=4)
+                os.replace(tmp_filename, filename)
+                self.__logger.warning(f"saved ray tracing table to {filename}")
+            error = self._tables[key]['interpolation_error']
+            self.__logger.info("interpolation error of ray tracing table for receiver depth {:.1f}m (max deviation from analytic solution): "
+                               "travel time {:.3g}ns, path length {:.3g}m, launch angle {:.3g}deg, receive angle {:.3g}deg, "
+                               "attenuation {:.2g} (relative)".format(key * units.cm / units.m,
+                                                                     error['travel_time'] / units.ns, error['travel_distance'] / units.m,
+                                                                     error['launch_angle'] / units.deg, error['receive_angle'] / units.deg,
+                                                                     error['attenuation']))
+        return self._tables[key]
+
+    def get_interpolation_error(self, receiver_depth):
+        """
+        returns the maximum deviation between the interpolated and the analytic ray tracing solution
+        that was found at random positions when the table was created
+
+        Parameters
+        ----------
+        receiver_depth: float
+            the z coordinate of the receiver
+
+        Returns
+        -------
+        dict with the maximum absolute deviation of the travel time, path length, launch and receive angle
+        and the maximum relative deviation of the attenuation
+        """
+        return self.get_table(receiver_depth)['interpolation_error']
+
+    def _get_analytic_ray_tracer(self):
+        if not hasattr(self, "_analytic"):
+            self._analytic = ray_tracing(self._medium, self._attenuation_model, logging.WARNING,
+                                         self._n_frequencies_integration, 0, config=self._config)
+        return self._analytic
+
+    def _calculate_analytic_solutions(self, d, z, receiver_depth, frequencies):
+        """
+        calculates all quantities that are stored in the table for an emitter at horizontal
+        distance d and depth z and a receiver at depth receiver_depth
+        """
+        nS = self.get_number_of_raytracing_solutions()
+        r = self._get_analytic_ray_tracer()
+        x1 = np.array([d, 0, z])
+        x2 = np.array([0, 0, receiver_depth])
+        r.set_start_and_end_point(x1, x2)
+        r.find_solutions()
+        result = {'n_solutions': r.get_number_of_solutions(),
+                  'solution_type': np.full(nS, np.nan),
+                  'C0': np.full(nS, np.nan),
+                  'travel_time': np.full(nS, np.nan),
+                  'travel_distance': np.full(nS, np.nan),
+                  'launch': np.full((nS, 2), np.nan),
+                  'receive': np.full((nS, 2), np.nan),
+                  'focusing': np.full(nS, np.nan),
+                  'log_attenuation': np.full((nS, len(frequencies)), np.nan)}
+        n1 = self._medium.get_index_of_refraction(x1)
+        n2 = self._medium.get_index_of_refraction(x2)
+        for iS in range(r.get_number_of_solutions()):
+            result['solution_type'][iS] = r.get_solution_type(iS)
+            result['C0'][iS] = r.get_results()[iS]['C0']
+            R = r.get_path_length(iS)
+            T = r.get_travel_time(iS)
+            result['travel_distance'][iS] = np.nan if R is None else R
+            result['travel_time'][iS] = np.nan if T is None else T
+            # the horizontal direction from emitter to receiver is the negative x axis
+            launch_vector = r.get_launch_vector(iS)
+            receive_vector = r.get_receive_vector(iS)
+            result['launch'][iS] = [-launch_vector[0], launch_vector[2]]
+            result['receive'][iS] = [-receive_vector[0], receive_vector[2]]
+            if self._config['propagation']['focusing']:
+                # the focusing is stored without limit and without the correction for the index of refraction
+                result['focusing'][iS] = r.get_focusing(iS, limit=np.inf) / (n1 / n2) ** 0.5
+            attenuation = r.get_attenuation(iS, frequencies)
+            with np.errstate(divide='ignore'):
+                result['log_attenuation'][iS] = np.log(attenuation)
+        return result
+
+    def create_table(self, receiver_depth):
+        """
+        creates the ray tracing table for a given receiver depth
+
+        The table covers the grid returned by `get_table_grid`. To report the accuracy of the table,
+        the interpolated solution is compared to the analytic solution for `n_validation` random points.
+
+        Parameters
+        ----------
+        receiver_depth: float
+            the z coordinate of the receiver
+
+        Returns
+        -------
+        table: dict
+        """
+        t_start = time.time()
+        dd, zz = self.get_table_grid()
+        frequencies = self.get_table_frequencies()
+        nS = self.get_number_of_raytracing_solutions()
+        self.__logger.warning("creating ray tracing table for receiver depth {:.1f}m with {} x {} grid points, this might take a while".format(
+            receiver_depth / units.m, len(dd), len(zz)))
+        table = {'receiver_depth': receiver_depth,
+                 'distances': dd,
+                 'depths': zz,
+                 'frequencies': frequencies,
+                 'n_solutions': np.zeros((len(dd), len(zz)), dtype=int),
+                 'solution_type': np.full((len(dd), len(zz), nS), np.nan),
+                 'C0': np.full((len(dd), len(zz), nS), np.nan),
+                 'travel_time': np.full((len(dd), len(zz), nS), np.nan),
+                 'travel_distance': np.full((len(dd), len(zz), nS), np.nan),
+                 'launch': np.full((len(dd), len(zz), nS, 2), np.nan),
+                 'receive': np.full((len(dd), len(zz), nS, 2), np.nan),
+                 'focusing': np.full((len(dd), len(zz), nS), np.nan),
+                 'log_attenuation': np.full((len(dd), len(zz), nS, len(frequencies)), np.nan)}
+        for iD, d in enumerate(dd):
+            for iZ, z in enumerate(zz):
+                result = self._calculate_analytic_solutions(d, z, receiver_depth, frequencies)
+                for key, value in result.items():
+                    table[key][iD, iZ] = value
+        self.__logger.warning("created ray tracing table in {:.0f}s".format(time.time() - t_start))
+
+        # compare interpolation against analytic solution
+        error = {'travel_time': 0, 'travel_distance': 0, 'launch_angle': 0, 'receive_angle': 0, 'attenuation': 0, 'n_validated': 0}
+        rng = np.random.default_rng(42)
+        for i in range(self._table_config['n_validation']):
+            d = rng.uniform(dd[0], dd[-1])
+            z = rng.uniform(zz[0], zz[-1])
+            interpolated = self._interpolate_table(table, d, z)
+            if interpolated is None:
+                continue
+            result = self._calculate_analytic_solutions(d, z, receiver_depth, frequencies)
+            if result['n_solutions'] != interpolated['n_solutions']:
+                continue
+            error['n_validated'] += 1
+            n = result['n_solutions']
+            for key in ['travel_time', 'travel_distance']:
+                error[key] = np.nanmax(np.append(np.abs(interpolated[key][:n] - result[key][:n]), error[key]))
+            for key, key2 in [['launch', 'launch_angle'], ['receive', 'receive_angle']]:
+                angle_table = np.arctan2(interpolated[key][:n, 0], interpolated[key][:n, 1])
+                angle_analytic = np.arctan2(result[key][:n, 0], result[key][:n, 1])
+                error[key2] = np.nanmax(np.append(np.abs(angle_table - angle_analytic), error[key2]))
+            error['attenuation'] = np.nanmax(np.append(np.abs(np.expm1(interpolated['log_attenuation'][:n] - result['log_attenuation'][:n])),
+                                                       error['attenuation']))
+        table['interpolation_error'] = error
+        return table
+
+    def _interpolate_table(self, table, d, z):
+        """
+        bilinear interpolation of the table at horizontal distance d and emitter depth z
+
+        Returns None if the point is outside of the table or if the ray tracing solutions are not the
+        same at all corners of the grid cell.
+        """
+        dd = table['distances']
+        zz = table['depths']
+        fd = (d - dd[0]) / (dd[1] - dd[0])
+        fz = (z - zz[0]) / (zz[1] - zz[0])
+        if(fd < 0 or fd > len(dd) - 1 or fz < 0 or fz > len(zz) - 1):
+            return None
+        iD = min(int(fd), len(dd) - 2)
+        iZ = min(int(fz), len(zz) - 2)
+        fd -= iD
+        fz -= iZ
+        n_solutions = table['n_solutions'][iD:iD + 2, iZ:iZ + 2]
+        if np.any(n_solutions != n_solutions[0, 0]):
+            return None
+        n = n_solutions[0, 0]
+        types = table['solution_type'][iD:iD + 2, iZ:iZ + 2]
+        if np.any(types[..., :n] != types[0, 0, :n]):
+            return None
+        weights = np.array([[(1 - fd) * (1 - fz), (1 - fd) * fz],
+                            [fd * (1 - fz), fd * fz]])
+        result = {'n_solutions': n, 'solution_type': types[0, 0]}
+        for key in ['C0', 'travel_time', 'travel_distance', 'launch', 'receive', 'focusing', 'log_attenuation']:
+            values = table[key][iD:iD + 2, iZ:iZ + 2]
+            result[key] = np.tensordot(weights, values, axes=([0, 1], [0, 1]))
+        return result
+
+    def find_solutions(self):
+        """
+        find all solutions between x1 and x2
+        """
+        self._table_results = None
+        table = self.get_table(self._x2_input[2])
+        dX = self._x2_input - self._x1_input
+        interpolated = self._interpolate_table(table, np.hypot(dX[0], dX[1]), self._x1_input[2])
+        if interpolated is None or np.any(np.isnan(interpolated['travel_time'][:interpolated['n_solutions']])):
+            self._n_fallback += 1
+            self.__logger.debug("point is outside of ray tracing table or solutions change within grid cell, using analytic ray tracer")
+            super().find_solutions()
+            return
+        self._n_interpolated += 1
+        self._table_results = interpolated
+        self._results = []
+        for iS in range(interpolated['n_solutions']):
+            C_0 = interpolated['C0'][iS]
+            self._results.append({'type': int(interpolated['solution_type'][iS]),
+                                  'C0': C_0,
+                                  'C1': self._r2d.get_C_1(self._x1, C_0),
+                                  'reflection': 0,
+                                  'reflection_case': 1})
+
+    def get_interpolation_statistics(self):
+        """
+        returns how often the table was used and how often the analytic ray tracer was used as fallback
+        """
+        return {'interpolated': self._n_interpolated, 'analytic': self._n_fallback}
+
+    def __check_solution_index(self, iS):
+        n = self.get_number_of_solutions()
+        if(iS >= n):
+            self.__logger.error("solution number {:d} requested but only {:d} solutions exist".format(iS + 1, n))
+            raise IndexError
+
+    def __get_3d_vector(self, vector_2d):
+        """
+        converts a vector in the (horizontal distance, z) plane into 3D
+        """
+        dX = self._x2_input - self._x1_input
+        horizontal = np.array([dX[0], dX[1], 0])
+        norm = np.linalg.norm(horizontal)
+        if norm > 0:
+            horizontal /= norm
+        vector = vector_2d[0] * horizontal + np.array([0, 0, vector_2d[1]])
+        return vector / np.linalg.norm(vector)
+
+    def get_solution_type(self, iS):
+        if self._table_results is None:
+            return super().get_solution_type(iS)
+        self.__check_solution_index(iS)
+        return self._results[iS]['type']
+
+    def get_launch_vector(self, iS):
+        if self._table_results is None:
+            return super().get_launch_vector(iS)
+        self.__check_solution_index(iS)
+        return self.__get_3d_vector(self._table_results['launch'][iS])
+
+    def get_receive_vector(self, iS):
+        if self._table_results is None:
+            return super().get_receive_vector(iS)
+        self.__check_solution_index(iS)
+        return self.__get_3d_vector(self._table_results['receive'][iS])
+
+    def get_path_length(self, iS, analytic=True):
+        if self._table_results is None:
+            return super().get_path_length(iS, analytic)
+        self.__check_solution_index(iS)
+        return self._table_results['travel_distance'][iS]
+
+    def get_travel_time(self, iS, analytic=True):
+        if self._table_results is None:
+            return super().get_travel_time(iS, analytic)
+        self.__check_solution_index(iS)
+        return self._table_results['travel_time'][iS]
+
+    def get_attenuation(self, iS, frequency, max_detector_freq=None):
+        """
+        calculates the signal attenuation due to attenuation in the medium (ice) by interpolating
+        the tabulated attenuation. Frequencies outside of the tabulated range get the attenuation of the
+        closest tabulated frequency.
+
+        The logarithm of the attenuation is interpolated linearly in distance, depth and frequency. For the
+        default table settings, the interpolated attenuation agrees with the analytic ray tracer within a few
+        percent (about 2% for a grid spacing of 10m). The maximum deviation that was found when the table
+        was created is returned by `get_interpolation_error`.
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+        frequency: array of floats
+            the frequencies for which the attenuation is calculated
+        max_detector_freq: float or None
+            not used by the tabulated ray tracer, the frequency binning is fixed when the table is created
+
+        Returns
+        -------
+        attenuation: array of floats
+            the fraction of the signal that reaches the observer
+            (only ice attenuation, the 1/R signal falloff not considered here)
+        """
+        if self._table_results is None:
+            return super().get_attenuation(iS, frequency, max_detector_freq)
+        self.__check_solution_index(iS)
+        table = self.get_table(self._x2_input[2])
+        attenuation = np.ones_like(frequency)
+        mask = frequency > 0
+        attenuation[mask] = np.exp(np.interp(frequency[mask], table['frequencies'], self._table_results['log_attenuation'][iS]))
+        return attenuation
+
+    def get_focusing(self, iS, dz=-1. * units.cm, limit=2.):
+        """
+        calculate the focusing effect in the medium from the table
+
+        The focusing is only tabulated if focusing is enabled in the config when the table is created,
+        otherwise the analytic ray tracer is used. The interpolated focusing agrees with the analytic
+        calculation within about 0.1%.
+
+        Parameters
+        ----------
+        iS: int
+            choose for which solution to compute the launch vector, counting
+            starts at zero
+        dz: float
+            only used if the analytic ray tracer is used
+        limit: float
+            The maximum signal focusing.
+
+        Returns
+        -------
+        focusing: float
+            gain of the signal at the receiver due to the focusing effect
+        """
+        if self._table_results is None:
+            return super().get_focusing(iS, dz, limit)
+        self.__check_solution_index(iS)
+        if np.isnan(self._table_results['focusing'][iS]):
+            return super().get_focusing(iS, dz, limit)
+        focusing = min(self._table_results['focusing'][iS], limit)
+        n1 = self._medium.get_index_of_refraction(self._x1_input)  # emitter
+        n2 = self._medium.get_index_of_refraction(self._x2_input)  # receiver
+        return focusing * (n1 / n2) ** 0.5
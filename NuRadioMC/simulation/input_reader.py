@@ -0,0 +1,248 @@
+import numpy as np
+import collections.abc
+import h5py
+import os
+import logging
+
+logger = logging.getLogger("NuRadioMC.input_reader")
+
+
+class hdf5_column(object):
+    """
+    lazy access to one data set of a NuRadioMC input file
+
+    The data set is only read from disk when it is accessed. If the input file is read in chunks (see
+    `hdf5_input_reader`), only one chunk of the data set (aligned to the event groups) is held in memory.
+    Otherwise the complete data set is read at the first access and kept in memory. The column can be
+    indexed like a numpy array with the shower index as first index.
+    """
+
+    def __init__(self, reader, name, shape, dtype, chunked):
+        self._reader = reader
+        self._name = name
+        self.shape = tuple(shape)
+        self.ndim = len(self.shape)
+        self._is_string = h5py.check_string_dtype(dtype) is not None or dtype.kind == 'S'
+        self.dtype = np.dtype('U') if self._is_string else dtype
+        self._chunked = chunked
+        self._data = None
+        self._buffer = None
+        self._start = 0
+        self._stop = 0
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _read(self, start=None, stop=None):
+        value = self._reader._get_file()[self._name][start:stop]
+        if self._is_string:
+            value = np.array(value).astype('U')
+        return value
+
+    def _load_chunk(self, i_chunk):
+        self._start, self._stop = self._reader.get_chunk_range(i_chunk)
+        self._buffer = self._read(self._start, self._stop)
+
+    def _read_rows(self, indices):
+        indices = np.where(indices < 0, indices + len(self), indices)
+        if len(indices) == 0:
+            return np.empty((0,) + self.shape[1:], dtype=self.dtype if not self._is_string else 'U1')
+        order = np.argsort(indices, kind='stable')
+        sorted_indices = indices[order]
+        chunk_indices = np.searchsorted(self._reader.get_chunk_boundaries(), sorted_indices, side='right') - 1
+        splits = np.flatnonzero(np.diff(chunk_indices)) + 1
+        rows = []
+        for chunk_rows in np.split(sorted_indices, splits):
+            if not (self._start <= chunk_rows[0] < self._stop):
+                self._load_chunk(self._reader.get_chunk_index(chunk_rows[0]))
+            rows.append(self._buffer[chunk_rows - self._start])
+        rows = np.concatenate(rows)
+        result = np.empty_like(rows)
+        result[order] = rows
+        return result
+
+    def __getitem__(self, index):
+        if not self._chunked:
+            if self._data is None:
+                self._data = self._read()
+            return self._data[index]
+
+        rest = ()
+        if isinstance(index, tuple):
+            index, rest = index[0], index[1:]
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not (self._start <= index < self._stop):
+                self._load_chunk(self._reader.get_chunk_index(index))
+            return self._buffer[(index - self._start,) + rest]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if self._start <= start < stop <= self._stop and step > 0:
+                return self._buffer[(slice(start - self._start, stop - self._start, step),) + rest]
+            index = np.arange(start, stop, step)
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        return self._read_rows(index.astype(int))[(slice(None),) + rest]
+
+    def __array__(self, dtype=None):
+        if self._data is not None:
+            value = self._data
+        elif self._chunked:
+            value = self._read_rows(np.arange(len(self)))
+        else:
+            value = self[:]
+        if dtype is not None:
+            return value.astype(dtype)
+        return value
+
+
+class hdf5_input_reader(collections.abc.Mapping):
+    """
+    columnar, lazy reader of NuRadioMC input files
+
+    The reader behaves like the dictionary of data sets that was previously created by reading the full
+    input file into memory, i.e. `reader['xx'][shower_index]` returns the x position of a shower. The data sets
+    are only read when they are accessed, data sets that are not needed by the simulation are not read before
+    they are copied into the output file.
+
+    If `chunk_size` is set, the showers are split into chunks of about `chunk_size` showers whose boundaries
+    coincide with the boundaries of the event groups. Each data set only holds the chunk that is currently
+    accessed in memory, so that the memory used by the input data is bounded by the chunk size and not by the
+    number of events in the input file. The chunks are read in order if the event groups are simulated in the
+    order of the input file. This requires that all showers of an event group are stored consecutively (which
+    is the case for the files created by the NuRadioMC event generators), otherwise the input file is read as
+    a single chunk.
+
+    The attributes of the input file are available as the dictionary `attrs` and the data sets of the
+    station groups (e.g. of a pre-simulation) as the dictionary `stations`.
+    """
+
+    def __init__(self, filename, chunk_size=None):
+        """
+        opens the input file and reads its attributes
+
+        Parameters
+        ----------
+        filename: string
+            the input hdf5 file
+        chunk_size: int or None
+            the approximate number of showers that are held in memory per data set. If None, every data set is
+            read completely at its first access
+        """
+        self._filename = filename
+        self._pid = os.getpid()
+        self._file = h5py.File(filename, 'r')
+        self.attrs = {key: value for key, value in self._file.attrs.items()}
+
+        self._n_showers = 0
+        for key in ['event_group_ids', 'xx']:
+            if key in self._file:
+                self._n_showers = len(self._file[key])
+                break
+        self._boundaries = self._calculate_chunk_boundaries(chunk_size)
+        chunked = len(self._boundaries) > 2
+
+        self._columns = {}
+        self.stations = {}
+        for key, value in self._file.items():
+            if isinstance(value, h5py.Group):
+                self.stations[key] = {}
+                for key2, value2 in value.items():
+                    self.stations[key][key2] = hdf5_column(self, f"{key}/{key2}", value2.shape, value2.dtype,
+                                                           chunked and value2.shape[:1] == (self._n_showers,))
+            else:
+                self._columns[key] = hdf5_column(self, key, value.shape, value.dtype,
+                                                 chunked and value.shape[:1] == (self._n_showers,) and key != 'event_group_ids')
+        if chunked:
+            logger.info(f"reading {self._n_showers} showers of {filename} in {len(self._boundaries) - 1} chunks")
+
+    def _calculate_chunk_boundaries(self, chunk_size):
+        if chunk_size is None or self._n_showers <= chunk_size or 'event_group_ids' not in self._file:
+            return np.array([0, self._n_showers])
+        event_group_ids = np.array(self._file['event_group_ids'])
+        group_starts = np.flatnonzero(event_group_ids[1:] != event_group_ids[:-1]) + 1
+        if len(group_starts) + 1 != len(np.unique(event_group_ids)):
+            logger.warning(f"the showers of the event groups in {self._filename} are not stored consecutively, "
+                           "the input file is read as a single chunk")
+            return np.array([0, self._n_showers])
+        boundaries = [0]
+        while True:
+            i = np.searchsorted(group_starts, boundaries[-1] + chunk_size)
+            if i == len(group_starts):
+                break
+            boundaries.append(group_starts[i])
+        boundaries.append(self._n_showers)
+        return np.array(boundaries, dtype=int)
+
+    def _get_file(self):
+        # hdf5 file handles can not be shared with forked processes, hence every process opens its own handle
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._file = h5py.File(self._filename, 'r')
+        return self._file
+
+    def __getitem__(self, key):
+        return self._columns[key]
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def get_number_of_chunks(self):
+        """
+        returns the number of chunks the input file is read in
+        """
+        return len(self._boundaries) - 1
+
+    def get_chunk_boundaries(self):
+        """
+        returns the shower indices of the chunk boundaries, i.e. chunk i contains the showers
+        `boundaries[i]` to `boundaries[i + 1] - 1`
+        """
+        return self._boundaries
+
+    def get_chunk_index(self, shower_index):
+        """
+        returns the index of the chunk that contains a shower
+        """
+        return int(np.searchsorted(self._boundaries, shower_index, side='right') - 1)
+
+    def get_chunk_range(self, i_chunk):
+        """
+        returns the first and the last + 1 shower index of a chunk
+        """
+        return self._boundaries[i_chunk], self._boundaries[i_chunk + 1]
+
+    def get_chunk(self, i_chunk, keys=None):
+        """
+        returns the data sets of a chunk
+
+        Parameters
+        ----------
+        i_chunk: int
+            the chunk index
+        keys: list of strings or None
+            the data sets to return, if None all data sets are returned
+
+        Returns
+        -------
+        dictionary of numpy arrays (views of the chunk that is held in memory)
+        """
+        start, stop = self.get_chunk_range(i_chunk)
+        if keys is None:
+            keys = self._columns.keys()
+        return {key: self._columns[key][start:stop] for key in keys}
+
+    def close(self):
+        """
+        closes the input file
+        """
+        if os.getpid() == self._pid:
+            self._file.close()
@@ -0,0 +1,234 @@
+import numpy as np
+import collections
+import json
+import csv
+import logging
+from NuRadioReco.utilities import units
+
+logger = logging.getLogger("NuRadioMC.profiling")
+
+
+def get_energy_bin(energy):
+    """
+    returns the label of the energy decade of an energy
+
+    Parameters
+    ----------
+    energy: float or None
+        the energy (in default units)
+
+    Returns
+    -------
+    string, the lower edge of the energy decade in eV (e.g. '1e+18'), or 'all' if no energy is given
+    """
+    if(energy is None or not np.isfinite(energy) or energy <= 0):
+        return 'all'
+    return "{:.0e}".format(10 ** np.floor(np.log10(energy / units.eV)))
+
+
+class simulation_profile(object):
+    """
+    collects the counters of a simulation run in a structured form
+
+    Two kinds of counters are kept, the number of calls of the expensive stages of the simulation
+    (e.g. ray tracing, Askaryan signal generation, detector simulation) and the number of skipped
+    simulations per reason (e.g. weight cut, distance cut, delta_C cut, amplitude cut). All counters
+    are broken down per station and per energy decade, i.e. they are stored as
+    `counters[name][station_id][energy_bin]`.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.skipped = {}
+
+    def reset(self):
+        """
+        sets all counters to zero
+        """
+        self.calls = {}
+        self.skipped = {}
+
+    def _add(self, counters, name, station_id, energy, n):
+        if(n == 0):
+            return
+        station_key = 'all' if station_id is None else str(station_id)
+        energy_bin = get_energy_bin(energy)
+        tmp = counters.setdefault(name, {}).setdefault(station_key, {})
+        tmp[energy_bin] = tmp.get(energy_bin, 0) + int(n)
+
+    def count_call(self, name, station_id=None, energy=None, n=1):
+        """
+        increases the call counter of a simulation stage
+
+        Parameters
+        ----------
+        name: string
+            the name of the stage, e.g. 'ray_tracing'
+        station_id: int or None
+            the station id
+        energy: float or None
+            the energy that is used for the binning
+        n: int
+            the number of calls
+        """
+        self._add(self.calls, name, station_id, energy, n)
+
+    def count_skipped(self, reason, station_id=None, energy=None, n=1):
+        """
+        increases the counter of skipped simulations
+
+        Parameters
+        ----------
+        reason: string
+            the reason why the simulation was skipped, e.g. 'distance_cut'
+        station_id: int or None
+            the station id
+        energy: float or None
+            the energy that is used for the binning
+        n: int
+            the number of skipped simulations
+        """
+        self._add(self.skipped, reason, station_id, energy, n)
+
+    def merge(self, other):
+        """
+        adds the counters of another profile (e.g. of a worker process) to this profile
+
+        Parameters
+        ----------
+        other: simulation_profile or dict
+            the other profile or its dictionary representation (see `get_counters`)
+        """
+        if(isinstance(other, simulation_profile)):
+            other = other.get_counters()
+        for counters, other_counters in [(self.calls, other.get('calls', {})), (self.skipped, other.get('skipped', {}))]:
+            for name in other_counters:
+                for station_key in other_counters[name]:
+                    tmp = counters.setdefault(name, {}).setdefault(station_key, {})
+                    for energy_bin, value in other_counters[name][station_key].items():
+                        tmp[energy_bin] = tmp.get(energy_bin, 0) + int(value)
+
+    def get_counters(self):
+        """
+        returns the counters as a dictionary with the keys 'calls' and 'skipped'
+        """
+        return {'calls': self.calls, 'skipped': self.skipped}
+
+    def get_total(self, name, kind='skipped'):
+        """
+        returns the sum of a counter over all stations and energy bins
+
+        Parameters
+        ----------
+        name: string
+            the name of the counter
+        kind: string
+            'calls' or 'skipped'
+
+        Returns
+        -------
+        int
+        """
+        counters = self.skipped if kind == 'skipped' else self.calls
+        if(name not in counters):
+            return 0
+        return int(np.sum([np.sum(list(tmp.values())) for tmp in counters[name].values()]))
+
+    def get_profile(self, timing=None, module_timing=None, extra=None):
+        """
+        assembles the complete profiling data
+
+        Parameters
+        ----------
+        timing: dict or None
+            the wall time (in seconds) per simulation stage
+        module_timing: dict or None
+            the accumulated run time (in seconds) of the detector simulation modules
+        extra: dict or None
+            additional entries that are added to the profile (e.g. cache statistics)
+
+        Returns
+        -------
+        OrderedDict
+        """
+        profile = collections.OrderedDict()
+        profile['timing'] = {key: float(value) for key, value in (timing or {}).items()}
+        profile['module_timing'] = {key: float(value) for key, value in (module_timing or {}).items()}
+        profile['calls'] = self.calls
+        profile['skipped'] = self.skipped
+        if(extra is not None):
+            profile.update(extra)
+        return profile
+
+    def to_json(self, **kwargs):
+        """
+        returns the profiling data (see `get_profile`) as a json string
+        """
+        return json.dumps(self.get_profile(**kwargs))
+
+    def write(self, filename, file_format='json', **kwargs):
+        """
+        writes the profiling data to a sidecar file
+
+        Parameters
+        ----------
+        filename: string
+            the output filename
+        file_format: string
+            'json' or 'csv'. The csv file has one row per value with the columns
+            category, name, station_id, energy_bin, value
+        kwargs:
+            passed on to `get_profile`
+        """
+        profile = self.get_profile(**kwargs)
+        if(file_format == 'json'):
+            with open(filename, 'w') as fout:
+                json.dump(profile, fout, indent=2)
+        elif(file_format == 'csv'):
+            with open(filename, 'w', newline='') as fout:
+                writer = csv.writer(fout)
+                writer.writerow(['category', 'name', 'station_id', 'energy_bin', 'value'])
+                for category, values in profile.items():
+                    if(category in ['calls', 'skipped']):
+                        for name in values:
+                            for station_key in values[name]:
+                                for energy_bin, value in values[name][station_key].items():
+                                    writer.writerow([category, name, station_key, energy_bin, value])
+                    elif(isinstance(values, dict)):
+                        for name, value in values.items():
+                            writer.writerow([category, name, 'all', 'all', value])
+                    else:
+                        writer.writerow([category, '', 'all', 'all', values])
+        else:
+            msg = f"file format {file_format} of the profiling data is not supported, use 'json' or 'csv'"
+            logger.error(msg)
+            raise ValueError(msg)
+        logger.info(f"wrote profiling data to {filename}")
+
+
+def merge_profiles(profile1, profile2):
+    """
+    combines the profiling data of two simulation runs (e.g. when merging hdf5 output files)
+
+    Timings, call counts, skipped simulations and all other numeric entries are added up.
+
+    Parameters
+    ----------
+    profile1: string
+        the profiling data of the first run as json string
+    profile2: string
+        the profiling data of the second run as json string
+
+    Returns
+    -------
+    string, the combined profiling data as json string
+    """
+    def add(a, b):
+        if(isinstance(a, dict) and isinstance(b, dict)):
+            result = dict(a)
+            for key, value in b.items():
+                result[key] = add(result[key], value) if key in result else value
+            return result
+        return a + b
+
+    return json.dumps(add(json.loads(profile1), json.loads(profile2)))
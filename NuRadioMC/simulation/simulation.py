@@ -9,11 +9,14 @@ from NuRadioMC.utilities import medium
 from NuRadioReco.utilities import fft
 from NuRadioMC.utilities.earth_attenuation import get_weight
 from NuRadioMC.SignalProp import propagation
+from NuRadioMC.simulation import profiling
+from NuRadioMC.simulation import input_reader
 import h5py
 import time
 import six
 import copy
 from scipy import constants
+from scipy.spatial import cKDTree
 # import detector simulation modules
 import NuRadioReco.modules.io.eventWriter
 import NuRadioReco.modules.channelSignalReconstructor
@@ -44,6 +47,8 @@ from six import iteritems
 import yaml
 import os
 import collections
+import pickle
+import multiprocessing
 from NuRadioMC.utilities.Veff import remove_duplicate_triggers
 
 STATUS = 31
@@ -93,6 +98,43 @@ def merge_config(user, default):
     return user
 
 
+# the simulation object that is inherited by the forked worker processes, see `simulation.run`
+_worker_simulation = None
+
+
+def _simulate_event_groups_in_worker(event_groups):
+    return _worker_simulation._simulate_event_groups_in_worker(event_groups)
+
+
+def append_to_hdf5_dataset(group, key, value, n_rows_before=0):
+    """
+    appends data to a resizable data set of a hdf5 file or group. The data set is created if it does not exist.
+
+    Parameters
+    ----------
+    group: h5py.File or h5py.Group
+        the hdf5 group that contains the data set
+    key: string
+        the name of the data set
+    value: array
+        the data that is appended along the first axis. If the other dimensions are larger than the ones of the
+        existing data set, the data set is resized.
+    n_rows_before: int
+        if the data set does not exist yet, it is filled with `n_rows_before` rows of zeros before the data is appended.
+        This is needed for quantities that are only created during the simulation.
+    """
+    value = np.asarray(value)
+    if(key not in group):
+        group.create_dataset(key, shape=(n_rows_before,) + value.shape[1:], dtype=value.dtype,
+                             maxshape=(None,) * value.ndim, chunks=True)
+    dset = group[key]
+    n_rows = dset.shape[0]
+    shape = (n_rows + value.shape[0],) + tuple(np.maximum(dset.shape[1:], value.shape[1:]))
+    if(shape != dset.shape):
+        dset.resize(shape)
+    dset[(slice(n_rows, None),) + tuple(slice(0, x) for x in value.shape[1:])] = value
+
+
 class simulation():
 
     def __init__(self, inputfilename,
@@ -110,7 +152,8 @@ class simulation():
                  write_detector=True,
                  event_list=None,
                  log_level_propagation=logging.WARNING,
-                 ice_model=None):
+                 ice_model=None,
+                 resume=False):
         """
         initialize the NuRadioMC end-to-end simulation
 
@@ -162,6 +205,9 @@ class simulation():
             the log level of the propagation module
         ice_model: medium object (default None)
             allows to specify a custom ice model. This model is used if the config file specifies the ice model as "custom". 
+        resume: bool (default False)
+            if True, the simulation continues from the last checkpoint of a previous (interrupted) run with the same
+            output file name. Checkpoints are written if the config option `output/checkpoint` is enabled.
         """
         logger.setLevel(log_level)
         self._log_level = log_level
@@ -184,7 +230,13 @@ class simulation():
             self._cfg['seed'] = np.random.randint(0, 2 ** 32 - 1)
 
         self._outputfilename = outputfilename
-        if(os.path.exists(self._outputfilename)):
+        self._checkpoint_filename = self._outputfilename + ".checkpoint"
+        self._resume = resume
+        if(self._resume and not os.path.exists(self._checkpoint_filename)):
+            msg = f"no checkpoint {self._checkpoint_filename} found to resume the simulation from"
+            logger.error(msg)
+            raise FileNotFoundError(msg)
+        if(os.path.exists(self._outputfilename) and not self._resume):
             msg = f"hdf5 output file {self._outputfilename} already exists"
             if file_overwrite == False:
                 logger.error(msg)
@@ -245,11 +297,11 @@ class simulation():
         if isinstance(inputfilename, str):
             logger.status(f"reading input from {inputfilename}")
             self._inputfilename = inputfilename
-            self._read_input_hdf5()  # we read in the full input file into memory at the beginning to limit io to the beginning and end of the run
+            self._read_input_hdf5()  # the data sets are read lazily, optionally in chunks of event groups
         else:
             logger.status("getting input on-the-fly")
             self._inputfilename = "on-the-fly"
-            self._fin = inputfilename[0]
+            self._fin = {key: np.asarray(value) for key, value in iteritems(inputfilename[0])}
             self._fin_attrs = inputfilename[1]
             self._fin_stations = {}
         # store all relevant attributes of the input file in a dictionary
@@ -267,6 +319,7 @@ class simulation():
         # perfom a dummy detector simulation to determine how the signals are filtered
         self._bandwidth_per_channel = {}
         self._amplification_per_channel = {}
+        self._filter_amplitude_per_channel = {}
         self.__noise_adder_normalization = {}
 
         # first create dummy event and station with channels
@@ -304,6 +357,7 @@ class simulation():
             self._detector_simulation_filter_amp(self._evt, self._station, self._det)
             self._bandwidth_per_channel[self._station_id] = {}
             self._amplification_per_channel[self._station_id] = {}
+            self._filter_amplitude_per_channel[self._station_id] = {}
             for channel_id in range(self._det.get_number_of_channels(self._station_id)):
                 ff = np.linspace(0, 0.5 / self._dt, 10000)
                 filt = np.ones_like(ff, dtype=np.complex)
@@ -312,6 +366,8 @@ class simulation():
                         filt *= instance.get_filter(ff, self._station_id, channel_id, self._det, **kwargs)
 
                 self._amplification_per_channel[self._station_id][channel_id] = np.abs(filt).max()
+                self._filter_amplitude_per_channel[self._station_id][channel_id] = np.abs(filt)
+                self._filter_frequencies = ff
                 bandwidth = np.trapz(np.abs(filt) ** 2, ff)
                 self._bandwidth_per_channel[self._station_id][channel_id] = bandwidth
                 logger.status(f"bandwidth of station {self._station_id} channel {channel_id} is {bandwidth/units.MHz:.1f}MHz")
@@ -361,6 +417,13 @@ class simulation():
         self._Vrms_efield = next(iter(next(iter(self._Vrms_efield_per_channel.values())).values()))
         tmp_cut = float(self._cfg['speedup']['min_efield_amplitude'])
         logger.status(f"final Vrms {self._Vrms/units.V:.2g}V corresponds to an efield of {self._Vrms_efield/units.V/units.m/units.micro:.2g} muV/m for a VEL = 1m (amplification factor of system is {amplification:.1f}).\n -> all signals with less then {tmp_cut:.1f} x Vrms_efield = {tmp_cut * self._Vrms_efield/units.m/units.V/units.micro:.2g}muV/m will be skipped")
+        self._trigger_feasibility_threshold = self._cfg['speedup'].get('trigger_feasibility_threshold', None)
+        if(self._trigger_feasibility_threshold is not None):
+            self._trigger_feasibility_threshold = float(self._trigger_feasibility_threshold)
+            self._trigger_feasibility_margin = float(self._cfg['speedup'].get('trigger_feasibility_margin', 0))
+            logger.status(f"sub events whose noiseless signal after filters and amplifiers is below "
+                          f"({self._trigger_feasibility_threshold:.1f} - {self._trigger_feasibility_margin:.1f}) x Vrms in all channels "
+                          "will be skipped before the noise generation")
 
         self._distance_cut_polynomial = None
         if self._cfg['speedup']['distance_cut']:
@@ -374,9 +437,20 @@ class simulation():
 
             self._get_distance_cut = get_distance_cut
 
-    def run(self):
+    def run(self, n_workers=None):
         """
         run the NuRadioMC simulation
+
+        Parameters
+        ----------
+        n_workers: int or None
+            number of worker processes the event groups are distributed to (default None). If None, all event groups
+            are simulated in the current process. Otherwise, the noise generator and the random number generator of the
+            Askaryan model (ARZ and Alvarez2009) are reseeded for every event group
+            with a seed that is derived from the global seed and the event group id, so that the result does not
+            depend on the number of workers. The worker processes are forked from the current process, i.e.,
+            they share the detector description, ray tracer and antenna patterns with the main process.
+            The parallel mode is therefore only available on platforms that support 'fork'.
         """
         if(len(self._fin['xx']) == 0):
             logger.status(f"writing empty hdf5 output file")
@@ -384,23 +458,47 @@ class simulation():
             logger.status(f"terminating simulation")
             return 0
         logger.status(f"Starting NuRadioMC simulation")
-        t_start = time.time()
-        t_last_update = t_start
+        self._t_start = time.time()
+        self._t_last_update = self._t_start
+        self._report_progress = True
 
         self._channelSignalReconstructor = NuRadioReco.modules.channelSignalReconstructor.channelSignalReconstructor()
         self._eventWriter = NuRadioReco.modules.io.eventWriter.eventWriter()
-        efieldToVoltageConverterPerEfield = NuRadioReco.modules.efieldToVoltageConverterPerEfield.efieldToVoltageConverterPerEfield()
-        efieldToVoltageConverter = NuRadioReco.modules.efieldToVoltageConverter.efieldToVoltageConverter()
-        efieldToVoltageConverter.begin(time_resolution=self._cfg['speedup']['time_res_efieldconverter'])
-        channelAddCableDelay = NuRadioReco.modules.channelAddCableDelay.channelAddCableDelay()
-        channelGenericNoiseAdder = NuRadioReco.modules.channelGenericNoiseAdder.channelGenericNoiseAdder()
-        channelGenericNoiseAdder.begin(seed=self._cfg['seed'])
-        channelResampler = NuRadioReco.modules.channelResampler.channelResampler()
-        electricFieldResampler = NuRadioReco.modules.electricFieldResampler.electricFieldResampler()
+        self._efieldToVoltageConverterPerEfield = NuRadioReco.modules.efieldToVoltageConverterPerEfield.efieldToVoltageConverterPerEfield()
+        self._efieldToVoltageConverter = NuRadioReco.modules.efieldToVoltageConverter.efieldToVoltageConverter()
+        self._efieldToVoltageConverter.begin(time_resolution=self._cfg['speedup']['time_res_efieldconverter'])
+        self._channelAddCableDelay = NuRadioReco.modules.channelAddCableDelay.channelAddCableDelay()
+        self._channelGenericNoiseAdder = NuRadioReco.modules.channelGenericNoiseAdder.channelGenericNoiseAdder()
+        self._channelGenericNoiseAdder.begin(seed=self._cfg['seed'])
+        if(self._cfg['speedup'].get('noise_bank_samples', None) is not None):
+            # the noise is cut out of a pre-generated noise bank at random offsets instead of generating it for every event
+            self._channelGenericNoiseAdder.create_noise_bank(int(self._cfg['speedup']['noise_bank_samples']), 1. / self._dt,
+                                                             0 * units.MHz, 0.5 / self._dt, type='rayleigh', seed=self._cfg['seed'])
+        self._channelResampler = NuRadioReco.modules.channelResampler.channelResampler()
+        self._electricFieldResampler = NuRadioReco.modules.electricFieldResampler.electricFieldResampler()
+        self._askaryan_cache = askaryan.frequency_spectrum_cache(self._cfg['speedup'].get('askaryan_cache_tolerance', None),
+                                                                 self._cfg['speedup'].get('askaryan_cache_distance_tolerance', 0.1))
         if(self._outputfilenameNuRadioReco is not None):
             self._eventWriter.begin(self._outputfilenameNuRadioReco, log_level=self._log_level)
-        unique_event_group_ids = np.unique(self._fin['event_group_ids'])
+        # if not None, serialized events are collected in this list instead of being written to the nur file
+        self._nur_event_buffer = None
+        self._reseed_per_event_group = n_workers is not None
+        # if not None, the hdf5 output is appended to the output file every `hdf5_flush_interval` event groups
+        self._hdf5_flush_interval = self._cfg['output'].get('hdf5_flush_interval', None)
+        self._unflushed_event_group_ids = []
+        self._output_file_initialized = False
+        self._n_event_groups_done = 0
+        self._write_checkpoints = bool(self._cfg['output'].get('checkpoint', False))
+        if(self._write_checkpoints and self._hdf5_flush_interval is None):
+            msg = "checkpoints require the hdf5 output to be flushed regularly, please set `output/hdf5_flush_interval`"
+            logger.error(msg)
+            raise AttributeError(msg)
+        unique_event_group_ids, self._event_group_index = np.unique(self._fin['event_group_ids'], return_inverse=True)
+        self._n_event_groups = len(unique_event_group_ids)
         self._n_showers = len(self._fin['event_group_ids'])
+        # the indices of the showers of each event group (in the order of the unique event group ids)
+        sorted_shower_indices = np.argsort(self._event_group_index, kind='stable')
+        self._event_group_shower_indices = np.split(sorted_shower_indices, np.cumsum(np.bincount(self._event_group_index))[:-1])
         self._shower_ids = np.array(self._fin['shower_ids'])
         self._shower_index_array = {}  # this array allows to convert the shower id to an index that starts from 0 to be used to access the arrays in the hdf5 file.
 
@@ -418,662 +516,1025 @@ class simulation():
         self._create_meta_output_datastructures()
 
         # check if the same detector was simulated before (then we can save the ray tracing part)
-        pre_simulated = self._check_if_was_pre_simulated()
+        self._check_if_was_pre_simulated()
 
         # Check if vertex_times exists:
         self._check_vertex_times()
 
-        input_time = 0.0
-        askaryan_time = 0.0
-        rayTracingTime = 0.0
-        detSimTime = 0.0
-        outputTime = 0.0
-        weightTime = 0.0
-        distance_cut_time = 0.0
+        self._timing = collections.OrderedDict()
+        for key in ['input', 'askaryan', 'ray_tracing', 'detector_simulation', 'output', 'weights', 'distance_cut']:
+            self._timing[key] = 0.0
 
-        n_shower_station = len(self._station_ids) * self._n_showers
-        iCounter = 0
+        self._calculate_weights()
+
+        self._n_shower_station = len(self._station_ids) * self._n_showers
+        self._iCounter = 0
+        self._profile = profiling.simulation_profile()
 
         # calculate bary centers of station
         self._station_barycenter = np.zeros((len(self._station_ids), 3))
         for iSt, station_id in enumerate(self._station_ids):
-            pos = []
-            for channel_id in range(self._det.get_number_of_channels(station_id)):
-                pos.append(self._det.get_relative_position(station_id, channel_id))
-            self._station_barycenter[iSt] = np.mean(np.array(pos), axis=0) + self._det.get_absolute_position(station_id)
+            self._station_barycenter[iSt] = self._det.get_station_snapshot(station_id).barycenter
+        self._calculate_candidate_stations()
+
+        if(self._resume):
+            self._resume_from_checkpoint()
 
         # loop over event groups
-        for i_event_group_id, event_group_id in enumerate(unique_event_group_ids):
-            logger.debug(f"simulating event group id {event_group_id}")
-            if(self._event_group_list is not None and event_group_id not in self._event_group_list):
-                logger.debug(f"skipping event group {event_group_id} because it is not in the event group list provided to the __init__ function")
-                continue
-            event_indices = np.atleast_1d(np.squeeze(np.argwhere(self._fin['event_group_ids'] == event_group_id)))
+        if(n_workers is None or n_workers <= 1):
+            for i_event_group_id, event_group_id in enumerate(unique_event_group_ids):
+                if(i_event_group_id < self._n_event_groups_done):  # already simulated before the checkpoint
+                    continue
+                self._simulate_event_group(i_event_group_id, event_group_id)
+                self._event_groups_finished([event_group_id])
+        else:
+            self._run_parallel(unique_event_group_ids, n_workers)
+
+        # end event group loop
+
+        # Create trigger structures if there are no triggering events.
+        # This is done to ensure that files with no triggering n_events
+        # merge properly.
+#         self._create_empty_multiple_triggers()
+
+        # save simulation run in hdf5 format (only triggered events)
+        t5 = time.time()
+        self._write_output_file()
+        if(self._outputfilenameNuRadioReco is not None):
+            self._eventWriter.end()
+            logger.debug("closing nur file")
+        if(self._write_checkpoints and os.path.exists(self._checkpoint_filename)):
+            os.remove(self._checkpoint_filename)
+
+        try:
+            self.calculate_Veff()
+        except:
+            logger.error("error in calculating effective volume")
+
+        t_total = time.time() - self._t_start
+        self._timing['output'] = time.time() - t5
+
+        profile_format = self._cfg['output'].get('profile', None)
+        if(profile_format is not None):
+            self._profile.write(f"{self._outputfilename}.profile.{profile_format}", file_format=profile_format,
+                                **self._get_profile_kwargs(t_total))
+
+        output_NuRadioRecoTime = "Timing of NuRadioReco modules \n"
+        module_timing = self._get_module_timing()
+        ttot = np.sum(np.array(list(module_timing.values())))
+        for name, t in module_timing.items():
+            trel = 100. * t / ttot
+            output_NuRadioRecoTime += f"{name}: {pretty_time_delta(t)} {trel:.1f}%\n"
+        logger.status(output_NuRadioRecoTime)
+
+        logger.status("{:d} events processed in {} = {:.2f}ms/event ({:.1f}% input, {:.1f}% ray tracing, {:.1f}% askaryan, {:.1f}% detector simulation, {:.1f}% output, {:.1f}% weights calculation)".format(self._n_showers,
+                                                                                         pretty_time_delta(t_total), 1.e3 * t_total / self._n_showers,
+                                                                                         100 * self._timing['input'] / t_total,
+                                                                                         100 * (self._timing['ray_tracing'] - self._timing['askaryan']) / t_total,
+                                                                                         100 * self._timing['askaryan'] / t_total,
+                                                                                         100 * self._timing['detector_simulation'] / t_total,
+                                                                                         100 * self._timing['output'] / t_total,
+                                                                                         100 * self._timing['weights'] / t_total))
+        if(self._cfg['speedup'].get('askaryan_cache_tolerance', None) is not None and self._askaryan_cache.n_calls > 0):
+            logger.status("{:d} of {:d} Askaryan spectra ({:.1f}%) were obtained from the shower cache".format(
+                self._askaryan_cache.n_hits, self._askaryan_cache.n_calls,
+                100. * self._askaryan_cache.n_hits / self._askaryan_cache.n_calls))
+        if(self._trigger_feasibility_threshold is not None):
+            logger.status(f"{self._profile.get_total('trigger_feasibility_cut'):d} sub events were skipped before the noise generation because they could not trigger")
+        triggered = remove_duplicate_triggers(self._mout['triggered'], self._fin['event_group_ids'])
+        n_triggered = np.sum(triggered)
+        return n_triggered
+
+    def _calculate_weights(self):
+        """
+        calculates the weights of all showers of the input file before the event loop
+
+        The weight is independent of the station and only depends on the "mother" particle, i.e. the incident
+        neutrino which determines the propability of arriving at our simulation volume. All subsequent showers
+        have the same weight. So we calculate the weights of the primary particles of all event groups in a single
+        (vectorized) call and assign them to all showers of the event group.
+        """
+        t1 = time.time()
+        self._weights = np.ones(self._n_showers)  # for a pulser simulation, every event has the same weight
+        # determine if a particle (neutrinos, or a secondary interaction of a neutrino, or surfaec muons) is simulated
+        particle_mode = "simulation_mode" not in self._fin_attrs or self._fin_attrs['simulation_mode'] != "emitter"
+        if particle_mode:
+            if(self._cfg['weights']['weight_mode'] == "existing"):
+                if("weights" in self._fin):
+                    self._weights = np.array(self._fin["weights"], dtype=float)
+                else:
+                    # all showers keep a weight of one
+                    logger.error("config file specifies to use weights from the input hdf5 file but the input file does not contain this information.")
+            elif(self._cfg['weights']['weight_mode'] is not None):
+                # the first shower of each event group is the primary particle
+                primary_indices = np.array([shower_indices[0] for shower_indices in self._event_group_shower_indices], dtype=int)
+                vertex_positions = np.array([self._fin['xx'][primary_indices],
+                                             self._fin['yy'][primary_indices],
+                                             self._fin['zz'][primary_indices]]).T
+                primary_weights = get_weight(self._fin['zeniths'][primary_indices],
+                                             self._fin['energies'][primary_indices],
+                                             self._fin['flavors'][primary_indices],
+                                             mode=self._cfg['weights']['weight_mode'],
+                                             cross_section_type=self._cfg['weights']['cross_section_type'],
+                                             vertex_position=vertex_positions,
+                                             phi_nu=self._fin['azimuths'][primary_indices],
+                                             tabulated=self._cfg['weights'].get('tabulated', False))
+                self._weights = np.array(primary_weights, dtype=float)[self._event_group_index]
+        n_skipped = np.sum(self._weights < self._cfg['speedup']['minimum_weight_cut'])
+        logger.info(f"{n_skipped} of {self._n_showers} showers have a weight below {self._cfg['speedup']['minimum_weight_cut']} and will be skipped")
+        self._timing['weights'] += time.time() - t1
+
+    def _calculate_candidate_stations(self):
+        """
+        applies the distance cut to all event groups before the event loop
+
+        A KD-tree of the station bary centers is queried with the energy dependent cut radius of each event group
+        to obtain the list of stations that need to be simulated for each event group. Also the energy sums of
+        closeby showers that determine the distance cut of the individual showers are calculated here.
+        """
+        self._candidate_station_indices = None
+        self._shower_distance_cuts = None
+        if not self._cfg['speedup']['distance_cut']:
+            return
+        t1 = time.time()
+        self._shower_distance_cuts = np.zeros(self._n_showers)
+        self._candidate_station_indices = [None] * len(self._event_group_shower_indices)
+        station_tree = cKDTree(self._station_barycenter)
+        for start, stop, event_group_indices in self._iter_input_chunks():
+            # the shower indices of the event groups are converted to indices relative to the start of the chunk
+            shower_energies = np.asarray(self._fin['shower_energies'][start:stop])
+            vertex_positions = np.array([self._fin['xx'][start:stop], self._fin['yy'][start:stop], self._fin['zz'][start:stop]], dtype=float).T
+            query_radius = np.zeros(stop - start)
+            for i_event_group in event_group_indices:
+                shower_indices = self._event_group_shower_indices[i_event_group]
+                chunk_indices = shower_indices - start
+                # the shower energies of closeby showers are added as they can constructively interfere
+                vertex_distances = np.linalg.norm(vertex_positions[chunk_indices] - vertex_positions[chunk_indices[0]], axis=1)
+                energies = shower_energies[chunk_indices]
+                for iSh, shower_index in enumerate(shower_indices):
+                    mask_shower_sum = np.abs(vertex_distances - vertex_distances[iSh]) < self._cfg['speedup']['distance_cut_sum_length']
+                    self._shower_distance_cuts[shower_index] = self._get_distance_cut(np.sum(energies[mask_shower_sum]))
+                # 100m safety margin is added to account for extent of station around bary center.
+                query_radius[chunk_indices] = self._get_distance_cut(np.sum(energies)) + 100 * units.m
+
+            # a station needs to be simulated if any shower of the event group is within the cut radius
+            stations_in_range = station_tree.query_ball_point(vertex_positions, r=query_radius)
+            for i_event_group in event_group_indices:
+                chunk_indices = self._event_group_shower_indices[i_event_group] - start
+                candidates = np.unique(np.concatenate([np.array(stations_in_range[i], dtype=int) for i in chunk_indices]))
+                self._candidate_station_indices[i_event_group] = candidates
+        n_candidates = np.sum([len(candidates) for candidates in self._candidate_station_indices])
+        logger.info(f"distance cut: {n_candidates} of {len(self._station_ids) * len(self._event_group_shower_indices)} event group/station combinations need to be simulated")
+        self._timing['distance_cut'] += time.time() - t1
+
+    def _iter_input_chunks(self):
+        """
+        yields the first and the last + 1 shower index and the indices of the event groups of each chunk of the input
+        file (see `input_reader.hdf5_input_reader`). An input that is not read in chunks forms a single chunk.
+        """
+        if(isinstance(self._fin, input_reader.hdf5_input_reader)):
+            boundaries = self._fin.get_chunk_boundaries()
+        else:
+            boundaries = np.array([0, self._n_showers])
+        # the showers of an event group are stored consecutively if the input is read in chunks
+        first_shower_indices = np.array([shower_indices[0] for shower_indices in self._event_group_shower_indices], dtype=int)
+        event_group_chunks = np.searchsorted(boundaries, first_shower_indices, side='right') - 1
+        for i_chunk in range(len(boundaries) - 1):
+            yield boundaries[i_chunk], boundaries[i_chunk + 1], np.flatnonzero(event_group_chunks == i_chunk)
+
+    def _simulate_event_group(self, i_event_group_id, event_group_id):
+        """
+        simulates all showers of one event group for all stations
+
+        Parameters
+        ----------
+        i_event_group_id: int
+            the index of the event group in the list of unique event group ids
+        event_group_id: int
+            the event group id
+        """
+        logger.debug(f"simulating event group id {event_group_id}")
+        if(self._event_group_list is not None and event_group_id not in self._event_group_list):
+            logger.debug(f"skipping event group {event_group_id} because it is not in the event group list provided to the __init__ function")
+            return
+        if(self._reseed_per_event_group):
+            self._channelGenericNoiseAdder.begin(seed=self._get_event_group_seed(event_group_id))
+            # the random shower realizations of the ARZ and Alvarez2009 models are drawn from a separate stream
+            askaryan.set_seed(self._cfg['signal']['model'], self._get_event_group_seed(event_group_id, stream=1))
+        event_indices = self._event_group_shower_indices[i_event_group_id]
+
+        t1 = time.time()
+        self._primary_index = event_indices[0]
+        # the weights of all showers were calculated before the event loop (see `_calculate_weights`)
+        self._mout['weights'][event_indices] = self._weights[event_indices]
+        # determine if a particle (neutrinos, or a secondary interaction of a neutrino, or surfaec muons) is simulated
+        particle_mode = "simulation_mode" not in self._fin_attrs or self._fin_attrs['simulation_mode'] != "emitter"
+        if particle_mode:
+            self._read_input_particle_properties(self._primary_index)  # this sets the self.input_particle for self._primary_index
+            self.primary = self.input_particle
+            self.primary[simp.weight] = self._weights[self._primary_index]
+
+        self._timing['weights'] += time.time() - t1
+        # skip all events where neutrino weights is zero, i.e., do not
+        # simulate neutrino that propagate through the Earth
+        if(self._mout['weights'][self._primary_index] < self._cfg['speedup']['minimum_weight_cut']):
+            logger.debug("neutrino weight is smaller than {}, skipping event".format(self._cfg['speedup']['minimum_weight_cut']))
+            for station_id in self._station_ids:
+                for shower_index in event_indices:
+                    self._profile.count_skipped('weight_cut', station_id, self._get_profile_energy(shower_index))
+            return
+
+        triggered_showers = {}  # this variable tracks which showers triggered a particular station
 
-            # the weight calculation is independent of the station, so we do this calculation only once
-            # the weight also depends just on the "mother" particle, i.e. the incident neutrino which determines
-            # the propability of arriving at our simulation volume. All subsequent showers have the same weight. So
-            # we calculate it just once and save it to all subshowers.
+        # only the stations that pass the distance cut are visited (see `_calculate_candidate_stations`)
+        station_indices = np.arange(len(self._station_ids))
+        if self._cfg['speedup']['distance_cut']:
+            station_indices = self._candidate_station_indices[i_event_group_id]
+            logger.debug(f"skipping {len(self._station_ids) - len(station_indices)} stations because no shower is within the distance cut")
+            self._iCounter += (len(self._station_ids) - len(station_indices)) * len(event_indices)
+            for iSt in np.setdiff1d(np.arange(len(self._station_ids)), station_indices):
+                for shower_index in event_indices:
+                    self._profile.count_skipped('distance_cut', self._station_ids[iSt], self._get_profile_energy(shower_index))
+
+        # loop over all stations (each station is treated independently)
+        for iSt in station_indices:
+            self._station_id = self._station_ids[iSt]
             t1 = time.time()
+            triggered_showers[self._station_id] = []
+            logger.debug(f"simulating station {self._station_id}")
+
+            candidate_station = False
+            # array-backed view of the detector description, avoids database lookups in the loops below
+            station_snapshot = self._det.get_station_snapshot(self._station_id)
+            self._sampling_rate_detector = station_snapshot.get_sampling_frequency(0)
+#             logger.warning('internal sampling rate is {:.3g}GHz, final detector sampling rate is {:.3g}GHz'.format(self.get_sampling_rate(), self._sampling_rate_detector))
+            self._n_samples = station_snapshot.get_number_of_samples(0) / self._sampling_rate_detector / self._dt
+            self._n_samples = int(np.ceil(self._n_samples / 2.) * 2)  # round to nearest even integer
+            self._ff = np.fft.rfftfreq(self._n_samples, self._dt)
+            self._tt = np.arange(0, self._n_samples * self._dt, self._dt)
+
+            ray_tracing_performed = False
+            if('station_{:d}'.format(self._station_id) in self._fin_stations):
+                ray_tracing_performed = (self._raytracer.get_output_parameters()[0]['name'] in self._fin_stations['station_{:d}'.format(self._station_id)]) and (self._was_pre_simulated)
+            self._evt_tmp = NuRadioReco.framework.event.Event(0, 0)
 
-            self._primary_index = event_indices[0]
-            # determine if a particle (neutrinos, or a secondary interaction of a neutrino, or surfaec muons) is simulated
-            particle_mode = "simulation_mode" not in self._fin_attrs or self._fin_attrs['simulation_mode'] != "emitter"
-            self._mout['weights'][event_indices] = np.ones(len(event_indices))  # for a pulser simulation, every event has the same weight
             if particle_mode:
-                self._read_input_particle_properties(self._primary_index)  # this sets the self.input_particle for self._primary_index
-                # calculate the weight for the primary particle
-                self.primary = self.input_particle
-                if(self._cfg['weights']['weight_mode'] == "existing"):
-                    if("weights" in self._fin):
-                        self._mout['weights'] = self._fin["weights"]
-                    else:
-                        logger.error("config file specifies to use weights from the input hdf5 file but the input file does not contain this information.")
-                elif(self._cfg['weights']['weight_mode'] is None):
-                    self.primary[simp.weight] = 1.
-                else:
-                    self.primary[simp.weight] = get_weight(self.primary[simp.zenith],
-                                                           self.primary[simp.energy],
-                                                           self.primary[simp.flavor],
-                                                           mode=self._cfg['weights']['weight_mode'],
-                                                           cross_section_type=self._cfg['weights']['cross_section_type'],
-                                                           vertex_position=self.primary[simp.vertex],
-                                                           phi_nu=self.primary[simp.azimuth])
-                # all entries for the event for this primary get the calculated primary's weight
-                self._mout['weights'][event_indices] = self.primary[simp.weight]
-
-            weightTime += time.time() - t1
-            # skip all events where neutrino weights is zero, i.e., do not
-            # simulate neutrino that propagate through the Earth
-            if(self._mout['weights'][self._primary_index] < self._cfg['speedup']['minimum_weight_cut']):
-                logger.debug("neutrino weight is smaller than {}, skipping event".format(self._cfg['speedup']['minimum_weight_cut']))
-                continue
+                # add the primary particle to the temporary event
+                self._evt_tmp.add_particle(self.primary)
 
-            # these quantities get computed to apply the distance cut as a function of shower energies
-            # the shower energies of closeby showers will be added as they can constructively interfere
-            if self._cfg['speedup']['distance_cut']:
-                t_tmp = time.time()
-                shower_energies = np.array(self._fin['shower_energies'])[event_indices]
-                vertex_positions = np.array([np.array(self._fin['xx'])[event_indices],
-                                             np.array(self._fin['yy'])[event_indices],
-                                             np.array(self._fin['zz'])[event_indices]]).T
-                vertex_distances = np.linalg.norm(vertex_positions - vertex_positions[0], axis=1)
-                distance_cut_time += time.time() - t_tmp
-
-            triggered_showers = {}  # this variable tracks which showers triggered a particular station
-
-            # loop over all stations (each station is treated independently)
-            for iSt, self._station_id in enumerate(self._station_ids):
-                t1 = time.time()
-                triggered_showers[self._station_id] = []
-                logger.debug(f"simulating station {self._station_id}")
+            self._create_sim_station()
+            # loop over all showers in event group
+            # create output data structure for this channel
+            sg = self._create_station_output_structure(len(event_indices), station_snapshot.n_channels)
+            for iSh, self._shower_index in enumerate(event_indices):
+                sg['shower_id'][iSh] = self._shower_ids[self._shower_index]
+                self._iCounter += 1
+#                 if(iCounter % max(1, int(n_shower_station / 100.)) == 0):
+                self._log_progress(i_event_group_id)
+
+                self._read_input_shower_properties()
+                self._askaryan_cache.reset()
+                if particle_mode:
+                    logger.debug(f"simulating shower {self._shower_index}: {self._fin['shower_type'][self._shower_index]} with E = {self._fin['shower_energies'][self._shower_index]/units.eV:.2g}eV")
+                x1 = self._shower_vertex  # the interaction point
 
                 if self._cfg['speedup']['distance_cut']:
-                    # perform a quick cut to reject event group completely if no shower is close enough to the station
                     t_tmp = time.time()
-                    vertex_distances_to_station = np.linalg.norm(vertex_positions - self._station_barycenter[iSt], axis=1)
-                    distance_cut = self._get_distance_cut(np.sum(shower_energies)) + 100 * units.m  # 100m safety margin is added to account for extent of station around bary center.
-                    if vertex_distances_to_station.min() > distance_cut:
-                        logger.debug(f"skipping station {self._station_id} because minimal distance {vertex_distances_to_station.min()/units.km:.1f}km > {distance_cut/units.km:.1f}km (shower energy = {shower_energies.max():.2g}eV) bary center of station {self._station_barycenter[iSt]}")
-                        distance_cut_time += time.time() - t_tmp
-                        iCounter += len(shower_energies)
+                    # the distance cut of this shower that depends on the sum of shower energies of all showers within
+                    # self._cfg['speedup']['distance_cut_sum_length'] was calculated before the event loop
+                    shower_distance_cut = self._shower_distance_cuts[self._shower_index]
+                    # quick speedup cut using barycenter of station as position
+                    distance_to_station = np.linalg.norm(x1 - self._station_barycenter[iSt])
+                    distance_cut = shower_distance_cut + 100 * units.m  # 100m safety margin is added to account for extent of station around bary center.
+                    if distance_to_station > distance_cut:
+                        logger.debug(f"skipping station {self._station_id} because distance {distance_to_station/units.km:.1f}km > {distance_cut/units.km:.1f}km (shower energy = {self._fin['shower_energies'][self._shower_index]:.2g}eV) between vertex {x1} and bary center of station {self._station_barycenter[iSt]}")
+                        self._timing['distance_cut'] += time.time() - t_tmp
+                        self._profile.count_skipped('distance_cut', self._station_id, self._get_profile_energy(self._shower_index))
                         continue
-                    distance_cut_time += time.time() - t_tmp
+                    self._timing['distance_cut'] += time.time() - t_tmp
 
-                candidate_station = False
-                self._sampling_rate_detector = self._det.get_sampling_frequency(self._station_id, 0)
-#                 logger.warning('internal sampling rate is {:.3g}GHz, final detector sampling rate is {:.3g}GHz'.format(self.get_sampling_rate(), self._sampling_rate_detector))
-                self._n_samples = self._det.get_number_of_samples(self._station_id, 0) / self._sampling_rate_detector / self._dt
-                self._n_samples = int(np.ceil(self._n_samples / 2.) * 2)  # round to nearest even integer
-                self._ff = np.fft.rfftfreq(self._n_samples, self._dt)
-                self._tt = np.arange(0, self._n_samples * self._dt, self._dt)
+                # skip vertices not in fiducial volume. This is required because 'mother' events are added to the event list
+                # if daugthers (e.g. tau decay) have their vertex in the fiducial volume
+                if not self._is_in_fiducial_volume():
+                    logger.debug(f"event is not in fiducial volume, skipping simulation {self._fin['xx'][self._shower_index]}, {self._fin['yy'][self._shower_index]}, {self._fin['zz'][self._shower_index]}")
+                    self._profile.count_skipped('fiducial_volume', self._station_id, self._get_profile_energy(self._shower_index))
+                    continue
 
-                ray_tracing_performed = False
-                if('station_{:d}'.format(self._station_id) in self._fin_stations):
-                    ray_tracing_performed = (self._raytracer.get_output_parameters()[0]['name'] in self._fin_stations['station_{:d}'.format(self._station_id)]) and (self._was_pre_simulated)
-                self._evt_tmp = NuRadioReco.framework.event.Event(0, 0)
+                # for special cases where only EM or HAD showers are simulated, skip all events that don't fulfill this criterion
+                if(self._cfg['signal']['shower_type'] in ["em", "had"]):
+                    if(self._fin['shower_type'][self._shower_index] != self._cfg['signal']['shower_type']):
+                        self._profile.count_skipped('shower_type', self._station_id, self._get_profile_energy(self._shower_index))
+                        continue
 
                 if particle_mode:
-                    # add the primary particle to the temporary event
-                    self._evt_tmp.add_particle(self.primary)
-
-                self._create_sim_station()
-                # loop over all showers in event group
-                # create output data structure for this channel
-                sg = self._create_station_output_structure(len(event_indices), self._det.get_number_of_channels(self._station_id))
-                for iSh, self._shower_index in enumerate(event_indices):
-                    sg['shower_id'][iSh] = self._shower_ids[self._shower_index]
-                    iCounter += 1
-#                     if(iCounter % max(1, int(n_shower_station / 100.)) == 0):
-                    if((time.time() - t_last_update) > 60):
-                        t_last_update = time.time()
-                        eta = pretty_time_delta((time.time() - t_start) * (n_shower_station - iCounter) / iCounter)
-                        total_time_sum = input_time + rayTracingTime + detSimTime + outputTime + weightTime + distance_cut_time  # askaryan time is part of the ray tracing time, so it is not counted here.
-                        total_time = time.time() - t_start
-                        tmp_att = 0
-                        if total_time > 0:
-                            logger.status(
-                                "processing event group {}/{} and shower {}/{} ({} showers triggered) = {:.1f}%, ETA {}, time consumption: ray tracing = {:.0f}%, askaryan = {:.0f}%, detector simulation = {:.0f}% reading input = {:.0f}%, calculating weights = {:.0f}%, distance cut {:.0f}%, unaccounted = {:.0f}% ".format(
-                                    i_event_group_id,
-                                    len(unique_event_group_ids),
-                                    iCounter,
-                                    n_shower_station,
-                                    np.sum(self._mout['triggered']),
-                                    100. * iCounter / n_shower_station,
-                                    eta,
-                                    100. * (rayTracingTime - askaryan_time) / total_time,
-                                    100. * askaryan_time / total_time,
-                                    100. * detSimTime / total_time,
-                                    100.*input_time / total_time,
-                                    100. * weightTime / total_time,
-                                    100 * distance_cut_time / total_time,
-                                    100 * (total_time - total_time_sum) / total_time))
-
-                    self._read_input_shower_properties()
-                    if particle_mode:
-                        logger.debug(f"simulating shower {self._shower_index}: {self._fin['shower_type'][self._shower_index]} with E = {self._fin['shower_energies'][self._shower_index]/units.eV:.2g}eV")
-                    x1 = self._shower_vertex  # the interaction point
+                    self._create_sim_shower()  # create sim shower
+                    self._evt_tmp.add_sim_shower(self._sim_shower)
+
+                # generate unique and increasing event id per station
+                self._event_ids_counter[self._station_id] += 1
+                self._event_id = self._event_ids_counter[self._station_id]
+
+                # be careful, zenith/azimuth angle always refer to where the neutrino came from,
+                # i.e., opposite to the direction of propagation. We need the propagation direction here,
+                # so we multiply the shower axis with '-1'
+                if 'zeniths' in self._fin:
+                    self._shower_axis = -1 * hp.spherical_to_cartesian(self._fin['zeniths'][self._shower_index], self._fin['azimuths'][self._shower_index])
+                else:
+                    self._shower_axis = np.array([0, 0, 1])
+
+                # calculate correct Cherenkov angle for ice density at vertex position
+                n_index = self._ice.get_index_of_refraction(x1)
+                cherenkov_angle = np.arccos(1. / n_index)
+
+                # first step: perform raytracing to see if solution exists
+                t2 = time.time()
+#                 input_time += (time.time() - t1)
+
+                for channel_id in range(station_snapshot.n_channels):
+                    x2 = station_snapshot.get_absolute_channel_position(channel_id)
+                    logger.debug(f"simulating channel {channel_id} at {x2}")
 
                     if self._cfg['speedup']['distance_cut']:
                         t_tmp = time.time()
-                        # calculate the sum of shower energies for all showers within self._cfg['speedup']['distance_cut_sum_length']
-                        mask_shower_sum = np.abs(vertex_distances - vertex_distances[iSh]) < self._cfg['speedup']['distance_cut_sum_length']
-                        shower_energy_sum = np.sum(shower_energies[mask_shower_sum])
-                        # quick speedup cut using barycenter of station as position
-                        distance_to_station = np.linalg.norm(x1 - self._station_barycenter[iSt])
-                        distance_cut = self._get_distance_cut(shower_energy_sum) + 100 * units.m  # 100m safety margin is added to account for extent of station around bary center.
-                        logger.debug(f"calculating distance cut. Current event has energy {self._fin['shower_energies'][self._shower_index]:.4g}, it is event number {iSh} and {np.sum(mask_shower_sum)} are within {self._cfg['speedup']['distance_cut_sum_length']/units.m:.1f}m -> {shower_energy_sum:.4g}")
-                        if distance_to_station > distance_cut:
-                            logger.debug(f"skipping station {self._station_id} because distance {distance_to_station/units.km:.1f}km > {distance_cut/units.km:.1f}km (shower energy = {self._fin['shower_energies'][self._shower_index]:.2g}eV) between vertex {x1} and bary center of station {self._station_barycenter[iSt]}")
-                            distance_cut_time += time.time() - t_tmp
+                        distance = np.linalg.norm(x1 - x2)
+
+                        if distance > shower_distance_cut:
+                            logger.debug('A distance speed up cut has been applied')
+                            logger.debug('Shower energy: {:.2e} eV'.format(self._fin['shower_energies'][self._shower_index] / units.eV))
+                            logger.debug('Distance cut: {:.2f} m'.format(shower_distance_cut / units.m))
+                            logger.debug('Distance to vertex: {:.2f} m'.format(distance / units.m))
+                            self._timing['distance_cut'] += time.time() - t_tmp
+                            self._profile.count_skipped('channel_distance_cut', self._station_id, self._get_profile_energy(self._shower_index))
                             continue
-                        distance_cut_time += time.time() - t_tmp
+                        self._timing['distance_cut'] += time.time() - t_tmp
+
+                    self._raytracer.set_start_and_end_point(x1, x2)
+                    self._raytracer.use_optional_function('set_shower_axis', self._shower_axis)
+                    if(self._was_pre_simulated and ray_tracing_performed and not self._cfg['speedup']['redo_raytracing']):  # check if raytracing was already performed
+                        if self._cfg['propagation']['module'] == 'radiopropa':
+                            logger.error('Presimulation can not be used with the radiopropa ray tracer module')
+                            raise Exception('Presimulation can not be used with the radiopropa ray tracer module')
+                        sg_pre = self._fin_stations["station_{:d}".format(self._station_id)]
+                        ray_tracing_solution = {}
+                        for output_parameter in self._raytracer.get_output_parameters():
+                            ray_tracing_solution[output_parameter['name']] = sg_pre[output_parameter['name']][self._shower_index, channel_id]
+                        self._raytracer.set_solution(ray_tracing_solution)
+                    else:
+                        self._raytracer.find_solutions()
+                        self._profile.count_call('ray_tracing', self._station_id, self._get_profile_energy(self._shower_index))
 
-                    # skip vertices not in fiducial volume. This is required because 'mother' events are added to the event list
-                    # if daugthers (e.g. tau decay) have their vertex in the fiducial volume
-                    if not self._is_in_fiducial_volume():
-                        logger.debug(f"event is not in fiducial volume, skipping simulation {self._fin['xx'][self._shower_index]}, {self._fin['yy'][self._shower_index]}, {self._fin['zz'][self._shower_index]}")
+                    if(not self._raytracer.has_solution()):
+                        logger.debug("event {} and station {}, channel {} does not have any ray tracing solution ({} to {})".format(
+                            self._event_group_id, self._station_id, channel_id, x1, x2))
+                        self._profile.count_skipped('no_ray_tracing_solution', self._station_id, self._get_profile_energy(self._shower_index))
+                        continue
+                    delta_Cs = []
+                    viewing_angles = []
+                    # loop through all ray tracing solution
+                    for iS in range(self._raytracer.get_number_of_solutions()):
+                        for key, value in self._raytracer.get_raytracing_output(iS).items():
+                            sg[key][iSh, channel_id, iS] = value
+                        self._launch_vector = self._raytracer.get_launch_vector(iS)
+                        sg['launch_vectors'][iSh, channel_id, iS] = self._launch_vector
+                        # calculates angle between shower axis and launch vector
+                        viewing_angle = hp.get_angle(self._shower_axis, self._launch_vector)
+                        viewing_angles.append(viewing_angle)
+                        delta_C = (viewing_angle - cherenkov_angle)
+                        logger.debug('solution {} {}: viewing angle {:.1f} = delta_C = {:.1f}'.format(
+                            iS, propagation.solution_types[self._raytracer.get_solution_type(iS)], viewing_angle / units.deg, (viewing_angle - cherenkov_angle) / units.deg))
+                        delta_Cs.append(delta_C)
+
+                    # discard event if delta_C (angle off cherenkov cone) is too large
+                    if(min(np.abs(delta_Cs)) > self._cfg['speedup']['delta_C_cut']):
+                        logger.debug('delta_C too large, event unlikely to be observed, skipping event')
+                        self._profile.count_skipped('delta_C_cut', self._station_id, self._get_profile_energy(self._shower_index))
                         continue
 
-                    # for special cases where only EM or HAD showers are simulated, skip all events that don't fulfill this criterion
-                    if(self._cfg['signal']['shower_type'] == "em"):
-                        if(self._fin['shower_type'][self._shower_index] != "em"):
-                            continue
-                    if(self._cfg['signal']['shower_type'] == "had"):
-                        if(self._fin['shower_type'][self._shower_index] != "had"):
+                    n = self._raytracer.get_number_of_solutions()
+                    for iS in range(n):  # loop through all ray tracing solution
+                        # skip individual channels where the viewing angle difference is too large
+                        # discard event if delta_C (angle off cherenkov cone) is too large
+                        if(np.abs(delta_Cs[iS]) > self._cfg['speedup']['delta_C_cut']):
+                            logger.debug('delta_C too large, ray tracing solution unlikely to be observed, skipping event')
                             continue
-
-                    if particle_mode:
-                        self._create_sim_shower()  # create sim shower
-                        self._evt_tmp.add_sim_shower(self._sim_shower)
-
-                    # generate unique and increasing event id per station
-                    self._event_ids_counter[self._station_id] += 1
-                    self._event_id = self._event_ids_counter[self._station_id]
-
-                    # be careful, zenith/azimuth angle always refer to where the neutrino came from,
-                    # i.e., opposite to the direction of propagation. We need the propagation direction here,
-                    # so we multiply the shower axis with '-1'
-                    if 'zeniths' in self._fin:
-                        self._shower_axis = -1 * hp.spherical_to_cartesian(self._fin['zeniths'][self._shower_index], self._fin['azimuths'][self._shower_index])
-                    else:
-                        self._shower_axis = np.array([0, 0, 1])
-
-                    # calculate correct Cherenkov angle for ice density at vertex position
-                    n_index = self._ice.get_index_of_refraction(x1)
-                    cherenkov_angle = np.arccos(1. / n_index)
-
-                    # first step: perform raytracing to see if solution exists
-                    t2 = time.time()
-#                     input_time += (time.time() - t1)
-
-                    for channel_id in range(self._det.get_number_of_channels(self._station_id)):
-                        x2 = self._det.get_relative_position(self._station_id, channel_id) + self._det.get_absolute_position(self._station_id)
-                        logger.debug(f"simulating channel {channel_id} at {x2}")
-
-                        if self._cfg['speedup']['distance_cut']:
-                            t_tmp = time.time()
-                            distance_cut = self._get_distance_cut(shower_energy_sum)
-                            distance = np.linalg.norm(x1 - x2)
-
-                            if distance > distance_cut:
-                                logger.debug('A distance speed up cut has been applied')
-                                logger.debug('Shower energy: {:.2e} eV'.format(self._fin['shower_energies'][self._shower_index] / units.eV))
-                                logger.debug('Distance cut: {:.2f} m'.format(distance_cut / units.m))
-                                logger.debug('Distance to vertex: {:.2f} m'.format(distance / units.m))
-                                distance_cut_time += time.time() - t_tmp
-                                continue
-                            distance_cut_time += time.time() - t_tmp
-
-                        self._raytracer.set_start_and_end_point(x1, x2)
-                        self._raytracer.use_optional_function('set_shower_axis', self._shower_axis)
-                        if(pre_simulated and ray_tracing_performed and not self._cfg['speedup']['redo_raytracing']):  # check if raytracing was already performed
-                            if self._cfg['propagation']['module'] == 'radiopropa':
-                                logger.error('Presimulation can not be used with the radiopropa ray tracer module')
-                                raise Exception('Presimulation can not be used with the radiopropa ray tracer module')
+                        if(self._was_pre_simulated and ray_tracing_performed and not self._cfg['speedup']['redo_raytracing']):
                             sg_pre = self._fin_stations["station_{:d}".format(self._station_id)]
-                            ray_tracing_solution = {}
-                            for output_parameter in self._raytracer.get_output_parameters():
-                                ray_tracing_solution[output_parameter['name']] = sg_pre[output_parameter['name']][self._shower_index, channel_id]
-                            self._raytracer.set_solution(ray_tracing_solution)
+                            R = sg_pre['travel_distances'][self._shower_index, channel_id, iS]
+                            T = sg_pre['travel_times'][self._shower_index, channel_id, iS]
                         else:
-                            self._raytracer.find_solutions()
-
-                        if(not self._raytracer.has_solution()):
-                            logger.debug("event {} and station {}, channel {} does not have any ray tracing solution ({} to {})".format(
-                                self._event_group_id, self._station_id, channel_id, x1, x2))
-                            continue
-                        delta_Cs = []
-                        viewing_angles = []
-                        # loop through all ray tracing solution
-                        for iS in range(self._raytracer.get_number_of_solutions()):
-                            for key, value in self._raytracer.get_raytracing_output(iS).items():
-                                sg[key][iSh, channel_id, iS] = value
-                            self._launch_vector = self._raytracer.get_launch_vector(iS)
-                            sg['launch_vectors'][iSh, channel_id, iS] = self._launch_vector
-                            # calculates angle between shower axis and launch vector
-                            viewing_angle = hp.get_angle(self._shower_axis, self._launch_vector)
-                            viewing_angles.append(viewing_angle)
-                            delta_C = (viewing_angle - cherenkov_angle)
-                            logger.debug('solution {} {}: viewing angle {:.1f} = delta_C = {:.1f}'.format(
-                                iS, propagation.solution_types[self._raytracer.get_solution_type(iS)], viewing_angle / units.deg, (viewing_angle - cherenkov_angle) / units.deg))
-                            delta_Cs.append(delta_C)
-
-                        # discard event if delta_C (angle off cherenkov cone) is too large
-                        if(min(np.abs(delta_Cs)) > self._cfg['speedup']['delta_C_cut']):
-                            logger.debug('delta_C too large, event unlikely to be observed, skipping event')
-                            continue
-
-                        n = self._raytracer.get_number_of_solutions()
-                        for iS in range(n):  # loop through all ray tracing solution
-                            # skip individual channels where the viewing angle difference is too large
-                            # discard event if delta_C (angle off cherenkov cone) is too large
-                            if(np.abs(delta_Cs[iS]) > self._cfg['speedup']['delta_C_cut']):
-                                logger.debug('delta_C too large, ray tracing solution unlikely to be observed, skipping event')
+                            R = self._raytracer.get_path_length(iS)  # calculate path length
+                            T = self._raytracer.get_travel_time(iS)  # calculate travel time
+                            if (R is None or T is None):
                                 continue
-                            if(pre_simulated and ray_tracing_performed and not self._cfg['speedup']['redo_raytracing']):
-                                sg_pre = self._fin_stations["station_{:d}".format(self._station_id)]
-                                R = sg_pre['travel_distances'][self._shower_index, channel_id, iS]
-                                T = sg_pre['travel_times'][self._shower_index, channel_id, iS]
+                        sg['travel_distances'][iSh, channel_id, iS] = R
+                        sg['travel_times'][iSh, channel_id, iS] = T
+                        self._launch_vector = self._raytracer.get_launch_vector(iS)
+                        receive_vector = self._raytracer.get_receive_vector(iS)
+                        # save receive vector
+                        sg['receive_vectors'][iSh, channel_id, iS] = receive_vector
+                        zenith, azimuth = hp.cartesian_to_spherical(*receive_vector)
+
+                        # get neutrino pulse from Askaryan module
+                        t_ask = time.time()
+
+                        if("simulation_mode" not in self._fin_attrs or self._fin_attrs['simulation_mode'] == "neutrino"):
+                            # first consider in-ice showers
+                            kwargs = {}
+                            # if the input file specifies a specific shower realization, use that realization
+                            if(self._cfg['signal']['model'] in ["ARZ2019", "ARZ2020"] and "shower_realization_ARZ" in self._fin):
+                                kwargs['iN'] = self._fin['shower_realization_ARZ'][self._shower_index]
+                                logger.debug(f"reusing shower {kwargs['iN']} ARZ shower library")
+                            elif(self._cfg['signal']['model'] == "Alvarez2009" and "shower_realization_Alvarez2009" in self._fin):
+                                kwargs['k_L'] = self._fin['shower_realization_Alvarez2009'][self._shower_index]
+                                logger.debug(f"reusing k_L parameter of Alvarez2009 model of k_L = {kwargs['k_L']:.4g}")
                             else:
-                                R = self._raytracer.get_path_length(iS)  # calculate path length
-                                T = self._raytracer.get_travel_time(iS)  # calculate travel time
-                                if (R is None or T is None):
-                                    continue
-                            sg['travel_distances'][iSh, channel_id, iS] = R
-                            sg['travel_times'][iSh, channel_id, iS] = T
-                            self._launch_vector = self._raytracer.get_launch_vector(iS)
-                            receive_vector = self._raytracer.get_receive_vector(iS)
-                            # save receive vector
-                            sg['receive_vectors'][iSh, channel_id, iS] = receive_vector
-                            zenith, azimuth = hp.cartesian_to_spherical(*receive_vector)
-
-                            # get neutrino pulse from Askaryan module
-                            t_ask = time.time()
-
-                            if("simulation_mode" not in self._fin_attrs or self._fin_attrs['simulation_mode'] == "neutrino"):
-                                # first consider in-ice showers
-                                kwargs = {}
-                                # if the input file specifies a specific shower realization, use that realization
-                                if(self._cfg['signal']['model'] in ["ARZ2019", "ARZ2020"] and "shower_realization_ARZ" in self._fin):
-                                    kwargs['iN'] = self._fin['shower_realization_ARZ'][self._shower_index]
-                                    logger.debug(f"reusing shower {kwargs['iN']} ARZ shower library")
-                                elif(self._cfg['signal']['model'] == "Alvarez2009" and "shower_realization_Alvarez2009" in self._fin):
-                                    kwargs['k_L'] = self._fin['shower_realization_Alvarez2009'][self._shower_index]
-                                    logger.debug(f"reusing k_L parameter of Alvarez2009 model of k_L = {kwargs['k_L']:.4g}")
-                                else:
-                                    # check if the shower was already simulated (e.g. for a different channel or ray tracing solution)
-                                    if(self._cfg['signal']['model'] in ["ARZ2019", "ARZ2020"]):
-                                        if(self._sim_shower.has_parameter(shp.charge_excess_profile_id)):
-                                            kwargs = {'iN': self._sim_shower.get_parameter(shp.charge_excess_profile_id)}
-                                    if(self._cfg['signal']['model'] == "Alvarez2009"):
-                                        if(self._sim_shower.has_parameter(shp.k_L)):
-                                            kwargs = {'k_L': self._sim_shower.get_parameter(shp.k_L)}
-                                            logger.debug(f"reusing k_L parameter of Alvarez2009 model of k_L = {kwargs['k_L']:.4g}")
-
-                                spectrum, additional_output = askaryan.get_frequency_spectrum(self._fin['shower_energies'][self._shower_index], viewing_angles[iS],
-                                                self._n_samples, self._dt, self._fin['shower_type'][self._shower_index], n_index, R,
-                                                self._cfg['signal']['model'], seed=self._cfg['seed'], full_output=True, **kwargs)
-                                # save shower realization to SimShower and hdf5 file
+                                # check if the shower was already simulated (e.g. for a different channel or ray tracing solution)
                                 if(self._cfg['signal']['model'] in ["ARZ2019", "ARZ2020"]):
-                                    if('shower_realization_ARZ' not in self._mout):
-                                        self._mout['shower_realization_ARZ'] = np.zeros(self._n_showers)
-                                    if(not self._sim_shower.has_parameter(shp.charge_excess_profile_id)):
-                                        self._sim_shower.set_parameter(shp.charge_excess_profile_id, additional_output['iN'])
-                                        self._mout['shower_realization_ARZ'][self._shower_index] = additional_output['iN']
-                                        logger.debug(f"setting shower profile for ARZ shower library to i = {additional_output['iN']}")
+                                    if(self._sim_shower.has_parameter(shp.charge_excess_profile_id)):
+                                        kwargs = {'iN': self._sim_shower.get_parameter(shp.charge_excess_profile_id)}
                                 if(self._cfg['signal']['model'] == "Alvarez2009"):
-                                    if('shower_realization_Alvarez2009' not in self._mout):
-                                        self._mout['shower_realization_Alvarez2009'] = np.zeros(self._n_showers)
-                                    if(not self._sim_shower.has_parameter(shp.k_L)):
-                                        self._sim_shower.set_parameter(shp.k_L, additional_output['k_L'])
-                                        self._mout['shower_realization_Alvarez2009'][self._shower_index] = additional_output['k_L']
-                                        logger.debug(f"setting k_L parameter of Alvarez2009 model to k_L = {additional_output['k_L']:.4g}")
-                                askaryan_time += (time.time() - t_ask)
-
-                                polarization_direction_onsky = self._calculate_polarization_vector()
-                                cs_at_antenna = cstrans.cstrafo(*hp.cartesian_to_spherical(*receive_vector))
-                                polarization_direction_at_antenna = cs_at_antenna.transform_from_onsky_to_ground(polarization_direction_onsky)
-                                logger.debug('receive zenith {:.0f} azimuth {:.0f} polarization on sky {:.2f} {:.2f} {:.2f}, on ground @ antenna {:.2f} {:.2f} {:.2f}'.format(
-                                    zenith / units.deg, azimuth / units.deg, polarization_direction_onsky[0],
-                                    polarization_direction_onsky[1], polarization_direction_onsky[2],
-                                    *polarization_direction_at_antenna))
-                                sg['polarization'][iSh, channel_id, iS] = polarization_direction_at_antenna
-                                eR, eTheta, ePhi = np.outer(polarization_direction_onsky, spectrum)
-
-                            elif(self._fin_attrs['simulation_mode'] == "emitter"):
-                                # NuRadioMC also supports the simulation of emitters. In this case, the signal model specifies the electric field polarization
-                                amplitude = self._fin['emitter_amplitudes'][self._shower_index]
-                                # following two lines used only for few models( not for all)
-                                emitter_frequency = self._fin['emitter_frequency'][self._shower_index]  # the frequency of cw and tone_burst signal
-                                half_width = self._fin['emitter_half_width'][self._shower_index]  # defines width of square and tone_burst signals
-                                # get emitting antenna properties
-                                antenna_model = self._fin['emitter_antenna_type'][self._shower_index]
-                                antenna_pattern = self._antenna_pattern_provider.load_antenna_pattern(antenna_model)
-                                ori = [self._fin['emitter_orientation_theta'][self._shower_index], self._fin['emitter_orientation_phi'][self._shower_index],
-                                       self._fin['emitter_rotation_theta'][self._shower_index], self._fin['emitter_rotation_phi'][self._shower_index]]
-
-                                # source voltage given to the emitter
-                                voltage_spectrum_emitter = emitter.get_frequency_spectrum(amplitude, self._n_samples, self._dt,
-                                                                                          self._fin['emitter_model'][self._shower_index], half_width=half_width, emitter_frequency=emitter_frequency)
-                                # convolve voltage output with antenna response to obtain emitted electric field
-                                frequencies = np.fft.rfftfreq(self._n_samples, d=self._dt)
-                                zenith_emitter, azimuth_emitter = hp.cartesian_to_spherical(*self._launch_vector)
-                                VEL = antenna_pattern.get_antenna_response_vectorized(frequencies, zenith_emitter, azimuth_emitter, *ori)
-                                c = constants.c * units.m / units.s
-                                eTheta = VEL['theta'] * (-1j) * voltage_spectrum_emitter * frequencies * n_index / (c)
-                                ePhi = VEL['phi'] * (-1j) * voltage_spectrum_emitter * frequencies * n_index / (c) 
-                                eR = np.zeros_like(eTheta)
-                                # rescale amplitudes by 1/R, for emitters this is not part of the "SignalGen" class
-                                eTheta *= 1 / R
-                                ePhi *= 1 / R
-                            else:
-                                logger.error(f"simulation mode {self._fin_attrs['simulation_mode']} unknown.")
-                                raise AttributeError(f"simulation mode {self._fin_attrs['simulation_mode']} unknown.")
-
-                            if(self._debug):
-                                from matplotlib import pyplot as plt
-                                fig, (ax, ax2) = plt.subplots(1, 2)
-                                ax.plot(self._ff, np.abs(eTheta) / units.micro / units.V * units.m)
-                                ax2.plot(self._tt, fft.freq2time(eTheta, 1. / self._dt) / units.micro / units.V * units.m)
-                                ax2.set_ylabel("amplitude [$\mu$V/m]")
-                                fig.tight_layout()
-                                fig.suptitle("$E_C$ = {:.1g}eV $\Delta \Omega$ = {:.1f}deg, R = {:.0f}m".format(
-                                    self._fin['shower_energies'][self._shower_index], viewing_angles[iS], R))
-                                fig.subplots_adjust(top=0.9)
-                                plt.show()
-
-                            electric_field = NuRadioReco.framework.electric_field.ElectricField([channel_id],
-                                                position=self._det.get_relative_position(self._sim_station.get_id(), channel_id),
-                                                shower_id=self._shower_ids[self._shower_index], ray_tracing_id=iS)
-                            if(iS is None):
-                                a = 1 / 0
-                            electric_field.set_frequency_spectrum(np.array([eR, eTheta, ePhi]), 1. / self._dt)
-                            electric_field = self._raytracer.apply_propagation_effects(electric_field, iS)
-                            # Trace start time is equal to the interaction time relative to the first
-                            # interaction plus the wave travel time.
-                            if hasattr(self, '_vertex_time'):
-                                trace_start_time = self._vertex_time + T
-                            else:
-                                trace_start_time = T
-
-                            # We shift the trace start time so that the trace time matches the propagation time.
-                            # The centre of the trace corresponds to the instant when the signal from the shower
-                            # vertex arrives at the observer. The next line makes sure that the centre time
-                            # of the trace is equal to vertex_time + T (wave propagation time)
-                            trace_start_time -= 0.5 * electric_field.get_number_of_samples() / electric_field.get_sampling_rate()
-
-                            electric_field.set_trace_start_time(trace_start_time)
-                            electric_field[efp.azimuth] = azimuth
-                            electric_field[efp.zenith] = zenith
-                            electric_field[efp.ray_path_type] = propagation.solution_types[self._raytracer.get_solution_type(iS)]
-                            electric_field[efp.nu_vertex_distance] = sg['travel_distances'][iSh, channel_id, iS]
-                            electric_field[efp.nu_viewing_angle] = viewing_angles[iS]
-                            self._sim_station.add_electric_field(electric_field)
-
-                            # apply a simple threshold cut to speed up the simulation,
-                            # application of antenna response will just decrease the
-                            # signal amplitude
-                            if(np.max(np.abs(electric_field.get_trace())) > float(self._cfg['speedup']['min_efield_amplitude']) * self._Vrms_efield_per_channel[self._station_id][channel_id]):
-                                candidate_station = True
-                        # end of ray tracing solutions loop
-                    t3 = time.time()
-                    rayTracingTime += t3 - t2
-                    # end of channels loop
-                # end of showers loop
-                # now perform first part of detector simulation -> convert each efield to voltage
-                # (i.e. apply antenna response) and apply additional simulation of signal chain (such as cable delays,
-                # amp response etc.)
-                if(not candidate_station):
-                    logger.debug("electric field amplitude too small in all channels, skipping to next event")
-                    continue
-                t1 = time.time()
+                                    if(self._sim_shower.has_parameter(shp.k_L)):
+                                        kwargs = {'k_L': self._sim_shower.get_parameter(shp.k_L)}
+                                        logger.debug(f"reusing k_L parameter of Alvarez2009 model of k_L = {kwargs['k_L']:.4g}")
+
+                            spectrum, additional_output = self._askaryan_cache.get_frequency_spectrum(self._fin['shower_energies'][self._shower_index], viewing_angles[iS],
+                                            self._n_samples, self._dt, self._fin['shower_type'][self._shower_index], n_index, R,
+                                            self._cfg['signal']['model'], seed=self._cfg['seed'], full_output=True, **kwargs)
+                            self._profile.count_call('askaryan', self._station_id, self._get_profile_energy(self._shower_index))
+                            # save shower realization to SimShower and hdf5 file
+                            if(self._cfg['signal']['model'] in ["ARZ2019", "ARZ2020"]):
+                                if('shower_realization_ARZ' not in self._mout):
+                                    self._mout['shower_realization_ARZ'] = np.zeros(self._n_showers)
+                                if(not self._sim_shower.has_parameter(shp.charge_excess_profile_id)):
+                                    self._sim_shower.set_parameter(shp.charge_excess_profile_id, additional_output['iN'])
+                                    self._mout['shower_realization_ARZ'][self._shower_index] = additional_output['iN']
+                                    logger.debug(f"setting shower profile for ARZ shower library to i = {additional_output['iN']}")
+                            if(self._cfg['signal']['model'] == "Alvarez2009"):
+                                if('shower_realization_Alvarez2009' not in self._mout):
+                                    self._mout['shower_realization_Alvarez2009'] = np.zeros(self._n_showers)
+                                if(not self._sim_shower.has_parameter(shp.k_L)):
+                                    self._sim_shower.set_parameter(shp.k_L, additional_output['k_L'])
+                                    self._mout['shower_realization_Alvarez2009'][self._shower_index] = additional_output['k_L']
+                                    logger.debug(f"setting k_L parameter of Alvarez2009 model to k_L = {additional_output['k_L']:.4g}")
+                            self._timing['askaryan'] += (time.time() - t_ask)
+
+                            polarization_direction_onsky = self._calculate_polarization_vector()
+                            cs_at_antenna = cstrans.cstrafo(*hp.cartesian_to_spherical(*receive_vector))
+                            polarization_direction_at_antenna = cs_at_antenna.transform_from_onsky_to_ground(polarization_direction_onsky)
+                            logger.debug('receive zenith {:.0f} azimuth {:.0f} polarization on sky {:.2f} {:.2f} {:.2f}, on ground @ antenna {:.2f} {:.2f} {:.2f}'.format(
+                                zenith / units.deg, azimuth / units.deg, polarization_direction_onsky[0],
+                                polarization_direction_onsky[1], polarization_direction_onsky[2],
+                                *polarization_direction_at_antenna))
+                            sg['polarization'][iSh, channel_id, iS] = polarization_direction_at_antenna
+                            eR, eTheta, ePhi = np.outer(polarization_direction_onsky, spectrum)
+
+                        elif(self._fin_attrs['simulation_mode'] == "emitter"):
+                            # NuRadioMC also supports the simulation of emitters. In this case, the signal model specifies the electric field polarization
+                            amplitude = self._fin['emitter_amplitudes'][self._shower_index]
+                            # following two lines used only for few models( not for all)
+                            emitter_frequency = self._fin['emitter_frequency'][self._shower_index]  # the frequency of cw and tone_burst signal
+                            half_width = self._fin['emitter_half_width'][self._shower_index]  # defines width of square and tone_burst signals
+                            # get emitting antenna properties
+                            antenna_model = self._fin['emitter_antenna_type'][self._shower_index]
+                            antenna_pattern = self._antenna_pattern_provider.load_antenna_pattern(antenna_model)
+                            ori = [self._fin['emitter_orientation_theta'][self._shower_index], self._fin['emitter_orientation_phi'][self._shower_index],
+                                   self._fin['emitter_rotation_theta'][self._shower_index], self._fin['emitter_rotation_phi'][self._shower_index]]
+
+                            # source voltage given to the emitter
+                            voltage_spectrum_emitter = emitter.get_frequency_spectrum(amplitude, self._n_samples, self._dt,
+                                                                                      self._fin['emitter_model'][self._shower_index], half_width=half_width, emitter_frequency=emitter_frequency)
+                            # convolve voltage output with antenna response to obtain emitted electric field
+                            frequencies = np.fft.rfftfreq(self._n_samples, d=self._dt)
+                            zenith_emitter, azimuth_emitter = hp.cartesian_to_spherical(*self._launch_vector)
+                            VEL = antenna_pattern.get_antenna_response_vectorized(frequencies, zenith_emitter, azimuth_emitter, *ori)
+                            c = constants.c * units.m / units.s
+                            eTheta = VEL['theta'] * (-1j) * voltage_spectrum_emitter * frequencies * n_index / (c)
+                            ePhi = VEL['phi'] * (-1j) * voltage_spectrum_emitter * frequencies * n_index / (c) 
+                            eR = np.zeros_like(eTheta)
+                            # rescale amplitudes by 1/R, for emitters this is not part of the "SignalGen" class
+                            eTheta *= 1 / R
+                            ePhi *= 1 / R
+                        else:
+                            logger.error(f"simulation mode {self._fin_attrs['simulation_mode']} unknown.")
+                            raise AttributeError(f"simulation mode {self._fin_attrs['simulation_mode']} unknown.")
+
+                        if(self._debug):
+                            from matplotlib import pyplot as plt
+                            fig, (ax, ax2) = plt.subplots(1, 2)
+                            ax.plot(self._ff, np.abs(eTheta) / units.micro / units.V * units.m)
+                            ax2.plot(self._tt, fft.freq2time(eTheta, 1. / self._dt) / units.micro / units.V * units.m)
+                            ax2.set_ylabel("amplitude [$\mu$V/m]")
+                            fig.tight_layout()
+                            fig.suptitle("$E_C$ = {:.1g}eV $\Delta \Omega$ = {:.1f}deg, R = {:.0f}m".format(
+                                self._fin['shower_energies'][self._shower_index], viewing_angles[iS], R))
+                            fig.subplots_adjust(top=0.9)
+                            plt.show()
+
+                        electric_field = NuRadioReco.framework.electric_field.ElectricField([channel_id],
+                                            position=station_snapshot.get_relative_position(channel_id),
+                                            shower_id=self._shower_ids[self._shower_index], ray_tracing_id=iS)
+                        if(iS is None):
+                            a = 1 / 0
+                        electric_field.set_frequency_spectrum(np.array([eR, eTheta, ePhi]), 1. / self._dt)
+                        electric_field = self._raytracer.apply_propagation_effects(electric_field, iS)
+                        # Trace start time is equal to the interaction time relative to the first
+                        # interaction plus the wave travel time.
+                        if hasattr(self, '_vertex_time'):
+                            trace_start_time = self._vertex_time + T
+                        else:
+                            trace_start_time = T
+
+                        # We shift the trace start time so that the trace time matches the propagation time.
+                        # The centre of the trace corresponds to the instant when the signal from the shower
+                        # vertex arrives at the observer. The next line makes sure that the centre time
+                        # of the trace is equal to vertex_time + T (wave propagation time)
+                        trace_start_time -= 0.5 * electric_field.get_number_of_samples() / electric_field.get_sampling_rate()
+
+                        electric_field.set_trace_start_time(trace_start_time)
+                        electric_field[efp.azimuth] = azimuth
+                        electric_field[efp.zenith] = zenith
+                        electric_field[efp.ray_path_type] = propagation.solution_types[self._raytracer.get_solution_type(iS)]
+                        electric_field[efp.nu_vertex_distance] = sg['travel_distances'][iSh, channel_id, iS]
+                        electric_field[efp.nu_viewing_angle] = viewing_angles[iS]
+                        self._sim_station.add_electric_field(electric_field)
+
+                        # apply a simple threshold cut to speed up the simulation,
+                        # application of antenna response will just decrease the
+                        # signal amplitude
+                        if(np.max(np.abs(electric_field.get_trace())) > float(self._cfg['speedup']['min_efield_amplitude']) * self._Vrms_efield_per_channel[self._station_id][channel_id]):
+                            candidate_station = True
+                    # end of ray tracing solutions loop
+                t3 = time.time()
+                self._timing['ray_tracing'] += t3 - t2
+                # end of channels loop
+            # end of showers loop
+            # now perform first part of detector simulation -> convert each efield to voltage
+            # (i.e. apply antenna response) and apply additional simulation of signal chain (such as cable delays,
+            # amp response etc.)
+            if(not candidate_station):
+                logger.debug("electric field amplitude too small in all channels, skipping to next event")
+                self._profile.count_skipped('amplitude_cut', self._station_id, self._get_profile_energy(self._primary_index))
+                continue
+            t1 = time.time()
+            self._profile.count_call('detector_simulation', self._station_id, self._get_profile_energy(self._primary_index))
+            self._station = NuRadioReco.framework.station.Station(self._station_id)
+            self._station.set_sim_station(self._sim_station)
+            self._station.set_use_trace_buffer(self._cfg['speedup'].get('station_trace_buffer', False))
+
+            # convert efields to voltages at digitizer
+            if(hasattr(self, '_detector_simulation_part1')):
+                # we give the user the opportunity to define a custom detector simulation
+                self._detector_simulation_part1()
+            else:
+                self._efieldToVoltageConverterPerEfield.run(self._evt, self._station, self._det)  # convolve efield with antenna pattern
+                self._detector_simulation_filter_amp(self._evt, self._station.get_sim_station(), self._det)
+                self._channelAddCableDelay.run(self._evt, self._sim_station, self._det)
+
+            if(self._cfg['speedup']['amp_per_ray_solution']):
+                self._channelSignalReconstructor.run(self._evt, self._station.get_sim_station(), self._det)
+                for channel in self._station.get_sim_station().iter_channels():
+                    tmp_index = np.argwhere(event_indices == self._get_shower_index(channel.get_shower_id()))[0]
+                    sg['max_amp_shower_and_ray'][tmp_index, channel.get_id(), channel.get_ray_tracing_solution_id()] = channel.get_parameter(chp.maximum_amplitude_envelope)
+                    sg['time_shower_and_ray'][tmp_index, channel.get_id(), channel.get_ray_tracing_solution_id()] = channel.get_parameter(chp.signal_time)
+            start_times = []
+            channel_identifiers = []
+            for channel in self._sim_station.iter_channels():
+                channel_identifiers.append(channel.get_unique_identifier())
+                start_times.append(channel.get_trace_start_time())
+            start_times = np.array(start_times)
+            start_times_sort = np.argsort(start_times)
+            delta_start_times = start_times[start_times_sort][1:] - start_times[start_times_sort][:-1]  # this array is sorted in time
+            split_event_time_diff = float(self._cfg['split_event_time_diff'])
+            iSplit = np.atleast_1d(np.squeeze(np.argwhere(delta_start_times > split_event_time_diff)))
+#             print(f"start times {start_times}")
+#             print(f"sort array {start_times_sort}")
+#             print(f"delta times {delta_start_times}")
+#             print(f"split at indices {iSplit}")
+            n_sub_events = len(iSplit) + 1
+            if(n_sub_events > 1):
+                logger.info(f"splitting event group id {self._event_group_id} into {n_sub_events} sub events")
+
+            tmp_station = copy.deepcopy(self._station)
+            event_group_has_triggered = False
+            for iEvent in range(n_sub_events):
+                iStart = 0
+                iStop = len(channel_identifiers)
+                if(n_sub_events > 1):
+                    if(iEvent > 0):
+                        iStart = iSplit[iEvent - 1] + 1
+                if(iEvent < n_sub_events - 1):
+                    iStop = iSplit[iEvent] + 1
+                indices = start_times_sort[iStart: iStop]
+                if(n_sub_events > 1):
+                    tmp = ""
+                    for start_time in start_times[indices]:
+                        tmp += f"{start_time/units.ns:.0f}, "
+                    tmp = tmp[:-2] + " ns"
+                    logger.info(f"creating event {iEvent} of event group {self._event_group_id} ranging rom {iStart} to {iStop} with indices {indices} corresponding to signal times of {tmp}")
+                self._evt = NuRadioReco.framework.event.Event(self._event_group_id, iEvent)  # create new event
+
+                if particle_mode:
+                    # add MC particles that belong to this (sub) event to event structure
+                    # add only primary for now, since full interaction chain is not typically in the input hdf5s
+                    self._evt.add_particle(self.primary)
+                # copy over generator information from temporary event to event
+                self._evt._generator_info = self._generator_info
+
                 self._station = NuRadioReco.framework.station.Station(self._station_id)
-                self._station.set_sim_station(self._sim_station)
+                self._station.set_use_trace_buffer(self._cfg['speedup'].get('station_trace_buffer', False))
+                sim_station = NuRadioReco.framework.sim_station.SimStation(self._station_id)
+                sim_station.set_is_neutrino()
+                tmp_sim_station = tmp_station.get_sim_station()
+                self._shower_ids_of_sub_event = []
+                for iCh in indices:
+                    ch_uid = channel_identifiers[iCh]
+                    shower_id = ch_uid[1]
+                    if(shower_id not in self._shower_ids_of_sub_event):
+                        self._shower_ids_of_sub_event.append(shower_id)
+                    sim_station.add_channel(tmp_sim_station.get_channel(ch_uid))
+                    efield_uid = ([ch_uid[0]], ch_uid[1], ch_uid[2])  # the efield unique identifier has as first parameter an array of the channels it is valid for
+                    for efield in tmp_sim_station.get_electric_fields():
+                        if(efield.get_unique_identifier() == efield_uid):
+                            sim_station.add_electric_field(efield)
 
-                # convert efields to voltages at digitizer
-                if(hasattr(self, '_detector_simulation_part1')):
-                    # we give the user the opportunity to define a custom detector simulation
-                    self._detector_simulation_part1()
+                if particle_mode:
+                    # add showers that contribute to this (sub) event to event structure
+                    for shower_id in self._shower_ids_of_sub_event:
+                        self._evt.add_sim_shower(self._evt_tmp.get_sim_shower(shower_id))
+                self._station.set_sim_station(sim_station)
+                self._station.set_station_time(self._evt_time)
+                self._evt.set_station(self._station)
+                if(bool(self._cfg['signal']['zerosignal'])):
+                    self._increase_signal(None, 0)
+
+                logger.debug("performing detector simulation")
+                if(hasattr(self, '_detector_simulation_part2')):
+                    # we give the user the opportunity to specify a custom detector simulation module sequence
+                    # which might be needed for certain analyses
+                    self._detector_simulation_part2()
                 else:
-                    efieldToVoltageConverterPerEfield.run(self._evt, self._station, self._det)  # convolve efield with antenna pattern
-                    self._detector_simulation_filter_amp(self._evt, self._station.get_sim_station(), self._det)
-                    channelAddCableDelay.run(self._evt, self._sim_station, self._det)
-
-                if(self._cfg['speedup']['amp_per_ray_solution']):
-                    self._channelSignalReconstructor.run(self._evt, self._station.get_sim_station(), self._det)
-                    for channel in self._station.get_sim_station().iter_channels():
-                        tmp_index = np.argwhere(event_indices == self._get_shower_index(channel.get_shower_id()))[0]
-                        sg['max_amp_shower_and_ray'][tmp_index, channel.get_id(), channel.get_ray_tracing_solution_id()] = channel.get_parameter(chp.maximum_amplitude_envelope)
-                        sg['time_shower_and_ray'][tmp_index, channel.get_id(), channel.get_ray_tracing_solution_id()] = channel.get_parameter(chp.signal_time)
-                start_times = []
-                channel_identifiers = []
-                for channel in self._sim_station.iter_channels():
-                    channel_identifiers.append(channel.get_unique_identifier())
-                    start_times.append(channel.get_trace_start_time())
-                start_times = np.array(start_times)
-                start_times_sort = np.argsort(start_times)
-                delta_start_times = start_times[start_times_sort][1:] - start_times[start_times_sort][:-1]  # this array is sorted in time
-                split_event_time_diff = float(self._cfg['split_event_time_diff'])
-                iSplit = np.atleast_1d(np.squeeze(np.argwhere(delta_start_times > split_event_time_diff)))
-#                 print(f"start times {start_times}")
-#                 print(f"sort array {start_times_sort}")
-#                 print(f"delta times {delta_start_times}")
-#                 print(f"split at indices {iSplit}")
-                n_sub_events = len(iSplit) + 1
-                if(n_sub_events > 1):
-                    logger.info(f"splitting event group id {self._event_group_id} into {n_sub_events} sub events")
-
-                tmp_station = copy.deepcopy(self._station)
-                event_group_has_triggered = False
-                for iEvent in range(n_sub_events):
-                    iStart = 0
-                    iStop = len(channel_identifiers)
-                    if(n_sub_events > 1):
-                        if(iEvent > 0):
-                            iStart = iSplit[iEvent - 1] + 1
-                    if(iEvent < n_sub_events - 1):
-                        iStop = iSplit[iEvent] + 1
-                    indices = start_times_sort[iStart: iStop]
-                    if(n_sub_events > 1):
-                        tmp = ""
-                        for start_time in start_times[indices]:
-                            tmp += f"{start_time/units.ns:.0f}, "
-                        tmp = tmp[:-2] + " ns"
-                        logger.info(f"creating event {iEvent} of event group {self._event_group_id} ranging rom {iStart} to {iStop} with indices {indices} corresponding to signal times of {tmp}")
-                    self._evt = NuRadioReco.framework.event.Event(self._event_group_id, iEvent)  # create new event
-
-                    if particle_mode:
-                        # add MC particles that belong to this (sub) event to event structure
-                        # add only primary for now, since full interaction chain is not typically in the input hdf5s
-                        self._evt.add_particle(self.primary)
-                    # copy over generator information from temporary event to event
-                    self._evt._generator_info = self._generator_info
-
-                    self._station = NuRadioReco.framework.station.Station(self._station_id)
-                    sim_station = NuRadioReco.framework.sim_station.SimStation(self._station_id)
-                    sim_station.set_is_neutrino()
-                    tmp_sim_station = tmp_station.get_sim_station()
-                    self._shower_ids_of_sub_event = []
-                    for iCh in indices:
-                        ch_uid = channel_identifiers[iCh]
-                        shower_id = ch_uid[1]
-                        if(shower_id not in self._shower_ids_of_sub_event):
-                            self._shower_ids_of_sub_event.append(shower_id)
-                        sim_station.add_channel(tmp_sim_station.get_channel(ch_uid))
-                        efield_uid = ([ch_uid[0]], ch_uid[1], ch_uid[2])  # the efield unique identifier has as first parameter an array of the channels it is valid for
-                        for efield in tmp_sim_station.get_electric_fields():
-                            if(efield.get_unique_identifier() == efield_uid):
-                                sim_station.add_electric_field(efield)
-
-                    if particle_mode:
-                        # add showers that contribute to this (sub) event to event structure
-                        for shower_id in self._shower_ids_of_sub_event:
-                            self._evt.add_sim_shower(self._evt_tmp.get_sim_shower(shower_id))
-                    self._station.set_sim_station(sim_station)
-                    self._station.set_station_time(self._evt_time)
-                    self._evt.set_station(self._station)
-                    if(bool(self._cfg['signal']['zerosignal'])):
-                        self._increase_signal(None, 0)
-
-                    logger.debug("performing detector simulation")
-                    if(hasattr(self, '_detector_simulation_part2')):
-                        # we give the user the opportunity to specify a custom detector simulation module sequence
-                        # which might be needed for certain analyses
-                        self._detector_simulation_part2()
-                    else:
-                        # start detector simulation
-                        efieldToVoltageConverter.run(self._evt, self._station, self._det)  # convolve efield with antenna pattern
-                        # downsample trace to internal simulation sampling rate (the efieldToVoltageConverter upsamples the trace to
-                        # 20 GHz by default to achive a good time resolution when the two signals from the two signal paths are added)
-                        channelResampler.run(self._evt, self._station, self._det, sampling_rate=1. / self._dt)
-
-                        if self._is_simulate_noise():
-                            max_freq = 0.5 / self._dt
-                            channel_ids = self._det.get_channel_ids(self._station.get_id())
-                            Vrms = {}
-                            for channel_id in channel_ids:
-                                norm = self._bandwidth_per_channel[self._station.get_id()][channel_id]
-                                Vrms[channel_id] = self._Vrms_per_channel[self._station.get_id()][channel_id] / (norm / (max_freq)) ** 0.5  # normalize noise level to the bandwidth its generated for
-                            channelGenericNoiseAdder.run(self._evt, self._station, self._det, amplitude=Vrms, min_freq=0 * units.MHz,
-                                                         max_freq=max_freq, type='rayleigh', excluded_channels=self._noiseless_channels[station_id])
-
-                        self._detector_simulation_filter_amp(self._evt, self._station, self._det)
-
-                        self._detector_simulation_trigger(self._evt, self._station, self._det)
-                    if(not self._station.has_triggered()):
+                    # start detector simulation
+                    self._efieldToVoltageConverter.run(self._evt, self._station, self._det)  # convolve efield with antenna pattern
+                    # downsample trace to internal simulation sampling rate (the efieldToVoltageConverter upsamples the trace to
+                    # 20 GHz by default to achive a good time resolution when the two signals from the two signal paths are added)
+                    self._channelResampler.run(self._evt, self._station, self._det, sampling_rate=1. / self._dt)
+
+                    if(self._trigger_feasibility_threshold is not None and not self._is_trigger_feasible()):
+                        # the station can not trigger on this sub event, hence, noise generation, filtering and
+                        # trigger simulation are skipped
+                        self._profile.count_skipped('trigger_feasibility_cut', self._station_id, self._get_profile_energy(self._primary_index))
                         continue
 
-                    event_group_has_triggered = True
-                    triggered_showers[self._station_id].extend(self._get_shower_index(self._shower_ids_of_sub_event))
-                    self._calculate_signal_properties()
-
-                    def find_indices(x, y):
-                        """
-                        finds the indices for the values `x` in array `y`
-
-                        modified from https://stackoverflow.com/questions/8251541/numpy-for-every-element-in-one-array-find-the-index-in-another-array
-                        the original solution returned a masked array which also indicated the elements in y that were
-                        not available in x. We don't need that. x will be always a subset of y, and we want only the
-                        indices in y for the subset x.
-
-                        Parameters
-                        ----------
-                        x: array
-                            the values for which the indices should be found
-                        y: array
-                            the larger array with many values
-
-                        Returns: array of integers
-                        """
-
-                        index = np.argsort(x)
-                        sorted_x = x[index]
-                        sorted_index = np.searchsorted(sorted_x, y)
-
-                        yindex = np.take(index, sorted_index, mode="clip")
-                        mask = x[yindex] != y
-                        result2 = yindex[~mask]
-                        return result2
-
-                    global_shower_indices = self._get_shower_index(self._shower_ids_of_sub_event)
-                    local_shower_index = find_indices(global_shower_indices, event_indices)
-                    self._save_triggers_to_hdf5(sg, local_shower_index, global_shower_indices)
-                    if(self._outputfilenameNuRadioReco is not None):
-                        # downsample traces to detector sampling rate to save file size
-                        channelResampler.run(self._evt, self._station, self._det, sampling_rate=self._sampling_rate_detector)
-                        channelResampler.run(self._evt, self._station.get_sim_station(), self._det, sampling_rate=self._sampling_rate_detector)
-                        electricFieldResampler.run(self._evt, self._station.get_sim_station(), self._det, sampling_rate=self._sampling_rate_detector)
-
-                        output_mode = {'Channels': self._cfg['output']['channel_traces'],
-                                       'ElectricFields': self._cfg['output']['electric_field_traces'],
-                                       'SimChannels': self._cfg['output']['sim_channel_traces'],
-                                       'SimElectricFields': self._cfg['output']['sim_electric_field_traces']}
-                        if self.__write_detector:
-                            self._eventWriter.run(self._evt, self._det, mode=output_mode)
-                        else:
-                            self._eventWriter.run(self._evt, mode=output_mode)
-                        logger.debug("WRITING EVENT!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-                # end sub events loop
-
-                # add local sg array to output data structure if any
-                if event_group_has_triggered:
-                    if(self._station_id not in self._mout_groups):
-                        self._mout_groups[self._station_id] = {}
-                    for key in sg:
-                        if(key not in self._mout_groups[self._station_id]):
-                            self._mout_groups[self._station_id][key] = list(sg[key])
-                        else:
-                            self._mout_groups[self._station_id][key].extend(sg[key])
+                    if self._is_simulate_noise():
+                        max_freq = 0.5 / self._dt
+                        channel_ids = self._det.get_channel_ids(self._station.get_id())
+                        Vrms = {}
+                        for channel_id in channel_ids:
+                            norm = self._bandwidth_per_channel[self._station.get_id()][channel_id]
+                            Vrms[channel_id] = self._Vrms_per_channel[self._station.get_id()][channel_id] / (norm / (max_freq)) ** 0.5  # normalize noise level to the bandwidth its generated for
+                        self._channelGenericNoiseAdder.run(self._evt, self._station, self._det, amplitude=Vrms, min_freq=0 * units.MHz,
+                                                           max_freq=max_freq, type='rayleigh', excluded_channels=self._noiseless_channels[self._station_id])
+
+                    self._detector_simulation_filter_amp(self._evt, self._station, self._det)
+
+                    self._detector_simulation_trigger(self._evt, self._station, self._det)
+                    self._profile.count_call('trigger_simulation', self._station_id, self._get_profile_energy(self._primary_index))
+                if(not self._station.has_triggered()):
+                    continue
 
-                detSimTime += time.time() - t1
+                event_group_has_triggered = True
+                triggered_showers[self._station_id].extend(self._get_shower_index(self._shower_ids_of_sub_event))
+                self._calculate_signal_properties()
+
+                def find_indices(x, y):
+                    """
+                    finds the indices for the values `x` in array `y`
+
+                    modified from https://stackoverflow.com/questions/8251541/numpy-for-every-element-in-one-array-find-the-index-in-another-array
+                    the original solution returned a masked array which also indicated the elements in y that were
+                    not available in x. We don't need that. x will be always a subset of y, and we want only the
+                    indices in y for the subset x.
+
+                    Parameters
+                    ----------
+                    x: array
+                        the values for which the indices should be found
+                    y: array
+                        the larger array with many values
+
+                    Returns: array of integers
+                    """
+
+                    index = np.argsort(x)
+                    sorted_x = x[index]
+                    sorted_index = np.searchsorted(sorted_x, y)
+
+                    yindex = np.take(index, sorted_index, mode="clip")
+                    mask = x[yindex] != y
+                    result2 = yindex[~mask]
+                    return result2
+
+                global_shower_indices = self._get_shower_index(self._shower_ids_of_sub_event)
+                local_shower_index = find_indices(global_shower_indices, event_indices)
+                self._save_triggers_to_hdf5(sg, local_shower_index, global_shower_indices)
+                if(self._outputfilenameNuRadioReco is not None):
+                    # downsample traces to detector sampling rate to save file size
+                    self._channelResampler.run(self._evt, self._station, self._det, sampling_rate=self._sampling_rate_detector)
+                    self._channelResampler.run(self._evt, self._station.get_sim_station(), self._det, sampling_rate=self._sampling_rate_detector)
+                    self._electricFieldResampler.run(self._evt, self._station.get_sim_station(), self._det, sampling_rate=self._sampling_rate_detector)
+
+                    self._write_nur_event(self._evt)
+            # end sub events loop
+
+            # add local sg array to output data structure if any
+            if event_group_has_triggered:
+                if(self._station_id not in self._mout_groups):
+                    self._mout_groups[self._station_id] = {}
+                for key in sg:
+                    if(key not in self._mout_groups[self._station_id]):
+                        self._mout_groups[self._station_id][key] = list(sg[key])
+                    else:
+                        self._mout_groups[self._station_id][key].extend(sg[key])
 
-            # end station loop
+            self._timing['detector_simulation'] += time.time() - t1
 
-        # end event group loop
+    def _get_profile_energy(self, shower_index):
+        """
+        returns the energy that is used to bin the profiling counters (the energy of the primary particle)
+        """
+        if('energies' in self._fin):
+            return self._fin['energies'][shower_index]
+        return None
 
-        # Create trigger structures if there are no triggering events.
-        # This is done to ensure that files with no triggering n_events
-        # merge properly.
-#         self._create_empty_multiple_triggers()
+    def _get_module_timing(self):
+        """
+        returns the accumulated run time of the detector simulation modules
 
-        # save simulation run in hdf5 format (only triggered events)
-        t5 = time.time()
-        self._write_output_file()
-        if(self._outputfilenameNuRadioReco is not None):
-            self._eventWriter.end()
-            logger.debug("closing nur file")
+        Returns
+        -------
+        OrderedDict with the module names as keys and the run time (in seconds) as values
+        """
+        module_timing = collections.OrderedDict()
+        for name, instance, kwargs in self._evt.iter_modules(self._station.get_id()):
+            module_timing[name] = instance.run.time[instance]
+        return module_timing
+
+    def _get_profile_kwargs(self, t_total=None):
+        """
+        collects the timing information and cache statistics that are stored together with the profiling counters
+        """
+        timing = collections.OrderedDict(self._timing)
+        if(t_total is not None):
+            timing['total'] = t_total
+        extra = {'askaryan_cache': {'calls': int(self._askaryan_cache.n_calls), 'hits': int(self._askaryan_cache.n_hits)},
+                 'n_showers': int(self._n_showers), 'n_stations': len(self._station_ids)}
+        return {'timing': timing, 'module_timing': self._get_module_timing(), 'extra': extra}
+
+    def _get_profile_json(self):
+        """
+        returns the profiling data (per-stage wall time, call counts, cache statistics and skipped simulations
+        per reason, station and energy decade) as json string which is saved as attribute of the hdf5 output file
+        """
+        return self._profile.to_json(**self._get_profile_kwargs(time.time() - self._t_start))
+
+    def _is_trigger_feasible(self):
+        """
+        checks if the noiseless signal of the current station could exceed the trigger threshold
+
+        The maximum amplitude of the signal after filters and amplifiers is estimated from the channel traces
+        (before noise is added) and the absolute value of the filter response that was determined in the dummy
+        detector simulation. The estimate is an upper bound, i.e. the sum of the absolute values of the filtered
+        frequency spectrum. The sub event is feasible if the estimate is larger than
+        (`trigger_feasibility_threshold` - `trigger_feasibility_margin`) x Vrms in any channel.
+
+        Returns
+        -------
+        bool
+        """
+        station_id = self._station.get_id()
+        for channel in self._station.iter_channels():
+            channel_id = channel.get_id()
+            trace = channel.get_trace()
+            n_samples = len(trace)
+            spectrum = np.abs(np.fft.rfft(trace))
+            spectrum *= np.interp(np.fft.rfftfreq(n_samples, 1. / channel.get_sampling_rate()), self._filter_frequencies,
+                                  self._filter_amplitude_per_channel[station_id][channel_id])
+            # all frequencies but the DC (and the Nyquist) component contribute twice to the inverse transformation
+            max_amplitude = (2 * np.sum(spectrum) - spectrum[0] - (spectrum[-1] if n_samples % 2 == 0 else 0)) / n_samples
+            if(max_amplitude >= (self._trigger_feasibility_threshold - self._trigger_feasibility_margin) * self._Vrms_per_channel[station_id][channel_id]):
+                return True
+        return False
+
+    def _get_event_group_seed(self, event_group_id, stream=0):
+        """
+        returns a reproducible random seed for an event group that is derived from the global seed
+
+        Parameters
+        ----------
+        event_group_id: int
+            the event group id
+        stream: int
+            different streams give independent seeds for the same event group (0: noise, 1: signal model)
+        """
+        entropy = [int(self._cfg['seed']), int(event_group_id)]
+        if(stream):
+            entropy.append(int(stream))
+        return np.random.SeedSequence(entropy).generate_state(1)[0]
+
+    def _log_progress(self, i_event_group_id):
+        """
+        prints the status of the simulation, at most once per minute
+        """
+        if(not self._report_progress or (time.time() - self._t_last_update) < 60 or self._iCounter == 0):
+            return
+        self._t_last_update = time.time()
+        eta = pretty_time_delta((time.time() - self._t_start) * (self._n_shower_station - self._iCounter) / self._iCounter)
+        total_time_sum = np.sum([self._timing[key] for key in ['input', 'ray_tracing', 'detector_simulation', 'output', 'weights', 'distance_cut']])  # askaryan time is part of the ray tracing time, so it is not counted here.
+        total_time = time.time() - self._t_start
+        if total_time > 0:
+            logger.status(
+                "processing event group {}/{} and shower {}/{} ({} showers triggered) = {:.1f}%, ETA {}, time consumption: ray tracing = {:.0f}%, askaryan = {:.0f}%, detector simulation = {:.0f}% reading input = {:.0f}%, calculating weights = {:.0f}%, distance cut {:.0f}%, unaccounted = {:.0f}% ".format(
+                    i_event_group_id,
+                    self._n_event_groups,
+                    self._iCounter,
+                    self._n_shower_station,
+                    np.sum(self._mout['triggered']),
+                    100. * self._iCounter / self._n_shower_station,
+                    eta,
+                    100. * (self._timing['ray_tracing'] - self._timing['askaryan']) / total_time,
+                    100. * self._timing['askaryan'] / total_time,
+                    100. * self._timing['detector_simulation'] / total_time,
+                    100. * self._timing['input'] / total_time,
+                    100. * self._timing['weights'] / total_time,
+                    100 * self._timing['distance_cut'] / total_time,
+                    100 * (total_time - total_time_sum) / total_time))
+
+    def _get_nur_output_mode(self):
+        return {'Channels': self._cfg['output']['channel_traces'],
+                'ElectricFields': self._cfg['output']['electric_field_traces'],
+                'SimChannels': self._cfg['output']['sim_channel_traces'],
+                'SimElectricFields': self._cfg['output']['sim_electric_field_traces']}
+
+    def _write_nur_event(self, evt):
+        """
+        writes an event to the nur output file, or adds the serialized event to the event buffer
+        if the event group is simulated in a worker process
+        """
+        output_mode = self._get_nur_output_mode()
+        if(self._nur_event_buffer is not None):
+            self._nur_event_buffer.append(evt.serialize(output_mode))
+            return
+        if self.__write_detector:
+            self._eventWriter.run(evt, self._det, mode=output_mode)
+        else:
+            self._eventWriter.run(evt, mode=output_mode)
+        logger.debug("WRITING EVENT!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
 
+    def _run_parallel(self, event_group_ids, n_workers):
+        """
+        distributes the event groups over a pool of forked worker processes and merges their output
+        in the order of the event groups
+
+        Parameters
+        ----------
+        event_group_ids: array of ints
+            the (unique) event group ids to simulate
+        n_workers: int
+            the number of worker processes
+        """
+        global _worker_simulation
+        # we use more chunks than workers to balance the load, the chunks are merged in order
+        chunk_size = int(np.ceil(len(event_group_ids) / (4. * n_workers)))
+        indexed_ids = list(enumerate(event_group_ids))[self._n_event_groups_done:]
+        chunks = [indexed_ids[i:i + chunk_size] for i in range(0, len(indexed_ids), chunk_size)]
+        logger.status(f"distributing {len(indexed_ids)} event groups in {len(chunks)} chunks to {n_workers} worker processes")
+        _worker_simulation = self
         try:
-            self.calculate_Veff()
-        except:
-            logger.error("error in calculating effective volume")
+            with multiprocessing.get_context('fork').Pool(n_workers) as pool:
+                for result in pool.imap(_simulate_event_groups_in_worker, chunks):
+                    self._merge_worker_output(result)
+                    self._event_groups_finished(result['simulated_event_group_ids'])
+                    self._log_progress(result['i_event_group_id'])
+        finally:
+            _worker_simulation = None
+
+    def _simulate_event_groups_in_worker(self, event_groups):
+        """
+        simulates a list of event groups in a worker process and returns the output of these event groups
 
-        t_total = time.time() - t_start
-        outputTime = time.time() - t5
+        Parameters
+        ----------
+        event_groups: list of tuples
+            list of (index, event group id)
 
-        output_NuRadioRecoTime = "Timing of NuRadioReco modules \n"
-        ts = []
-        for iM, (name, instance, kwargs) in enumerate(self._evt.iter_modules(self._station.get_id())):
-            ts.append(instance.run.time[instance])
-        ttot = np.sum(np.array(ts))
-        for i, (name, instance, kwargs) in enumerate(self._evt.iter_modules(self._station.get_id())):
-            t = pretty_time_delta(ts[i])
-            trel = 100.*ts[i] / ttot
-            output_NuRadioRecoTime += f"{name}: {t} {trel:.1f}%\n"
-        logger.status(output_NuRadioRecoTime)
+        Returns
+        -------
+        dict with the output of the simulated event groups
+        """
+        self._report_progress = False
+        self._nur_event_buffer = []
+        self._create_meta_output_datastructures()
+        self._mout_attrs = collections.OrderedDict()
+        for key in self._timing:
+            self._timing[key] = 0.0
+        self._iCounter = 0
+        self._profile.reset()
+        self._askaryan_cache.n_calls = 0
+        self._askaryan_cache.n_hits = 0
+        event_ids_counter = copy.copy(self._event_ids_counter)
+        for i_event_group_id, event_group_id in event_groups:
+            self._simulate_event_group(i_event_group_id, event_group_id)
+
+        event_group_ids = [event_group_id for i_event_group_id, event_group_id in event_groups]
+        shower_indices = np.flatnonzero(np.isin(self._fin['event_group_ids'], event_group_ids))
+        result = {'i_event_group_id': event_groups[-1][0],
+                  'simulated_event_group_ids': event_group_ids,
+                  'shower_indices': shower_indices,
+                  'mout': {key: value[shower_indices] for key, value in iteritems(self._mout)},
+                  'trigger_names': list(self._mout_attrs.get('trigger_names', [])),
+                  'mout_groups': self._mout_groups,
+                  'event_group_ids': self._output_event_group_ids,
+                  'sub_event_ids': self._output_sub_event_ids,
+                  'triggered_station': self._output_triggered_station,
+                  'multiple_triggers_station': self._output_multiple_triggers_station,
+                  'maximum_amplitudes': self._output_maximum_amplitudes,
+                  'maximum_amplitudes_envelope': self._output_maximum_amplitudes_envelope,
+                  'events': self._nur_event_buffer,
+                  'timing': self._timing,
+                  'askaryan_cache': (self._askaryan_cache.n_calls, self._askaryan_cache.n_hits),
+                  'n_processed': self._iCounter,
+                  'n_event_ids': {station_id: self._event_ids_counter[station_id] - event_ids_counter[station_id] for station_id in self._event_ids_counter},
+                  'profile': self._profile.get_counters()}
+        return result
+
+    def _merge_worker_output(self, result):
+        """
+        merges the output of the event groups simulated by a worker process into the output data structures
+        """
+        # the trigger names are added dynamically, so the order of the triggers can differ between workers
+        columns = []
+        if(len(result['trigger_names'])):
+            if('trigger_names' not in self._mout_attrs):
+                self._mout_attrs['trigger_names'] = []
+            for trigger_name in result['trigger_names']:
+                if(trigger_name not in self._mout_attrs['trigger_names']):
+                    self._mout_attrs['trigger_names'].append(trigger_name)
+            n_triggers = len(self._mout_attrs['trigger_names'])
+            if('multiple_triggers' not in self._mout):
+                self._mout['multiple_triggers'] = np.zeros((self._n_showers, n_triggers), dtype=np.bool)
+            elif(self._mout['multiple_triggers'].shape[1] < n_triggers):
+                tmp = np.zeros((self._n_showers, n_triggers), dtype=np.bool)
+                tmp[:, :self._mout['multiple_triggers'].shape[1]] = self._mout['multiple_triggers']
+                self._mout['multiple_triggers'] = tmp
+            columns = np.array([self._mout_attrs['trigger_names'].index(trigger_name) for trigger_name in result['trigger_names']], dtype=int)
+
+        def remap_triggers(values):
+            tmp = np.zeros(len(self._mout_attrs['trigger_names']), dtype=np.bool)
+            tmp[columns[:len(values)]] = values
+            return tmp
+
+        shower_indices = result['shower_indices']
+        for key, value in iteritems(result['mout']):
+            if(key == 'multiple_triggers'):
+                self._mout[key][shower_indices[:, np.newaxis], columns[np.newaxis, :]] = value
+                continue
+            if(key not in self._mout):
+                self._mout[key] = np.zeros((self._n_showers,) + value.shape[1:], dtype=value.dtype)
+            self._mout[key][shower_indices] = value
+
+        for station_id, sg in iteritems(result['mout_groups']):
+            if(station_id not in self._mout_groups):
+                self._mout_groups[station_id] = {}
+            for key, value in iteritems(sg):
+                if(key == 'multiple_triggers'):
+                    value = [remap_triggers(x) for x in value]
+                if(key not in self._mout_groups[station_id]):
+                    self._mout_groups[station_id][key] = list(value)
+                else:
+                    self._mout_groups[station_id][key].extend(value)
 
-        logger.status("{:d} events processed in {} = {:.2f}ms/event ({:.1f}% input, {:.1f}% ray tracing, {:.1f}% askaryan, {:.1f}% detector simulation, {:.1f}% output, {:.1f}% weights calculation)".format(self._n_showers,
-                                                                                         pretty_time_delta(t_total), 1.e3 * t_total / self._n_showers,
-                                                                                         100 * input_time / t_total,
-                                                                                         100 * (rayTracingTime - askaryan_time) / t_total,
-                                                                                         100 * askaryan_time / t_total,
-                                                                                         100 * detSimTime / t_total,
-                                                                                         100 * outputTime / t_total,
-                                                                                         100 * weightTime / t_total))
-        triggered = remove_duplicate_triggers(self._mout['triggered'], self._fin['event_group_ids'])
-        n_triggered = np.sum(triggered)
-        return n_triggered
+        for station_id in self._station_ids:
+            self._output_event_group_ids[station_id].extend(result['event_group_ids'][station_id])
+            self._output_sub_event_ids[station_id].extend(result['sub_event_ids'][station_id])
+            self._output_triggered_station[station_id].extend(result['triggered_station'][station_id])
+            self._output_multiple_triggers_station[station_id].extend([remap_triggers(x) for x in result['multiple_triggers_station'][station_id]])
+            self._output_maximum_amplitudes[station_id].extend(result['maximum_amplitudes'][station_id])
+            self._output_maximum_amplitudes_envelope[station_id].extend(result['maximum_amplitudes_envelope'][station_id])
+
+        if(self._outputfilenameNuRadioReco is not None):
+            for evt_pkl in result['events']:
+                evt = NuRadioReco.framework.event.Event(0, 0)
+                evt.deserialize(evt_pkl)
+                self._write_nur_event(evt)
+
+        for key, value in iteritems(result['timing']):
+            self._timing[key] += value
+        self._askaryan_cache.n_calls += result['askaryan_cache'][0]
+        self._askaryan_cache.n_hits += result['askaryan_cache'][1]
+        self._iCounter += result['n_processed']
+        for station_id, n_event_ids in iteritems(result['n_event_ids']):
+            self._event_ids_counter[station_id] += n_event_ids
+        self._profile.merge(result['profile'])
 
     def _calculate_emitter_output(self):
         pass
@@ -1132,26 +1593,14 @@ class simulation():
 
     def _read_input_hdf5(self):
         """
-        reads input file into memory
-        """
-        fin = h5py.File(self._inputfilename, 'r')
-        self._fin = {}
-        self._fin_stations = {}
-        self._fin_attrs = {}
-        for key, value in iteritems(fin):
-            if isinstance(value, h5py._hl.group.Group):
-                self._fin_stations[key] = {}
-                for key2, value2 in iteritems(value):
-                    self._fin_stations[key][key2] = np.array(value2)
-            else:
-                if len(value) and type(value[0]) == bytes:
-                    self._fin[key] = np.array(value).astype('U')
-                else:
-                    self._fin[key] = np.array(value)
-        for key, value in iteritems(fin.attrs):
-            self._fin_attrs[key] = value
+        opens the input file
 
-        fin.close()
+        The data sets are read when they are accessed for the first time. If `speedup/input_chunk_size` is set,
+        only a chunk of event groups is held in memory (see `input_reader.hdf5_input_reader`).
+        """
+        self._fin = input_reader.hdf5_input_reader(self._inputfilename, self._cfg['speedup'].get('input_chunk_size', None))
+        self._fin_stations = self._fin.stations
+        self._fin_attrs = self._fin.attrs
 
     def _check_vertex_times(self):
 
@@ -1378,7 +1827,39 @@ class simulation():
         # interaction chain is currently not populated in the input files.
         self._sim_shower[shp.parent_id] = self.primary.get_id()
 
+    def _get_saved_mask(self, shower_indices=None):
+        """
+        returns the mask of the showers that are saved to the hdf5 output file
+
+        Parameters
+        ----------
+        shower_indices: array of ints or None
+            if not None, the mask is only calculated for the showers with these indices
+        """
+        if shower_indices is None:
+            shower_indices = np.arange(self._n_showers)
+        # here we add the first interaction to the saved events
+        # if any of its children triggered
+
+        # Careful! saved should be a copy of the triggered array, and not
+        # a reference! saved indicates the interactions to be saved, while
+        # triggered should indicate if an interaction has produced a trigger
+        saved = np.copy(self._mout['triggered'][shower_indices])
+        if('n_interactions' in self._fin):  # if n_interactions is not specified, there are not parents
+            event_group_ids = self._fin['event_group_ids'][shower_indices]
+            parent_mask = self._fin['n_interaction'][shower_indices] == 1
+            for event_id in np.unique(event_group_ids):
+                event_mask = event_group_ids == event_id
+                if (True in saved[event_mask]):
+                    saved[parent_mask & event_mask] = True
+        return saved
+
     def _write_output_file(self, empty=False):
+        if(self._hdf5_flush_interval is not None and not empty):
+            # the data was already (partially) written to the output file, we only need to append the remaining
+            # event groups
+            self._flush_output_file()
+            return
         folder = os.path.dirname(self._outputfilename)
         if(not os.path.exists(folder) and folder != ''):
             logger.warning(f"output folder {folder} does not exist, creating folder...")
@@ -1386,19 +1867,7 @@ class simulation():
         fout = h5py.File(self._outputfilename, 'w')
 
         if not empty:
-            # here we add the first interaction to the saved events
-            # if any of its children triggered
-
-            # Careful! saved should be a copy of the triggered array, and not
-            # a reference! saved indicates the interactions to be saved, while
-            # triggered should indicate if an interaction has produced a trigger
-            saved = np.copy(self._mout['triggered'])
-            if('n_interactions' in self._fin):  # if n_interactions is not specified, there are not parents
-                parent_mask = self._fin['n_interaction'] == 1
-                for event_id in np.unique(self._fin['event_group_ids']):
-                    event_mask = self._fin['event_group_ids'] == event_id
-                    if (True in self._mout['triggered'][event_mask]):
-                        saved[parent_mask & event_mask] = True
+            saved = self._get_saved_mask()
 
             logger.status("start saving events")
             # save data sets
@@ -1413,26 +1882,53 @@ class simulation():
 
             # save "per event" quantities
             if('trigger_names' in self._mout_attrs):
-                n_triggers = len(self._mout_attrs['trigger_names'])
                 for station_id in self._mout_groups:
                     n_events_for_station = len(self._output_triggered_station[station_id])
                     if(n_events_for_station > 0):
-                        n_channels = self._det.get_number_of_channels(station_id)
                         sg = fout["station_{:d}".format(station_id)]
-                        sg['event_group_ids'] = np.array(self._output_event_group_ids[station_id])
-                        sg['event_ids'] = np.array(self._output_sub_event_ids[station_id])
-                        sg['maximum_amplitudes'] = np.array(self._output_maximum_amplitudes[station_id])
-                        sg['maximum_amplitudes_envelope'] = np.array(self._output_maximum_amplitudes_envelope[station_id])
-                        sg['triggered_per_event'] = np.array(self._output_triggered_station[station_id])
-
-                        # the multiple triggeres 2d array might have different number of entries per event
-                        # because the number of different triggers can increase dynamically
-                        # therefore we first create an array with the right size and then fill it
-                        tmp = np.zeros((n_events_for_station, n_triggers), dtype=np.bool)
-                        for iE, values in enumerate(self._output_multiple_triggers_station[station_id]):
-                            tmp[iE] = values
-                        sg['multiple_triggers_per_event'] = tmp
+                        for key, value in iteritems(self._get_per_event_output(station_id)):
+                            sg[key] = value
+
+            # now we also save all input parameters back into the out file
+            for key in self._fin.keys():
+                if(key.startswith("station_")):
+                    continue
+                if(not key in fout.keys()):  # only save data sets that havn't been recomputed and saved already
+                    value = np.asarray(self._fin[key][np.flatnonzero(saved)])
+                    if value.dtype.char == 'U':
+                        fout[key] = np.array(value, dtype=h5py.string_dtype(encoding='utf-8'))
+                    else:
+                        fout[key] = value
+
+        self._write_output_attributes(fout, empty)
+        fout.close()
 
+    def _get_per_event_output(self, station_id):
+        """
+        returns the "per event" quantities of a station as a dictionary of arrays
+        """
+        output = {}
+        n_triggers = len(self._mout_attrs['trigger_names'])
+        n_events_for_station = len(self._output_triggered_station[station_id])
+        output['event_group_ids'] = np.array(self._output_event_group_ids[station_id])
+        output['event_ids'] = np.array(self._output_sub_event_ids[station_id])
+        output['maximum_amplitudes'] = np.array(self._output_maximum_amplitudes[station_id])
+        output['maximum_amplitudes_envelope'] = np.array(self._output_maximum_amplitudes_envelope[station_id])
+        output['triggered_per_event'] = np.array(self._output_triggered_station[station_id])
+
+        # the multiple triggeres 2d array might have different number of entries per event
+        # because the number of different triggers can increase dynamically
+        # therefore we first create an array with the right size and then fill it
+        tmp = np.zeros((n_events_for_station, n_triggers), dtype=np.bool)
+        for iE, values in enumerate(self._output_multiple_triggers_station[station_id]):
+            tmp[iE, :len(values)] = values
+        output['multiple_triggers_per_event'] = tmp
+        return output
+
+    def _write_output_attributes(self, fout, empty=False):
+        """
+        writes the meta information (attributes) into the hdf5 output file
+        """
         # save meta arguments
         for (key, value) in iteritems(self._mout_attrs):
             fout.attrs[key] = value
@@ -1443,11 +1939,7 @@ class simulation():
         if not empty:
             # save antenna position separately to hdf5 output
             for station_id in self._mout_groups:
-                n_channels = self._det.get_number_of_channels(station_id)
-                positions = np.zeros((n_channels, 3))
-                for channel_id in range(n_channels):
-                    positions[channel_id] = self._det.get_relative_position(station_id, channel_id) + self._det.get_absolute_position(station_id)
-                fout["station_{:d}".format(station_id)].attrs['antenna_positions'] = positions
+                fout["station_{:d}".format(station_id)].attrs['antenna_positions'] = self._det.get_station_snapshot(station_id).absolute_positions
                 fout["station_{:d}".format(station_id)].attrs['Vrms'] = list(self._Vrms_per_channel[station_id].values())
                 fout["station_{:d}".format(station_id)].attrs['bandwidth'] = list(self._bandwidth_per_channel[station_id].values())
 
@@ -1456,6 +1948,9 @@ class simulation():
             fout.attrs.create("dt", self._dt, dtype=np.float)
             fout.attrs.create("bandwidth", self._bandwidth, dtype=np.float)
             fout.attrs['n_samples'] = self._n_samples
+            if(self._trigger_feasibility_threshold is not None):
+                fout.attrs['n_trigger_feasibility_cut'] = self._profile.get_total('trigger_feasibility_cut')
+            fout.attrs['profile'] = self._get_profile_json()
         fout.attrs['config'] = yaml.dump(self._cfg)
 
         # save NuRadioMC and NuRadioReco versions
@@ -1464,23 +1959,175 @@ class simulation():
         fout.attrs['NuRadioMC_version'] = NuRadioMC.__version__
         fout.attrs['NuRadioMC_version_hash'] = version.get_NuRadioMC_commit_hash()
 
-        if not empty:
-            # now we also save all input parameters back into the out file
-            for key in self._fin.keys():
-                if(key.startswith("station_")):
-                    continue
-                if(not key in fout.keys()):  # only save data sets that havn't been recomputed and saved already
-                    if np.array(self._fin[key]).dtype.char == 'U':
-                        fout[key] = np.array(self._fin[key], dtype=h5py.string_dtype(encoding='utf-8'))[saved]
-
-                    else:
-                        fout[key] = np.array(self._fin[key])[saved]
-
         for key in self._fin_attrs.keys():
             if(not key in fout.attrs.keys()):  # only save atrributes sets that havn't been recomputed and saved already
                 if(key not in ["trigger_names", "Tnoise", "Vrms", "bandwidth", "n_samples", "dt", "detector", "config"]):  # don't write trigger names from input to output file, this will lead to problems with incompatible trigger names when merging output files
                     fout.attrs[key] = self._fin_attrs[key]
-        fout.close()
+
+    def _event_groups_finished(self, event_group_ids):
+        """
+        bookkeeping of the simulated event groups, the output is appended to the hdf5 output file
+        every `output/hdf5_flush_interval` event groups
+
+        Parameters
+        ----------
+        event_group_ids: list of ints
+            the event group ids that were simulated
+        """
+        self._n_event_groups_done += len(event_group_ids)
+        if(self._hdf5_flush_interval is None):
+            return
+        self._unflushed_event_group_ids.extend(event_group_ids)
+        if(len(self._unflushed_event_group_ids) >= self._hdf5_flush_interval):
+            self._flush_output_file()
+            if(self._write_checkpoints):
+                self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        """
+        saves everything that is needed to continue the simulation after the last simulated event group
+
+        The checkpoint is written after the hdf5 output was flushed, so it only needs to contain the per shower
+        output, the random generator states and the bookkeeping of the output files.
+        """
+        hdf5_rows = {}
+        with h5py.File(self._outputfilename, 'r') as fout:
+            def get_rows(name, obj):
+                if isinstance(obj, h5py.Dataset):
+                    hdf5_rows[name] = obj.shape[0]
+            fout.visititems(get_rows)
+        checkpoint = {'n_event_groups_done': self._n_event_groups_done,
+                      'n_showers': self._n_showers,
+                      'config': self._cfg,
+                      'reseed_per_event_group': self._reseed_per_event_group,
+                      'mout': self._mout,
+                      'mout_attrs': self._mout_attrs,
+                      'event_ids_counter': self._event_ids_counter,
+                      'timing': self._timing,
+                      'iCounter': self._iCounter,
+                      'profile': self._profile,
+                      'noise_adder': self._channelGenericNoiseAdder,
+                      'numpy_random_state': np.random.get_state(),
+                      'askaryan_random_state': askaryan.get_random_state(self._cfg['signal']['model']),
+                      'hdf5_rows': hdf5_rows,
+                      'event_writer': None}
+        if(self._outputfilenameNuRadioReco is not None):
+            checkpoint['event_writer'] = self._eventWriter.get_checkpoint()
+        # write to a temporary file first so that an interruption does not corrupt the last checkpoint
+        tmp_filename = self._checkpoint_filename + ".tmp"
+        with open(tmp_filename, 'wb') as fout:
+            pickle.dump(checkpoint, fout, protocol=4)
+        os.replace(tmp_filename, self._checkpoint_filename)
+        logger.info(f"wrote checkpoint after {self._n_event_groups_done} event groups to {self._checkpoint_filename}")
+
+    def _resume_from_checkpoint(self):
+        """
+        restores the state of the simulation from the last checkpoint and removes everything from the output
+        files that was written after the checkpoint
+        """
+        with open(self._checkpoint_filename, 'rb') as fin:
+            checkpoint = pickle.load(fin)
+        # the seed might have been drawn randomly at the initialization, so we use the seed of the checkpoint
+        config = copy.deepcopy(self._cfg)
+        config['seed'] = checkpoint['config']['seed']
+        if(checkpoint['n_showers'] != self._n_showers or checkpoint['config'] != config):
+            msg = f"checkpoint {self._checkpoint_filename} was created with a different input file or configuration"
+            logger.error(msg)
+            raise ValueError(msg)
+        if(checkpoint['reseed_per_event_group'] != self._reseed_per_event_group):
+            msg = "the simulation needs to be resumed with `n_workers` set if (and only if) the interrupted simulation was run with `n_workers`"
+            logger.error(msg)
+            raise ValueError(msg)
+        self._cfg['seed'] = checkpoint['config']['seed']
+        self._n_event_groups_done = checkpoint['n_event_groups_done']
+        self._mout = checkpoint['mout']
+        self._mout_attrs = checkpoint['mout_attrs']
+        self._event_ids_counter = checkpoint['event_ids_counter']
+        self._timing = checkpoint['timing']
+        self._iCounter = checkpoint['iCounter']
+        self._profile = checkpoint['profile']
+        self._channelGenericNoiseAdder = checkpoint['noise_adder']
+        np.random.set_state(checkpoint['numpy_random_state'])
+        askaryan.set_random_state(self._cfg['signal']['model'], checkpoint['askaryan_random_state'])
+
+        # remove everything that was written to the hdf5 file after the checkpoint
+        hdf5_rows = checkpoint['hdf5_rows']
+        with h5py.File(self._outputfilename, 'a') as fout:
+            datasets = []
+            fout.visititems(lambda name, obj: datasets.append(name) if isinstance(obj, h5py.Dataset) else None)
+            for name in datasets:
+                if(name not in hdf5_rows):
+                    del fout[name]
+                elif(fout[name].shape[0] != hdf5_rows[name]):
+                    fout[name].resize(hdf5_rows[name], axis=0)
+        self._output_file_initialized = True
+        if(self._outputfilenameNuRadioReco is not None):
+            self._eventWriter.resume_from_checkpoint(checkpoint['event_writer'])
+        logger.status(f"resuming simulation from checkpoint after {self._n_event_groups_done} event groups")
+
+    def _flush_output_file(self):
+        """
+        appends the output of all event groups that were simulated since the last flush to the hdf5 output file
+
+        The per shower and per station data sets are stored in resizable, chunked data sets. The output file is
+        opened and closed for every flush, so that the file on disk is always a valid hdf5 file containing
+        all event groups up to the last flush. The per station output is removed from memory after the flush.
+        The event groups are expected to be sorted by the shower index in the input file (which is the case
+        for files created with the NuRadioMC event generator), then the final output file is identical to
+        the one written at the end of the simulation.
+        """
+        folder = os.path.dirname(self._outputfilename)
+        if(not os.path.exists(folder) and folder != ''):
+            logger.warning(f"output folder {folder} does not exist, creating folder...")
+            os.makedirs(folder)
+        shower_indices = np.flatnonzero(np.isin(self._fin['event_group_ids'], self._unflushed_event_group_ids))
+        logger.info(f"appending {len(self._unflushed_event_group_ids)} event groups to {self._outputfilename}")
+        mode = 'a' if self._output_file_initialized else 'w'
+        with h5py.File(self._outputfilename, mode) as fout:
+            self._output_file_initialized = True
+            saved = self._get_saved_mask(shower_indices)
+            saved_indices = shower_indices[saved]
+            n_rows_before = fout['triggered'].shape[0] if 'triggered' in fout else 0
+            keys_written = []
+            for (key, value) in iteritems(self._mout):
+                append_to_hdf5_dataset(fout, key, value[saved_indices], n_rows_before)
+                keys_written.append(key)
+            for key in self._fin.keys():
+                if(key.startswith("station_") or key in keys_written):
+                    continue
+                value = np.asarray(self._fin[key][saved_indices])
+                if value.dtype.char == 'U':
+                    value = np.array(value, dtype=h5py.string_dtype(encoding='utf-8'))
+                append_to_hdf5_dataset(fout, key, value, n_rows_before)
+
+            for station_id in self._mout_groups:
+                sg = fout.require_group("station_{:d}".format(station_id))
+                value = self._mout_groups[station_id]
+                if(len(value)):
+                    n_rows_before = sg['triggered'].shape[0] if 'triggered' in sg else 0
+                    triggered = np.array(value['triggered'])
+                    for (key2, value2) in iteritems(value):
+                        if(key2 == 'multiple_triggers'):
+                            # the number of triggers can increase dynamically
+                            tmp = np.zeros((len(value2), len(self._mout_attrs['trigger_names'])), dtype=np.bool)
+                            for iE, values in enumerate(value2):
+                                tmp[iE, :len(values)] = values
+                            value2 = tmp
+                        append_to_hdf5_dataset(sg, key2, np.array(value2)[triggered], n_rows_before)
+                if('trigger_names' in self._mout_attrs and len(self._output_triggered_station[station_id]) > 0):
+                    n_rows_before = sg['event_group_ids'].shape[0] if 'event_group_ids' in sg else 0
+                    for key, value in iteritems(self._get_per_event_output(station_id)):
+                        append_to_hdf5_dataset(sg, key, value, n_rows_before)
+                # remove the flushed output from memory
+                self._mout_groups[station_id] = {}
+                self._output_event_group_ids[station_id] = []
+                self._output_sub_event_ids[station_id] = []
+                self._output_triggered_station[station_id] = []
+                self._output_multiple_triggers_station[station_id] = []
+                self._output_maximum_amplitudes[station_id] = []
+                self._output_maximum_amplitudes_envelope[station_id] = []
+            self._write_output_attributes(fout)
+        self._unflushed_event_group_ids = []
 
     def calculate_Veff(self):
         # calculate effective
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+from NuRadioMC.SignalGen import askaryan
+from NuRadioReco.utilities import units
+import numpy as np
+from numpy import testing
+
+"""
+this unit test compares the Askaryan spectra obtained from the shower level cache against the
+directly calculated spectra, per frequency bin in amplitude and phase
+"""
+
+n_index = 1.78
+cherenkov_angle = np.arccos(1. / n_index)
+dt = 0.5 * units.ns
+n_samples = 256
+energy = 1e18 * units.eV
+
+
+def assert_spectra_equal(spectrum, reference, rtol):
+    # the phase is only defined for frequency bins with a significant amplitude
+    mask = np.abs(reference) > 1e-3 * np.abs(reference).max()
+    testing.assert_allclose(np.abs(spectrum), np.abs(reference), rtol=rtol, atol=1e-10 * np.abs(reference).max())
+    testing.assert_allclose(np.angle(spectrum[mask] * np.conj(reference[mask])), 0, atol=1e-6)
+
+
+for model in ['Alvarez2000', 'Alvarez2009']:
+    kwargs = {}
+    if(model == 'Alvarez2009'):
+        kwargs['k_L'] = 40.
+    cache = askaryan.frequency_spectrum_cache(tolerance=0.1 * units.deg, distance_tolerance=0.5)
+    # the first call fills the cache, the second one only differs in distance and is rescaled with 1/R
+    theta = cherenkov_angle + 1 * units.deg
+    for R in [1 * units.km, 1.3 * units.km]:
+        spectrum = cache.get_frequency_spectrum(energy, theta, n_samples, dt, "HAD", n_index, R, model, **kwargs)
+        reference = askaryan.get_frequency_spectrum(energy, theta, n_samples, dt, "HAD", n_index, R, model, **kwargs)
+        assert_spectra_equal(spectrum, reference, rtol=1e-10)
+    testing.assert_equal(cache.n_hits, 1)
+
+    # add a second viewing angle and interpolate in between
+    cache.get_frequency_spectrum(energy, theta + 0.1 * units.deg, n_samples, dt, "HAD", n_index, R, model, **kwargs)
+    theta2 = theta + 0.05 * units.deg
+    R2 = 1.1 * units.km
+    spectrum = cache.get_frequency_spectrum(energy, theta2, n_samples, dt, "HAD", n_index, R2, model, **kwargs)
+    reference = askaryan.get_frequency_spectrum(energy, theta2, n_samples, dt, "HAD", n_index, R2, model, **kwargs)
+    testing.assert_equal(cache.n_hits, 2)
+    assert_spectra_equal(spectrum, reference, rtol=1e-2)
+
+    # viewing angles outside of the tolerance are calculated
+    cache.get_frequency_spectrum(energy, theta + 1 * units.deg, n_samples, dt, "HAD", n_index, R, model, **kwargs)
+    testing.assert_equal(cache.n_hits, 2)
+
+    # distances outside of the distance tolerance are calculated
+    cache.get_frequency_spectrum(energy, theta, n_samples, dt, "HAD", n_index, 3 * units.km, model, **kwargs)
+    testing.assert_equal(cache.n_hits, 2)
+
+    # a new shower clears the cache
+    cache.reset()
+    cache.get_frequency_spectrum(energy, theta, n_samples, dt, "HAD", n_index, R, model, **kwargs)
+    testing.assert_equal(cache.n_hits, 2)
+    testing.assert_equal(cache.n_calls, 7)
+
+# the ARZ models are calculated in the near field, the cached spectrum is only reused for identical
+# viewing angles and distances
+cache = askaryan.frequency_spectrum_cache(tolerance=0.1 * units.deg)
+theta = cherenkov_angle + 1 * units.deg
+R = 1 * units.km
+for theta2, R2, n_hits in [[theta, R, 0], [theta, R, 1], [theta + 0.01 * units.deg, R, 1], [theta, 1.01 * R, 1]]:
+    spectrum = cache.get_frequency_spectrum(energy, theta2, n_samples, dt, "HAD", n_index, R2, 'ARZ2020', iN=10)
+    reference = askaryan.get_frequency_spectrum(energy, theta2, n_samples, dt, "HAD", n_index, R2, 'ARZ2020', iN=10)
+    testing.assert_equal(cache.n_hits, n_hits)
+    assert_spectra_equal(spectrum, reference, rtol=1e-10)
+
+print('U02unit_test_spectrum_cache passed without issues')
@@ -2,3 +2,4 @@
 
 set -e
 NuRadioMC/test/SignalGen/U01unit_test.py NuRadioMC/test/SignalGen/reference_v1.pkl
+NuRadioMC/test/SignalGen/U02unit_test_spectrum_cache.py
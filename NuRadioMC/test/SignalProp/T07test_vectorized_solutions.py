@@ -0,0 +1,57 @@
+import numpy as np
+import time
+from numpy import testing
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test compares the vectorized ray tracing interface `find_solutions_vectorized` against
+the results of the pair-by-pair interface
+"""
+
+ice = medium.southpole_simple()
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 50
+rmin = 50. * units.m
+rmax = 3. * units.km
+zmin = 0. * units.m
+zmax = -3. * units.km
+rr = np.random.triangular(rmin, rmax, rmax, n_events)
+phiphi = np.random.uniform(0, 2 * np.pi, n_events)
+xx = rr * np.cos(phiphi)
+yy = rr * np.sin(phiphi)
+zz = np.random.uniform(zmin, zmax, n_events)
+
+points = np.array([xx, yy, zz]).T
+# the first receiver is deeper than some of the vertices to also test the swapping of start and stop point
+x_receivers = np.array([[0., 0., -1500.], [0., 0., -5.], [10., 5., -100.]])
+
+r = ray.ray_tracing(ice)
+t_start = time.time()
+results = r.find_solutions_vectorized(points[:, None], x_receivers[None, :])
+t_vectorized = time.time() - t_start
+
+t_start = time.time()
+for iX, x in enumerate(points):
+    for iR, x_receiver in enumerate(x_receivers):
+        r.set_start_and_end_point(x, x_receiver)
+        r.find_solutions()
+        n = r.get_number_of_solutions()
+        testing.assert_equal(results['n_solutions'][iX, iR], n)
+        for iS in range(n):
+            testing.assert_equal(results['solution_type'][iX, iR, iS], r.get_solution_type(iS))
+            testing.assert_allclose(results['C0'][iX, iR, iS], r.get_results()[iS]['C0'], rtol=1e-6)
+            testing.assert_allclose(results['launch_vector'][iX, iR, iS], r.get_launch_vector(iS), rtol=1e-6, atol=1e-10)
+            testing.assert_allclose(results['receive_vector'][iX, iR, iS], r.get_receive_vector(iS), rtol=1e-6, atol=1e-10)
+            testing.assert_allclose(results['travel_distance'][iX, iR, iS], r.get_path_length(iS), rtol=1e-6)
+            testing.assert_allclose(results['travel_time'][iX, iR, iS], r.get_travel_time(iS), rtol=1e-6)
+        assert(np.all(np.isnan(results['C0'][iX, iR, n:])))
+t_loop = time.time() - t_start
+
+logger.info(f"vectorized: {t_vectorized:.2f}s, pair by pair: {t_loop:.2f}s")
+print('T07test_vectorized_solutions passed without issues')
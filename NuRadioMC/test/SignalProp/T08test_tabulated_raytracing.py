@@ -0,0 +1,56 @@
+import numpy as np
+import tempfile
+from numpy import testing
+from NuRadioMC.SignalProp import propagation
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioReco.utilities import units
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test creates a small ray tracing table and compares the interpolated solutions
+of the tabulated ray tracer with the analytic ray tracer, including the attenuation and the focusing
+"""
+
+ice = medium.southpole_simple()
+table_location = tempfile.mkdtemp()
+config = {'propagation': {'attenuate_ice': True, 'focusing': True, 'focusing_limit': 2,
+                          'tabulated': {'table_location': table_location,
+                                        'd_min': 100, 'd_max': 300, 'd_step': 10,
+                                        'z_min': -500, 'z_max': -100, 'z_step': 10,
+                                        'n_validation': 10}}}
+tabulated = propagation.get_propagation_module('tabulated')(ice, n_frequencies_integration=25, config=config)
+analytic = ray.ray_tracing(ice, n_frequencies_integration=25)
+x_receiver = np.array([0., 0., -50.])
+frequencies = np.linspace(50, 1000, 50) * units.MHz
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 20
+rr = np.random.uniform(120, 280, n_events)
+phiphi = np.random.uniform(0, 2 * np.pi, n_events)
+points = np.array([rr * np.cos(phiphi), rr * np.sin(phiphi), np.random.uniform(-480, -120, n_events)]).T
+
+for x in points:
+    tabulated.set_start_and_end_point(x, x_receiver)
+    tabulated.find_solutions()
+    analytic.set_start_and_end_point(x, x_receiver)
+    analytic.find_solutions()
+    testing.assert_equal(tabulated.get_number_of_solutions(), analytic.get_number_of_solutions())
+    for iS in range(analytic.get_number_of_solutions()):
+        testing.assert_equal(tabulated.get_solution_type(iS), analytic.get_solution_type(iS))
+        testing.assert_allclose(tabulated.get_travel_time(iS), analytic.get_travel_time(iS), atol=1 * units.ns)
+        testing.assert_allclose(tabulated.get_path_length(iS), analytic.get_path_length(iS), atol=0.2 * units.m)
+        testing.assert_allclose(tabulated.get_launch_vector(iS), analytic.get_launch_vector(iS), atol=1e-3)
+        testing.assert_allclose(tabulated.get_receive_vector(iS), analytic.get_receive_vector(iS), atol=1e-3)
+        # the attenuation is interpolated in distance, depth and frequency and agrees within a few percent
+        testing.assert_allclose(tabulated.get_attenuation(iS, frequencies), analytic.get_attenuation(iS, frequencies), rtol=3e-2)
+        testing.assert_allclose(tabulated.get_focusing(iS), analytic.get_focusing(iS), rtol=1e-3)
+    # requesting a solution that does not exist raises the same error for all getters
+    for getter in [tabulated.get_launch_vector, tabulated.get_focusing]:
+        testing.assert_raises(IndexError, getter, tabulated.get_number_of_solutions())
+
+logger.info(f"interpolation statistics {tabulated.get_interpolation_statistics()}")
+logger.info(f"interpolation error {tabulated.get_interpolation_error(x_receiver[2])}")
+print('T08test_tabulated_raytracing passed without issues')
@@ -0,0 +1,49 @@
+import numpy as np
+from numpy import testing
+from scipy import integrate
+from NuRadioMC.SignalProp import analyticraytracing as ray
+from NuRadioMC.utilities import medium
+from NuRadioMC.utilities import attenuation
+from NuRadioReco.utilities import units
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('test_raytracing')
+
+"""
+this unit test compares the vectorized Gauss-Legendre integration of the attenuation along the ray path
+against an adaptive integration with scipy.integrate.quad that is done for each frequency separately
+"""
+
+ice = medium.southpole_2015()
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 10
+rr = np.random.uniform(50 * units.m, 2.5 * units.km, n_events)
+zz = np.random.uniform(-2.7 * units.km, -10 * units.m, n_events)
+x_receiver = np.array([0., 0., -200. * units.m])
+frequencies = np.linspace(50 * units.MHz, 1 * units.GHz, 20)
+
+r = ray.ray_tracing(ice, attenuation_model="SP1")
+r2d = r._r2d
+for iE in range(n_events):
+    r.set_start_and_end_point(np.array([rr[iE], 0, zz[iE]]), x_receiver)
+    r.find_solutions()
+    for iS in range(r.get_number_of_solutions()):
+        C_0 = r.get_results()[iS]['C0']
+        x1 = np.array([0, min(zz[iE], x_receiver[2])])
+        x2 = np.array([rr[iE], max(zz[iE], x_receiver[2])])
+        x2_mirrored = r2d.get_z_mirrored(x1, x2, C_0)
+        gamma_turn, z_turn = r2d.get_turning_point(ice.n_ice ** 2 - C_0 ** -2)
+        points = None
+        if(x1[1] < z_turn and z_turn < x2_mirrored[1]):
+            points = [z_turn]
+
+        def dt(t, frequency):
+            z = r2d.get_z_unmirrored(t, C_0)
+            return r2d.ds(t, C_0) / attenuation.get_attenuation_length(z, frequency, "SP1")
+
+        reference = np.array([integrate.quad(dt, x1[1], x2_mirrored[1], args=(f,), epsrel=1e-8, points=points, limit=500)[0]
+                              for f in frequencies])
+        testing.assert_allclose(np.exp(-r2d.get_attenuation_integral(x1, x2, C_0, frequencies)), np.exp(-reference), rtol=1e-6)
+
+print('T09test_attenuation_integral passed without issues')
@@ -72,6 +72,8 @@ parser.add_argument('outputfilename', type=str,
                     help='hdf5 output filename')
 parser.add_argument('outputfilenameNuRadioReco', type=str, nargs='?', default=None,
                     help='outputfilename of NuRadioReco detector sim file')
+parser.add_argument('--n_workers', type=int, default=None,
+                    help='number of worker processes the event groups are distributed to')
 args = parser.parse_args()
 
 sim = mySimulation(inputfilename=args.inputfilename,
@@ -82,5 +84,5 @@ sim = mySimulation(inputfilename=args.inputfilename,
                             write_mode='mini',
                             default_detector_station=101,
                             file_overwrite=True)
-sim.run()
+sim.run(n_workers=args.n_workers)
 
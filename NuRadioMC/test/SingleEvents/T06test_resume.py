@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+from __future__ import absolute_import, division, print_function
+import argparse
+import glob
+import multiprocessing
+import os
+import h5py
+import numpy as np
+from numpy import testing
+import NuRadioReco.modules.efieldToVoltageConverter
+import NuRadioReco.modules.trigger.simpleThreshold
+import NuRadioReco.modules.channelBandPassFilter
+import NuRadioReco.modules.io.eventWriter
+import NuRadioReco.modules.io.NuRadioRecoio
+from NuRadioReco.utilities import units
+from NuRadioMC.simulation import simulation
+import logging
+logging.basicConfig(level=logging.WARNING)
+
+"""
+this test interrupts a simulation after a checkpoint was written, resumes it and compares the output against the
+output of an uninterrupted simulation
+
+The simulation is interrupted a few event groups after the last checkpoint, so that events that were written after
+the checkpoint need to be removed from the output files. The nur output is split into files of two events, and the
+nur files that were started after the checkpoint need to be removed. Every simulation runs in a new process so that
+all random number generators (e.g. of the Askaryan models) start from the same state.
+"""
+
+efieldToVoltageConverter = NuRadioReco.modules.efieldToVoltageConverter.efieldToVoltageConverter()
+efieldToVoltageConverter.begin()
+triggerSimulatorSimple = NuRadioReco.modules.trigger.simpleThreshold.triggerSimulator()
+channelBandPassFilter = NuRadioReco.modules.channelBandPassFilter.channelBandPassFilter()
+
+
+class smallFilesEventWriter(NuRadioReco.modules.io.eventWriter.eventWriter):
+
+    def begin(self, filename, **kwargs):
+        super().begin(filename, events_per_file=2, **kwargs)
+
+
+NuRadioReco.modules.io.eventWriter.eventWriter = smallFilesEventWriter
+
+
+class interruption(Exception):
+    pass
+
+
+class mySimulation(simulation.simulation):
+
+    def __init__(self, *args, interrupt_after=None, **kwargs):
+        self._interrupt_after = interrupt_after
+        super().__init__(*args, **kwargs)
+
+    def _detector_simulation_filter_amp(self, evt, station, det):
+        channelBandPassFilter.run(evt, station, det, passband=[80 * units.MHz, 500 * units.MHz],
+                                  filter_type='butter', order=2)
+
+    def _detector_simulation_trigger(self, evt, station, det):
+        triggerSimulatorSimple.run(evt, station, det,
+                                   threshold=3 * self._Vrms,
+                                   triggered_channels=None,
+                                   number_concidences=1,
+                                   trigger_name='simple_threshold')
+
+    def _event_groups_finished(self, event_group_ids):
+        super()._event_groups_finished(event_group_ids)
+        if(self._interrupt_after is not None and self._n_event_groups_done >= self._interrupt_after):
+            raise interruption()
+
+
+def run_simulation(outputfilename, interrupt_after=None, resume=False):
+    sim = mySimulation(inputfilename=args.inputfilename,
+                       outputfilename=outputfilename + ".hdf5",
+                       detectorfile=args.detectordescription,
+                       outputfilenameNuRadioReco=outputfilename + ".nur",
+                       config_file=args.config,
+                       write_mode='mini',
+                       default_detector_station=101,
+                       file_overwrite=True,
+                       resume=resume,
+                       interrupt_after=interrupt_after)
+    try:
+        sim.run()
+    except interruption:
+        pass
+
+
+def run_in_new_process(*args, **kwargs):
+    process = multiprocessing.get_context('fork').Process(target=run_simulation, args=args, kwargs=kwargs)
+    process.start()
+    process.join()
+    testing.assert_equal(process.exitcode, 0)
+
+
+def get_nur_files(filename):
+    return [filename + ".nur"] + sorted(glob.glob(filename + "_part*.nur"))
+
+
+parser = argparse.ArgumentParser(description='Test the resumption of an interrupted simulation')
+parser.add_argument('inputfilename', type=str,
+                    help='path to NuRadioMC input event list')
+parser.add_argument('detectordescription', type=str,
+                    help='path to file containing the detector description')
+parser.add_argument('config', type=str,
+                    help='NuRadioMC yaml config file with checkpoints enabled')
+parser.add_argument('outputfilename', type=str,
+                    help='output filename without file ending')
+args = parser.parse_args()
+
+reference = args.outputfilename + "_uninterrupted"
+resumed = args.outputfilename + "_resumed"
+for filename in glob.glob(reference + "*.nur") + glob.glob(resumed + "*.nur"):
+    os.remove(filename)
+
+run_in_new_process(reference)
+run_in_new_process(resumed, interrupt_after=10)
+assert os.path.exists(resumed + ".hdf5.checkpoint")
+# a nur file that was started after the checkpoint has to be removed when the simulation is resumed
+stale_filename = resumed + "_part99.nur"
+with open(stale_filename, 'wb') as fout:
+    fout.write(b'stale')
+run_in_new_process(resumed, resume=True)
+assert not os.path.exists(resumed + ".hdf5.checkpoint")
+assert not os.path.exists(stale_filename)
+
+with h5py.File(reference + ".hdf5", 'r') as fin1, h5py.File(resumed + ".hdf5", 'r') as fin2:
+    datasets = []
+    fin1.visititems(lambda name, obj: datasets.append(name) if isinstance(obj, h5py.Dataset) else None)
+    testing.assert_equal(len(datasets) > 0, True)
+    for name in datasets:
+        testing.assert_equal(np.array(fin2[name]), np.array(fin1[name]), err_msg=f"data set {name} differs")
+    testing.assert_equal(fin2.attrs['trigger_names'], fin1.attrs['trigger_names'])
+
+files_reference = get_nur_files(reference)
+files_resumed = get_nur_files(resumed)
+testing.assert_equal([os.path.basename(f)[len(os.path.basename(reference)):] for f in files_reference],
+                     [os.path.basename(f)[len(os.path.basename(resumed)):] for f in files_resumed])
+io_reference = NuRadioReco.modules.io.NuRadioRecoio.NuRadioRecoio(files_reference)
+io_resumed = NuRadioReco.modules.io.NuRadioRecoio.NuRadioRecoio(files_resumed)
+testing.assert_equal(io_resumed.get_n_events(), io_reference.get_n_events())
+for evt1, evt2 in zip(io_reference.get_events(), io_resumed.get_events()):
+    testing.assert_equal(evt2.get_id(), evt1.get_id())
+    testing.assert_equal(evt2.get_run_number(), evt1.get_run_number())
+    for station1, station2 in zip(evt1.get_stations(), evt2.get_stations()):
+        for channel1, channel2 in zip(station1.iter_channels(), station2.iter_channels()):
+            testing.assert_equal(channel2.get_trace(), channel1.get_trace())
+
+print('T06test_resume passed without issues')
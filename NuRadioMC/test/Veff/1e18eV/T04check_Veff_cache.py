@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+import numpy as np
+from numpy import testing
+import numbers
+import os
+import shutil
+import tempfile
+import NuRadioMC.utilities.Veff
+
+"""
+this test calculates the effective volume of the simulation output with and without the result cache of
+`get_Veff_Aeff`, and checks that only files that are new or were modified since the last call are read again
+"""
+
+path = os.path.dirname(os.path.abspath(__file__))
+folder = tempfile.mkdtemp()
+filenames = [os.path.join(folder, f"output{i:d}.hdf5") for i in range(2)]
+for filename in filenames:
+    shutil.copy(os.path.join(path, "output.hdf5"), filename)
+cache_file = os.path.join(folder, "veff_cache.json")
+
+# count the files that are read
+get_Veff_Aeff_single_file = NuRadioMC.utilities.Veff.get_Veff_Aeff_single_file
+files_read = []
+
+
+def counting_get_Veff_Aeff_single_file(filename, *args, **kwargs):
+    files_read.append(filename)
+    return get_Veff_Aeff_single_file(filename, *args, **kwargs)
+
+
+NuRadioMC.utilities.Veff.get_Veff_Aeff_single_file = counting_get_Veff_Aeff_single_file
+
+
+def assert_results_equal(result, reference):
+    if(isinstance(reference, dict)):
+        testing.assert_equal(sorted(result.keys()), sorted(reference.keys()))
+        for key in reference:
+            assert_results_equal(result[key], reference[key])
+    elif(isinstance(reference, (list, tuple))):
+        testing.assert_equal(len(result), len(reference))
+        for value, reference_value in zip(result, reference):
+            assert_results_equal(value, reference_value)
+    elif(isinstance(reference, numbers.Number) and not isinstance(reference, (bool, np.bool_))):
+        testing.assert_allclose(result, reference, rtol=1e-12)
+    else:
+        testing.assert_equal(result, reference)
+
+
+def get_Veff(cache_file=None):
+    del files_read[:]
+    return NuRadioMC.utilities.Veff.get_Veff_Aeff(folder, oversampling_theta=2, cache_file=cache_file)
+
+
+reference = get_Veff()
+testing.assert_equal(len(reference), 4)
+testing.assert_equal(sorted(files_read), filenames)
+
+# the first call fills the cache
+assert_results_equal(get_Veff(cache_file), reference)
+testing.assert_equal(sorted(files_read), filenames)
+testing.assert_equal(os.path.exists(cache_file), True)
+
+# the second call takes all results from the cache
+assert_results_equal(get_Veff(cache_file), reference)
+testing.assert_equal(files_read, [])
+
+# a modified file is read again
+stat = os.stat(filenames[1])
+os.utime(filenames[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+assert_results_equal(get_Veff(cache_file), reference)
+testing.assert_equal(files_read, [filenames[1]])
+assert_results_equal(get_Veff(cache_file), reference)
+testing.assert_equal(files_read, [])
+
+shutil.rmtree(folder)
+print('T04check_Veff_cache passed without issues')
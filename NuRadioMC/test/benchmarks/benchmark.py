@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+"""
+performance benchmarks of the NuRadioMC simulation chain and its hot kernels
+
+All benchmarks run on fixed synthetic inputs (fixed random seeds, analytic antenna models and a detector
+description that is generated on the fly), so that the results of different code versions are comparable.
+For every benchmark the throughput (e.g. events/s or solutions/s) and the peak memory (of the python
+allocations, measured with tracemalloc in a separate run) are reported.
+
+The results can be stored as json file and compared against a baseline (i.e. the json output of a previous
+run). Benchmarks whose throughput dropped or whose peak memory increased by more than the tolerance are
+flagged as regression and the script exits with a non-zero status.
+
+Examples
+--------
+python3 benchmark.py --output baseline.json
+python3 benchmark.py --baseline baseline.json --tolerance 0.2
+python3 benchmark.py --benchmarks ray_tracing askaryan --scale 0.5
+"""
+from __future__ import absolute_import, division, print_function
+import argparse
+import collections
+import datetime
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from NuRadioReco.utilities import units
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger("NuRadioMC.benchmark")
+
+benchmarks = collections.OrderedDict()
+
+
+def register(name):
+    """
+    decorator that adds a benchmark function to the list of available benchmarks
+    """
+    def decorator(func):
+        benchmarks[name] = func
+        return func
+    return decorator
+
+
+def measure(name, func, n_items, unit, repeat=3):
+    """
+    measures the run time and peak memory of a function
+
+    The run time is the minimum of `repeat` calls, the peak memory is measured in an additional call with
+    tracemalloc enabled (tracemalloc slows down the execution, hence, it is not enabled for the timing).
+
+    Parameters
+    ----------
+    name: string
+        the name of the benchmark
+    func: callable
+        the function that is benchmarked, called without arguments
+    n_items: int
+        the number of items (events, solutions, ...) that are processed in one call of `func`
+    unit: string
+        the name of the items, e.g. 'events'
+    repeat: int
+        the number of timed calls
+
+    Returns
+    -------
+    dict with the benchmark result
+    """
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    func()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t = min(times)
+    result = {'time': t, 'n_items': int(n_items), 'unit': unit,
+              'throughput': n_items / t if t > 0 else float('inf'),
+              'peak_memory': int(peak_memory)}
+    print("{:40s} {:10.4f}s {:12.1f} {}/s {:8.1f} MB".format(name, t, result['throughput'], unit, peak_memory / 1024 ** 2))
+    return result
+
+
+def get_detector_description(n_channels=8):
+    """
+    returns a detector description (in the json format of the NuRadioReco detector) of one station with
+    four surface LPDAs and a vertical string of deep antennas, using only analytic antenna models
+    """
+    station = {"station_id": 101, "pos_easting": 0, "pos_northing": 0, "pos_altitude": 0, "pos_site": "southpole",
+               "commission_time": "{TinyDate}:2017-11-04T00:00:00", "decommission_time": "{TinyDate}:2038-01-01T00:00:00"}
+    channels = {}
+    for channel_id in range(n_channels):
+        if(channel_id < 4):
+            # surface LPDAs pointing downwards
+            phi = 90 * channel_id
+            position = [3 * np.cos(np.deg2rad(phi)), 3 * np.sin(np.deg2rad(phi)), -1]
+            orientation = [180, 0, 90, phi]
+        else:
+            # vertical string of deep antennas spaced by 1m
+            position = [0, 0, -100 - (channel_id - 4)]
+            orientation = [0, 0, 90, 0]
+        channels[str(channel_id + 1)] = {
+            "station_id": 101, "channel_id": channel_id, "ant_type": "analytic_LPDA",
+            "ant_position_x": position[0], "ant_position_y": position[1], "ant_position_z": position[2],
+            "ant_orientation_theta": orientation[0], "ant_orientation_phi": orientation[1],
+            "ant_rotation_theta": orientation[2], "ant_rotation_phi": orientation[3],
+            "cab_time_delay": 0, "adc_n_samples": 512, "adc_sampling_frequency": 2.0, "adc_nbits": 8, "adc_noise_nbits": 3,
+            "amp_type": "100",
+            "commission_time": "{TinyDate}:2017-11-01T00:00:00", "decommission_time": "{TinyDate}:2038-01-01T00:00:00"}
+    return {"_default": {}, "stations": {"1": station}, "channels": channels}
+
+
+def get_detector(path):
+    """
+    writes the benchmark detector description to `path` and returns an updated detector object
+    """
+    from NuRadioReco.detector import detector
+    filename = os.path.join(path, "benchmark_detector.json")
+    with open(filename, 'w') as fout:
+        json.dump(get_detector_description(), fout)
+    det = detector.Detector(json_filename=filename, antenna_by_depth=False)
+    det.update(datetime.datetime(2018, 1, 1))
+    return det, filename
+
+
+def get_event_with_efields(det, n_samples=2048, sampling_rate=5 * units.GHz, seed=0):
+    """
+    creates an event with one station that contains one pulse-like electric field per channel
+    """
+    import NuRadioReco.framework.event
+    import NuRadioReco.framework.station
+    import NuRadioReco.framework.sim_station
+    import NuRadioReco.framework.electric_field
+    from NuRadioReco.framework.parameters import electricFieldParameters as efp
+    rnd = np.random.RandomState(seed)
+    evt = NuRadioReco.framework.event.Event(1, 1)
+    sim_station = NuRadioReco.framework.sim_station.SimStation(101)
+    sim_station.set_is_neutrino()
+    tt = np.arange(n_samples) / sampling_rate
+    for channel_id in det.get_channel_ids(101):
+        electric_field = NuRadioReco.framework.electric_field.ElectricField([channel_id], det.get_relative_position(101, channel_id))
+        trace = np.zeros_like(tt)
+        i0 = n_samples // 2 + rnd.randint(-50, 50)
+        trace[i0] = 1 * units.mV / units.m
+        trace[i0 + 1] = -1 * units.mV / units.m
+        electric_field.set_trace(np.array([np.zeros_like(tt), trace, 0.5 * trace]), sampling_rate)
+        electric_field.set_trace_start_time(0)
+        electric_field[efp.azimuth] = rnd.uniform(0, 2 * np.pi)
+        electric_field[efp.zenith] = rnd.uniform(90, 150) * units.deg
+        electric_field[efp.ray_path_type] = 'direct'
+        sim_station.add_electric_field(electric_field)
+    station = NuRadioReco.framework.station.Station(101)
+    station.set_sim_station(sim_station)
+    evt.set_station(station)
+    return evt, station
+
+
+def get_event_with_noise(det, n_samples=1024, sampling_rate=2 * units.GHz, Vrms=10 * units.mV, seed=0, event_id=1):
+    """
+    creates an event with one station whose channels contain white noise with a pulse in the middle
+    """
+    import NuRadioReco.framework.event
+    import NuRadioReco.framework.station
+    import NuRadioReco.framework.channel
+    rnd = np.random.RandomState(seed)
+    evt = NuRadioReco.framework.event.Event(1, event_id)
+    station = NuRadioReco.framework.station.Station(101)
+    for channel_id in det.get_channel_ids(101):
+        channel = NuRadioReco.framework.channel.Channel(channel_id)
+        trace = rnd.normal(0, Vrms, n_samples)
+        trace[n_samples // 2: n_samples // 2 + 4] += np.array([4, -4, 3, -3]) * Vrms
+        channel.set_trace(trace, sampling_rate)
+        station.add_channel(channel)
+    evt.set_station(station)
+    return evt, station
+
+
+@register("ray_tracing")
+def benchmark_ray_tracing(scale, tmp_dir):
+    from NuRadioMC.SignalProp import analyticraytracing as ray
+    from NuRadioMC.utilities import medium
+    ice = medium.southpole_simple()
+    rnd = np.random.RandomState(0)
+    n_events = max(1, int(100 * scale))
+    rr = rnd.triangular(50 * units.m, 3 * units.km, 3 * units.km, n_events)
+    phiphi = rnd.uniform(0, 2 * np.pi, n_events)
+    points = np.array([rr * np.cos(phiphi), rr * np.sin(phiphi), rnd.uniform(-3 * units.km, 0, n_events)]).T
+    x_receiver = np.array([0., 0., -100.])
+    r = ray.ray_tracing(ice)
+
+    def find_solutions():
+        n_solutions = 0
+        for x in points:
+            r.set_start_and_end_point(x, x_receiver)
+            r.find_solutions()
+            n_solutions += r.get_number_of_solutions()
+        return n_solutions
+
+    results = {}
+    cpp_available = ray.cpp_available
+    try:
+        ray.cpp_available = False
+        n_solutions = find_solutions()
+        results['ray_tracing_python'] = measure('ray_tracing_python', find_solutions, n_solutions, 'solutions')
+        if(cpp_available):
+            ray.cpp_available = True
+            results['ray_tracing_cpp'] = measure('ray_tracing_cpp', find_solutions, n_solutions, 'solutions')
+        else:
+            results['ray_tracing_cpp'] = {'skipped': 'C++ ray tracer is not available'}
+            print("{:40s} skipped (C++ ray tracer is not available)".format('ray_tracing_cpp'))
+    finally:
+        ray.cpp_available = cpp_available
+
+    results['ray_tracing_vectorized'] = measure('ray_tracing_vectorized',
+                                                lambda: r.find_solutions_vectorized(points[:, None], x_receiver[None, None]),
+                                                n_solutions, 'solutions')
+    return results
+
+
+@register("askaryan")
+def benchmark_askaryan(scale, tmp_dir):
+    from NuRadioMC.SignalGen import askaryan
+    rnd = np.random.RandomState(0)
+    n_spectra = max(1, int(100 * scale))
+    energies = 10 ** rnd.uniform(17, 19, n_spectra) * units.eV
+    theta = np.arccos(1. / 1.78) + rnd.uniform(-5, 5, n_spectra) * units.deg
+    results = {}
+    for model in ['ZHS1992', 'Alvarez2000', 'Alvarez2009', 'ARZ2020']:
+        name = f"askaryan_{model}"
+
+        def get_spectra():
+            for iS in range(n_spectra):
+                askaryan.get_frequency_spectrum(energies[iS], theta[iS], 2048, 0.2 * units.ns, "HAD", 1.78,
+                                                1 * units.km, model, seed=1234)
+        try:
+            askaryan.get_frequency_spectrum(energies[0], theta[0], 2048, 0.2 * units.ns, "HAD", 1.78, 1 * units.km, model, seed=1234)
+        except Exception as e:  # e.g. the shower library of the ARZ models can not be downloaded
+            results[name] = {'skipped': str(e)}
+            print("{:40s} skipped ({})".format(name, e))
+            continue
+        results[name] = measure(name, get_spectra, n_spectra, 'spectra')
+    return results
+
+
+@register("antenna_pattern")
+def benchmark_antenna_pattern(scale, tmp_dir, antenna_model='analytic_LPDA'):
+    from NuRadioReco.detector import antennapattern
+    rnd = np.random.RandomState(0)
+    n_directions = max(1, int(1000 * scale))
+    zeniths = rnd.uniform(0, np.pi, n_directions)
+    azimuths = rnd.uniform(0, 2 * np.pi, n_directions)
+    ff = np.fft.rfftfreq(2048, 0.2 * units.ns)
+    orientation = [180 * units.deg, 0, 90 * units.deg, 0]
+
+    def load():
+        if(antenna_model.startswith("analytic")):
+            return antennapattern.AntennaPatternAnalytic(antenna_model)
+        return antennapattern.AntennaPattern(antenna_model)
+
+    results = {}
+    results['antenna_pattern_load'] = measure('antenna_pattern_load', load, 1, 'patterns', repeat=1)
+    pattern = load()
+
+    def evaluate():
+        for iD in range(n_directions):
+            pattern.get_antenna_response_vectorized(ff, zeniths[iD], azimuths[iD], *orientation)
+
+    results['antenna_pattern_evaluation'] = measure('antenna_pattern_evaluation', evaluate, n_directions, 'directions')
+    results['antenna_pattern_evaluation_multiple_directions'] = measure(
+        'antenna_pattern_evaluation_multiple_directions',
+        lambda: pattern.get_antenna_response_multiple_directions(ff, zeniths, azimuths, *orientation),
+        n_directions, 'directions')
+    return results
+
+
+@register("efield_to_voltage")
+def benchmark_efield_to_voltage(scale, tmp_dir):
+    import NuRadioReco.modules.efieldToVoltageConverter
+    det, detector_file = get_detector(tmp_dir)
+    n_events = max(1, int(20 * scale))
+    events = [get_event_with_efields(det, seed=i) for i in range(n_events)]
+    converter = NuRadioReco.modules.efieldToVoltageConverter.efieldToVoltageConverter()
+    converter.begin()
+
+    def run():
+        for evt, station in events:
+            converter.run(evt, station, det)
+
+    return {'efield_to_voltage': measure('efield_to_voltage', run, n_events, 'events')}
+
+
+@register("trigger")
+def benchmark_trigger(scale, tmp_dir):
+    import NuRadioReco.modules.trigger.simpleThreshold
+    import NuRadioReco.modules.trigger.highLowThreshold
+    import NuRadioReco.modules.trigger.envelopeTrigger
+    import NuRadioReco.modules.phasedarray.triggerSimulator
+    det, detector_file = get_detector(tmp_dir)
+    n_events = max(1, int(100 * scale))
+    Vrms = 10 * units.mV
+    events = [get_event_with_noise(det, Vrms=Vrms, seed=i) for i in range(n_events)]
+    modules = collections.OrderedDict()
+    modules['trigger_simple_threshold'] = (NuRadioReco.modules.trigger.simpleThreshold.triggerSimulator(),
+                                           dict(threshold=3 * Vrms, number_concidences=1))
+    modules['trigger_high_low'] = (NuRadioReco.modules.trigger.highLowThreshold.triggerSimulator(),
+                                   dict(threshold_high=3 * Vrms, threshold_low=-3 * Vrms, triggered_channels=[0, 1, 2, 3],
+                                        number_concidences=2))
+    modules['trigger_envelope'] = (NuRadioReco.modules.trigger.envelopeTrigger.triggerSimulator(),
+                                   dict(passband=[80 * units.MHz, 500 * units.MHz], order=4, threshold=2 * Vrms,
+                                        coinc_window=30 * units.ns, number_coincidences=2))
+    modules['trigger_phased_array'] = (NuRadioReco.modules.phasedarray.triggerSimulator.triggerSimulator(),
+                                       dict(Vrms=Vrms, threshold=2 * Vrms ** 2, triggered_channels=[4, 5, 6, 7]))
+    results = {}
+    for name, (module, kwargs) in modules.items():
+
+        def run():
+            for evt, station in events:
+                module.run(evt, station, det, trigger_name=name, **kwargs)
+
+        results[name] = measure(name, run, n_events, 'events')
+    return results
+
+
+@register("io")
+def benchmark_io(scale, tmp_dir):
+    import NuRadioReco.modules.io.eventWriter
+    from NuRadioReco.modules.io import NuRadioRecoio
+    det, detector_file = get_detector(tmp_dir)
+    n_events = max(1, int(100 * scale))
+    events = [get_event_with_noise(det, seed=i, event_id=i + 1)[0] for i in range(n_events)]
+    filename = os.path.join(tmp_dir, "benchmark.nur")
+
+    def write():
+        writer = NuRadioReco.modules.io.eventWriter.eventWriter()
+        writer.begin(filename)
+        for evt in events:
+            writer.run(evt)
+        writer.end()
+
+    def read():
+        reader = NuRadioRecoio.NuRadioRecoio([filename])
+        n = 0
+        for evt in reader.get_events():
+            n += 1
+        reader.close_files()
+        return n
+
+    results = {}
+    results['io_write'] = measure('io_write', write, n_events, 'events')
+    results['io_read'] = measure('io_read', read, n_events, 'events')
+    return results
+
+
+@register("simulation")
+def benchmark_simulation(scale, tmp_dir):
+    import yaml
+    import NuRadioReco.modules.channelBandPassFilter
+    import NuRadioReco.modules.trigger.simpleThreshold
+    from NuRadioMC.simulation import simulation
+    from NuRadioMC.EvtGen.generator import generate_eventlist_cylinder
+    det, detector_file = get_detector(tmp_dir)
+    n_events = max(1, int(50 * scale))
+    input_file = os.path.join(tmp_dir, "benchmark_input.hdf5")
+    volume = {'fiducial_rmin': 0 * units.km, 'fiducial_rmax': 1 * units.km,
+              'fiducial_zmin': -1.5 * units.km, 'fiducial_zmax': 0 * units.km}
+    generate_eventlist_cylinder(input_file, n_events, 1e18 * units.eV, 1e19 * units.eV, volume, seed=1)
+    config_file = os.path.join(tmp_dir, "benchmark_config.yaml")
+    with open(config_file, 'w') as fout:
+        yaml.dump({'noise': False, 'propagation': {'ice_model': 'southpole_simple'},
+                   'signal': {'model': 'Alvarez2000'}, 'trigger': {'noise_temperature': 300},
+                   'weights': {'weight_mode': 'core_mantle_crust_simple'}}, fout)
+    channelBandPassFilter = NuRadioReco.modules.channelBandPassFilter.channelBandPassFilter()
+    triggerSimulator = NuRadioReco.modules.trigger.simpleThreshold.triggerSimulator()
+
+    class benchmarkSimulation(simulation.simulation):
+
+        def _detector_simulation_filter_amp(self, evt, station, det):
+            channelBandPassFilter.run(evt, station, det, passband=[80 * units.MHz, 500 * units.MHz],
+                                      filter_type='butter', order=4)
+
+        def _detector_simulation_trigger(self, evt, station, det):
+            triggerSimulator.run(evt, station, det, threshold=3 * self._Vrms, number_concidences=1)
+
+    def run():
+        sim = benchmarkSimulation(inputfilename=input_file, outputfilename=os.path.join(tmp_dir, "benchmark_output.hdf5"),
+                                  detectorfile=detector_file, config_file=config_file, file_overwrite=True)
+        sim.run()
+
+    return {'simulation': measure('simulation', run, n_events, 'events', repeat=1)}
+
+
+def compare(results, baseline, tolerance):
+    """
+    compares benchmark results with a baseline
+
+    Parameters
+    ----------
+    results: dict
+        the benchmark results
+    baseline: dict
+        the baseline results (same format as `results`)
+    tolerance: float
+        the allowed relative decrease of the throughput and increase of the peak memory
+
+    Returns
+    -------
+    list of strings, a description of every regression
+    """
+    regressions = []
+    for name, result in results.items():
+        if(name not in baseline or 'throughput' not in result or 'throughput' not in baseline[name]):
+            continue
+        ratio = result['throughput'] / baseline[name]['throughput']
+        if(ratio < 1 - tolerance):
+            regressions.append(f"{name}: throughput decreased to {ratio:.1%} of the baseline "
+                               f"({result['throughput']:.1f} vs. {baseline[name]['throughput']:.1f} {result['unit']}/s)")
+        if(baseline[name]['peak_memory'] > 0):
+            ratio_memory = result['peak_memory'] / baseline[name]['peak_memory']
+            if(ratio_memory > 1 + tolerance):
+                regressions.append(f"{name}: peak memory increased to {ratio_memory:.1%} of the baseline "
+                                   f"({result['peak_memory'] / 1024 ** 2:.1f} vs. {baseline[name]['peak_memory'] / 1024 ** 2:.1f} MB)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='run the NuRadioMC performance benchmarks')
+    parser.add_argument('--benchmarks', type=str, nargs='+', default=list(benchmarks.keys()), choices=list(benchmarks.keys()),
+                        help='the benchmarks that are run (default: all)')
+    parser.add_argument('--scale', type=float, default=1.,
+                        help='scales the size of the synthetic inputs (and with it the run time of the benchmarks)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='json file to which the results are written (can be used as baseline of a later run)')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='json file with the results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='the relative decrease of the throughput (or increase of the peak memory) that is flagged as regression')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="NuRadioMC_benchmark_")
+    results = collections.OrderedDict()
+    try:
+        for name in args.benchmarks:
+            results.update(benchmarks[name](args.scale, tmp_dir))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    import NuRadioMC
+    output = {'meta': {'date': datetime.datetime.now().isoformat(), 'NuRadioMC_version': NuRadioMC.__version__,
+                       'python_version': platform.python_version(), 'numpy_version': np.__version__,
+                       'platform': platform.platform(), 'processor': platform.processor(), 'scale': args.scale,
+                       'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024},
+              'results': results}
+    if(args.output is not None):
+        with open(args.output, 'w') as fout:
+            json.dump(output, fout, indent=2)
+        print(f"results written to {args.output}")
+
+    if(args.baseline is not None):
+        with open(args.baseline, 'r') as fin:
+            baseline = json.load(fin)
+        if(baseline['meta'].get('scale') != args.scale):
+            logger.warning(f"the baseline was measured with scale {baseline['meta'].get('scale')}, the comparison is not meaningful")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if(len(regressions)):
+            print("the following benchmarks show a regression compared to {}:\n{}".format(args.baseline, "\n".join(regressions)))
+            sys.exit(1)
+        print(f"no regression compared to {args.baseline} (tolerance {args.tolerance:.0%})")
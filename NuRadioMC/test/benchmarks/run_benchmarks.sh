@@ -0,0 +1,10 @@
+#!/bin/bash
+set -e
+# runs the performance benchmarks and compares them against a baseline if one is given as first argument, e.g.
+# ./NuRadioMC/test/benchmarks/run_benchmarks.sh baseline.json
+# the results are written to benchmark_results.json and can be used as baseline for later runs
+if [ -z "$1" ]; then
+    python3 NuRadioMC/test/benchmarks/benchmark.py --output benchmark_results.json
+else
+    python3 NuRadioMC/test/benchmarks/benchmark.py --output benchmark_results.json --baseline $1
+fi
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+from NuRadioMC.utilities import earth_attenuation
+from NuRadioReco.utilities import units
+from radiotools import helper as hp
+import numpy as np
+from numpy import testing
+
+"""
+this unit test compares the vectorized Earth absorption weights against the weights calculated event by event
+and the tabulated column densities against a fine integration of the Earth's density along the chord
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_events = 50
+zeniths = np.arccos(np.random.uniform(-1, 1, n_events))
+azimuths = np.random.uniform(0, 2 * np.pi, n_events)
+energies = 10 ** np.random.uniform(16, 20, n_events) * units.eV
+flavors = np.random.choice([-16, -14, -12, 12, 14, 16], n_events)
+vertices = np.array([np.random.uniform(-3 * units.km, 3 * units.km, n_events),
+                     np.random.uniform(-3 * units.km, 3 * units.km, n_events),
+                     np.random.uniform(-2.5 * units.km, 0, n_events)]).T
+
+for mode in ['simple', 'core_mantle_crust_simple', 'core_mantle_crust', 'PREM', 'None']:
+    weights = earth_attenuation.get_weight(zeniths, energies, flavors, mode=mode,
+                                           vertex_position=vertices, phi_nu=azimuths)
+    for i in range(n_events):
+        weight = earth_attenuation.get_weight(zeniths[i], energies[i], flavors[i], mode=mode,
+                                              vertex_position=vertices[i], phi_nu=azimuths[i])
+        testing.assert_allclose(weights[i], weight, rtol=1e-10)
+
+directions = hp.spherical_to_cartesian(zeniths, azimuths)
+for earth in [earth_attenuation.PREM(), earth_attenuation.CoreMantleCrustModel()]:
+    # only chords through the Earth are compared, very short chords are not resolved by the step size of the integration
+    mask = directions[:, 2] < -0.1
+    reference = earth.slant_depth(vertices[mask], directions[mask], step=10 * units.m)
+    testing.assert_allclose(earth.slant_depth_tabulated(vertices[mask], directions[mask]), reference, rtol=1e-4)
+    testing.assert_allclose(earth.slant_depth_tabulated(vertices[mask][0], directions[mask][0]), reference[0], rtol=1e-4)
+
+print('U01unit_test_earth_attenuation passed without issues')
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+from NuRadioMC.simulation import input_reader
+import numpy as np
+from numpy import testing
+import h5py
+import tempfile
+import os
+
+"""
+this unit test compares the data sets returned by the chunked input reader against the data sets of the
+input file that are read into memory at once
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_event_groups = 200
+event_group_ids = np.repeat(np.arange(n_event_groups) + 1, np.random.randint(1, 5, n_event_groups))
+n_showers = len(event_group_ids)
+data = {'event_group_ids': event_group_ids,
+        'shower_ids': np.arange(n_showers),
+        'xx': np.random.uniform(-1000, 1000, n_showers),
+        'shower_type': np.random.choice(['had', 'em'], n_showers)}
+launch_vectors = np.random.normal(size=(n_showers, 4, 2, 3))
+
+filename = os.path.join(tempfile.mkdtemp(), 'input.hdf5')
+with h5py.File(filename, 'w') as fout:
+    for key, value in data.items():
+        if value.dtype.char == 'U':
+            fout[key] = np.array(value, dtype=h5py.string_dtype(encoding='utf-8'))
+        else:
+            fout[key] = value
+    fout['station_101/launch_vectors'] = launch_vectors
+    fout.attrs['n_events'] = n_event_groups
+
+for chunk_size in [None, 1, 25]:
+    fin = input_reader.hdf5_input_reader(filename, chunk_size)
+    testing.assert_equal(fin.attrs['n_events'], n_event_groups)
+    testing.assert_equal(sorted(fin.keys()), sorted(data.keys()))
+    if chunk_size is not None:
+        # the chunks are aligned to the event groups
+        boundaries = fin.get_chunk_boundaries()
+        testing.assert_equal(boundaries[[0, -1]], [0, n_showers])
+        testing.assert_array_less(0, np.diff(boundaries))
+        testing.assert_equal(np.all(event_group_ids[boundaries[1:-1]] != event_group_ids[boundaries[1:-1] - 1]), True)
+    indices = np.random.permutation(n_showers)[:100]
+    for key, value in data.items():
+        testing.assert_equal(np.array(fin[key]), value)
+        testing.assert_equal(fin[key][indices], value[indices])
+        testing.assert_equal(fin[key][value == value[7]], value[value == value[7]])
+        for i in list(indices) + [-1]:
+            testing.assert_equal(fin[key][i], value[i])
+        for i_chunk in range(fin.get_number_of_chunks()):
+            start, stop = fin.get_chunk_range(i_chunk)
+            testing.assert_equal(fin.get_chunk(i_chunk, [key])[key], value[start:stop])
+    sg = fin.stations['station_101']['launch_vectors']
+    for i in indices:
+        testing.assert_equal(sg[i, 2], launch_vectors[i, 2])
+    testing.assert_equal(sg[indices, 1, 0], launch_vectors[indices, 1, 0])
+    fin.close()
+
+print('U02unit_test_input_reader passed without issues')
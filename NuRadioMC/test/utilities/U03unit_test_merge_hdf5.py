@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+from NuRadioMC.utilities import merge_hdf5
+import numpy as np
+from numpy import testing
+import h5py
+import tempfile
+import os
+
+"""
+this unit test merges output files, including files without triggered events and files with colliding event
+group ids, and compares the merged file against the result of the previous implementation that read all files
+into memory: the data sets of the files with triggered events are concatenated, colliding event group ids are
+replaced by new ids and the number of events is summed over all files
+"""
+
+tmp_dir = tempfile.mkdtemp()
+trigger_names = np.array(['simple_threshold', 'high_low'], dtype=h5py.string_dtype(encoding='utf-8'))
+
+
+def write_file(filename, n_events, event_group_ids, triggered, station_event_group_ids, start_event_id=0):
+    n_rows = len(event_group_ids)
+    with h5py.File(os.path.join(tmp_dir, filename), 'w') as fout:
+        fout.attrs['n_events'] = n_events
+        fout.attrs['start_event_id'] = start_event_id
+        fout.attrs['Emin'] = 1e18
+        if(n_rows):
+            # files without any events do not know the trigger names
+            fout.attrs['trigger_names'] = trigger_names
+        fout['event_group_ids'] = np.array(event_group_ids, dtype=int)
+        fout['triggered'] = np.array(triggered, dtype=bool)
+        fout['xx'] = start_event_id + np.arange(n_rows, dtype=float)
+        fout['multiple_triggers'] = np.ones((n_rows, 2), dtype=bool)
+        fout['shower_type'] = np.array(['had'] * n_rows, dtype=h5py.string_dtype(encoding='utf-8'))
+        if(n_rows):
+            n_station_rows = len(station_event_group_ids)
+            fout['station_101/event_group_ids'] = np.array(station_event_group_ids, dtype=int)
+            fout['station_101/maximum_amplitudes'] = start_event_id + np.arange(n_station_rows * 3, dtype=float).reshape(n_station_rows, 3)
+            fout['station_101'].attrs['Vrms'] = 1.
+    return os.path.join(tmp_dir, filename)
+
+
+file1 = write_file('file1.hdf5', 10, [0, 0, 1, 2], [True, False, True, True], [0, 1])
+file_empty = write_file('empty.hdf5', 5, [], [], [])
+file_not_triggered = write_file('not_triggered.hdf5', 7, [5], [False], [5], start_event_id=50)
+file2 = write_file('file2.hdf5', 10, [1, 1, 3], [True, True, False], [1, 3], start_event_id=100)
+
+for kwargs in [{}, {'chunk_size': 2, 'compression': None, 'n_readers': 2}]:
+    output_filename = os.path.join(tmp_dir, 'merged.hdf5')
+    if(os.path.exists(output_filename)):
+        os.remove(output_filename)
+    merge_hdf5.merge2([file1, file_empty, file_not_triggered, file2], output_filename, **kwargs)
+    with h5py.File(output_filename, 'r') as fin:
+        testing.assert_equal(fin.attrs['n_events'], 32)
+        testing.assert_equal(fin.attrs['start_event_id'], 0)
+        testing.assert_equal(fin.attrs['Emin'], 1e18)
+        testing.assert_equal(list(fin.attrs['trigger_names']), list(trigger_names))
+        testing.assert_equal(sorted(fin.keys()), ['event_group_ids', 'multiple_triggers', 'shower_type', 'station_101', 'triggered', 'xx'])
+        # the rows of the file without triggered events are skipped (the previous implementation appended rows of
+        # zeros instead). The event group id 1 of the second file collides with the first file and is replaced by 4
+        testing.assert_equal(fin['event_group_ids'][...], [0, 0, 1, 2, 4, 4, 3])
+        testing.assert_equal(fin['triggered'][...], [True, False, True, True, True, True, False])
+        testing.assert_equal(fin['xx'][...], [0, 1, 2, 3, 100, 101, 102])
+        testing.assert_equal(fin['multiple_triggers'].shape, (7, 2))
+        testing.assert_equal(fin['shower_type'].dtype, h5py.File(file1, 'r')['shower_type'].dtype)
+        testing.assert_equal(list(fin['shower_type'].asstr()[...]), ['had'] * 7)
+        testing.assert_equal(fin['station_101/event_group_ids'][...], [0, 1, 4, 3])
+        testing.assert_equal(fin['station_101/maximum_amplitudes'][...],
+                             np.append(np.arange(6.).reshape(2, 3), 100 + np.arange(6.).reshape(2, 3), axis=0))
+        testing.assert_equal(fin['station_101'].attrs['Vrms'], 1.)
+
+# if none of the files contains triggered events, the content of the first file is copied
+output_filename = os.path.join(tmp_dir, 'merged_empty.hdf5')
+merge_hdf5.merge2([file_empty, file_not_triggered], output_filename)
+with h5py.File(output_filename, 'r') as fin, h5py.File(file_empty, 'r') as fempty:
+    testing.assert_equal(fin.attrs['n_events'], 12)
+    testing.assert_equal(sorted(fin.keys()), sorted(fempty.keys()))
+    for key in fempty:
+        testing.assert_equal(fin[key].shape, fempty[key].shape)
+        testing.assert_equal(fin[key].dtype, fempty[key].dtype)
+
+print('U03unit_test_merge_hdf5 passed without issues')
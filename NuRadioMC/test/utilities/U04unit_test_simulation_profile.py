@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+from NuRadioMC.simulation import profiling
+from NuRadioReco.utilities import units
+import numpy as np
+from numpy import testing
+import tempfile
+import json
+import csv
+import os
+
+"""
+this unit test checks the counters of the simulation profile per station and energy decade, the combination of the
+profiles of two simulation runs as done when merging output files, and the json and csv sidecar files
+"""
+
+testing.assert_equal(profiling.get_energy_bin(3e18 * units.eV), '1e+18')
+testing.assert_equal(profiling.get_energy_bin(1e18 * units.eV), '1e+18')
+testing.assert_equal(profiling.get_energy_bin(9.9e19 * units.eV), '1e+19')
+for energy in [None, 0, -1, np.nan]:
+    testing.assert_equal(profiling.get_energy_bin(energy), 'all')
+
+profile1 = profiling.simulation_profile()
+profile1.count_call('ray_tracing', 101, 3e18 * units.eV)
+profile1.count_call('ray_tracing', 101, 5e18 * units.eV, n=3)
+profile1.count_call('ray_tracing', 102, 2e19 * units.eV)
+profile1.count_call('askaryan', 101, 3e18 * units.eV, n=0)
+profile1.count_skipped('distance_cut', 101, 3e18 * units.eV, n=2)
+profile1.count_skipped('weight_cut')
+testing.assert_equal(profile1.get_counters(), {
+    'calls': {'ray_tracing': {'101': {'1e+18': 4}, '102': {'1e+19': 1}}},
+    'skipped': {'distance_cut': {'101': {'1e+18': 2}}, 'weight_cut': {'all': {'all': 1}}}})
+testing.assert_equal(profile1.get_total('ray_tracing', kind='calls'), 5)
+testing.assert_equal(profile1.get_total('distance_cut'), 2)
+testing.assert_equal(profile1.get_total('askaryan', kind='calls'), 0)
+testing.assert_equal(profile1.get_total('delta_C_cut'), 0)
+
+profile2 = profiling.simulation_profile()
+profile2.count_call('ray_tracing', 101, 2e18 * units.eV, n=2)
+profile2.count_call('askaryan', 101, 2e18 * units.eV)
+profile2.count_skipped('distance_cut', 102, 1e17 * units.eV)
+
+# merging the counters of a worker, as object or as dictionary
+merged = profiling.simulation_profile()
+merged.merge(profile1)
+merged.merge(profile2.get_counters())
+expected_counters = {
+    'calls': {'ray_tracing': {'101': {'1e+18': 6}, '102': {'1e+19': 1}}, 'askaryan': {'101': {'1e+18': 1}}},
+    'skipped': {'distance_cut': {'101': {'1e+18': 2}, '102': {'1e+17': 1}}, 'weight_cut': {'all': {'all': 1}}}}
+testing.assert_equal(merged.get_counters(), expected_counters)
+testing.assert_equal(profile1.get_total('ray_tracing', kind='calls'), 5)
+
+# combining the profiling data of two simulation runs
+json1 = profile1.to_json(timing={'ray_tracing': 1.5, 'total': 3.}, module_timing={'triggerSimulator': 0.5},
+                         extra={'askaryan_cache': {'calls': 4, 'hits': 1}, 'n_showers': 10, 'n_stations': 2})
+json2 = profile2.to_json(timing={'ray_tracing': 0.5, 'askaryan': 1., 'total': 2.},
+                         extra={'askaryan_cache': {'calls': 2, 'hits': 2}, 'n_showers': 5, 'n_stations': 2})
+combined = json.loads(profiling.merge_profiles(json1, json2))
+testing.assert_equal(combined['timing'], {'ray_tracing': 2., 'total': 5., 'askaryan': 1.})
+testing.assert_equal(combined['module_timing'], {'triggerSimulator': 0.5})
+testing.assert_equal(combined['calls'], expected_counters['calls'])
+testing.assert_equal(combined['skipped'], expected_counters['skipped'])
+testing.assert_equal(combined['askaryan_cache'], {'calls': 6, 'hits': 3})
+testing.assert_equal(combined['n_showers'], 15)
+
+# sidecar files
+output_directory = tempfile.mkdtemp()
+kwargs = {'timing': {'ray_tracing': 1.5}, 'module_timing': {'triggerSimulator': 0.5}, 'extra': {'n_showers': 10}}
+profile1.write(os.path.join(output_directory, 'profile.json'), **kwargs)
+with open(os.path.join(output_directory, 'profile.json'), 'r') as fin:
+    testing.assert_equal(json.load(fin), json.loads(profile1.to_json(**kwargs)))
+profile1.write(os.path.join(output_directory, 'profile.csv'), file_format='csv', **kwargs)
+with open(os.path.join(output_directory, 'profile.csv'), 'r', newline='') as fin:
+    rows = list(csv.reader(fin))
+testing.assert_equal(rows[0], ['category', 'name', 'station_id', 'energy_bin', 'value'])
+testing.assert_equal(sorted(rows[1:]), sorted([
+    ['timing', 'ray_tracing', 'all', 'all', '1.5'],
+    ['module_timing', 'triggerSimulator', 'all', 'all', '0.5'],
+    ['calls', 'ray_tracing', '101', '1e+18', '4'],
+    ['calls', 'ray_tracing', '102', '1e+19', '1'],
+    ['skipped', 'distance_cut', '101', '1e+18', '2'],
+    ['skipped', 'weight_cut', 'all', 'all', '1'],
+    ['n_showers', '', 'all', 'all', '10']]))
+testing.assert_raises(ValueError, profile1.write, os.path.join(output_directory, 'profile.txt'), file_format='txt')
+
+profile1.reset()
+testing.assert_equal(profile1.get_counters(), {'calls': {}, 'skipped': {}})
+
+print('U04unit_test_simulation_profile passed without issues')
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+from NuRadioMC.simulation import simulation
+from NuRadioMC.simulation import input_reader
+from NuRadioReco.utilities import units
+import numpy as np
+from numpy import testing
+import h5py
+import tempfile
+import os
+
+"""
+this unit test checks that the candidate stations of the distance cut, which are obtained from a KD-tree of the
+station bary centers, are the same as the stations selected by comparing the distances of all showers and stations,
+including stations that are exactly at the cut radius, for an input file that is read at once and in chunks
+"""
+
+np.random.seed(0)  # set seed to have reproducible results
+n_event_groups = 50
+distance_cut_sum_length = 200 * units.m
+event_group_ids = np.repeat(np.arange(n_event_groups) + 1, np.random.randint(1, 5, n_event_groups))
+n_showers = len(event_group_ids)
+# the positions are integer multiples of a metre so that the distances at the cut radius are exact
+data = {'event_group_ids': event_group_ids,
+        'shower_energies': 10 ** np.random.uniform(15, 19, n_showers) * units.eV,
+        'xx': np.random.randint(-5000, 5000, n_showers) * units.m,
+        'yy': np.random.randint(-5000, 5000, n_showers) * units.m,
+        'zz': np.random.randint(-2500, 0, n_showers) * units.m}
+filename = os.path.join(tempfile.mkdtemp(), 'input.hdf5')
+with h5py.File(filename, 'w') as fout:
+    for key, value in data.items():
+        fout[key] = value
+    fout.attrs['n_events'] = n_event_groups
+
+
+def get_distance_cut(shower_energy):
+    return max(100 * units.m, 500 * units.m * (np.floor(np.log10(shower_energy / units.eV)) - 15))
+
+
+_, event_group_index = np.unique(event_group_ids, return_inverse=True)
+event_group_shower_indices = np.split(np.argsort(event_group_index, kind='stable'), np.cumsum(np.bincount(event_group_index))[:-1])
+vertex_positions = np.array([data['xx'], data['yy'], data['zz']]).T
+cut_radius = np.array([get_distance_cut(np.sum(data['shower_energies'][shower_indices])) + 100 * units.m
+                       for shower_indices in event_group_shower_indices])
+
+# stations on a regular grid, and stations exactly at and 1m beyond the cut radius of a shower of some event groups
+station_positions = [[x, y, 0] for x in np.arange(-4000, 4001, 2000) for y in np.arange(-4000, 4001, 2000)]
+for i_event_group in range(0, n_event_groups, 5):
+    shower_index = np.random.choice(event_group_shower_indices[i_event_group])
+    radius = cut_radius[i_event_group]
+    station_positions.append(vertex_positions[shower_index] + np.array([0.6, 0.8, 0]) * radius)
+    station_positions.append(vertex_positions[shower_index] + np.array([0, 0, radius]))
+    station_positions.append(vertex_positions[shower_index] - np.array([radius + 1 * units.m, 0, 0]))
+station_positions = np.array(station_positions)
+testing.assert_equal(station_positions, np.round(station_positions))
+
+# plain distance comparison of all showers and stations as done before the KD-tree was used
+reference_candidates = []
+n_at_cut_radius = 0
+for i_event_group, shower_indices in enumerate(event_group_shower_indices):
+    distances = np.linalg.norm(vertex_positions[shower_indices][:, None] - station_positions[None], axis=2).min(axis=0)
+    reference_candidates.append(np.flatnonzero(distances <= cut_radius[i_event_group]))
+    n_at_cut_radius += np.sum(distances == cut_radius[i_event_group])
+testing.assert_array_less(n_event_groups // 5, n_at_cut_radius)
+reference_shower_distance_cuts = np.zeros(n_showers)
+for shower_indices in event_group_shower_indices:
+    vertex_distances = np.linalg.norm(vertex_positions[shower_indices] - vertex_positions[shower_indices[0]], axis=1)
+    for iSh, shower_index in enumerate(shower_indices):
+        mask = np.abs(vertex_distances - vertex_distances[iSh]) < distance_cut_sum_length
+        reference_shower_distance_cuts[shower_index] = get_distance_cut(np.sum(data['shower_energies'][shower_indices][mask]))
+
+for fin in [data] + [input_reader.hdf5_input_reader(filename, chunk_size) for chunk_size in [None, 1, 7]]:
+    sim = simulation.simulation.__new__(simulation.simulation)
+    sim._cfg = {'speedup': {'distance_cut': True, 'distance_cut_sum_length': distance_cut_sum_length}}
+    sim._fin = fin
+    sim._n_showers = n_showers
+    sim._event_group_shower_indices = event_group_shower_indices
+    sim._station_ids = np.arange(len(station_positions)) + 101
+    sim._station_barycenter = station_positions
+    sim._get_distance_cut = get_distance_cut
+    sim._timing = {'distance_cut': 0.0}
+    sim._calculate_candidate_stations()
+    testing.assert_equal(len(sim._candidate_station_indices), n_event_groups)
+    for candidates, reference in zip(sim._candidate_station_indices, reference_candidates):
+        testing.assert_equal(candidates, reference)
+    testing.assert_allclose(sim._shower_distance_cuts, reference_shower_distance_cuts, rtol=1e-12)
+
+    # without the distance cut, all stations are simulated
+    sim._cfg['speedup']['distance_cut'] = False
+    sim._calculate_candidate_stations()
+    testing.assert_equal(sim._candidate_station_indices, None)
+
+print('U05unit_test_candidate_stations passed without issues')
@@ -0,0 +1,8 @@
+#!/bin/bash
+
+set -e
+NuRadioMC/test/utilities/U01unit_test_earth_attenuation.py
+NuRadioMC/test/utilities/U02unit_test_input_reader.py
+NuRadioMC/test/utilities/U03unit_test_merge_hdf5.py
+NuRadioMC/test/utilities/U04unit_test_simulation_profile.py
+NuRadioMC/test/utilities/U05unit_test_candidate_stations.py
@@ -7,6 +7,8 @@ from six import iteritems
 import json
 import os
 import copy
+import hashlib
+import collections
 import time
 
 from NuRadioReco.utilities import units
@@ -150,6 +152,26 @@ def get_Veff_water_equivalent(Veff, density_medium=0.917 * units.g / units.cm **
     return Veff * density_medium / density_water
 
 
+def _get_Veff_Aeff_values(volume_proj_area, n_events, weights, efficiency=None):
+    """
+    returns the effective volume (or area), its uncertainty, the weighted sum of triggered events
+    and the lower and upper 68% limits for the weights of the triggered events
+    """
+    weighted_sum = np.sum(weights)
+    if(efficiency is None):
+        efficiency_sum = weighted_sum
+    else:
+        efficiency_sum = np.sum(weights * efficiency)
+    Veff = volume_proj_area * efficiency_sum / n_events
+    Veff_error = 0
+    if(weighted_sum > 0):
+        Veff_error = Veff / efficiency_sum ** 0.5
+    FC_low, FC_high = FC_limits(efficiency_sum)
+    Veff_low = volume_proj_area * FC_low / n_events
+    Veff_high = volume_proj_area * FC_high / n_events
+    return [Veff, Veff_error, weighted_sum, Veff_low, Veff_high]
+
+
 def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff="veff", bounds_theta=[0, np.pi]):
     """
     calculates the effective volume or effective area from surface muons from a single NuRadioMC hdf5 file
@@ -174,7 +196,7 @@ def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_co
 
         * 'efficiency': dict
             allows to apply an (analysis) efficiency cut for calculating effective volumes
-            
+
             * 'func': function
                 a function that paramaterized the efficiency as a function of SNR (=Vmax/Vrms)
             * 'channel_ids': array on ints
@@ -199,174 +221,210 @@ def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_co
         restrict theta to sub-range wrt. the simulated range in the file
         Note: assumes events were simulated uniformly in cos(theta)
         bounds_theta should be a (two-item) list, but will care only about the min/max values
-    
+
     Returns
     ----------
     list of dictionaries
         Each file is one entry. The dictionary keys store all relevant properties
     """
+    return get_Veff_Aeff_single_file(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station,
+                                     veff_aeff=veff_aeff, bounds_thetas=[bounds_theta])[0]
+
+
+def get_Veff_Aeff_single_file(filename, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff="veff",
+                              oversampling_theta=1, bounds_thetas=None):
+    """
+    calculates the effective volume or effective area from surface muons from a single NuRadioMC hdf5 file for
+    several zenith angle bins
+
+    The file is read only once, and only the data sets that are needed for the requested trigger combinations are read.
+    The triggered events of all triggers and trigger combinations are determined once and then summed up for all
+    zenith angle bins. See `get_Veff_Aeff_single` for a description of the parameters.
+
+    Parameters
+    ----------
+    oversampling_theta: int
+        the number of equal-size cos(theta) bins within thetamin/max of the input file, only used if `bounds_thetas` is None
+    bounds_thetas: list of lists of floats or None
+        the theta ranges the effective volume is calculated for (see `bounds_theta` of `get_Veff_Aeff_single`)
+
+    Returns
+    -------
+    list of dictionaries
+        one entry per theta range
+    """
     if(veff_aeff not in ["veff", "aeff_surface_muons"]):
         raise AttributeError(f"the paramter `veff_aeff` needs to be one of either `veff` or `aeff_surface_muons`")
     logger.warning(f"processing file  {filename}")
-    fin = h5py.File(filename, 'r')
-    n_events = fin.attrs['n_events']
-
-    out = {}
-    Emin = fin.attrs['Emin']
-    Emax = fin.attrs['Emax']
-    E = 10 ** (0.5 * (np.log10(Emin) + np.log10(Emax)))
-    out['energy'] = E
-    out['energy_min'] = Emin
-    out['energy_max'] = Emax
-
-    # calculate effective
-    thetamin = 0
-    thetamax = np.pi
-    phimin = 0
-    phimax = 2 * np.pi
-    if('thetamin' in fin.attrs):
-        thetamin = fin.attrs['thetamin']
-    if('thetamax' in fin.attrs):
-        thetamax = fin.attrs['thetamax']
-
-    theta_width_file = abs(np.cos(thetamin) - np.cos(thetamax))
-    # restrict the theta range, if requested
-    if min(bounds_theta) > thetamin:
-        logger.info("restricting thetamin from {} to {}".format(thetamin, min(bounds_theta)))
-        thetamin = min(bounds_theta)
-    if max(bounds_theta) < thetamax:
-        logger.info("restricting thetamax from {} to {}".format(thetamax, max(bounds_theta)))
-        thetamax = max(bounds_theta)
-    # The restriction assumes isotropic event generation in cos(theta) band
-    theta_fraction = abs(np.cos(thetamin) - np.cos(thetamax)) / theta_width_file
-    if theta_fraction < 1:
-        # adjust n_events to account for solid angle fraction in the requested theta range
-        n_events *= theta_fraction
-
-    if('phimin' in fin.attrs):
-        phimin = fin.attrs['phimin']
-    if('phimax' in fin.attrs):
-        phimax = fin.attrs['phimax']
-    if(veff_aeff == "veff"):
-        volume_proj_area = fin.attrs['volume']
-    elif(veff_aeff == "aeff_surface_muons"):
-        area = fin.attrs['area']
-        # The used area must be the projected area, perpendicular to the incoming
-        # flux, which leaves us with the following correction. Remember that the
-        # zenith bins must be small for the effective area to be correct.
-        volume_proj_area = area * 0.5 * (np.abs(np.cos(thetamin)) + np.abs(np.cos(thetamax)))
-    else:
-        raise AttributeError(f"attributes do neither contain volume nor area")
-
-    Vrms = np.nan
-    if 'Vrms' in fin.attrs:
-        Vrms = fin.attrs['Vrms']
-
-    # Solid angle needed for the effective volume calculations
-    out['domega'] = np.abs(phimax - phimin) * np.abs(np.cos(thetamin) - np.cos(thetamax))
-    out['thetamin'] = thetamin
-    out['thetamax'] = thetamax
-    out['deposited'] = deposited
-    out[veff_aeff] = {}
-    out['n_triggered_weighted'] = {}
-    out['SNRs'] = {}
-
-    if('weights' not in fin.keys()):
-        logger.warning(f"file {filename} is empty")
-        FC_low, FC_high = FC_limits(0)
-        Veff_low = volume_proj_area * FC_low / n_events
-        Veff_high = volume_proj_area * FC_high / n_events
-        for iT, trigger_name in enumerate(trigger_names):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        for trigger_name, values in iteritems(trigger_combinations):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        return out
-
-    triggered = np.array(fin['triggered'])
-    if('trigger_names' in fin.attrs):
-        if(np.any(trigger_names != fin.attrs['trigger_names'])):
-            if(triggered.size == 0 and fin.attrs['trigger_names'].size == 0):
-                logger.warning("file {} has no triggering events. Using trigger names from another file".format(filename))
+    with h5py.File(filename, 'r') as fin:
+        attrs = {key: fin.attrs[key] for key in fin.attrs}
+
+        thetamin_file = attrs.get('thetamin', 0)
+        thetamax_file = attrs.get('thetamax', np.pi)
+        if(bounds_thetas is None):
+            if(oversampling_theta == 1):
+                bounds_thetas = [[0, np.pi]]
             else:
-                logger.error("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
-                raise AttributeError("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, fin.attrs['trigger_names'], trigger_names))
-    else:
-        logger.warning(f"file {filename} has no triggering events. Using trigger names from a different file: {trigger_names}")
-
-    weights = np.array(fin['weights'])
-    # if theta range is restricted, select events in that range
-    if theta_fraction < 1:
-        # generate boolean mask for events in fin inside selected theta range
-        mask_theta = np.array((fin['zeniths'] > thetamin) & (fin['zeniths'] < thetamax))
-        # multiply events with mask, events outside are zero-weighted
-        weights *= mask_theta
-
-    if(triggered.size == 0):
-        FC_low, FC_high = FC_limits(0)
-        Veff_low = volume_proj_area * FC_low / n_events
-        Veff_high = volume_proj_area * FC_high / n_events
-        for iT, trigger_name in enumerate(trigger_names):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-        for trigger_name, values in iteritems(trigger_combinations):
-            out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
-    else:
+                thetas = np.arccos(np.linspace(np.cos(thetamin_file), np.cos(thetamax_file), oversampling_theta + 1))
+                bounds_thetas = list(zip(thetas[:-1], thetas[1:]))
+
+        # the properties of each theta range
+        outs = []
+        bins = []
+        for bounds_theta in bounds_thetas:
+            out = {}
+            n_events = attrs['n_events']
+            Emin = attrs['Emin']
+            Emax = attrs['Emax']
+            E = 10 ** (0.5 * (np.log10(Emin) + np.log10(Emax)))
+            out['energy'] = E
+            out['energy_min'] = Emin
+            out['energy_max'] = Emax
+
+            # calculate effective
+            thetamin = thetamin_file
+            thetamax = thetamax_file
+            phimin = attrs.get('phimin', 0)
+            phimax = attrs.get('phimax', 2 * np.pi)
+
+            theta_width_file = abs(np.cos(thetamin) - np.cos(thetamax))
+            # restrict the theta range, if requested
+            if min(bounds_theta) > thetamin:
+                logger.info("restricting thetamin from {} to {}".format(thetamin, min(bounds_theta)))
+                thetamin = min(bounds_theta)
+            if max(bounds_theta) < thetamax:
+                logger.info("restricting thetamax from {} to {}".format(thetamax, max(bounds_theta)))
+                thetamax = max(bounds_theta)
+            # The restriction assumes isotropic event generation in cos(theta) band
+            theta_fraction = abs(np.cos(thetamin) - np.cos(thetamax)) / theta_width_file
+            if theta_fraction < 1:
+                # adjust n_events to account for solid angle fraction in the requested theta range
+                n_events *= theta_fraction
+
+            if(veff_aeff == "veff"):
+                volume_proj_area = attrs['volume']
+            elif(veff_aeff == "aeff_surface_muons"):
+                area = attrs['area']
+                # The used area must be the projected area, perpendicular to the incoming
+                # flux, which leaves us with the following correction. Remember that the
+                # zenith bins must be small for the effective area to be correct.
+                volume_proj_area = area * 0.5 * (np.abs(np.cos(thetamin)) + np.abs(np.cos(thetamax)))
+            else:
+                raise AttributeError(f"attributes do neither contain volume nor area")
+
+            # Solid angle needed for the effective volume calculations
+            out['domega'] = np.abs(phimax - phimin) * np.abs(np.cos(thetamin) - np.cos(thetamax))
+            out['thetamin'] = thetamin
+            out['thetamax'] = thetamax
+            out['deposited'] = deposited
+            out[veff_aeff] = {}
+            out['n_triggered_weighted'] = {}
+            out['SNRs'] = {}
+            outs.append(out)
+            bins.append((thetamin, thetamax, theta_fraction, n_events, volume_proj_area))
+
+        Vrms = np.nan
+        if 'Vrms' in attrs:
+            Vrms = attrs['Vrms']
+
+        if('weights' not in fin.keys()):
+            logger.warning(f"file {filename} is empty")
+            for out, (thetamin, thetamax, theta_fraction, n_events, volume_proj_area) in zip(outs, bins):
+                FC_low, FC_high = FC_limits(0)
+                Veff_low = volume_proj_area * FC_low / n_events
+                Veff_high = volume_proj_area * FC_high / n_events
+                for iT, trigger_name in enumerate(trigger_names):
+                    out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
+                for trigger_name, values in iteritems(trigger_combinations):
+                    out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
+            return outs
+
+        triggered = np.array(fin['triggered'])
+        if('trigger_names' in attrs):
+            if(np.any(trigger_names != attrs['trigger_names'])):
+                if(triggered.size == 0 and attrs['trigger_names'].size == 0):
+                    logger.warning("file {} has no triggering events. Using trigger names from another file".format(filename))
+                else:
+                    logger.error("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, attrs['trigger_names'], trigger_names))
+                    raise AttributeError("file {} has inconsistent trigger names: {}\ncurrent trigger names {}".format(filename, attrs['trigger_names'], trigger_names))
+        else:
+            logger.warning(f"file {filename} has no triggering events. Using trigger names from a different file: {trigger_names}")
+
+        if(triggered.size == 0):
+            for out, (thetamin, thetamax, theta_fraction, n_events, volume_proj_area) in zip(outs, bins):
+                FC_low, FC_high = FC_limits(0)
+                Veff_low = volume_proj_area * FC_low / n_events
+                Veff_high = volume_proj_area * FC_high / n_events
+                for iT, trigger_name in enumerate(trigger_names):
+                    out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
+                for trigger_name, values in iteritems(trigger_combinations):
+                    out[veff_aeff][trigger_name] = [0, 0, 0, Veff_low, Veff_high]
+            return outs
+
+        # all data sets are read only once
+        weights = np.array(fin['weights'])
+        zeniths = None
+        if(np.any([theta_fraction < 1 for thetamin, thetamax, theta_fraction, n_events, volume_proj_area in bins])):
+            zeniths = np.array(fin['zeniths'])
+        gids = np.array(fin['event_group_ids'])
+        multiple_triggers = np.array(fin['multiple_triggers'], dtype=bool)
+        max_amp_ray_solution = None
+
+        # the triggered events of all triggers (and the efficiencies) are independent of the theta range
+        triggered_events = collections.OrderedDict()
         for iT, trigger_name in enumerate(trigger_names):
-            triggered = np.array(fin['multiple_triggers'][:, iT], dtype=np.bool)
-            triggered = remove_duplicate_triggers(triggered, fin['event_group_ids'])
-            Veff = volume_proj_area * np.sum(weights[triggered]) / n_events
-            Veff_error = 0
-            if(np.sum(weights[triggered]) > 0):
-                Veff_error = Veff / np.sum(weights[triggered]) ** 0.5
-            FC_low, FC_high = FC_limits(np.sum(weights[triggered]))
-            Veff_low = volume_proj_area * FC_low / n_events
-            Veff_high = volume_proj_area * FC_high / n_events
-            out[veff_aeff][trigger_name] = [Veff, Veff_error, np.sum(weights[triggered]), Veff_low, Veff_high]
+            triggered_events[trigger_name] = (remove_duplicate_triggers(multiple_triggers[:, iT], gids), None)
 
         for trigger_name, values in iteritems(trigger_combinations):
             indiv_triggers = values['triggers']
-            triggered = np.zeros_like(fin['multiple_triggers'][:, 0], dtype=np.bool)
+            triggered = np.zeros_like(multiple_triggers[:, 0], dtype=bool)
             if(isinstance(indiv_triggers, str)):
-                triggered = triggered | np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_triggers]], dtype=np.bool)
+                triggered = triggered | multiple_triggers[:, trigger_names_dict[indiv_triggers]]
             else:
                 for indiv_trigger in indiv_triggers:
-                    triggered = triggered | np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_trigger]], dtype=np.bool)
+                    triggered = triggered | multiple_triggers[:, trigger_names_dict[indiv_trigger]]
             if 'triggerAND' in values:
-                triggered = triggered & np.array(fin['multiple_triggers'][:, trigger_names_dict[values['triggerAND']]], dtype=np.bool)
+                triggered = triggered & multiple_triggers[:, trigger_names_dict[values['triggerAND']]]
             if 'notriggers' in values:
                 indiv_triggers = values['notriggers']
                 if(isinstance(indiv_triggers, str)):
-                    triggered = triggered & ~np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_triggers]], dtype=np.bool)
+                    triggered = triggered & ~multiple_triggers[:, trigger_names_dict[indiv_triggers]]
                 else:
                     for indiv_trigger in indiv_triggers:
-                        triggered = triggered & ~np.array(fin['multiple_triggers'][:, trigger_names_dict[indiv_trigger]], dtype=np.bool)
+                        triggered = triggered & ~multiple_triggers[:, trigger_names_dict[indiv_trigger]]
+            if(('min_sigma' in values.keys() or 'ray_solution' in values.keys()) and max_amp_ray_solution is None):
+                max_amp_ray_solution = np.array(fin['max_amp_ray_solution'])
             if('min_sigma' in values.keys()):
                 if(isinstance(values['min_sigma'], list)):
-                    if(trigger_name not in out['SNR']):
-                        out['SNR'][trigger_name] = {}
+                    for out in outs:
+                        if(trigger_name not in out['SNR']):
+                            out['SNR'][trigger_name] = {}
                     masks = np.zeros_like(triggered)
                     for iS in range(len(values['min_sigma'])):
-                        As = np.max(np.nan_to_num(fin['max_amp_ray_solution']), axis=-1)  # we use the this quantity because it is always computed before noise is added!
+                        As = np.max(np.nan_to_num(max_amp_ray_solution), axis=-1)  # we use the this quantity because it is always computed before noise is added!
                         As_sorted = np.sort(As[:, values['channels'][iS]], axis=1)
                         # the smallest of the three largest amplitudes
                         max_amplitude = As_sorted[:, -values['n_channels'][iS]]
                         mask = np.sum(As[:, values['channels'][iS]] >= (values['min_sigma'][iS] * Vrms), axis=1) >= values['n_channels'][iS]
                         masks = masks | mask
-                        out['SNR'][trigger_name][iS] = max_amplitude[mask] / Vrms
+                        for out in outs:
+                            out['SNR'][trigger_name][iS] = max_amplitude[mask] / Vrms
                     triggered = triggered & masks
                 else:
-                    As = np.max(np.nan_to_num(fin['max_amp_ray_solution']), axis=-1)  # we use the this quantity because it is always computed before noise is added!
+                    As = np.max(np.nan_to_num(max_amp_ray_solution), axis=-1)  # we use the this quantity because it is always computed before noise is added!
 
                     As_sorted = np.sort(As[:, values['channels']], axis=1)
                     max_amplitude = As_sorted[:, -values['n_channels']]  # the smallest of the three largest amplitudes
 
                     mask = np.sum(As[:, values['channels']] >= (values['min_sigma'] * Vrms), axis=1) >= values['n_channels']
-                    out['SNR'][trigger_name] = As_sorted[mask] / Vrms
+                    for out in outs:
+                        out['SNR'][trigger_name] = As_sorted[mask] / Vrms
                     triggered = triggered & mask
             if('ray_solution' in values.keys()):
-                As = np.array(fin['max_amp_ray_solution'])
+                As = max_amp_ray_solution
                 max_amps = np.argmax(As[:, values['ray_channel']], axis=-1)
                 sol = np.array(fin['ray_tracing_solution_type'])
-                mask = np.array([sol[i, values['ray_channel'], max_amps[i]] == values['ray_solution'] for i in range(len(max_amps))], dtype=np.bool)
+                mask = np.array([sol[i, values['ray_channel'], max_amps[i]] == values['ray_solution'] for i in range(len(max_amps))], dtype=bool)
                 triggered = triggered & mask
 
             if('n_reflections' in values.keys()):
@@ -377,20 +435,13 @@ def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_co
                     # advanced indexing: selects the ray tracing solution per event with the highest amplitude
                     triggered = triggered & (np.array(fin[f'station_{station:d}/ray_tracing_reflection'])[..., max_amps, 0][:, 0] == values['n_reflections'])
 
-            triggered = remove_duplicate_triggers(triggered, fin['event_group_ids'])
-            Veff = volume_proj_area * np.sum(weights[triggered]) / n_events
-            Vefferror = 0
-            if(np.sum(weights[triggered]) > 0):
-                Vefferror = Veff / np.sum(weights[triggered]) ** 0.5
-            FC_low, FC_high = FC_limits(np.sum(weights[triggered]))
-            Veff_low = volume_proj_area * FC_low / n_events
-            Veff_high = volume_proj_area * FC_high / n_events
+            triggered = remove_duplicate_triggers(triggered, gids)
 
-            if('efficiency' in values.keys() and Veff > 0):
+            e = None
+            if('efficiency' in values.keys() and np.sum(weights[triggered]) > 0):
                 get_efficiency = values['efficiency']['func']
                 channel_ids = values['efficiency']['channel_ids']
-                gids = np.array(fin['event_group_ids'])
-                ugids = np.unique(np.array(fin['event_group_ids']))
+                ugids = np.unique(gids)
 
                 # calculate the group event ids that triggered
                 ugids_triggered_index = []
@@ -437,27 +488,55 @@ def get_Veff_Aeff_single(filename, trigger_names, trigger_names_dict, trigger_co
                 if("Vrms" in values['efficiency']):
                     Vrms = values['efficiency']['Vrms']
                 e = get_efficiency(max_amplitudes / Vrms)  # we calculated the maximum amplitudes for all gids, now we select only those that triggered
-                Veff = volume_proj_area * np.sum(weights[triggered] * e) / n_events
-                Vefferror = 0
-                if(np.sum(weights[triggered]) > 0):
-                    Vefferror = Veff / np.sum(weights[triggered] * e) ** 0.5
-                FC_low, FC_high = FC_limits(np.sum(weights[triggered] * e))
-                Veff_low = volume_proj_area * FC_low / n_events
-                Veff_high = volume_proj_area * FC_high / n_events
+            triggered_events[trigger_name] = (triggered, e)
 
-            out[veff_aeff][trigger_name] = [Veff, Vefferror, np.sum(weights[triggered]), Veff_low, Veff_high]
-    return out
+    # sum up the weights of the triggered events in each theta range
+    for out, (thetamin, thetamax, theta_fraction, n_events, volume_proj_area) in zip(outs, bins):
+        weights_bin = weights
+        # if theta range is restricted, select events in that range
+        if theta_fraction < 1:
+            # multiply events with mask, events outside are zero-weighted
+            weights_bin = weights * ((zeniths > thetamin) & (zeniths < thetamax))
+        for trigger_name, (triggered, e) in triggered_events.items():
+            out[veff_aeff][trigger_name] = _get_Veff_Aeff_values(volume_proj_area, n_events, weights_bin[triggered], e)
+    return outs
 
 
 def tmp(args):
-    return get_Veff_Aeff_single(*args)
+    return get_Veff_Aeff_single_file(*args)
+
+
+def _get_cache_key(filename, parameters):
+    """
+    returns the key of a file in the cache of `get_Veff_Aeff`
+
+    The file is identified by its name, size and modification time, so that a file that is overwritten (e.g. by
+    merging additional simulations into it) is processed again.
+    """
+    stat = os.stat(filename)
+    signature = f"{os.path.basename(filename)}|{stat.st_size:d}|{stat.st_mtime_ns:d}|{parameters}"
+    return hashlib.sha1(signature.encode()).hexdigest()
+
+
+def _to_json_compatible(value):
+    """
+    converts the output of `get_Veff_Aeff_single_file` into built-in python types that can be stored as json
+    """
+    if(isinstance(value, dict)):
+        return {str(key): _to_json_compatible(value2) for key, value2 in value.items()}
+    if(isinstance(value, (list, tuple, np.ndarray))):
+        return [_to_json_compatible(value2) for value2 in value]
+    if(isinstance(value, np.generic)):
+        return value.item()
+    return value
 
 
 def get_Veff_Aeff(folder,
              trigger_combinations={},
              station=101,
              veff_aeff="veff",
-             n_cores=1, oversampling_theta=1):
+             n_cores=1, oversampling_theta=1,
+             cache_file=None):
     """
     calculates the effective volume or effective area from surface muons from NuRadioMC hdf5 files
 
@@ -469,12 +548,12 @@ def get_Veff_Aeff(folder,
         folder conaining the hdf5 files, one per energy OR filename
     trigger_combinations: dict, optional
         keys are the names of triggers to calculate. Values are dicts again:
-            
+
         * 'triggers': list of strings
             name of individual triggers that are combined with an OR
 
         the following additional options are optional
-        
+
         * 'efficiency': dict
             allows to apply an (analysis) efficiency cut for calculating effective volumes
 
@@ -496,18 +575,24 @@ def get_Veff_Aeff(folder,
 
         * "veff" (default)
         * "aeff_surface_muons"
-        
+
     n_cores: int
         the number of cores to use
 
     oversampling_theta: int
         calculate the effective volume for finer binning (<oversampling_theta> data points per file):
-        
+
         * 1: no oversampling
         * >1: oversampling with <oversampling_theta> equal-size cos(theta) bins within thetamin/max of the input file
-        
+
         .. Note:: oversampling assumes that events were simulated uniformly in cos(theta)
-    
+
+    cache_file: string or None
+        if set, the results of each file are stored in this json file, identified by the file name, size and modification
+        time and the parameters of this function. Files that are already contained in the cache are not read again, so that
+        only new (or modified) files are processed when the effective volume of a production is recomputed. Trigger
+        combinations with an efficiency function can not be cached.
+
     Returns
     -------
     list of dictionaries.
@@ -526,21 +611,21 @@ def get_Veff_Aeff(folder,
             raise FileNotFoundError(f"couldnt find any hdf5 file in folder {folder}")
         filenames = sorted(glob.glob(os.path.join(folder, '*.hdf5')))
     for iF, filename in enumerate(filenames):
-        fin = h5py.File(filename, 'r')
-        if 'deposited' in fin.attrs:
-            deposited = fin.attrs['deposited']
-            if prev_deposited is None:
-                prev_deposited = deposited
-            elif prev_deposited != deposited:
-                raise AttributeError("The deposited parameter is not consistent among the input files!")
-
-        if('trigger_names' in fin.attrs):
-            trigger_names = fin.attrs['trigger_names']
-            if(len(trigger_names) > 0):
-                for iT, trigger_name in enumerate(trigger_names):
-                    trigger_names_dict[trigger_name] = iT
-                logger.info(f"first file with triggernames {filename}: {trigger_names}")
-                break
+        with h5py.File(filename, 'r') as fin:
+            if 'deposited' in fin.attrs:
+                deposited = fin.attrs['deposited']
+                if prev_deposited is None:
+                    prev_deposited = deposited
+                elif prev_deposited != deposited:
+                    raise AttributeError("The deposited parameter is not consistent among the input files!")
+
+            if('trigger_names' in fin.attrs):
+                trigger_names = fin.attrs['trigger_names']
+                if(len(trigger_names) > 0):
+                    for iT, trigger_name in enumerate(trigger_names):
+                        trigger_names_dict[trigger_name] = iT
+                    logger.info(f"first file with triggernames {filename}: {trigger_names}")
+                    break
 
     trigger_combinations['all_triggers'] = {'triggers': trigger_names}
     logger.info(f"Trigger names:  {trigger_names}")
@@ -552,37 +637,48 @@ def get_Veff_Aeff(folder,
                 logger.warning(f"trigger {value} not available, removing this trigger from the trigger combination {key}")
                 trigger_combinations[key]['triggers'].pop(i)
                 i -= 1
-    from multiprocessing import Pool
-    logger.warning(f"running {len(filenames)} jobs on {n_cores} cores")
+
+    cache = None
+    if(cache_file is not None):
+        try:
+            parameters = json.dumps(_to_json_compatible([trigger_names, trigger_combinations, deposited, station, veff_aeff,
+                                                         oversampling_theta]), sort_keys=True)
+        except TypeError:
+            logger.warning("the trigger combinations can not be serialized (e.g. because they contain an efficiency function), the results are not cached")
+        else:
+            cache = {}
+            if(os.path.exists(cache_file)):
+                with open(cache_file, 'r') as fin:
+                    cache = json.load(fin)
+            cache_keys = [_get_cache_key(f, parameters) for f in filenames]
 
     args = []
-    if oversampling_theta == 1:
-        for f in filenames:
-            args.append([f, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff])
-    else:
-        # get the thetamin, thetamax from the files and do oversampling
+    for iF, f in enumerate(filenames):
+        if(cache is None or cache_keys[iF] not in cache):
+            args.append([f, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff, oversampling_theta])
+    if oversampling_theta != 1:
         logger.info("Calculating effective volumes with finer binning, {} bins per input file".format(oversampling_theta))
-        for f in filenames:
-            fin = h5py.File(f, 'r')
-            costhetamin = np.cos(fin.attrs['thetamin'])
-            costhetamax = np.cos(fin.attrs['thetamax'])
-            thetas = np.arccos(np.linspace(costhetamin, costhetamax, oversampling_theta + 1))
-            thetas_min = thetas[:-1]
-            thetas_max = thetas[1:]
-            for bounds_theta in zip(thetas_min, thetas_max):
-                args.append([f, trigger_names, trigger_names_dict, trigger_combinations, deposited, station, veff_aeff, bounds_theta])
+    logger.warning(f"running {len(args)} jobs on {n_cores} cores")
 
     if n_cores == 1:
         output = []
         for arg in args:
             output.append(tmp(arg))
-        return output
     else:
+        from multiprocessing import Pool
         with Pool(n_cores) as p:
             output = p.map(tmp, args)
-            print("output")
-            print(output)
-            return output
+
+    if(cache is None):
+        return [out for outs in output for out in outs]
+
+    for arg, outs in zip(args, output):
+        cache[cache_keys[filenames.index(arg[0])]] = _to_json_compatible(outs)
+    if(len(args)):
+        with open(cache_file, 'w') as fout:
+            json.dump(cache, fout)
+    logger.info(f"{len(filenames) - len(args)} of {len(filenames)} files were taken from the cache {cache_file}")
+    return [out for cache_key in cache_keys for out in cache[cache_key]]
 
 
 def get_Veff_Aeff_array(data):
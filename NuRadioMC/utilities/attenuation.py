@@ -11,25 +11,15 @@ def fit_GL1(z):
 
     Parameters
     ----------
-    z: float
+    z: float or array
         depth in default units
     """
 
     fit_values = [1.16052586e+03, 6.87257150e-02, -9.82378264e-05,
                     -3.50628312e-07, -2.21040482e-10, -3.63912864e-14]
     min_length = 100 * units.m
-    if(not hasattr(z, '__len__')):
-        att_length = 0
-    else:
-        att_length = np.zeros_like(z)
-    for power, coeff in enumerate(fit_values):
-        att_length += coeff * z ** power
-
-    if (not hasattr(att_length, '__len__')):
-        if (att_length < min_length):
-            att_length = min_length
-    else:
-        att_length[ att_length < min_length ] = min_length
+    att_length = np.polynomial.polynomial.polyval(z, fit_values)
+    att_length = np.maximum(att_length, min_length)
     return att_length
 
 
@@ -54,10 +44,12 @@ def get_attenuation_length(z, frequency, model):
 
     Parameters
     ----------
-    z: float
+    z: float or array
         depth in default units
-    frequency: float
-        frequency of signal in default units
+    frequency: float or array
+        frequency of signal in default units. If both `z` and `frequency` are arrays, their shapes
+        need to be broadcastable, e.g., z[:, np.newaxis] and frequency[np.newaxis, :] returns the
+        attenuation length for all combinations of depths and frequencies.
     model: string
         Ice model for attenuation length. Options:
         
@@ -79,18 +71,9 @@ def get_attenuation_length(z, frequency, model):
         b0 = -6.74890 + t * (0.026709 - t * 0.000884)
         b1 = -6.22121 - t * (0.070927 + t * 0.001773)
         b2 = -4.09468 - t * (0.002213 + t * 0.000332)
-        if(not hasattr(frequency, '__len__')):
-            if (frequency < 1. * units.GHz):
-                a = (b1 * w0 - b0 * w1) / (w0 - w1)
-                bb = (b1 - b0) / (w1 - w0)
-            else:
-                a = (b2 * w1 - b1 * w2) / (w1 - w2)
-                bb = (b2 - b1) / (w2 - w1)
-        else:
-            a = np.ones_like(frequency) * (b2 * w1 - b1 * w2) / (w1 - w2)
-            bb = np.ones_like(frequency) * (b2 - b1) / (w2 - w1)
-            a[frequency < 1. * units.GHz] = (b1 * w0 - b0 * w1) / (w0 - w1)
-            bb[frequency < 1. * units.GHz] = (b1 - b0) / (w1 - w0)
+        low_frequency = frequency < 1. * units.GHz
+        a = np.where(low_frequency, (b1 * w0 - b0 * w1) / (w0 - w1), (b2 * w1 - b1 * w2) / (w1 - w2))
+        bb = np.where(low_frequency, (b1 - b0) / (w1 - w0), (b2 - b1) / (w2 - w1))
 
         return 1. / np.exp(a + bb * w)
     elif(model == "GL1"):
@@ -99,11 +82,7 @@ def get_attenuation_length(z, frequency, model):
         att_length_f = att_length_75 - 0.55 * units.m * (frequency / units.MHz - 75)
 
         min_length = 1 * units.m
-        if(not hasattr(frequency, '__len__') and not hasattr(z, '__len__')):
-            if (att_length_f < min_length):
-                att_length_f = min_length
-        else:
-            att_length_f[ att_length_f < min_length ] = min_length
+        att_length_f = np.maximum(att_length_f, min_length)
 
         return att_length_f
     if model == 'GL2':
@@ -116,11 +95,7 @@ def get_attenuation_length(z, frequency, model):
         att_length_f = bulk_att_length_f * np.poly1d(np.flip(fit_values_GL2))(z)
 
         min_length = 1 * units.m
-        if (not hasattr(frequency, '__len__') and not hasattr(z, '__len__')):
-            if att_length_f < min_length:
-                att_length_f = min_length
-        else:
-            att_length_f[att_length_f < min_length] = min_length
+        att_length_f = np.maximum(att_length_f, min_length)
         return att_length_f
 
 
@@ -144,7 +119,7 @@ def get_attenuation_length(z, frequency, model):
         # this differs from the equation published in F. Wu PhD thesis UCI.
         # 262m is supposed to be the depth averaged attenuation length but the
         # integral (int(1/L, 420, 0)/420) ^ -1 = 231.21m and NOT 262m.
-        att_length *= L / 231.21 * units.m
+        att_length = att_length * L / 231.21 * units.m
 
         return att_length
     else:
@@ -8,18 +8,25 @@ logger = logging.getLogger("utilities.earth_attenuation")
 
 AMU = 1.66e-27 * units.kg
 
+# tables of slant depths, calculated once per Earth model (see `PREM.slant_depth_tabulated`)
+_slant_depth_tables = {}
+
 
 def get_weight(theta_nu, pnu, flavors, mode='simple', cross_section_type='ctw',
-               vertex_position=None, phi_nu=None):
+               vertex_position=None, phi_nu=None, tabulated=False):
     """
     calculates neutrino weight due to Earth absorption for different models
 
+    All arguments can be arrays, i.e., the weights of all events can be calculated in a single call.
+
     Parameters
     ----------
     theta_nu: float or array of floats
         the zenith angle of the neutrino direction (where it came from, i.e., opposite to the direction of propagation)
     pnu: float or array of floats
         the momentum of the neutrino
+    flavors: int or array of ints
+        the flavor of the neutrino
     mode: string
         * 'simple': assuming interaction happens at the surface and approximating the Earth with constant density
         * 'core_mantle_crust_simple': assuming interaction happens at the surface and approximating the Earth with 3 layers of constant density
@@ -27,32 +34,38 @@ def get_weight(theta_nu, pnu, flavors, mode='simple', cross_section_type='ctw',
         * 'PREM': density of Earth is parameterized as a fuction of radius, path through Earth to interaction vertex is considered
     cross_section_type: string
         'ghandi', 'ctw' or 'csms' (see description in `cross_sections.py`)
-    vertex_position: 3-dim array or None (default)
+    vertex_position: 3-dim array, array of shape (n, 3) or None (default)
         the position of the neutrino interaction
-    phi_nu: float
+    phi_nu: float or array of floats
         the azimuth angle of the neutrino direction
+    tabulated: bool (default False)
+        only relevant for the modes 'core_mantle_crust' and 'PREM'. If True, the slant depth is interpolated
+        from a table that is calculated once per Earth model (see `PREM.slant_depth_tabulated`) instead of
+        integrating the density along the path of every neutrino.
     """
+    if(np.ndim(theta_nu) or np.ndim(pnu) or np.ndim(flavors)):
+        theta_nu, pnu, flavors = np.broadcast_arrays(np.asarray(theta_nu, dtype=float), np.asarray(pnu, dtype=float), flavors)
     if(mode == 'simple'):
         return get_simple_weight(theta_nu, pnu, cross_section_type=cross_section_type)
     elif (mode == "core_mantle_crust_simple"):
         return get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type=cross_section_type)
-    elif (mode == "core_mantle_crust"):
-        earth = CoreMantleCrustModel()
+    elif (mode in ["core_mantle_crust", "PREM"]):
+        if(mode == "core_mantle_crust"):
+            earth = CoreMantleCrustModel()
+        else:
+            earth = PREM()
         direction = hp.spherical_to_cartesian(theta_nu, phi_nu)
-        slant_depth = earth.slant_depth(vertex_position, direction)
-        # by requesting the interaction length for a density of 1, we get it in units of length**2/weight
-        L_int = cross_sections.get_interaction_length(pnu, density=1., flavor=flavors, inttype='total',
-                                                      cross_section_type=cross_section_type)
-        return np.exp(-slant_depth / L_int)
-    elif (mode == "PREM"):
-        earth = PREM()
-        direction = hp.spherical_to_cartesian(theta_nu, phi_nu)
-        slant_depth = earth.slant_depth(vertex_position, direction)
+        if(tabulated):
+            slant_depth = earth.slant_depth_tabulated(vertex_position, direction)
+        else:
+            slant_depth = earth.slant_depth(vertex_position, direction)
         # by requesting the interaction length for a density of 1, we get it in units of length**2/weight
         L_int = cross_sections.get_interaction_length(pnu, density=1., flavor=flavors, inttype='total',
                                                       cross_section_type=cross_section_type)
         return np.exp(-slant_depth / L_int)
     elif (mode == "None"):
+        if(np.ndim(theta_nu)):
+            return np.ones_like(theta_nu)
         return 1.
     else:
         logger.error('mode {} not supported'.format(mode))
@@ -76,12 +89,14 @@ def get_simple_weight(theta_nu, pnu, cross_section_type='ctw'):
     """
     R_earth = 6357390 * units.m
     DensityCRUST = 2900 * units.kg / units.m ** 3
-    if(theta_nu <= 0.5 * np.pi):  # coming from above
-        return np.ones_like(theta_nu)
-    else:  # coming from below
-        sigma = cross_sections.get_nu_cross_section(pnu, flavors=0, cross_section_type=cross_section_type)
-        d = -2 * R_earth * np.cos(theta_nu)
-        return np.exp(-d * sigma * DensityCRUST / AMU)
+    theta_nu = np.asarray(theta_nu, dtype=float)
+    sigma = cross_sections.get_nu_cross_section(pnu, flavors=0, cross_section_type=cross_section_type)
+    below = theta_nu > 0.5 * np.pi  # neutrinos coming from below
+    d = np.where(below, -2 * R_earth * np.cos(theta_nu), 0)
+    weight = np.where(below, np.exp(-d * sigma * DensityCRUST / AMU), 1.)
+    if(weight.ndim == 0):
+        return weight.item()
+    return weight
 
 
 def get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type='ctw'):
@@ -106,21 +121,20 @@ def get_core_mantle_crust_weight(theta_nu, pnu, flavors, cross_section_type='ctw
     R_EARTH = 6.378140e6 * units.m
     densities = np.array([14000.0, 3400.0, 2900.0]) * units.kg / units.m ** 3  # inner layer, middle layer, outer layer
     radii = np.array([3.46e6 * units.m, R_EARTH - 4.0e4 * units.m, R_EARTH])  # average radii of boundaries between earth layers
+    theta_nu = np.asarray(theta_nu, dtype=float)
     sigma = cross_sections.get_nu_cross_section(pnu, flavors, cross_section_type=cross_section_type)
-    if(theta_nu <= 0.5 * np.pi):  # coming from above
-        return np.ones_like(theta_nu)
-    elif (theta_nu <= np.pi - np.arcsin(radii[1] / radii[2])):  # only go through the outer layer
-        d_outer = -2 * R_EARTH * np.cos(theta_nu)
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU)
-    elif (theta_nu <= np.pi - np.arcsin(radii[0] / radii[2])):  # only go through the outer and middle layer
-        d_middle = 2 * np.sqrt(radii[1] * radii[1] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu))
-        d_outer = -2 * R_EARTH * np.cos(theta_nu) - d_middle
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU)
-    else:  # go through all three layers
-        d_inner = 2 * np.sqrt(radii[0] * radii[0] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu))
-        d_middle = 2 * np.sqrt(radii[1] * radii[1] - radii[2] * radii[2] * np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu)) - d_inner
-        d_outer = -2 * R_EARTH * np.cos(theta_nu) - d_middle - d_inner
-        weight = np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU - d_inner * sigma * densities[0] / AMU)
+    below = theta_nu > 0.5 * np.pi  # neutrinos coming from below
+    # length of the chord through the inner and middle layer, the chord does not cross a layer if the square root is undefined
+    sin2 = np.sin(np.pi - theta_nu) * np.sin(np.pi - theta_nu)
+    crosses_inner = below & (theta_nu > np.pi - np.arcsin(radii[0] / radii[2]))
+    crosses_middle = below & (theta_nu > np.pi - np.arcsin(radii[1] / radii[2]))
+    d_inner = np.where(crosses_inner, 2 * np.sqrt(np.abs(radii[0] * radii[0] - radii[2] * radii[2] * sin2)), 0)
+    d_middle = np.where(crosses_middle, 2 * np.sqrt(np.abs(radii[1] * radii[1] - radii[2] * radii[2] * sin2)) - d_inner, 0)
+    d_outer = np.where(below, -2 * R_EARTH * np.cos(theta_nu) - d_middle - d_inner, 0)
+    weight = np.exp(-d_outer * sigma * densities[2] / AMU - d_middle * sigma * densities[1] / AMU - d_inner * sigma * densities[0] / AMU)
+    weight = np.where(below, weight, 1.)
+    if(weight.ndim == 0):
+        return weight.item()
     return weight
 
 
@@ -207,22 +221,28 @@ class PREM:
         Integrates the Earth's density along the chord, resulting in a column
         density (or material thickness) with units of mass per area.
 
+        Supports passing arrays of endpoints and directions or a single
+        endpoint and direction. The chords of many neutrinos are integrated
+        together, i.e., without a python loop over the chords.
+
         Parameters
         ----------
         endpoint : array_like
             Vector position of the chord endpoint, in a coordinate system
             centered on the surface of the Earth (e.g. a negative third
-            coordinate represents the depth below the surface).
+            coordinate represents the depth below the surface). Either of
+            shape (3,) or (n, 3).
         direction : array_like
             Vector direction of the chord, in a coordinate system
             centered on the surface of the Earth (e.g. a negative third
-            coordinate represents the chord pointing into the Earth).
+            coordinate represents the chord pointing into the Earth). Either of
+            shape (3,) or (n, 3).
         step : float, optional
             Step size for the integration.
 
         Returns
         -------
-        float
+        float or array of floats
             Column density along the chord starting from `depth` and
             passing through the Earth at `angle`.
 
@@ -231,32 +251,154 @@ class PREM:
         PREM.density : Calculates the Earth's density at a given radius.
 
         """
+        single = np.ndim(endpoint) == 1 and np.ndim(direction) == 1
         # Convert to Earth-centric coordiante system (e.g. center of the Earth
         # is at (0, 0, 0))
-        endpoint = np.array([endpoint[0], endpoint[1],
-                             endpoint[2] + self.earth_radius])
-        direction /= np.linalg.norm(direction)
-        dot_prod = np.dot(endpoint, direction)
+        endpoint = np.array(endpoint, dtype=float, ndmin=2)
+        endpoint[:, 2] += self.earth_radius
+        direction = np.array(direction, dtype=float, ndmin=2)
+        direction = direction / np.linalg.norm(direction, axis=1, keepdims=True)
+        endpoint, direction = np.broadcast_arrays(endpoint, direction)
+        dot_prod = np.sum(endpoint * direction, axis=1)
         # Check for intersection of line and sphere
-        discriminant = dot_prod ** 2 - np.sum(endpoint ** 2) + self.earth_radius ** 2
-        if discriminant <= 0:
-            return 0
+        radius_squared = np.sum(endpoint ** 2, axis=1)
+        discriminant = dot_prod ** 2 - radius_squared + self.earth_radius ** 2
         # Calculate the distance at which the line intersects the sphere
-        distance = -dot_prod + np.sqrt(discriminant)
-        if distance <= 0:
-            return 0
+        distance = -dot_prod + np.sqrt(np.maximum(discriminant, 0))
+        distance[(discriminant <= 0) | (distance <= 0)] = 0
         # Parameterize line integral with ts from 0 to 1, with steps just under
-        # the given step size (in meters)
-        n_steps = int(distance / step)
-        if distance % step:
-            n_steps += 1
-        ts = np.linspace(0, 1, n_steps)
-        xs = endpoint[0] + ts * distance * direction[0]
-        ys = endpoint[1] + ts * distance * direction[1]
-        zs = endpoint[2] + ts * distance * direction[2]
-        rs = np.sqrt(xs ** 2 + ys ** 2 + zs ** 2)
-        rhos = self.density(rs)
-        return np.trapz(rhos * distance, ts)
+        # the given step size (in meters). The integration points of all chords are concatenated
+        # (in chunks to limit the memory consumption) and the trapezoidal integrals are summed per chord.
+        n_steps = np.ceil(distance / step).astype(int)
+        n_steps[n_steps < 2] = 0  # a chord with less than two integration points has no column density
+        depths = np.zeros(len(distance))
+        max_points = 2 ** 20
+        i_start = 0
+        while(i_start < len(n_steps)):
+            i_stop = i_start + max(1, np.searchsorted(np.cumsum(n_steps[i_start:]), max_points, side='right'))
+            n = n_steps[i_start:i_stop]
+            if(np.sum(n)):
+                i_chord = np.repeat(np.arange(i_start, i_stop), n)
+                offsets = np.cumsum(n) - n
+                i_point = np.arange(np.sum(n)) - np.repeat(offsets, n)
+                ts = i_point * (1. / np.maximum(n_steps[i_chord] - 1, 1))
+                ts[(offsets + n - 1)[n > 0]] = 1.
+                # distance of the integration points to the center of the Earth
+                ls = ts * distance[i_chord]
+                rs = np.sqrt(np.maximum(radius_squared[i_chord] + ls * (2 * dot_prod[i_chord] + ls), 0))
+                rhos = self.density(rs) * distance[i_chord]
+                # the trapezoidal segments between the last point of one chord and the first point of the next chord are discarded
+                segments = np.diff(ts) * (rhos[1:] + rhos[:-1]) / 2.
+                same_chord = i_chord[1:] == i_chord[:-1]
+                depths += np.bincount(i_chord[1:][same_chord], weights=segments[same_chord], minlength=len(depths))
+            i_start = i_stop
+        if(single):
+            return depths[0]
+        return depths
+
+    def slant_depth_tabulated(self, endpoint, direction):
+        """
+        Calculates the column density of a chord cutting through Earth using a precalculated table.
+
+        Because of the spherical symmetry of the Earth model, the column density of a chord that crosses
+        the whole Earth only depends on the impact parameter of the chord, i.e., on the cosine of the angle
+        at which the chord enters the Earth. This column density is tabulated once per Earth model and
+        obtained via linear interpolation. The part of the chord between the surface and the endpoint
+        is located in the outermost layer of constant density and is accounted for analytically, so that
+        the column densities of all endpoints (at any depth within the outermost layer) are obtained from
+        the same table. Endpoints deeper than the outermost layer are calculated with `slant_depth`.
+
+        Parameters
+        ----------
+        endpoint : array_like
+            Vector position of the chord endpoint, in a coordinate system
+            centered on the surface of the Earth. Either of shape (3,) or (n, 3).
+        direction : array_like
+            Vector direction of the chord, in a coordinate system
+            centered on the surface of the Earth. Either of shape (3,) or (n, 3).
+
+        Returns
+        -------
+        float or array of floats
+            Column density along the chord
+
+        See Also
+        --------
+        PREM.slant_depth : Calculates the column density by integrating the Earth's density along the chord.
+
+        """
+        single = np.ndim(endpoint) == 1 and np.ndim(direction) == 1
+        endpoint = np.array(endpoint, dtype=float, ndmin=2)
+        endpoint[:, 2] += self.earth_radius
+        direction = np.array(direction, dtype=float, ndmin=2)
+        direction = direction / np.linalg.norm(direction, axis=1, keepdims=True)
+        endpoint, direction = np.broadcast_arrays(endpoint, direction)
+        dot_prod = np.sum(endpoint * direction, axis=1)
+        r2 = np.sum(endpoint ** 2, axis=1)
+        # impact parameter of the chord and the distances from the endpoint to the points where the chord
+        # enters and leaves the Earth
+        impact_parameter = np.sqrt(np.maximum(r2 - dot_prod ** 2, 0))
+        half_chord = np.sqrt(np.maximum(self.earth_radius ** 2 - impact_parameter ** 2, 0))
+        t_in = -dot_prod - half_chord
+        t_out = -dot_prod + half_chord
+        depths = np.zeros(len(r2))
+        density_outer_layer = self.densities[-1]
+        if(callable(density_outer_layer)):  # the outermost layer does not have a constant density
+            direct = np.ones(len(r2), dtype=bool)
+        else:
+            direct = (r2 < self.radii[-2] ** 2) & (t_in < 0)
+            hits_earth = (impact_parameter < self.earth_radius) & (t_out > 0) & ~direct
+            # chords that start at the endpoint in the outermost layer and go outwards, only cross the outermost layer
+            outwards = hits_earth & (dot_prod >= 0) & (t_in < 0)
+            depths[outwards] = density_outer_layer * t_out[outwards]
+            # all other chords cross the whole Earth, the part before the endpoint is subtracted if the endpoint is inside the Earth
+            crossing = hits_earth & ~outwards
+            b, table = self._get_slant_depth_table()
+            depths[crossing] = np.where(impact_parameter[crossing] < b[-1],
+                                        np.interp(impact_parameter[crossing], b, table),
+                                        density_outer_layer * 2 * half_chord[crossing])
+            depths[crossing] -= density_outer_layer * np.maximum(-t_in[crossing], 0)
+        if(np.any(direct)):
+            depths[direct] = self.slant_depth(endpoint[direct] - np.array([0, 0, self.earth_radius]), direction[direct])
+        if(single):
+            return depths[0]
+        return depths
+
+    def _get_slant_depth_table(self):
+        """
+        returns the table of column densities of chords crossing the whole Earth used by `slant_depth_tabulated`.
+        The table is calculated at the first call and cached for all instances of the Earth model.
+
+        The density is integrated separately in each layer with a Gauss-Legendre quadrature, so the
+        table is calculated quickly and does not suffer from the discontinuities of the density at the
+        layer boundaries.
+
+        Returns
+        -------
+        impact_parameters: array of floats
+            the impact parameters of the chords, i.e., the minimal distance of the chord to the center of the Earth.
+            Only chords that cross the layers below the outermost layer are tabulated.
+        table: array of floats
+            the column density of the chords
+        """
+        key = self.__class__
+        if(key not in _slant_depth_tables):
+            logger.info(f"calculating table of slant depths for {self.__class__.__name__} Earth model")
+            impact_parameters = np.linspace(0, self.radii[-2], 20001)
+            nodes, weights = np.polynomial.legendre.leggauss(16)
+            # the distance from the point of closest approach at which the chords cross the layer boundaries
+            s_boundaries = np.sqrt(np.maximum(np.array(self.radii)[None, :] ** 2 - impact_parameters[:, None] ** 2, 0))
+            s_lower = np.hstack([np.zeros((len(impact_parameters), 1)), s_boundaries[:, :-1]])
+            s_center = 0.5 * (s_boundaries + s_lower)
+            s_half_width = 0.5 * (s_boundaries - s_lower)
+            table = np.zeros(len(impact_parameters))
+            for node, weight in zip(nodes, weights):
+                s = s_center + node * s_half_width
+                rhos = self.density(np.sqrt(impact_parameters[:, None] ** 2 + s ** 2))
+                # the chord is symmetric around the point of closest approach
+                table += 2 * weight * np.sum(rhos * s_half_width, axis=1)
+            _slant_depth_tables[key] = (impact_parameters, table)
+        return _slant_depth_tables[key]
 
 
 class CoreMantleCrustModel(PREM):
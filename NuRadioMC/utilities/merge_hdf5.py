@@ -8,187 +8,239 @@ import argparse
 import os
 import logging
 import math
+from NuRadioMC.simulation import profiling
 logger = logging.getLogger("HDF5-merger")
 logging.basicConfig(format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
 logger.setLevel(logging.WARNING)
 
 
-def merge2(filenames, output_filename):
+def _read_file_summary(filename):
+    """
+    reads the attributes and the shapes and data types of all data sets of an output file (first pass of `merge2`)
+
+    Only the event group ids are read from the data sets as they are needed to check their uniqueness.
+
+    Parameters
+    ----------
+    filename: string
+        the hdf5 output file
+
+    Returns
+    -------
+    dictionary
+    """
+    summary = {'filename': filename, 'datasets': OrderedDict(), 'groups': OrderedDict(), 'group_attrs': OrderedDict(),
+               'event_group_ids': None}
+    with h5py.File(filename, 'r') as fin:
+        summary['attrs'] = OrderedDict((key, fin.attrs[key]) for key in fin.attrs)
+        # empty files might not have the triggered object at all
+        summary['n_triggered'] = int(np.sum(np.array(fin['triggered']))) if 'triggered' in fin.keys() else 0
+        for key in fin:
+            if isinstance(fin[key], h5py._hl.group.Group):  # loop through station groups
+                summary['groups'][key] = OrderedDict((key2, (fin[key][key2].shape, fin[key][key2].dtype)) for key2 in fin[key])
+                summary['group_attrs'][key] = OrderedDict((key2, fin[key].attrs[key2]) for key2 in fin[key].attrs)
+            else:
+                summary['datasets'][key] = (fin[key].shape, fin[key].dtype)
+        if(summary['n_triggered'] and 'event_group_ids' in fin.keys()):
+            summary['event_group_ids'] = np.unique(fin['event_group_ids'][...])
+    return summary
+
+
+def _copy_dataset(source, destination, offset, chunk_size, event_group_id_map=None):
+    """
+    copies a data set chunk by chunk into a preallocated data set of the merged file
+
+    Parameters
+    ----------
+    source: h5py.Dataset
+        the data set of the input file
+    destination: h5py.Dataset
+        the data set of the merged file
+    offset: int
+        the row of the merged data set where the data of the input file starts
+    chunk_size: int
+        the number of rows that are copied at once
+    event_group_id_map: tuple of arrays or None
+        the sorted event group ids that need to be replaced and their new values
+    """
+    for start in range(0, len(source), chunk_size):
+        stop = min(start + chunk_size, len(source))
+        value = source[start:stop]
+        if(event_group_id_map is not None):
+            old_ids, new_ids = event_group_id_map
+            index = np.minimum(np.searchsorted(old_ids, value), len(old_ids) - 1)
+            mask = old_ids[index] == value
+            value[mask] = new_ids[index[mask]]
+        destination[offset + start:offset + stop] = value
+
+
+def merge2(filenames, output_filename, chunk_size=100000, compression='gzip', n_readers=1):
+    """
+    merges multiple hdf5 output files into one file
+
+    The merge is done in two passes, so that the memory does not scale with the size of the files. In the first pass
+    only the attributes and the shapes of the data sets are read (and the event group ids to guarantee their uniqueness).
+    In the second pass, all data sets and station groups are copied chunk by chunk into preallocated data sets.
+
+    Parameters
+    ----------
+    filenames: list of strings
+        the input files
+    output_filename: string
+        the merged file
+    chunk_size: int
+        the number of rows that are copied at once
+    compression: string or None
+        the compression filter of the merged data sets (e.g. 'gzip' or 'lzf'), None for no compression
+    n_readers: int
+        the number of processes that read the attributes and shapes of the input files in the first pass
+    """
     logger.warning(f"merging {len(filenames)} files into {os.path.basename(output_filename)}")
-    data = OrderedDict()
     attrs = OrderedDict()
-    groups = OrderedDict()
     group_attrs = OrderedDict()
-    n_data = {}
-    n_groups = {}
-    non_empty_filenames = []
+    non_empty_files = []  # the indices of the files with triggered events
     n_events_total = 0
 
-    for f in filenames:
+    if(n_readers > 1):
+        from multiprocessing import Pool
+        with Pool(n_readers) as p:
+            summaries = p.map(_read_file_summary, filenames)
+    else:
+        summaries = [_read_file_summary(f) for f in filenames]
+
+    for iF, (f, summary) in enumerate(zip(filenames, summaries)):
         logger.info("adding file {}".format(f))
-        fin = h5py.File(f, 'r')
-        n_events_total += fin.attrs['n_events']
-        logger.debug(f"increasing total number of events by {fin.attrs['n_events']:d} to {n_events_total:d} ")
+        n_events_total += summary['attrs']['n_events']
+        logger.debug(f"increasing total number of events by {summary['attrs']['n_events']:d} to {n_events_total:d} ")
 
-        # empty files might not have the triggered object at all
-        if('triggered' not in fin.keys() or  ('triggered' in fin.keys() and np.sum(np.array(fin['triggered'])) == 0)):
+        if(summary['n_triggered'] == 0):
             logger.info(f"file {f} contains no events")
         else:
-            non_empty_filenames.append(f)
-            logger.debug(f"file {f} contains {np.sum(np.array(fin['triggered']))} triggered events.")
-
-        data[f] = {}
-        groups[f] = {}
+            non_empty_files.append(iF)
+            logger.debug(f"file {f} contains {summary['n_triggered']} triggered events.")
 
-        for key in fin:
-            if isinstance(fin[key], h5py._hl.group.Group):  # loop through station groups
-                groups[f][key] = {}
-                if(key not in n_groups):
-                    n_groups[key] = {}
-                for key2 in fin[key]:
-                    groups[f][key][key2] = fin[key][key2][...]
-                    if(key2 not in n_groups[key]):
-                        n_groups[key][key2] = 0
-                    n_groups[key][key2] += len(groups[f][key][key2])
-                if(key not in group_attrs):
-                    group_attrs[key] = {}
-                    for key2 in fin[key].attrs:
-                        group_attrs[key][key2] = fin[key].attrs[key2]
-                else:
-                    for key2 in fin[key].attrs:
-                        if(not np.all(group_attrs[key][key2] == fin[key].attrs[key2])):
-                            logger.warning(f"attribute {key2} of group {key} of file {filenames[0]} and {f} are different ({group_attrs[key][key2]} vs. {fin[key].attrs[key2]}. Using attribute value of first file, but you have been warned!")
+        for key in summary['groups']:
+            if(key not in group_attrs):
+                group_attrs[key] = summary['group_attrs'][key]
             else:
-                data[f][key] = fin[key][...]
-                if(key not in n_data):
-                    n_data[key] = 0
-                n_data[key] += len(data[f][key])
+                for key2 in summary['group_attrs'][key]:
+                    if(not np.all(group_attrs[key][key2] == summary['group_attrs'][key][key2])):
+                        logger.warning(f"attribute {key2} of group {key} of file {filenames[0]} and {f} are different ({group_attrs[key][key2]} vs. {summary['group_attrs'][key][key2]}. Using attribute value of first file, but you have been warned!")
 
-        for key in fin.attrs:
+        fin_attrs = summary['attrs']
+        for key in fin_attrs:
             if(key not in attrs):
-                attrs[key] = fin.attrs[key]
+                attrs[key] = fin_attrs[key]
+            elif(key == 'profile'):
+                # the profiling counters and timings of all files are added up
+                attrs[key] = profiling.merge_profiles(attrs[key], fin_attrs[key])
             else:
                 if(key != 'trigger_names'):
-                    if(not np.all(np.nan_to_num(attrs[key]) == np.nan_to_num(fin.attrs[key]))):
+                    if(not np.all(np.nan_to_num(attrs[key]) == np.nan_to_num(fin_attrs[key]))):
                         if(key == "n_events"):
-                            logger.warning(f"number of events in file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin.attrs[key]}. We keep track of the total number of events, but in case the simulation was performed with different settings per file (e.g. different zenith angle bins), the averaging might be effected.")
+                            logger.warning(f"number of events in file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin_attrs[key]}. We keep track of the total number of events, but in case the simulation was performed with different settings per file (e.g. different zenith angle bins), the averaging might be effected.")
                         elif(key == "start_event_id"):
                             continue
                         else:
-                            logger.warning(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin.attrs[key]}. Using attribute value of first file, but you have been warned!")
+                            logger.warning(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin_attrs[key]}. Using attribute value of first file, but you have been warned!")
                 else:
-                    if(len(attrs[key]) != len(fin.attrs[key]) or np.all(attrs[key] != fin.attrs[key])):
-                        logger.error(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin.attrs[key]}. ")
-                        raise AttributeError(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin.attrs[key]}. ")
-            if((('trigger_names' not in attrs) or (len(attrs['trigger_names']) == 0)) and 'trigger_names' in fin.attrs):
-                attrs['trigger_names'] = fin.attrs['trigger_names']
-        fin.close()
+                    if(len(attrs[key]) != len(fin_attrs[key]) or np.all(attrs[key] != fin_attrs[key])):
+                        logger.error(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin_attrs[key]}. ")
+                        raise AttributeError(f"attribute {key} of file {filenames[0]} and {f} are different ({attrs[key]} vs. {fin_attrs[key]}. ")
+            if((('trigger_names' not in attrs) or (len(attrs['trigger_names']) == 0)) and 'trigger_names' in fin_attrs):
+                attrs['trigger_names'] = fin_attrs['trigger_names']
 
     # create data sets
     logger.info("creating data sets")
     fout = h5py.File(output_filename, 'w')
-    if(len(non_empty_filenames)):
+    if(len(non_empty_files)):
         # check event group ids for uniqueness (this is important because effective volume/area calculation uses the event
         # group id to determine if a multi station coincidence exists
-        # to start, get the 'event_group_ids' for the first file name only
+        # to start, get the unique 'event_group_ids' for the first file name only
         # then, loop over all the other files (iF-th file) in the set, and check to see if there
-        # is any overlap (intersection) between the iF-th file and the first file
-        # if so, then identify what the overlap is, and increment the id number in the iF-th file by 1
-        # so that it again becomes unique; then use a np mask to replace the overlapping
-        # number with the new unique number in the iF-th file
-        # then, append the now totally unique list of id's from the iF-th file
-        # to the list from the first file, and so on
-        unique_uegids = np.unique(data[non_empty_filenames[0]]['event_group_ids'])
-        for iF, f in enumerate(non_empty_filenames):
-            if(iF == 0):
-                continue
-            current_uegids = np.unique(data[f]['event_group_ids'])
+        # is any overlap (intersection) between the iF-th file and the previous files
+        # if so, then new unique ids are assigned to the overlapping ids of the iF-th file. The replacement
+        # is applied (also to the event_group_id arrays of the station groups) when the data sets are copied
+        event_group_id_maps = {}
+        unique_uegids = summaries[non_empty_files[0]]['event_group_ids']
+        for iF in non_empty_files[1:]:
+            current_uegids = summaries[iF]['event_group_ids']
             intersect = np.intersect1d(unique_uegids, current_uegids, assume_unique=True)
-            if(np.sum(intersect)):
-                current_egids = data[f]['event_group_ids']
+            if(len(intersect)):
                 new_egid = max(unique_uegids.max(), current_uegids.max()) + 1
-                for gid in intersect:
-                    mask = gid == current_egids  # there can be multiple entries per unique event group id, we need to change all of them to the new id
-                    current_egids[mask] = new_egid
-                    # also change the event_group_id arrays of the station groups
-                    if f in non_empty_filenames:
-                        for key in groups[f]:  # loop through all groups
-                            if 'event_group_ids' in groups[f][key]:
-                                g_egids = groups[f][key]['event_group_ids']
-                                mask_g = gid == g_egids
-                                if(np.sum(mask_g)):  # station might not have this event group id, so skip stations where this egid is not present
-                                    g_egids[mask_g] = new_egid
-                    new_egid += 1
-
-                logger.warning(f"event group ids are not unique per file, current file is {f}, new unique ids have been generated.")
+                new_egids = np.arange(new_egid, new_egid + len(intersect), dtype=current_uegids.dtype)
+                event_group_id_maps[iF] = (intersect, new_egids)
+                current_uegids = np.union1d(np.setdiff1d(current_uegids, intersect, assume_unique=True), new_egids)
+
+                logger.warning(f"event group ids are not unique per file, current file is {filenames[iF]}, new unique ids have been generated.")
                 logger.debug(f"non-unique event ids: {intersect}")
-            current_uegids = np.unique(data[f]['event_group_ids'])  # get the updated list of unique event group ids. Now there should be no intersection with the ids of the previous files
             # test again for uniqueness
             intersect = np.intersect1d(unique_uegids, current_uegids, assume_unique=True)
-            if(np.sum(intersect)):
-                raise IndexError(f"event group ids are not unique per file, current file is {f}")
+            if(len(intersect)):
+                raise IndexError(f"event group ids are not unique per file, current file is {filenames[iF]}")
             unique_uegids = np.append(unique_uegids, current_uegids)
 
-        keys = data[non_empty_filenames[0]]
+        # preallocate the data sets of the merged file and calculate where the data of each input file starts
+        offsets = OrderedDict((iF, []) for iF in non_empty_files)  # (group, data set, first row) per file
+        keys = summaries[non_empty_files[0]]['datasets']
         for key in keys:
-            logger.info(f"merging key {key}")
             all_files_have_key = True
-            for f in non_empty_filenames:
-                if(not key in data[f]):
-                    logger.debug(f"key {key} not in {f}")
+            for iF in non_empty_files:
+                if(not key in summaries[iF]['datasets']):
+                    logger.debug(f"key {key} not in {filenames[iF]}")
                     all_files_have_key = False
             if(not all_files_have_key):
                 logger.warning(f"not all files have the key {key}. This key will not be present in the merged file.")
                 continue
-            shape = list(data[non_empty_filenames[0]][key].shape)
-            shape[0] = n_data[key]
-
-            tmp = np.zeros(shape, dtype=data[non_empty_filenames[0]][key].dtype)
-
-            i = 0
-            for f in non_empty_filenames:
-                tmp[i:(i + len(data[f][key]))] = data[f][key]
-                i += len(data[f][key])
+            shape, dtype = summaries[non_empty_files[0]]['datasets'][key]
+            shape = list(shape)
+            n_rows = 0
+            for iF in non_empty_files:
+                offsets[iF].append((None, key, n_rows))
+                n_rows += summaries[iF]['datasets'][key][0][0]
+            shape[0] = n_rows
+            fout.create_dataset(key, shape, dtype=dtype, compression=compression)
 
-            fout.create_dataset(key, tmp.shape, dtype=tmp.dtype,
-                                compression='gzip')[...] = tmp
-
-        keys = groups[non_empty_filenames[0]]
+        keys = summaries[non_empty_files[0]]['groups']
         for key in keys:  # loop through all groups
-            logger.info("writing group {}".format(key))
             # first loop through all keys of this group(station) to find all available entries (necessary because some
             # of the files might be empty
-            list_of_keys = list(groups[non_empty_filenames[0]][key].keys())
+            list_of_keys = list(keys[key].keys())
             list_of_dtypes = {}
             list_of_shapes = {}
-            for f in non_empty_filenames:
-                for key2 in groups[f][key]:  # loop through all datasets of this group
+            n_rows = {}
+            for iF in non_empty_files:
+                for key2, (shape, dtype) in summaries[iF]['groups'].get(key, {}).items():  # loop through all datasets of this group
                     if(key2 not in list_of_dtypes):
-                        list_of_dtypes[key2] = groups[f][key][key2].dtype
-                        list_of_shapes[key2] = list(groups[f][key][key2].shape)
-                    groups[f][key][key2].dtype
+                        list_of_dtypes[key2] = dtype
+                        list_of_shapes[key2] = list(shape)
+                        n_rows[key2] = 0
                     if(key2 not in list_of_keys):
                         list_of_keys.append(key2)
+                    offsets[iF].append((key, key2, n_rows[key2]))
+                    n_rows[key2] += shape[0]
 
             g = fout.create_group(key)
             for key2 in list_of_keys:  # loop through all datasets of this group
                 shape = list_of_shapes[key2]
-                shape[0] = n_groups[key][key2]
-
-                tmp = np.zeros(shape, dtype=list_of_dtypes[key2])
-                i = 0
-                for f in non_empty_filenames:
-                    if(key2 in groups[f][key]):
-                        tmp[i:(i + len(groups[f][key][key2]))] = groups[f][key][key2]
-                        i += len(groups[f][key][key2])
-                    else:
-                        logger.info(f"data set {key2} not in file {f} of station {key}")
-
-                g.create_dataset(key2, shape, dtype=list_of_dtypes[key2],
-                                 compression='gzip')[...] = tmp
+                shape[0] = n_rows[key2]
+                g.create_dataset(key2, shape, dtype=list_of_dtypes[key2], compression=compression)
             # save group attributes
             for key2 in group_attrs[key]:
                 fout[key].attrs[key2] = group_attrs[key][key2]
+
+        # second pass: copy the data sets of all files chunk by chunk
+        for iF in non_empty_files:
+            logger.info(f"copying data sets of file {filenames[iF]}")
+            with h5py.File(filenames[iF], 'r') as fin:
+                for key, key2, offset in offsets[iF]:
+                    if(key is None):
+                        source, destination = fin[key2], fout[key2]
+                    else:
+                        source, destination = fin[key][key2], fout[key][key2]
+                    event_group_id_map = event_group_id_maps.get(iF, None) if key2 == 'event_group_ids' else None
+                    _copy_dataset(source, destination, offset, chunk_size, event_group_id_map)
+
         # save all atrributes
         attrs['n_events'] = n_events_total
         for key in attrs:
@@ -207,13 +259,14 @@ def merge2(filenames, output_filename):
             if isinstance(fin[key], h5py._hl.group.Group):
                 g = fout.create_group(key)
                 for key2 in fin[key]:
-                    g.create_dataset(key2, fin[key][key2].shape, dtype=fin[key][key2].dtype,
-                                     compression='gzip')[...] = fin[key][key2]
+                    _copy_dataset(fin[key][key2], g.create_dataset(key2, fin[key][key2].shape, dtype=fin[key][key2].dtype,
+                                                                   compression=compression), 0, chunk_size)
                 for key2 in fin[key].attrs:
                     g.attrs[key2] = fin[key].attrs[key2]
             else:
-                fout.create_dataset(key, fin[key].shape, dtype=fin[key].dtype,
-                                    compression='gzip')[...] = fin[key]
+                _copy_dataset(fin[key], fout.create_dataset(key, fin[key].shape, dtype=fin[key].dtype,
+                                                            compression=compression), 0, chunk_size)
+        fin.close()
 
     fout.close()
 
@@ -233,7 +286,11 @@ if __name__ == "__main__":
     parser.add_argument('files', nargs='+', help='input file or files')
     parser.add_argument('--loglevel', metavar='level', help='loglevel set to either DEBUG, INFO, or WARNING')
     parser.add_argument('--cores', default=1, type=int, help='number of cores to use')
+    parser.add_argument('--chunk_size', default=100000, type=int, help='number of rows that are copied at once')
+    parser.add_argument('--compression', default='gzip', help="compression of the merged data sets, 'gzip', 'lzf' or 'none'")
+    parser.add_argument('--readers', default=1, type=int, help='number of processes that read the attributes of the input files (only used if cores is 1)')
     args = parser.parse_args()
+    merge_kwargs = {'chunk_size': args.chunk_size, 'compression': None if args.compression == 'none' else args.compression}
 
     if args.loglevel is not None:
         log_val = eval(f'logging.{args.loglevel}')
@@ -272,13 +329,13 @@ if __name__ == "__main__":
                     input_args.append({'filenames': input_files[mask], 'output_filename': output_filename})
         if(args.cores == 1):
             for i in range(len(input_args)):
-                merge2(input_args[i]['filenames'], input_args[i]['output_filename'])
+                merge2(input_args[i]['filenames'], input_args[i]['output_filename'], n_readers=args.readers, **merge_kwargs)
         else:
             from multiprocessing import Pool
             logger.warning(f"running {len(input_args)} job on {args.cores} cores")
 
             def tmp(kwargs):
-                merge2(**kwargs)
+                merge2(**kwargs, **merge_kwargs)
 
             with Pool(args.cores) as p:
                 p.map(tmp, input_args)
@@ -289,4 +346,4 @@ if __name__ == "__main__":
             logger.error('file {} already exists, skipping'.format(output_filename))
         else:
             input_files = args.files[1:]
-            merge2(input_files, output_filename)
+            merge2(input_files, output_filename, n_readers=args.readers, **merge_kwargs)
@@ -3,7 +3,6 @@ import json
 import os
 from NuRadioReco.utilities import units, io_utilities
 from radiotools import helper as hp
-from radiotools import coordinatesystems as cs
 from scipy import constants
 import logging
 import pickle
@@ -81,6 +80,26 @@ def interpolate_linear_vectorized(x, x0, x1, y0, y1, interpolation_method='compl
     return result
 
 
+def _interpolate_linear_broadcast(x, x0, x1, y0, y1):
+    """
+    Same as `interpolate_linear` (complex interpolation) but all parameters can be arrays that are broadcast
+    against each other, if x0 and x1 are equal y0 is returned
+    """
+    equal = x0 == x1
+    denominator = np.where(equal, 1., x1 - x0)
+    return np.where(equal, y0, y0 + (y1 - y0) * (x - x0) / denominator)
+
+
+def _is_equal(a, b, rel_precision=1e-5):
+    """
+    Same as `radiotools.helper.is_equal` for an array `a`
+    """
+    a = np.asarray(a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difference = np.where(a + b != 0, 0.5 * np.abs(a - b) / np.abs(a + b), 0.5 * np.abs(a - b) / (np.abs(a) + np.abs(b)))
+    return np.where((a + b == 0) & (a == 0), True, difference < rel_precision)
+
+
 def get_group_delay(vector_effective_length, df):
     """
     helper function to calculate the group delay from the vector effecitve length
@@ -938,6 +957,130 @@ def preprocess_XFDTD(path):
                 fout, protocol=4)
 
 
+def _check_antenna_response_grid(ff, thetas, phis, frequencies, theta_angles, phi_angles):
+    """
+    checks that the antenna response is tabulated on a regular grid of frequencies, phi and theta angles,
+    with the theta angle running fastest and the frequency running slowest
+
+    Parameters
+    ----------
+    ff, thetas, phis: arrays of floats
+        the frequency, theta and phi of every entry of the antenna response
+    frequencies, theta_angles, phi_angles: arrays of floats
+        the (unique) axes of the grid
+    """
+    n_freqs, n_theta, n_phi = len(frequencies), len(theta_angles), len(phi_angles)
+    if len(ff) != n_freqs * n_theta * n_phi:
+        logger.error("antenna response has {} entries, expected {}".format(len(ff), n_freqs * n_theta * n_phi))
+        raise Exception("antenna response is not tabulated on a regular grid")
+    grid_ff, grid_phis, grid_thetas = np.meshgrid(frequencies, phi_angles, theta_angles, indexing='ij')
+    for name, values, grid in [('phi angle', phis, grid_phis), ('theta angle', thetas, grid_thetas), ('frequency', ff, grid_ff)]:
+        mismatch = np.flatnonzero(np.asarray(values) != grid.flatten())
+        if len(mismatch):
+            logger.error("{} has changed during the loop at index {}: {}, {}".format(
+                name, mismatch[0], grid.flatten()[mismatch[0]], values[mismatch[0]]))
+            raise Exception("{} has changed during the loop".format(name))
+
+
+def _get_binary_antenna_response_filenames(antenna_model, path=path_to_antennamodels):
+    """
+    returns the filenames of the binary representation of an antenna model, i.e., the file with the
+    axes of the grid and the file with the vector effective length
+    """
+    return (os.path.join(path, antenna_model, "{}_axes.npz".format(antenna_model)),
+            os.path.join(path, antenna_model, "{}_response.npy".format(antenna_model)))
+
+
+def save_binary_antenna_response(antenna_model, path=path_to_antennamodels):
+    """
+    converts the pickle file of an antenna model into the binary format that can be memory mapped
+    (see `load_binary_antenna_response`)
+
+    The consistency of the grid is checked once during the conversion. The vector effective lengths are saved
+    as one contiguous complex array of shape (2, n_freqs, n_phi, n_theta) (H_theta and H_phi) and the
+    axes and orientation in a separate npz file together with the hash sum of the pickle file.
+
+    Parameters
+    ----------
+    antenna_model: string
+        name of antenna model
+    path: string
+        path to folder containing the antenna models
+    """
+    filename = os.path.join(path, antenna_model, "{}.pkl".format(antenna_model))
+    orientation_theta, orientation_phi, rotation_theta, rotation_phi, ff, thetas, phis, H_phi, H_theta = \
+        get_pickle_antenna_response(filename)
+    frequencies = np.unique(ff)
+    theta_angles = np.unique(thetas)
+    phi_angles = np.unique(phis)
+    _check_antenna_response_grid(ff, thetas, phis, frequencies, theta_angles, phi_angles)
+    response = np.array([H_theta, H_phi], dtype=complex).reshape(2, len(frequencies), len(phi_angles), len(theta_angles))
+
+    filename_axes, filename_response = _get_binary_antenna_response_filenames(antenna_model, path)
+    # the files are written to a temporary file first and then renamed, so that processes that
+    # convert the same antenna model at the same time do not read incomplete files
+    tmp_suffix = ".{}.tmp".format(os.getpid())
+    with open(filename_response + tmp_suffix, 'wb') as fout:
+        np.save(fout, response)
+    with open(filename_axes + tmp_suffix, 'wb') as fout:
+        np.savez(fout, frequencies=frequencies, theta_angles=theta_angles, phi_angles=phi_angles,
+                 orientation=np.array([orientation_theta, orientation_phi, rotation_theta, rotation_phi]),
+                 sha1=_get_antenna_model_hash(filename) or '')
+    os.replace(filename_response + tmp_suffix, filename_response)
+    os.replace(filename_axes + tmp_suffix, filename_axes)
+    logger.info("saved binary antenna response of {} to {}".format(antenna_model, filename_response))
+
+
+def load_binary_antenna_response(antenna_model, path=path_to_antennamodels):
+    """
+    loads the binary representation of an antenna model (see `save_binary_antenna_response`). The vector
+    effective lengths are memory mapped, i.e., the file is opened in milliseconds and the pages are shared
+    between all processes on the same node that use the antenna model.
+
+    Parameters
+    ----------
+    antenna_model: string
+        name of antenna model
+    path: string
+        path to folder containing the antenna models
+
+    Returns
+    -------
+    orientation: array of floats
+        orientation_theta, orientation_phi, rotation_theta, rotation_phi
+    frequencies, theta_angles, phi_angles: arrays of floats
+        the axes of the grid
+    response: memory mapped array of complex
+        the vector effective length of shape (2, n_freqs, n_phi, n_theta) (H_theta and H_phi)
+    """
+    filename_axes, filename_response = _get_binary_antenna_response_filenames(antenna_model, path)
+    with np.load(filename_axes) as fin:
+        axes = {key: fin[key] for key in fin.files}
+    filename = os.path.join(path, antenna_model, "{}.pkl".format(antenna_model))
+    sha1 = _get_antenna_model_hash(filename)
+    # the binary representation is outdated if the pickle file was updated on the server or replaced locally
+    if (sha1 is not None and str(axes['sha1']) != sha1) or \
+            (os.path.exists(filename) and os.path.getmtime(filename) > os.path.getmtime(filename_response)):
+        logger.warning("binary antenna response of {} is outdated".format(antenna_model))
+        raise IOError("binary antenna response of {} is outdated".format(antenna_model))
+    response = np.load(filename_response, mmap_mode='r')
+    if response.shape != (2, len(axes['frequencies']), len(axes['phi_angles']), len(axes['theta_angles'])):
+        logger.error("binary antenna response of {} does not match the axes".format(antenna_model))
+        raise IOError("binary antenna response of {} does not match the axes".format(antenna_model))
+    return axes['orientation'], axes['frequencies'], axes['theta_angles'], axes['phi_angles'], response
+
+
+def _get_antenna_model_hash(path):
+    """
+    returns the sha1 hash sum of an antenna model pickle file from the list of hash sums of the antenna
+    models on the central data server, or None if the antenna model is not in the list
+    """
+    antenna_directory = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(antenna_directory, 'antenna_models_hash.json'), 'r') as fin:
+        antenna_hashs = json.load(fin)
+    return antenna_hashs.get(os.path.basename(path), None)
+
+
 class AntennaPatternBase:
     """
     base class of utility class that handles access and buffering to antenna pattern
@@ -971,34 +1114,6 @@ class AntennaPatternBase:
 
         return np.matmul(inv(E), A)
 
-    def _get_theta_and_phi(self, zenith, azimuth, orientation_theta, orientation_phi, rotation_theta, rotation_phi):
-        """
-        transform zenith and azimuth angle in ARIANNA coordinate system to the WIPLD coordinate system.
-        In addition the orientation of the antenna as deployed in the field is taken into account.
-
-        Parameters
-        ----------
-        """
-
-        rot = self._get_antenna_rotation(orientation_theta, orientation_phi, rotation_theta, rotation_phi)
-
-        incoming_direction = hp.spherical_to_cartesian(zenith, azimuth)
-        incoming_direction_WIPLD = np.dot(rot, incoming_direction.T).T
-        theta, phi = hp.cartesian_to_spherical(*incoming_direction_WIPLD)
-        if zenith == 180 * units.deg:
-            logger.debug(incoming_direction)
-            logger.debug(rot)
-            logger.debug(incoming_direction_WIPLD)
-        #         theta = 0.5 * np.pi - theta  # in wipl D the elevation is defined with 0deg being in the x-y plane
-        #         theta = hp.get_normalized_angle(theta)
-        #         phi = hp.get_normalized_angle(phi)
-
-        logger.debug("zen/az {:.0f} {:.0f} transform to {:.0f} {:.0f}".format(zenith / units.deg,
-                                                                              azimuth / units.deg,
-                                                                              theta / units.deg,
-                                                                              phi / units.deg))
-        return theta, phi
-
     def get_antenna_response_vectorized(self, freq, zenith, azimuth, orientation_theta, orientation_phi, rotation_theta,
                                         rotation_phi):
         """
@@ -1037,27 +1152,101 @@ class AntennaPatternBase:
 
         if isinstance(freq, (float, int)):
             freq = np.array([freq])
-        theta, phi = self._get_theta_and_phi(zenith, azimuth, orientation_theta, orientation_phi, rotation_theta,
-                                             rotation_phi)
+        VEL = self.get_antenna_response_multiple_directions(freq, np.array([zenith]), np.array([azimuth]),
+                                                            orientation_theta, orientation_phi,
+                                                            rotation_theta, rotation_phi)
+        return {'theta': VEL['theta'][0],
+                'phi': VEL['phi'][0]}
+
+    def get_antenna_response_multiple_directions(self, freq, zenith, azimuth, orientation_theta, orientation_phi,
+                                                 rotation_theta, rotation_phi):
+        """
+        get the antenna response for many incoming signal directions at once
 
-        Vtheta_raw, Vphi_raw = self._get_antenna_response_vectorized_raw(freq, theta, phi)
+        Same as `get_antenna_response_vectorized` but for arrays of zenith and azimuth angles. The transformation
+        into the coordinate system of the antenna simulation, the interpolation of the antenna pattern and the
+        transformation of the vector effective length back into the ARIANNA coordinate system are done for all
+        directions together.
+
+        Parameters
+        ----------
+        freq : array of floats
+            frequencies
+        zenith : array of floats
+            zenith angles of incoming signal directions
+        azimuth : array of floats
+            azimuth angles of incoming signal directions
+        orientation_theta: float
+            orientation of the antenna, as a zenith angle (see `get_antenna_response_vectorized`)
+        orientation_phi: float
+            orientation of the antenna, as an azimuth angle (see `get_antenna_response_vectorized`)
+        rotation_theta: float
+            rotation of the antenna, as a zenith angle (see `get_antenna_response_vectorized`)
+        rotation_phi: float
+            rotation of the antenna, as an azimuth angle (see `get_antenna_response_vectorized`)
+
+        Returns
+        -------
+        VEL: dictonary of complex arrays
+            theta and phi component of the vector effective length, both components
+            are complex arrays of shape (number of directions, number of frequencies)
+        """
+        freq = np.atleast_1d(freq)
+        zenith = np.atleast_1d(np.array(zenith, dtype=float))
+        azimuth = np.atleast_1d(np.array(azimuth, dtype=float))
+        if self._notfound:
+            VEL = {'theta': np.ones((len(zenith), len(freq)), dtype=np.complex),
+                   'phi': np.ones((len(zenith), len(freq)), dtype=np.complex)}
+            return VEL
+
+        rot = self._get_antenna_rotation(orientation_theta, orientation_phi, rotation_theta, rotation_phi)
+        incoming_direction = np.array([np.sin(zenith) * np.cos(azimuth),
+                                       np.sin(zenith) * np.sin(azimuth),
+                                       np.cos(zenith)])
+        theta, phi = hp.cartesian_to_spherical(*np.dot(rot, incoming_direction))
+
+        Vtheta_raw, Vphi_raw = self._get_antenna_response_multiple_directions_raw(freq, theta, phi)
 
         # now rotate the raw theta and phi component of the VEL into the ARIANNA coordinate system.
         # As the theta and phi angles are differently defined in WIPLD and ARIANNA, also the orientation of the
         # eTheta and ePhi unit vectors are different.
-        cstrans = cs.cstrafo(zenith=theta, azimuth=phi)
-        V_xyz_raw = cstrans.transform_from_onsky_to_ground(
-            np.array([np.zeros(Vtheta_raw.shape[0]), Vtheta_raw, Vphi_raw]))
-        rot = self._get_antenna_rotation(orientation_theta, orientation_phi, rotation_theta, rotation_phi)
-        from numpy.linalg import inv
-        V_xyz = np.dot(inv(rot), V_xyz_raw)
-
-        cstrans2 = cs.cstrafo(zenith=zenith, azimuth=azimuth)
-        V_onsky = cstrans2.transform_from_ground_to_onsky(V_xyz)
-        VEL = {'theta': V_onsky[1],
-               'phi': V_onsky[2]}
+        V_xyz_raw = Vtheta_raw[:, None] * _get_e_theta(theta, phi)[:, :, None] + \
+            Vphi_raw[:, None] * _get_e_phi(phi)[:, :, None]
+        V_xyz = np.einsum('ij,njf->nif', np.linalg.inv(rot), V_xyz_raw)
+        VEL = {'theta': np.einsum('nif,ni->nf', V_xyz, _get_e_theta(zenith, azimuth)),
+               'phi': np.einsum('nif,ni->nf', V_xyz, _get_e_phi(azimuth))}
         return VEL
 
+    def _get_antenna_response_multiple_directions_raw(self, freq, theta, phi):
+        """
+        get vector effective length in the coordinate system of the antenna simulation for many directions
+
+        The default implementation loops over the directions, subclasses can provide a vectorized implementation.
+
+        Returns
+        -------
+        Vtheta_raw, Vphi_raw: complex arrays of shape (number of directions, number of frequencies)
+        """
+        Vtheta_raw = np.zeros((len(theta), len(freq)), dtype=np.complex)
+        Vphi_raw = np.zeros((len(theta), len(freq)), dtype=np.complex)
+        for i in range(len(theta)):
+            Vtheta_raw[i], Vphi_raw[i] = self._get_antenna_response_vectorized_raw(freq, theta[i], phi[i])
+        return Vtheta_raw, Vphi_raw
+
+
+def _get_e_theta(zenith, azimuth):
+    """
+    returns the eTheta unit vectors of the on-sky coordinate system for arrays of directions, shape (n, 3)
+    """
+    return np.array([np.cos(zenith) * np.cos(azimuth), np.cos(zenith) * np.sin(azimuth), -np.sin(zenith)]).T
+
+
+def _get_e_phi(azimuth):
+    """
+    returns the ePhi unit vectors of the on-sky coordinate system for arrays of directions, shape (n, 3)
+    """
+    return np.array([-np.sin(azimuth), np.cos(azimuth), np.zeros_like(azimuth)]).T
+
 
 class AntennaPattern(AntennaPatternBase):
     """
@@ -1065,7 +1254,7 @@ class AntennaPattern(AntennaPatternBase):
     """
 
     def __init__(self, antenna_model, path=path_to_antennamodels,
-                 interpolation_method='complex'):
+                 interpolation_method='complex', use_binary=True):
         """
 
         Parameters
@@ -1078,6 +1267,10 @@ class AntennaPattern(AntennaPatternBase):
             specify in which domain the interpolation should be performed, can be either
             * 'complex' (default) interpolate real and imaginary part of vector effective length
             * 'magphase' interpolate magnitude and phase of vector effective length
+        use_binary: bool (default True)
+            if True, the antenna response is memory mapped from its binary representation
+            (see `save_binary_antenna_response`). If the binary representation does not exist yet, the
+            pickle file is loaded and converted.
         """
 
         self._name = antenna_model
@@ -1086,26 +1279,50 @@ class AntennaPattern(AntennaPatternBase):
         t = time()
         filename = os.path.join(path, antenna_model, "{}.pkl".format(antenna_model))
         self._notfound = False
-        try:
-            self._orientation_theta, self._orientation_phi, self._rotation_theta, self._rotation_phi, \
-                ff, thetas, phis, H_phi, H_theta = get_pickle_antenna_response(filename)
-
-        except IOError:
-            self._notfound = True
-            logger.error("antenna response for {} not found".format(antenna_model))
-            raise FileNotFoundError("antenna response for {} not found".format(antenna_model))
+        response = None
+        if use_binary:
+            try:
+                orientation, self.frequencies, self.theta_angles, self.phi_angles, response = \
+                    load_binary_antenna_response(antenna_model, path)
+            except IOError:
+                try:
+                    save_binary_antenna_response(antenna_model, path)
+                    orientation, self.frequencies, self.theta_angles, self.phi_angles, response = \
+                        load_binary_antenna_response(antenna_model, path)
+                except IOError as e:
+                    logger.warning("binary antenna response of {} could not be created ({}), using pickle file".format(
+                        antenna_model, e))
+        if response is not None:
+            self._orientation_theta, self._orientation_phi, self._rotation_theta, self._rotation_phi = orientation
+            # the response is stored in the order (frequency, phi, theta), i.e., the flattened arrays use the same
+            # indexing as the pickle format (see `_get_index`)
+            self.VEL_theta = response[0].reshape(-1)
+            self.VEL_phi = response[1].reshape(-1)
+        else:
+            try:
+                self._orientation_theta, self._orientation_phi, self._rotation_theta, self._rotation_phi, \
+                    ff, thetas, phis, H_phi, H_theta = get_pickle_antenna_response(filename)
+
+            except IOError:
+                self._notfound = True
+                logger.error("antenna response for {} not found".format(antenna_model))
+                raise FileNotFoundError("antenna response for {} not found".format(antenna_model))
+            self.frequencies = np.unique(ff)
+            self.theta_angles = np.unique(thetas)
+            self.phi_angles = np.unique(phis)
+            # additional consistency check
+            _check_antenna_response_grid(ff, thetas, phis, self.frequencies, self.theta_angles, self.phi_angles)
+            self.VEL_phi = H_phi
+            self.VEL_theta = H_theta
 
-        self.frequencies = np.unique(ff)
         self.frequency_lower_bound = self.frequencies[0]
         self.frequency_upper_bound = self.frequencies[-1]
 
-        self.theta_angles = np.unique(thetas)
         self.theta_lower_bound = self.theta_angles[0]
         self.theta_upper_bound = self.theta_angles[-1]
         logger.debug(
             "{} thetas from {} to {}".format(len(self.theta_angles), self.theta_lower_bound, self.theta_upper_bound))
 
-        self.phi_angles = np.unique(phis)
         self.phi_lower_bound = self.phi_angles[0]
         self.phi_upper_bound = self.phi_angles[-1]
         logger.debug("{} phis from {} to {}".format(len(self.phi_angles), self.phi_lower_bound, self.phi_upper_bound))
@@ -1114,31 +1331,7 @@ class AntennaPattern(AntennaPatternBase):
         self.n_theta = len(self.theta_angles)
         self.n_phi = len(self.phi_angles)
 
-        self.VEL_phi = H_phi
-        self.VEL_theta = H_theta
-
-        # additional consistency check
-        for iFreq, freq in enumerate(self.frequencies):
-            for iPhi, phi in enumerate(self.phi_angles):
-                for iTheta, theta in enumerate(self.theta_angles):
-                    index = self._get_index(iFreq, iTheta, iPhi)
-
-                    if phi != phis[index]:
-                        logger.error("phi angle has changed during theta loop {0}, {1}".format(
-                            phi / units.deg, phis[index] / units.deg))
-                        raise Exception("phi angle has changed during theta loop")
-
-                    if theta != thetas[index]:
-                        logger.error("theta angle has changed during theta loop {0}, {1}".format(
-                            theta / units.deg, thetas[index] / units.deg))
-                        raise Exception("theta angle has changed during theta loop")
-
-                    if freq != ff[index]:
-                        logger.error("frequency has changed {0}, {1}".format(
-                            freq, ff[index]))
-                        raise Exception("frequency has changed")
-
-        logger.warning('loading antenna file {} took {:.0f} seconds'.format(antenna_model, time() - t))
+        logger.info('loading antenna file {} took {:.2f} seconds'.format(antenna_model, time() - t))
 
     def _get_index(self, iFreq, iTheta, iPhi):
         """
@@ -1298,6 +1491,84 @@ class AntennaPattern(AntennaPatternBase):
         interpolated_VELp[out_of_bound_freqs_high] = 0 + 0 * 1j
         return interpolated_VELt, interpolated_VELp
 
+    def _get_antenna_response_multiple_directions_raw(self, freq, theta, phi):
+        """
+        get vector effective length in WIPLD coordinate system for many directions
+
+        The trilinear interpolation of `_get_antenna_response_vectorized_raw` is done for all directions
+        and frequencies together. Only the complex interpolation is vectorized, the interpolation in
+        magnitude and phase falls back to the interpolation direction by direction.
+        """
+        if self._interpolation_method != 'complex':
+            return super()._get_antenna_response_multiple_directions_raw(freq, theta, phi)
+        theta = np.array(theta, dtype=float)
+        phi = np.array(phi, dtype=float)
+        mask = phi < self.phi_lower_bound
+        phi[mask] += 2 * np.pi * np.ceil((self.phi_lower_bound - phi[mask]) / (2 * np.pi))
+        mask = phi > self.phi_upper_bound
+        phi[mask] -= 2 * np.pi * np.ceil((phi[mask] - self.phi_upper_bound) / (2 * np.pi))
+
+        theta[_is_equal(theta, self.theta_upper_bound, rel_precision=1e-5)] = self.theta_upper_bound
+        theta[_is_equal(theta, self.theta_lower_bound, rel_precision=1e-5)] = self.theta_lower_bound
+        out_of_range = (phi < self.phi_lower_bound) | (phi > self.phi_upper_bound) | \
+            (theta < self.theta_lower_bound) | (theta > self.theta_upper_bound)
+        if np.any(out_of_range):
+            logger.warning("theta or phi out of range for {} directions, returning (0,0j)".format(np.sum(out_of_range)))
+            theta[out_of_range] = self.theta_lower_bound
+            phi[out_of_range] = self.phi_lower_bound
+
+        def get_lower_and_upper_index(x, lower_bound, upper_bound, n):
+            if upper_bound == lower_bound:
+                return np.zeros(len(x), dtype=int), np.zeros(len(x), dtype=int)
+            return (np.array(np.floor((x - lower_bound) / (upper_bound - lower_bound) * (n - 1)), dtype=int),
+                    np.array(np.ceil((x - lower_bound) / (upper_bound - lower_bound) * (n - 1)), dtype=int))
+
+        # the angles are columns and the frequencies rows of the interpolated arrays
+        iTheta_lower, iTheta_upper = get_lower_and_upper_index(theta, self.theta_lower_bound, self.theta_upper_bound, self.n_theta)
+        iPhi_lower, iPhi_upper = get_lower_and_upper_index(phi, self.phi_lower_bound, self.phi_upper_bound, self.n_phi)
+        iTheta_lower, iTheta_upper, iPhi_lower, iPhi_upper = [x[:, None] for x in [iTheta_lower, iTheta_upper, iPhi_lower, iPhi_upper]]
+        theta = theta[:, None]
+        phi = phi[:, None]
+        theta_lower = self.theta_angles[iTheta_lower]
+        theta_upper = self.theta_angles[iTheta_upper]
+        phi_lower = self.phi_angles[iPhi_lower]
+        phi_upper = self.phi_angles[iPhi_upper]
+
+        iFrequency_lower = np.array(np.floor(
+            (freq - self.frequency_lower_bound) / (self.frequency_upper_bound - self.frequency_lower_bound) * (
+                self.n_freqs - 1)), dtype=int)
+        iFrequency_upper = np.array(np.ceil(
+            (freq - self.frequency_lower_bound) / (self.frequency_upper_bound - self.frequency_lower_bound) * (
+                self.n_freqs - 1)), dtype=int)
+        # handling frequency out of bound cases properly
+        out_of_bound_freqs = (freq < self.frequency_lower_bound) | (freq > self.frequency_upper_bound)
+        iFrequency_lower[out_of_bound_freqs] = 0
+        iFrequency_upper[out_of_bound_freqs] = self.n_freqs - 1
+        frequency_lower = self.frequencies[iFrequency_lower]
+        frequency_upper = self.frequencies[iFrequency_upper]
+
+        def interpolate(VEL, iFrequency):
+            VEL_theta_low = _interpolate_linear_broadcast(
+                phi, phi_lower, phi_upper,
+                VEL[self._get_index(iFrequency, iTheta_lower, iPhi_lower)],
+                VEL[self._get_index(iFrequency, iTheta_lower, iPhi_upper)])
+            VEL_theta_up = _interpolate_linear_broadcast(
+                phi, phi_lower, phi_upper,
+                VEL[self._get_index(iFrequency, iTheta_upper, iPhi_lower)],
+                VEL[self._get_index(iFrequency, iTheta_upper, iPhi_upper)])
+            return _interpolate_linear_broadcast(theta, theta_lower, theta_upper, VEL_theta_low, VEL_theta_up)
+
+        interpolated_VEL = []
+        for VEL in [self.VEL_theta, self.VEL_phi]:
+            interpolated = _interpolate_linear_broadcast(freq, frequency_lower, frequency_upper,
+                                                         interpolate(VEL, iFrequency_lower),
+                                                         interpolate(VEL, iFrequency_upper))
+            # set all out of bound frequencies and directions to zero
+            interpolated[:, out_of_bound_freqs] = 0
+            interpolated[out_of_range] = 0
+            interpolated_VEL.append(interpolated)
+        return interpolated_VEL[0], interpolated_VEL[1]
+
 
 class AntennaPatternAnalytic(AntennaPatternBase):
     """
@@ -1368,12 +1639,13 @@ class AntennaPatternAnalytic(AntennaPatternBase):
             H_eff_t = np.zeros_like(Gain)
             fmask = freq >= 0
             H_eff_t[fmask] = Gain[fmask] * max_gain_cross * 1 / freq[fmask]
-            H_eff_t *= np.cos(theta) * np.sin(phi)
+            # theta and phi can be columns of directions, the frequencies are broadcast along the rows
+            H_eff_t = H_eff_t * (np.cos(theta) * np.sin(phi))
             H_eff_t *= constants.c * units.m / units.s * Z_ant / Z_0 / np.pi
 
             H_eff_p = np.zeros_like(Gain)
             H_eff_p[fmask] = Gain[fmask] * max_gain_co * 1 / freq[fmask]
-            H_eff_p *= np.cos(phi)
+            H_eff_p = H_eff_p * np.cos(phi)
             H_eff_p *= constants.c * units.m / units.s * Z_ant / Z_0 / np.pi
 
             if group_delay is not None:
@@ -1388,6 +1660,13 @@ class AntennaPatternAnalytic(AntennaPatternBase):
 
             return H_eff_p, H_eff_t
 
+    def _get_antenna_response_multiple_directions_raw(self, freq, theta, phi):
+        """
+        get vector effective length of the analytic antenna pattern for many directions at once
+        """
+        VEL_1, VEL_2 = self._get_antenna_response_vectorized_raw(freq, theta[:, None], phi[:, None])
+        return np.broadcast_to(VEL_1, (len(theta), len(freq))), np.broadcast_to(VEL_2, (len(theta), len(freq)))
+
 
 class AntennaPatternProvider(object):
     __instance = None
@@ -15,6 +15,7 @@ import six  # # used for compatibility between py2 and py3
 import warnings
 from astropy.utils.exceptions import ErfaWarning
 import NuRadioReco.utilities.metaclasses
+from NuRadioReco.detector.detector_snapshot import StationSnapshot
 
 logger = logging.getLogger('NuRadioReco.detector')
 warnings.filterwarnings('ignore', category=ErfaWarning)
@@ -208,6 +209,7 @@ class Detector(object):
         self._buffered_devices = {}
         self.__valid_t0 = astropy.time.Time('2100-1-1')
         self.__valid_t1 = astropy.time.Time('1970-1-1')
+        self._station_snapshots = {}
 
         self.__noise_RMS = None
 
@@ -427,6 +429,38 @@ class Detector(object):
             self._buffered_channels = {}
             self.__valid_t0 = astropy.time.Time('2100-1-1')
             self.__valid_t1 = astropy.time.Time('1970-1-1')
+            self._invalidate_station_snapshots()
+
+    def _invalidate_station_snapshots(self):
+        """
+        discards all compiled station snapshots. Needs to be called whenever the detector description changes.
+        """
+        self._station_snapshots = {}
+
+    def get_station_snapshot(self, station_id, time=None):
+        """
+        returns a read-only, array-backed snapshot of the detector description of a station
+
+        The snapshot contains the channel positions, antenna orientations, cable delays and sampling parameters
+        as numpy arrays as well as the station barycenter. It is compiled on first request and
+        reused until the detector description changes (e.g. if `update` leaves the current validity period).
+
+        Parameters
+        ----------
+        station_id: int
+            the station id
+        time: astropy.time.Time or None
+            if not None, the detector is updated to this time before the snapshot is returned
+
+        Returns
+        -------
+        StationSnapshot
+        """
+        if time is not None:
+            self.update(time)
+        if station_id not in self._station_snapshots:
+            self._station_snapshots[station_id] = StationSnapshot(self, station_id)
+        return self._station_snapshots[station_id]
 
     def get_detector_time(self):
         """
@@ -0,0 +1,110 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger('NuRadioReco.detector.detector_snapshot')
+
+
+class StationSnapshot(object):
+    """
+    read-only, array-backed copy of the detector description of one station
+
+    The snapshot holds the quantities that are queried repeatedly in the inner loops of a simulation or
+    reconstruction (channel positions, antenna orientations, cable delays and sampling parameters) as
+    numpy arrays, so that no lookups in the buffered detector database are needed. It is only valid for the
+    detector time it was created for, use `Detector.get_station_snapshot` to obtain an up-to-date snapshot.
+    All arrays are ordered like `channel_ids` and are write protected.
+    """
+
+    def __init__(self, det, station_id):
+        """
+        compiles the snapshot from a detector object
+
+        Parameters
+        ----------
+        det: Detector object
+            the detector description, needs to be updated to the desired time
+        station_id: int
+            the station id
+        """
+        self.station_id = station_id
+        self.channel_ids = np.array(sorted(det.get_channel_ids(station_id)), dtype=int)
+        self.n_channels = len(self.channel_ids)
+        self._channel_index = {channel_id: i for i, channel_id in enumerate(self.channel_ids)}
+
+        self.absolute_position = np.array(det.get_absolute_position(station_id), dtype=float)
+        self.relative_positions = np.zeros((self.n_channels, 3))
+        self.antenna_orientations = np.zeros((self.n_channels, 4))
+        self.cable_delays = np.zeros(self.n_channels)
+        self.sampling_frequencies = np.full(self.n_channels, np.nan)
+        self.numbers_of_samples = np.zeros(self.n_channels, dtype=int)
+        for i, channel_id in enumerate(self.channel_ids):
+            self.relative_positions[i] = det.get_relative_position(station_id, channel_id)
+            self.antenna_orientations[i] = det.get_antenna_orientation(station_id, channel_id)
+            self.cable_delays[i] = det.get_cable_delay(station_id, channel_id)
+            try:
+                self.sampling_frequencies[i] = det.get_sampling_frequency(station_id, channel_id)
+                self.numbers_of_samples[i] = det.get_number_of_samples(station_id, channel_id)
+            except KeyError:
+                logger.debug("no sampling parameters defined for channel {} of station {}".format(channel_id, station_id))
+        self.absolute_positions = self.relative_positions + self.absolute_position
+        if self.n_channels > 0:
+            self.barycenter = np.mean(self.relative_positions, axis=0) + self.absolute_position
+        else:
+            self.barycenter = np.array(self.absolute_position)
+
+        for array in [self.channel_ids, self.absolute_position, self.relative_positions, self.absolute_positions,
+                      self.antenna_orientations, self.cable_delays, self.sampling_frequencies,
+                      self.numbers_of_samples, self.barycenter]:
+            array.flags.writeable = False
+
+    def get_channel_index(self, channel_id):
+        """
+        returns the index of a channel in the arrays of the snapshot
+
+        Parameters
+        ----------
+        channel_id: int
+            the channel id
+
+        Returns int
+        """
+        if channel_id not in self._channel_index:
+            logger.error("channel {} does not exist in station {}".format(channel_id, self.station_id))
+            raise KeyError("channel {} does not exist in station {}".format(channel_id, self.station_id))
+        return self._channel_index[channel_id]
+
+    def get_relative_position(self, channel_id):
+        """
+        returns the position of a channel relative to the station position
+        """
+        return np.array(self.relative_positions[self.get_channel_index(channel_id)])
+
+    def get_absolute_channel_position(self, channel_id):
+        """
+        returns the absolute position of a channel, i.e. the station position plus the relative channel position
+        """
+        return np.array(self.absolute_positions[self.get_channel_index(channel_id)])
+
+    def get_antenna_orientation(self, channel_id):
+        """
+        returns the antenna orientation (orientation theta, orientation phi, rotation theta, rotation phi) of a channel
+        """
+        return np.array(self.antenna_orientations[self.get_channel_index(channel_id)])
+
+    def get_cable_delay(self, channel_id):
+        """
+        returns the cable delay of a channel
+        """
+        return self.cable_delays[self.get_channel_index(channel_id)]
+
+    def get_sampling_frequency(self, channel_id):
+        """
+        returns the sampling frequency of a channel (NaN if not defined in the detector description)
+        """
+        return self.sampling_frequencies[self.get_channel_index(channel_id)]
+
+    def get_number_of_samples(self, channel_id):
+        """
+        returns the number of samples of a channel (0 if not defined in the detector description)
+        """
+        return self.numbers_of_samples[self.get_channel_index(channel_id)]
@@ -62,12 +62,14 @@ class DetectorSysUncertainties(NuRadioReco.detector.detector.Detector):
             else:
                 key = station_id
         self._antenna_orientation_override[key] = [ori_theta, ori_phi, rot_theta, rot_phi]
+        self._invalidate_station_snapshots()
 
     def reset_antenna_orientation_offsets(self):
         """
         resets all previously set antenna orientation offsets
         """
         self._antenna_orientation_override = {}
+        self._invalidate_station_snapshots()
 
     def get_antenna_orientation(self, station_id, channel_id):
         """
@@ -125,12 +127,14 @@ class DetectorSysUncertainties(NuRadioReco.detector.detector.Detector):
             else:
                 key = station_id
         self._antenna_position_override[key] = [x, y, z]
+        self._invalidate_station_snapshots()
 
     def reset_antenna_position_offsets(self):
         """
         resets all previously set antenna position offsets
         """
         self._antenna_position_override = {}
+        self._invalidate_station_snapshots()
 
     def get_relative_position(self, station_id, channel_id):
         """
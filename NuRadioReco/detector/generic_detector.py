@@ -370,6 +370,7 @@ class GenericDetector(NuRadioReco.detector.detector.Detector):
             'station_id': station_id,
             'properties': properties
         })
+        self._invalidate_station_snapshots()
 
     def get_station_properties_for_event(self, run_number, event_id, station_id=None):
         """
@@ -408,6 +409,8 @@ class GenericDetector(NuRadioReco.detector.detector.Detector):
         event_id: integer
             ID of the event the detector should be set to
         """
+        if run_number != self.__run_number or event_id != self.__event_id:
+            self._invalidate_station_snapshots()
         self.__run_number = run_number
         self.__event_id = event_id
 
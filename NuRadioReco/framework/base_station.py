@@ -95,6 +95,13 @@ class BaseStation():
     def get_id(self):
         return self._station_id
 
+    def uses_trace_buffer(self):
+        """
+        returns True if modules should process all channels at once through the station level trace storage.
+        Only supported by `Station`, see `Station.set_use_trace_buffer`.
+        """
+        return False
+
     def remove_triggers(self):
         self._triggers = collections.OrderedDict()
 
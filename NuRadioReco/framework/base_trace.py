@@ -1,11 +1,8 @@
 from __future__ import absolute_import, division, print_function
 import numpy as np
 import logging
-import fractions
-import decimal
 import numbers
-from NuRadioReco.utilities import fft, bandpass_filter
-import scipy.signal
+from NuRadioReco.utilities import fft, bandpass_filter, trace_utilities
 import copy
 try:
     import cPickle as pickle
@@ -14,6 +11,36 @@ except ImportError:
 logger = logging.getLogger("BaseTrace")
 
 
+def _read_only_view(array):
+    """
+    returns a non-writeable view of an array (or None)
+    """
+    if array is None:
+        return None
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _take_or_copy(array, copy):
+    """
+    returns a copy of the array, or the array itself if `copy` is False and the array is writeable
+    """
+    if array is None or copy or not array.flags.writeable:
+        return np.copy(array)
+    return array
+
+
+def _in_place(operation, array, other):
+    """
+    applies a binary numpy operation in place if the result fits into the array, otherwise a new array is returned
+    """
+    other = np.asarray(other)
+    if(np.can_cast(np.result_type(array, other), array.dtype) and np.broadcast(array, other).shape == array.shape):
+        return operation(array, other, out=array)
+    return operation(array, other)
+
+
 class BaseTrace:
 
     def __init__(self):
@@ -23,12 +50,19 @@ class BaseTrace:
         self.__time_domain_up_to_date = True
         self._trace_start_time = 0
 
-    def get_trace(self):
+    def get_trace(self, copy=True):
         """
         returns the time trace. If the frequency spectrum was modified before,
         an ifft is performed automatically to have the time domain representation
         up to date.
 
+        Parameters
+        ----------
+        copy: bool (default True)
+            if False, a read-only view of the internal trace is returned instead of a copy. The view is only
+            valid until the trace is modified, e.g. through `set_trace`, `set_frequency_spectrum`, one of the
+            in-place operations or a change of domain (`get_frequency_spectrum`).
+
         Returns: 1 or N dimensional np.array of floats
             the time trace
         """
@@ -36,7 +70,9 @@ class BaseTrace:
             self._time_trace = fft.freq2time(self._frequency_spectrum, self._sampling_rate)
             self.__time_domain_up_to_date = True
             self._frequency_spectrum = None
-        return np.copy(self._time_trace)
+        if(copy):
+            return np.copy(self._time_trace)
+        return _read_only_view(self._time_trace)
 
     def get_filtered_trace(self, passband, filter_type='butter', order=10):
         """
@@ -51,21 +87,37 @@ class BaseTrace:
         order: int
             Order of the Butterworth filter, if the filter types butter or butterabs are chosen
         """
-        spec = copy.copy(self.get_frequency_spectrum())
         freq = self.get_frequencies()
         filter_response = bandpass_filter.get_filter_response(freq, passband, filter_type, order)
-        spec *= filter_response
+        spec = self.get_frequency_spectrum(copy=False) * filter_response
         return fft.freq2time(spec, self.get_sampling_rate())
 
-    def get_frequency_spectrum(self):
+    def get_frequency_spectrum(self, copy=True):
+        """
+        returns the complex frequency spectrum. If the time trace was modified before,
+        an fft is performed automatically to have the frequency domain representation
+        up to date.
+
+        Parameters
+        ----------
+        copy: bool (default True)
+            if False, a read-only view of the internal spectrum is returned instead of a copy. The view is only
+            valid until the spectrum is modified, e.g. through `set_trace`, `set_frequency_spectrum`, one of the
+            in-place operations or a change of domain (`get_trace`).
+
+        Returns: 1 or N dimensional np.array of complex floats
+            the frequency spectrum
+        """
         if(self.__time_domain_up_to_date):
             self._frequency_spectrum = fft.time2freq(self._time_trace, self._sampling_rate)
             self._time_trace = None
 #             logger.debug("frequency spectrum has shape {}".format(self._frequency_spectrum.shape))
             self.__time_domain_up_to_date = False
-        return np.copy(self._frequency_spectrum)
+        if(copy):
+            return np.copy(self._frequency_spectrum)
+        return _read_only_view(self._frequency_spectrum)
 
-    def set_trace(self, trace, sampling_rate):
+    def set_trace(self, trace, sampling_rate, copy=True):
         """
         sets the time trace
 
@@ -75,21 +127,73 @@ class BaseTrace:
             the time series
         sampling_rate: float
             the sampling rage of the trace, i.e., the inverse of the bin width
+        copy: bool (default True)
+            if False, the trace object takes ownership of the array instead of copying it, i.e., the array
+            must not be modified by the caller afterwards. Read-only arrays (e.g. the views returned by
+            `get_trace(copy=False)`) are always copied.
         """
         if trace is not None:
             if trace.shape[trace.ndim - 1] % 2 != 0:
                 raise ValueError('Attempted to set trace with an uneven number ({}) of samples. Only traces with an even number of samples are allowed.'.format(trace.shape[trace.ndim - 1]))
         self.__time_domain_up_to_date = True
-        self._time_trace = np.copy(trace)
+        self._time_trace = _take_or_copy(trace, copy)
         self._sampling_rate = sampling_rate
         self._frequency_spectrum = None
 
-    def set_frequency_spectrum(self, frequency_spectrum, sampling_rate):
+    def set_frequency_spectrum(self, frequency_spectrum, sampling_rate, copy=True):
+        """
+        sets the frequency spectrum
+
+        Parameters
+        -----------
+        frequency_spectrum: np.array of complex floats
+            the frequency spectrum
+        sampling_rate: float
+            the sampling rage of the trace, i.e., the inverse of the bin width
+        copy: bool (default True)
+            if False, the trace object takes ownership of the array instead of copying it, i.e., the array
+            must not be modified by the caller afterwards. Read-only arrays (e.g. the views returned by
+            `get_frequency_spectrum(copy=False)`) are always copied.
+        """
         self.__time_domain_up_to_date = False
-        self._frequency_spectrum = np.copy(frequency_spectrum)
+        self._frequency_spectrum = _take_or_copy(frequency_spectrum, copy)
         self._sampling_rate = sampling_rate
         self._time_trace = None
 
+    def multiply_frequency_spectrum(self, factor):
+        """
+        multiplies the frequency spectrum in place, e.g. with a filter or detector response.
+        The frequency domain representation is used, i.e., an fft is performed if the time trace
+        was modified before.
+
+        Parameters
+        ----------
+        factor: float, complex or np.array of complex floats
+            the factor the spectrum is multiplied with, needs to be broadcastable to the shape of the spectrum
+        """
+        self.get_frequency_spectrum(copy=False)  # brings the frequency domain up to date
+        self._frequency_spectrum = _in_place(np.multiply, self._frequency_spectrum, factor)
+
+    def add_to_trace(self, trace):
+        """
+        adds a time series (e.g. noise) to the time trace in place.
+        The time domain representation is used, i.e., an ifft is performed if the frequency spectrum
+        was modified before.
+
+        Parameters
+        ----------
+        trace: np.array of floats
+            the time series that is added, needs to be broadcastable to the shape of the trace
+        """
+        self.get_trace(copy=False)  # brings the time domain up to date
+        self._time_trace = _in_place(np.add, self._time_trace, trace)
+
+    def _stores_trace(self, array):
+        """
+        returns True if the time domain is up to date and the trace is stored in `array` (without a copy)
+        """
+        return self.__time_domain_up_to_date and self._time_trace is array
+
     def get_sampling_rate(self):
         """
         returns the sampling rate of the trace
@@ -126,7 +230,7 @@ class BaseTrace:
     def get_hilbert_envelope(self):
         from scipy import signal
         # get hilbert envelope for either 1D (N) analytic trace or (3,N) E-field
-        h = signal.hilbert(self.get_trace())
+        h = signal.hilbert(self.get_trace(copy=False))
         return np.abs(h)
 
     def get_hilbert_envelope_mag(self):
@@ -163,36 +267,23 @@ class BaseTrace:
         """
         if delta_t > .1 * self.get_number_of_samples() / self.get_sampling_rate() and not silent:
             logger.warning('Trace is shifted by more than 10% of its length')
-        spec = self.get_frequency_spectrum()
-        spec *= np.exp(-2.j * np.pi * delta_t * self.get_frequencies())
-        self.set_frequency_spectrum(spec, self._sampling_rate)
+        self.multiply_frequency_spectrum(np.exp(-2.j * np.pi * delta_t * self.get_frequencies()))
 
     def resample(self, sampling_rate):
         if sampling_rate == self.get_sampling_rate():
             return
-        resampling_factor = fractions.Fraction(decimal.Decimal(sampling_rate / self.get_sampling_rate())).limit_denominator(5000)
-
-        resampled_trace = self.get_trace()
-        if resampling_factor.numerator != 1:
-            # resample and use axis -1 since trace might be either shape (N) for analytic trace or shape (3,N) for E-field
-            resampled_trace = scipy.signal.resample(resampled_trace, resampling_factor.numerator * self.get_number_of_samples(), axis=-1)
-        if resampling_factor.denominator != 1:
-            # resample and use axis -1 since trace might be either shape (N) for analytic trace or shape (3,N) for E-field
-            resampled_trace = scipy.signal.resample(resampled_trace, np.shape(resampled_trace)[-1] // resampling_factor.denominator, axis=-1)
-
-        if resampled_trace.shape[-1] % 2 != 0:
-            resampled_trace = resampled_trace.T[:-1].T
-        self.set_trace(resampled_trace, sampling_rate)
+        resampled_trace = trace_utilities.resample(self.get_trace(copy=False), self.get_sampling_rate(), sampling_rate)
+        self.set_trace(resampled_trace, sampling_rate, copy=False)
 
     def serialize(self):
         data = {'sampling_rate': self.get_sampling_rate(),
-                'time_trace': self.get_trace(),
+                'time_trace': self.get_trace(copy=False),
                 'trace_start_time': self.get_trace_start_time()}
         return pickle.dumps(data, protocol=4)
 
     def deserialize(self, data_pkl):
         data = pickle.loads(data_pkl)
-        self.set_trace(data['time_trace'], data['sampling_rate'])
+        self.set_trace(data['time_trace'], data['sampling_rate'], copy=False)
         if('trace_start_time' in data.keys()):
             self.set_trace_start_time(data['trace_start_time'])
 
@@ -206,9 +297,9 @@ class BaseTrace:
         # Some sanity checks
         if not isinstance(x, BaseTrace):
             raise TypeError('+ operator is only defined for 2 BaseTrace objects')
-        if self.get_trace() is None or x.get_trace() is None:
+        if self.get_trace(copy=False) is None or x.get_trace(copy=False) is None:
             raise ValueError('One of the trace objects has no trace set')
-        if self.get_trace().ndim != x.get_trace().ndim:
+        if self.get_trace(copy=False).ndim != x.get_trace(copy=False).ndim:
             raise ValueError('Traces have different dimensions')
         if self.get_sampling_rate() != x.get_sampling_rate():
             # Upsample trace with lower sampling rate
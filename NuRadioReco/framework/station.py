@@ -2,7 +2,9 @@ from __future__ import absolute_import, division, print_function
 import NuRadioReco.framework.base_station
 import NuRadioReco.framework.sim_station
 import NuRadioReco.framework.channel
+from NuRadioReco.utilities import fft
 from six import iteritems
+import numpy as np
 import pickle
 import logging
 import collections
@@ -16,6 +18,10 @@ class Station(NuRadioReco.framework.base_station.BaseStation):
         self.__channels = collections.OrderedDict()
         self.__reference_reconstruction = 'RD'
         self.__sim_station = None
+        self.__use_trace_buffer = False
+        self.__trace_buffer = None
+        self.__trace_buffer_channel_ids = None
+        self.__trace_buffer_rows = []
 
     def set_sim_station(self, sim_station):
         self.__sim_station = sim_station
@@ -46,6 +52,153 @@ class Station(NuRadioReco.framework.base_station.BaseStation):
     def add_channel(self, channel):
         self.__channels[channel.get_id()] = channel
 
+    def set_use_trace_buffer(self, use_trace_buffer=True):
+        """
+        enables (or disables) the station level trace storage. If enabled, modules that support it process all
+        channels at once through the bulk trace functions (`get_trace_buffer`, `get_frequency_spectra`,
+        `set_frequency_spectra`, `multiply_frequency_spectra`, `set_traces`) instead of looping over the channels.
+        """
+        self.__use_trace_buffer = use_trace_buffer
+
+    def uses_trace_buffer(self):
+        """
+        returns True if modules should use the station level trace storage, see `set_use_trace_buffer`
+        """
+        return self.__use_trace_buffer
+
+    def __is_trace_buffer_valid(self, channel_ids):
+        if(self.__trace_buffer is None or channel_ids != self.__trace_buffer_channel_ids):
+            return False
+        for channel_id, row in zip(channel_ids, self.__trace_buffer_rows):
+            if(not self.__channels[channel_id]._stores_trace(row)):
+                return False
+        return True
+
+    def __set_trace_buffer(self, buffer, sampling_rate, channel_ids):
+        self.__trace_buffer = buffer
+        self.__trace_buffer_channel_ids = channel_ids
+        self.__trace_buffer_rows = []
+        for iCh, channel_id in enumerate(channel_ids):
+            row = buffer[iCh]
+            self.__channels[channel_id].set_trace(row, sampling_rate, copy=False)
+            self.__trace_buffer_rows.append(row)
+
+    def get_trace_buffer(self, use_channels=None):
+        """
+        returns the time traces of all channels as one contiguous array of shape (n_channels, n_samples)
+
+        The traces of the channels are views into this array, i.e., modifications of the array are
+        directly visible in the channels. The array is created (and the traces are copied into it) if the
+        channels are not yet stored in it, e.g. because a channel was modified individually in the meantime.
+        The order of the channels is the same as in `iter_channels`.
+
+        Parameters
+        ----------
+        use_channels: list of ints or None
+            the channel ids, if None all channels are used
+
+        Returns
+        -------
+        np.array of shape (n_channels, n_samples)
+        """
+        channel_ids = [channel.get_id() for channel in self.iter_channels(use_channels)]
+        if(self.__is_trace_buffer_valid(channel_ids)):
+            return self.__trace_buffer
+        sampling_rates = [self.__channels[channel_id].get_sampling_rate() for channel_id in channel_ids]
+        n_samples = [self.__channels[channel_id].get_number_of_samples() for channel_id in channel_ids]
+        if(len(np.unique(sampling_rates)) > 1 or len(np.unique(n_samples)) > 1):
+            msg = "all channels need the same sampling rate and number of samples to be stored in one array"
+            logger.error(msg)
+            raise ValueError(msg)
+        buffer = np.empty((len(channel_ids), n_samples[0] if len(n_samples) else 0))
+        for iCh, channel_id in enumerate(channel_ids):
+            buffer[iCh] = self.__channels[channel_id].get_trace(copy=False)
+        self.__set_trace_buffer(buffer, sampling_rates[0] if len(sampling_rates) else None, channel_ids)
+        return buffer
+
+    def set_traces(self, traces, sampling_rate, use_channels=None):
+        """
+        sets the time traces of all channels from one array of shape (n_channels, n_samples)
+
+        The array is used as the station level trace storage, i.e., the station takes ownership of it.
+
+        Parameters
+        ----------
+        traces: np.array of floats
+            the time traces in the order of `iter_channels`
+        sampling_rate: float
+            the sampling rate of the traces
+        use_channels: list of ints or None
+            the channel ids, if None all channels are set
+        """
+        channel_ids = [channel.get_id() for channel in self.iter_channels(use_channels)]
+        if(traces.ndim != 2 or traces.shape[0] != len(channel_ids)):
+            msg = "traces need to have the shape (n_channels, n_samples) = ({}, n_samples), got {}".format(len(channel_ids), traces.shape)
+            logger.error(msg)
+            raise ValueError(msg)
+        if(not traces.flags.writeable or not traces.flags.c_contiguous):
+            traces = np.array(traces, order='C')
+        self.__set_trace_buffer(traces, sampling_rate, channel_ids)
+
+    def get_frequency_spectra(self, use_channels=None):
+        """
+        returns the frequency spectra of all channels calculated with one batched fft
+
+        Parameters
+        ----------
+        use_channels: list of ints or None
+            the channel ids, if None all channels are used
+
+        Returns
+        -------
+        np.array of complex floats of shape (n_channels, n_frequencies)
+        """
+        buffer = self.get_trace_buffer(use_channels)
+        return fft.time2freq(buffer, self.__get_buffer_sampling_rate())
+
+    def set_frequency_spectra(self, spectra, sampling_rate=None, use_channels=None):
+        """
+        sets the frequency spectra of all channels. The spectra are transformed into the time domain with one
+        batched ifft and stored in the station level trace storage.
+
+        Parameters
+        ----------
+        spectra: np.array of complex floats
+            the frequency spectra in the order of `iter_channels`, shape (n_channels, n_frequencies)
+        sampling_rate: float or None
+            the sampling rate, if None the sampling rate of the channels is kept
+        use_channels: list of ints or None
+            the channel ids, if None all channels are set
+        """
+        if(sampling_rate is None):
+            self.get_trace_buffer(use_channels)
+            sampling_rate = self.__get_buffer_sampling_rate()
+        self.set_traces(fft.freq2time(spectra, sampling_rate), sampling_rate, use_channels)
+
+    def multiply_frequency_spectra(self, factor, use_channels=None):
+        """
+        multiplies the frequency spectra of all channels (e.g. with a filter response) using one batched fft
+        and ifft. The result is written back into the station level trace storage.
+
+        Parameters
+        ----------
+        factor: float, complex or np.array of complex floats
+            needs to be broadcastable to (n_channels, n_frequencies), e.g. one response for all channels
+            of shape (n_frequencies) or one response per channel of shape (n_channels, n_frequencies)
+        use_channels: list of ints or None
+            the channel ids, if None all channels are used
+        """
+        buffer = self.get_trace_buffer(use_channels)
+        sampling_rate = self.__get_buffer_sampling_rate()
+        spectra = fft.time2freq(buffer, sampling_rate)
+        spectra *= factor
+        buffer[:] = fft.freq2time(spectra, sampling_rate, n=buffer.shape[-1])
+
+    def __get_buffer_sampling_rate(self):
+        if(len(self.__trace_buffer_channel_ids) == 0):
+            return None
+        return self.__channels[self.__trace_buffer_channel_ids[0]].get_sampling_rate()
+
     def set_reference_reconstruction(self, reference):
         if reference not in ['RD', 'MC']:
             import sys
@@ -1,11 +1,143 @@
 import logging
 import time
 import numpy as np
+import scipy.fft
 from NuRadioReco.utilities import units
-from scipy.interpolate import interp1d
 from scipy.signal import resample
 from NuRadioReco.modules.base.module import register_run
-from NuRadioReco.utilities.trace_utilities import delay_trace
+
+logger = logging.getLogger('NuRadioReco.analogToDigitalConverter')
+
+# upsampling frequency of the traces before they are interpolated at the ADC clock times.
+# We cannot downsample with a Fourier method because we want to keep the higher Nyquist zones.
+upsampling_frequency = 5.0 * units.GHz
+
+# resampling kernels shared by all instances of the module, the key is
+# (number of samples, MC sampling rate, ADC sampling rate, time delay, dtype)
+_resampling_kernels = {}
+_max_resampling_kernels = 1000
+
+
+def get_resampling_kernel(n_samples, MC_sampling_frequency, adc_sampling_frequency, adc_time_delay, dtype=np.float64):
+    """
+    Returns the precomputed resampling kernel that maps a trace simulated with the MC
+    sampling frequency onto the (delayed) ADC clock times.
+
+    The resampling is a linear operation that only depends on the number of samples,
+    the two sampling frequencies and the time delay, so the kernel is computed once and
+    cached. It consists of the phase factors of the fractional delay, the parameters of the
+    Fourier upsampling to 5 GHz and the indices and weights of the linear interpolation at
+    the ADC clock times.
+
+    Parameters
+    ----------
+    n_samples: int
+        Number of samples of the MC traces
+    MC_sampling_frequency: float
+        Sampling frequency of the MC traces
+    adc_sampling_frequency: float
+        ADC sampling frequency
+    adc_time_delay: float
+        Time delay of the ADC clock (including the clock offset). Must be positive or 0
+    dtype: numpy dtype
+        np.float64 (default) or np.float32, the precision used for the resampling
+
+    Returns
+    -------
+    kernel: dictionary
+    """
+    key = (n_samples, MC_sampling_frequency, adc_sampling_frequency, adc_time_delay, np.dtype(dtype).name)
+    if key in _resampling_kernels:
+        return _resampling_kernels[key]
+
+    if adc_time_delay < 0:
+        msg = 'Time delay must be positive'
+        logger.error(msg)
+        raise ValueError(msg)
+
+    frequencies = np.fft.rfftfreq(n_samples, 1 / MC_sampling_frequency)
+    phases = np.exp(-1j * 2 * np.pi * frequencies * adc_time_delay)
+
+    # the delay is cyclic, so the trace is cropped. Some samples from the beginning are
+    # thrown away and then some samples from the end (see trace_utilities.delay_trace)
+    n_delayed = 2 * (len(frequencies) - 1)
+    init_sample = int(adc_time_delay * MC_sampling_frequency) + 1
+    delayed_samples = n_samples - int(np.round(MC_sampling_frequency / adc_sampling_frequency)) - 1
+    delayed_samples = max(0, min(delayed_samples, n_delayed - init_sample))
+
+    # the traces are interpolated at the ADC clock times, the first upsampled sample
+    # corresponds to the first ADC clock time plus one ADC clock cycle
+    if(upsampling_frequency > MC_sampling_frequency):
+        upsampling_nsamples = int(upsampling_frequency * delayed_samples / MC_sampling_frequency)
+        interpolation_frequency = upsampling_frequency
+    else:
+        upsampling_nsamples = None
+        interpolation_frequency = MC_sampling_frequency
+    n_interpolation = delayed_samples if upsampling_nsamples is None else upsampling_nsamples
+
+    new_n_samples = int((adc_sampling_frequency / MC_sampling_frequency) * delayed_samples)
+    new_n_samples -= new_n_samples % 2  # ensuring trace has an even number of samples
+    positions = (np.arange(new_n_samples) - 1) / adc_sampling_frequency * interpolation_frequency
+    positions = np.clip(positions, 0, max(n_interpolation - 1, 0))
+    indices = np.minimum(np.floor(positions).astype(int), max(n_interpolation - 2, 0))
+    weights = positions - indices
+
+    kernel = {
+        'phases': phases.astype(np.result_type(dtype, np.complex64)),
+        'init_sample': init_sample,
+        'delayed_samples': delayed_samples,
+        'upsampling_nsamples': upsampling_nsamples,
+        'indices': indices,
+        'weights': weights.astype(dtype),
+        'dtype': np.dtype(dtype)
+    }
+    if len(_resampling_kernels) >= _max_resampling_kernels:
+        _resampling_kernels.clear()
+    _resampling_kernels[key] = kernel
+    return kernel
+
+
+def apply_resampling_kernel(traces, kernel, trigger_filter=None):
+    """
+    Delays the traces and resamples them to the ADC clock times using a kernel
+    from `get_resampling_kernel`.
+
+    Parameters
+    ----------
+    traces: 2D array of floats
+        The traces with shape (n_channels, n_samples)
+    kernel: dictionary
+        The resampling kernel
+    trigger_filter: array of complex or None
+        Frequency domain response that is applied to the traces before the digitisation.
+        Must have the length of the rfft of the traces
+
+    Returns
+    -------
+    resampled_traces: 2D array of floats
+        The traces at the ADC clock times with shape (n_channels, n_adc_samples)
+    """
+    traces = np.atleast_2d(traces).astype(kernel['dtype'], copy=False)
+    spectra = scipy.fft.rfft(traces, axis=-1)
+    if(spectra.shape[-1] != len(kernel['phases'])):
+        msg = "the number of samples of the traces does not match the resampling kernel"
+        logger.error(msg)
+        raise ValueError(msg)
+    if trigger_filter is not None:
+        if(len(trigger_filter) != spectra.shape[-1]):
+            msg = "Wrong filter length to apply to traces"
+            logger.error(msg)
+            raise ValueError(msg)
+        spectra = spectra * trigger_filter
+    delayed_traces = scipy.fft.irfft(spectra * kernel['phases'], axis=-1)
+    delayed_traces = delayed_traces[:, kernel['init_sample']:kernel['init_sample'] + kernel['delayed_samples']]
+
+    if kernel['upsampling_nsamples'] is not None:
+        delayed_traces = resample(delayed_traces, kernel['upsampling_nsamples'], axis=-1)
+
+    indices = kernel['indices']
+    weights = kernel['weights']
+    return delayed_traces[:, indices] * (1 - weights) + delayed_traces[:, np.minimum(indices + 1, delayed_traces.shape[-1] - 1)] * weights
 
 
 def perfect_comparator(trace, adc_n_bits, adc_ref_voltage, mode='floor', output='voltage'):
@@ -140,7 +272,9 @@ class analogToDigitalConverter:
         times displaced from the channel times. This is fine as long as the input
         channel traces have been simulated with a sampling rate greater than the
         ADC sampling rate, which should be the case. Upsampling is also possible,
-        and recommended for phased array simulations.
+        and recommended for phased array simulations. All channels with the same
+        sampling parameters are resampled at once, and the resampling kernel (delay
+        phases, upsampling and interpolation weights) is cached across events.
 
         .. Important:: Upsampling after digitisation is performed by the FPGA, which
             means that the digitised trace is no longer discretised after being upsampled.
@@ -182,77 +316,29 @@ class analogToDigitalConverter:
 
         self.logger = logging.getLogger('NuRadioReco.analogToDigitalConverter')
 
-    def get_digital_trace(self, station, det, channel,
-                          Vrms=None,
-                          trigger_adc=False,
-                          clock_offset=0.0,
-                          adc_type='perfect_floor_comparator',
-                          return_sampling_frequency=False,
-                          adc_output='voltage',
-                          trigger_filter=None):
+    def __get_adc_parameters(self, det_channel, channel, Vrms, trigger_adc, clock_offset):
         """
-        Returns the digital trace for a channel, without setting it. This allows
-        the creation of a digital trace that can be used for triggering purposes
-        without removing the original information on the channel.
-
-        Parameters
-        ----------
-        station: framework.station.Station object
-        det: detector.detector.Detector object
-        channel: framework.channel.Channel object
-        Vrms: float
-            If supplied, overrides adc_reference_voltage as supplied in the detector description file
-        trigger_adc: bool
-            If True, the relevant ADC parameters in the config file are the ones
-            that start with `'trigger_'`
-        random_clock_offset: bool
-            If True, a random clock offset between -1 and 1 clock cycles is added
-        adc_type: string
-            The type of ADC used. The following are available:
-
-            * perfect_floor_comparator
-            * perfect_ceiling_comparator
-
-            See functions with the same name on this module for documentation
-        return_sampling_frequency: bool
-            If True, returns the trace and the ADC sampling frequency
-        adc_output: string
-            Options:
-
-            * 'voltage' to store the ADC output as discretised voltage trace
-            * 'counts' to store the ADC output in ADC counts
-        
-        trigger_filter: array floats
-            Freq. domain of the response to be applied to post-ADC traces
-            Must be length for "MC freq"
+        reads the ADC parameters of a channel from the detector description
 
         Returns
         -------
-        digital_trace: array of floats
-            Digitised voltage trace
+        adc_n_bits: int
+        adc_ref_voltage: float
         adc_sampling_frequency: float
-            ADC sampling frequency for the channel
+        adc_time_delay: float
+            the time delay of the ADC clock including the clock offset
         """
-
-        station_id = station.get_id()
         channel_id = channel.get_id()
-        det_channel = det.get_channel(station_id, channel_id)
-
         for field in self._mandatory_fields:
             if(trigger_adc):
                 field_check = 'trigger_' + field
             else:
                 field_check = field
             if(field_check) not in det_channel:
-                channel_id = channel.get_id()
                 error_msg = "The field {} is not present in channel {}. ".format(field_check, channel_id)
                 error_msg += "Please specify it on your detector file"
                 raise ValueError(error_msg)
 
-        times = channel.get_times()[:]
-        trace = channel.get_trace()[:]
-        MC_sampling_frequency = channel.get_sampling_rate()
-
         if(trigger_adc):  # assumes that the trigger uses
             adc_time_delay_label = "trigger_adc_time_delay"
             adc_n_bits_label = "trigger_adc_nbits"
@@ -262,7 +348,6 @@ class analogToDigitalConverter:
         else:
             adc_time_delay_label = "adc_time_delay"
             adc_n_bits_label = "adc_nbits"
-            adc_noise_n_bits = "adc_noise_nbits"
             adc_noise_n_bits_label = "adc_noise_nbits"
             adc_ref_voltage_label = "adc_reference_voltage"
             adc_sampling_frequency_label = "adc_sampling_frequency"
@@ -289,69 +374,172 @@ class analogToDigitalConverter:
 
         if(adc_sampling_frequency > channel.get_sampling_rate()):
             error_msg = 'The ADC sampling rate is greater than '
-            error_msg += 'the channel {} sampling rate. '.format(channel.get_id())
+            error_msg += 'the channel {} sampling rate. '.format(channel_id)
             error_msg += 'Please change the ADC sampling rate.'
             raise ValueError(error_msg)
 
-        if trigger_filter is not None:
+        return adc_n_bits, adc_ref_voltage, adc_sampling_frequency, adc_time_delay
+
+    def get_digital_traces(self, station, det, channel_ids=None,
+                           Vrms=None,
+                           trigger_adc=False,
+                           clock_offset=0.0,
+                           adc_type='perfect_floor_comparator',
+                           return_sampling_frequency=False,
+                           adc_output='voltage',
+                           trigger_filter=None,
+                           dtype=np.float64):
+        """
+        Returns the digital traces for several channels of a station, without setting them.
 
-            trace_fft = np.fft.rfft(trace)
-            if(len(trace_fft) != trigger_filter):
-                raise ValueError("Wrong filter length to apply to traces")
+        All channels that share the number of samples, the sampling frequencies and the
+        ADC time delay are delayed and resampled at once as a 2D array, using a resampling
+        kernel that is cached across events (see `get_resampling_kernel`).
 
-            trace = np.fft.irfft(trace_fft * trigger_filter)
+        Parameters
+        ----------
+        station: framework.station.Station object
+        det: detector.detector.Detector object
+        channel_ids: list of ints or None
+            The channels to digitise. If None, all channels of the station are used
+        Vrms: float or dictionary
+            If supplied, overrides adc_reference_voltage as supplied in the detector description file.
+            Can be a dictionary with the channel ids as keys
+        trigger_adc: bool
+            If True, the relevant ADC parameters in the config file are the ones
+            that start with `'trigger_'`
+        clock_offset: float
+            Clock offset in units of ADC clock cycles that is added to the ADC time delay
+        adc_type: string
+            The type of ADC used, see `get_digital_trace`
+        return_sampling_frequency: bool
+            If True, also returns the ADC sampling frequencies
+        adc_output: string
+            'voltage' or 'counts', see `get_digital_trace`
+        trigger_filter: array floats
+            Freq. domain of the response to be applied to post-ADC traces
+            Must be length for "MC freq"
+        dtype: numpy dtype
+            np.float64 (default) or np.float32. The single precision halves the memory of
+            the resampling and is sufficient for ADCs with a moderate number of bits
 
-        # Random clock offset
-        delayed_samples = len(trace) - int(np.round(MC_sampling_frequency / adc_sampling_frequency)) - 1
-        trace = delay_trace(trace, MC_sampling_frequency, adc_time_delay, delayed_samples)
+        Returns
+        -------
+        digital_traces: dictionary
+            Digitised voltage traces, the keys are the channel ids
+        adc_sampling_frequencies: dictionary
+            ADC sampling frequency for each channel
+        """
+        station_id = station.get_id()
+        if(channel_ids is None):
+            channel_ids = station.get_channel_ids()
+
+        groups = {}
+        adc_parameters = {}
+        for channel_id in channel_ids:
+            channel = station.get_channel(channel_id)
+            channel_Vrms = Vrms[channel_id] if isinstance(Vrms, dict) else Vrms
+            adc_parameters[channel_id] = self.__get_adc_parameters(det.get_channel(station_id, channel_id), channel,
+                                                                   channel_Vrms, trigger_adc, clock_offset)
+            adc_sampling_frequency, adc_time_delay = adc_parameters[channel_id][2:]
+            key = (channel.get_number_of_samples(), channel.get_sampling_rate(), adc_sampling_frequency, adc_time_delay)
+            groups.setdefault(key, []).append(channel_id)
+
+        digital_traces = {}
+        adc_sampling_frequencies = {}
+        for key, group_channel_ids in groups.items():
+            kernel = get_resampling_kernel(*key, dtype=dtype)
+            traces = np.array([station.get_channel(channel_id).get_trace() for channel_id in group_channel_ids])
+            resampled_traces = apply_resampling_kernel(traces, kernel, trigger_filter)
+
+            # Digitisation
+            for channel_id, resampled_trace in zip(group_channel_ids, resampled_traces):
+                adc_n_bits, adc_ref_voltage, adc_sampling_frequency = adc_parameters[channel_id][:3]
+                digital_traces[channel_id] = self._adc_types[adc_type](resampled_trace, adc_n_bits, adc_ref_voltage, adc_output)
+                adc_sampling_frequencies[channel_id] = adc_sampling_frequency
 
-        times = times + 1.0 / adc_sampling_frequency
-        times = times[:len(trace)]
+        if return_sampling_frequency:
+            return digital_traces, adc_sampling_frequencies
+        else:
+            return digital_traces
 
-        # Upsampling to 5 GHz before downsampling using interpolation.
-        # We cannot downsample with a Fourier method because we want to keep
-        # the higher Nyquist zones.
-        upsampling_frequency = 5.0 * units.GHz
+    def get_digital_trace(self, station, det, channel,
+                          Vrms=None,
+                          trigger_adc=False,
+                          clock_offset=0.0,
+                          adc_type='perfect_floor_comparator',
+                          return_sampling_frequency=False,
+                          adc_output='voltage',
+                          trigger_filter=None,
+                          dtype=np.float64):
+        """
+        Returns the digital trace for a channel, without setting it. This allows
+        the creation of a digital trace that can be used for triggering purposes
+        without removing the original information on the channel.
 
-        if(upsampling_frequency > MC_sampling_frequency):
-            upsampling_nsamples = int(upsampling_frequency * len(trace) / MC_sampling_frequency)
-            perfectly_upsampled_trace = resample(trace, upsampling_nsamples)
+        Parameters
+        ----------
+        station: framework.station.Station object
+        det: detector.detector.Detector object
+        channel: framework.channel.Channel object
+        Vrms: float
+            If supplied, overrides adc_reference_voltage as supplied in the detector description file
+        trigger_adc: bool
+            If True, the relevant ADC parameters in the config file are the ones
+            that start with `'trigger_'`
+        clock_offset: float
+            Clock offset in units of ADC clock cycles that is added to the ADC time delay
+        adc_type: string
+            The type of ADC used. The following are available:
 
-            perfectly_upsampled_times = np.arange(len(perfectly_upsampled_trace)) / upsampling_frequency
-            perfectly_upsampled_times += times[0]
-        else:
-            perfectly_upsampled_trace = trace[:]
-            perfectly_upsampled_times = times[:]
+            * perfect_floor_comparator
+            * perfect_ceiling_comparator
 
-        interpolate_delayed_trace = interp1d(perfectly_upsampled_times, perfectly_upsampled_trace,
-                                             kind='linear',
-                                             fill_value=(perfectly_upsampled_trace[0], perfectly_upsampled_trace[-1]),
-                                             bounds_error=False)
+            See functions with the same name on this module for documentation
+        return_sampling_frequency: bool
+            If True, returns the trace and the ADC sampling frequency
+        adc_output: string
+            Options:
 
-        # Downsampling to ADC frequency
-        new_n_samples = int((adc_sampling_frequency / MC_sampling_frequency) * len(trace))
-        resampled_times = np.arange(new_n_samples) / adc_sampling_frequency
-        resampled_times += channel.get_trace_start_time()
-        resampled_trace = interpolate_delayed_trace(resampled_times)
+            * 'voltage' to store the ADC output as discretised voltage trace
+            * 'counts' to store the ADC output in ADC counts
 
-        # Digitisation
-        digital_trace = self._adc_types[adc_type](resampled_trace, adc_n_bits, adc_ref_voltage, adc_output)
+        trigger_filter: array floats
+            Freq. domain of the response to be applied to post-ADC traces
+            Must be length for "MC freq"
+        dtype: numpy dtype
+            np.float64 (default) or np.float32, the precision of the resampling
 
-        # Ensuring trace has an even number of samples
-        if(len(digital_trace) % 2 == 1):
-            digital_trace = digital_trace[:-1]
+        Returns
+        -------
+        digital_trace: array of floats
+            Digitised voltage trace
+        adc_sampling_frequency: float
+            ADC sampling frequency for the channel
+        """
+        channel_id = channel.get_id()
+        digital_traces, adc_sampling_frequencies = self.get_digital_traces(station, det, [channel_id],
+                                                                           Vrms=Vrms,
+                                                                           trigger_adc=trigger_adc,
+                                                                           clock_offset=clock_offset,
+                                                                           adc_type=adc_type,
+                                                                           return_sampling_frequency=True,
+                                                                           adc_output=adc_output,
+                                                                           trigger_filter=trigger_filter,
+                                                                           dtype=dtype)
 
         if return_sampling_frequency:
-            return digital_trace, adc_sampling_frequency
+            return digital_traces[channel_id], adc_sampling_frequencies[channel_id]
         else:
-            return digital_trace
+            return digital_traces[channel_id]
 
     @register_run()
     def run(self, evt, station, det,
             clock_offset=0.0,
             adc_type='perfect_floor_comparator',
             adc_output='voltage',
-            trigger_filter=None):
+            trigger_filter=None,
+            dtype=np.float64):
         """
         Runs the analogToDigitalConverter and transforms the traces from all
         the channels of an input station to digital voltage values.
@@ -375,23 +563,24 @@ class analogToDigitalConverter:
             * 'voltage' to store the ADC output as discretised voltage trace
             * 'counts' to store the ADC output in ADC counts
 
-        upsampling_factor: integer
-            Upsampling factor. The digital trace will be a upsampled to a
-            sampling frequency int_factor times higher than the original one
+        trigger_filter: array floats
+            Freq. domain of the response to be applied to post-ADC traces
+        dtype: numpy dtype
+            np.float64 (default) or np.float32, the precision of the resampling
 
         """
 
         t = time.time()
 
-        for channel in station.iter_channels():
-            digital_trace, adc_sampling_frequency = self.get_digital_trace(station, det, channel,
+        digital_traces, adc_sampling_frequencies = self.get_digital_traces(station, det,
                                                                            clock_offset=clock_offset,
                                                                            adc_type=adc_type,
                                                                            return_sampling_frequency=True,
                                                                            adc_output=adc_output,
-                                                                           trigger_filter=trigger_filter)
-
-            channel.set_trace(digital_trace, adc_sampling_frequency)
+                                                                           trigger_filter=trigger_filter,
+                                                                           dtype=dtype)
+        for channel in station.iter_channels():
+            channel.set_trace(digital_traces[channel.get_id()], adc_sampling_frequencies[channel.get_id()])
 
         self.__t += time.time() - t
 
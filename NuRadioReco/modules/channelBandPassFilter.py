@@ -92,10 +92,32 @@ class channelBandPassFilter:
         """
         if passband is None:
             passband = [55 * units.MHz, 1000 * units.MHz]
+        if(station.uses_trace_buffer() and self._apply_filter_to_station(station, passband, filter_type, order, rp)):
+            return
         for channel in station.iter_channels():
             tmp_passband, tmp_order, tmp_filter_type, tmp_rp = self.get_filter_arguments(channel.get_id(), passband, filter_type, order, rp)
             self._apply_filter(channel, tmp_passband, tmp_filter_type, tmp_order, tmp_rp, False)
 
+    def _apply_filter_to_station(self, station, passband, filter_type, order, rp=None):
+        """
+        applies the filters to all channels of the station at once through the station level trace storage
+
+        Returns False (without modifying the channels) if this is not possible, i.e., for FIR filters or if the
+        channels have different sampling rates or numbers of samples.
+        """
+        channels = list(station.iter_channels())
+        if(len(channels) == 0 or len(set([(channel.get_sampling_rate(), channel.get_number_of_samples()) for channel in channels])) > 1):
+            return False
+        frequencies = channels[0].get_frequencies()
+        filters = []
+        for channel in channels:
+            tmp_passband, tmp_order, tmp_filter_type, tmp_rp = self.get_filter_arguments(channel.get_id(), passband, filter_type, order, rp)
+            if(tmp_filter_type.find('FIR') >= 0):
+                return False
+            filters.append(self.get_filter(frequencies, 0, 0, None, tmp_passband, tmp_filter_type, tmp_order, tmp_rp))
+        station.multiply_frequency_spectra(np.array(filters))
+        return True
+
     def get_filter(self, frequencies, station_id, channel_id, det, passband, filter_type, order=2, rp=None):
         """
         helper function to return the filter that the module applies.
@@ -147,7 +169,6 @@ class channelBandPassFilter:
     def _apply_filter(self, channel, passband, filter_type, order, rp=None, is_efield=False):
 
         frequencies = channel.get_frequencies()
-        trace_fft = channel.get_frequency_spectrum()
         sample_rate = channel.get_sampling_rate()
 
         # for FIR filters, it is easier to set the trace rather than the FFT to apply the
@@ -159,13 +180,13 @@ class channelBandPassFilter:
         isFIR = False
 
         if(filter_type == 'rectangular'):
-            trace_fft *= self.get_filter(frequencies, 0, 0, None, passband, filter_type)
+            channel.multiply_frequency_spectrum(self.get_filter(frequencies, 0, 0, None, passband, filter_type))
         elif(filter_type == 'butter'):
-            trace_fft *= self.get_filter(frequencies, 0, 0, None, passband, filter_type, order)
+            channel.multiply_frequency_spectrum(self.get_filter(frequencies, 0, 0, None, passband, filter_type, order))
         elif(filter_type == 'butterabs'):
-            trace_fft *= self.get_filter(frequencies, 0, 0, None, passband, filter_type, order)
+            channel.multiply_frequency_spectrum(self.get_filter(frequencies, 0, 0, None, passband, filter_type, order))
         elif(filter_type == 'cheby1'):
-            trace_fft *= self.get_filter(frequencies, 0, 0, None, passband, filter_type, order, rp)
+            channel.multiply_frequency_spectrum(self.get_filter(frequencies, 0, 0, None, passband, filter_type, order, rp))
         elif(filter_type.find('FIR') >= 0):
             # print('This is a FIR filter')
             firarray = filter_type.split()
@@ -207,15 +228,13 @@ class channelBandPassFilter:
                 print("odd filter order, rolling is off by T_s/2")
 
             ndelay = int(0.5 * (Nfir - 1))
-            trace_fir = signal.lfilter(taps, 1.0, channel.get_trace())
+            trace_fir = signal.lfilter(taps, 1.0, channel.get_trace(copy=False))
             trace_fir = np.roll(trace_fir, -ndelay)
             isFIR = True
         else:
-            trace_fft *= self.get_filter(frequencies, 0, 0, None, passband, filter_type)
+            channel.multiply_frequency_spectrum(self.get_filter(frequencies, 0, 0, None, passband, filter_type))
         if isFIR:
-            channel.set_trace(trace_fir, sample_rate)
-        else:
-            channel.set_frequency_spectrum(trace_fft, sample_rate)
+            channel.set_trace(trace_fir, sample_rate, copy=False)
 
     def end(self):
         pass
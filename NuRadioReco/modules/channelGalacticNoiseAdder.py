@@ -7,8 +7,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.constants
 import scipy.interpolate
-import pygdsm
-import healpy
 import astropy.coordinates
 import astropy.units
 
@@ -28,24 +26,36 @@ class channelGalacticNoiseAdder:
     of the brightness temperature is interpolated in between.
     """
     def __init__(self):
-        self.__debug = None
+        # the default parameters of `begin`, the sky model is only evaluated when it is needed for the first time
+        self.__debug = False
         self.__zenith_sample = None
         self.__azimuth_sample = None
-        self.__n_side = None
-        self.__interpolaiton_frequencies = None
-        self.__gdsm = None
+        self.__n_side = 4
+        self.__interpolaiton_frequencies = np.arange(10, 1100, 100) * units.MHz
+        self.__sidereal_time_resolution = None
+        self.__noise_temperatures = None
+        self.__temperature_interpolator = None
+        self.__galactic_coordinates = None
+        self.__solid_angle = None
+        self.__local_coordinates_key = None
+        self.__local_coordinates = None
+        self.__channel_noise_cache = {}
         self.__antenna_pattern_provider = NuRadioReco.detector.antennapattern.AntennaPatternProvider()
-        self.begin()
 
     def begin(
         self,
         debug=False,
         n_side=4,
-        interpolation_frequencies=np.arange(10, 1100, 100) * units.MHz
+        interpolation_frequencies=np.arange(10, 1100, 100) * units.MHz,
+        sidereal_time_resolution=None
     ):
         """
         Set up important parameters for the module
 
+        The sky brightness temperature for all healpix pixels and interpolation frequencies is calculated here
+        once, and not for every event. If `begin` is not called, it is calculated with the default parameters
+        in the first call of `run`.
+
         Parameters
         ---------------
         debug: bool, default: False
@@ -63,10 +73,154 @@ class channelGalacticNoiseAdder:
             calculated by interpolation the log10 of the temperature
             The interpolation_frequencies have to cover the entire passband
             specified in the run method.
+        sidereal_time_resolution: float or None, default: None
+            The transformation of the sky map into local coordinates and the noise spectra
+            projected onto the antennas are cached for the site and station time of the last
+            event, i.e. consecutive events at the same site and time share the cache. If set,
+            the station times are binned in local sidereal time with this resolution, i.e. all
+            events within one bin use the sky of the first event of the bin. This makes the
+            cache useful if every event has a different station time. If None, only events
+            with exactly the same station time share the cache.
         """
         self.__debug = debug
+        self.__sidereal_time_resolution = sidereal_time_resolution
+        self.__local_coordinates_key = None
+        self.__local_coordinates = None
+        self.__channel_noise_cache = {}
+        if self.__noise_temperatures is not None and self.__n_side == n_side and \
+                np.array_equal(self.__interpolaiton_frequencies, interpolation_frequencies):
+            return
         self.__n_side = n_side
         self.__interpolaiton_frequencies = interpolation_frequencies
+        self.__calculate_noise_temperatures()
+
+    def __calculate_noise_temperatures(self):
+        """
+        evaluates the radio sky model for all healpix pixels and interpolation frequencies
+        """
+        import pygdsm
+        import healpy
+        gdsm = pygdsm.pygsm.GlobalSkyModel()
+        n_pixels = healpy.pixelfunc.nside2npix(self.__n_side)
+        # save noise temperatures for all directions and frequencies
+        self.__noise_temperatures = np.zeros((len(self.__interpolaiton_frequencies), n_pixels))
+        for i_freq, noise_freq in enumerate(self.__interpolaiton_frequencies):
+            radio_sky = gdsm.generate(noise_freq / units.MHz)
+            radio_sky = healpy.pixelfunc.ud_grade(radio_sky, self.__n_side)
+            self.__noise_temperatures[i_freq] = radio_sky
+        self.__temperature_interpolator = scipy.interpolate.interp1d(self.__interpolaiton_frequencies, np.log10(self.__noise_temperatures),
+                                                                     kind='quadratic', axis=0)
+        self.__solid_angle = healpy.pixelfunc.nside2pixarea(self.__n_side, degrees=False)
+        pixel_longitudes, pixel_latitudes = healpy.pixelfunc.pix2ang(self.__n_side, range(n_pixels), lonlat=True)
+        pixel_longitudes *= units.deg
+        pixel_latitudes *= units.deg
+        self.__galactic_coordinates = astropy.coordinates.Galactic(l=pixel_longitudes * astropy.units.rad, b=pixel_latitudes * astropy.units.rad)
+
+    def __get_local_coordinates(self, detector, station):
+        """
+        returns the directions of all healpix pixels in the local coordinate system of the station
+
+        Only the directions for the last site and (binned) station time are kept. If they change,
+        the cached noise spectra of the channels are discarded as well.
+
+        Returns
+        -------
+        cache_key: tuple
+            identifies the site and (binned) station time
+        zenith: array of floats
+            the zenith angles of all pixels
+        azimuth: array of floats
+            the azimuth angles of all pixels
+        """
+        site_latitude, site_longitude = detector.get_site_coordinates(station.get_id())
+        station_time = station.get_station_time()
+        station_time.format = 'iso'
+        site_location = astropy.coordinates.EarthLocation(lat=site_latitude * astropy.units.deg, lon=site_longitude * astropy.units.deg)
+        if self.__sidereal_time_resolution is None:
+            time_key = station_time.iso
+        else:
+            sidereal_time = station_time.sidereal_time('mean', longitude=site_location.lon).hourangle * units.hour
+            time_key = int(sidereal_time // self.__sidereal_time_resolution)
+        cache_key = (site_latitude, site_longitude, time_key)
+        if cache_key != self.__local_coordinates_key:
+            local_cs = astropy.coordinates.AltAz(location=site_location, obstime=station_time)
+            local_coordinates = self.__galactic_coordinates.transform_to(local_cs)
+            self.__local_coordinates_key = cache_key
+            self.__local_coordinates = (np.pi / 2. - local_coordinates.alt.rad, local_coordinates.az.rad)
+            self.__channel_noise_cache = {}
+        zenith, azimuth = self.__local_coordinates
+        return cache_key, zenith, azimuth
+
+    def __get_channel_noise(self, detector, station, channel, passband, local_coordinates):
+        """
+        returns the galactic noise of all pixels above the horizon projected onto the antenna of a channel
+
+        The result only depends on the antenna model, orientation and depth, the frequencies of the channel,
+        the passband and the sky in local coordinates, and is cached for this combination (for the sky of
+        the last event only, see `__get_local_coordinates`).
+
+        Returns
+        -------
+        dict with the passband filter, the projection of the electric field amplitudes of all visible
+        pixels onto the theta and phi component of the antenna response (arrays of shape
+        (number of visible pixels, number of frequencies in the passband)), and, in debug mode, the
+        intermediate quantities needed for the debug plots
+        """
+        cache_key, zenith, azimuth = local_coordinates
+        freqs = channel.get_frequencies()
+        antenna_model = detector.get_antenna_model(station.get_id(), channel.get_id())
+        antenna_orientation = detector.get_antenna_orientation(station.get_id(), channel.get_id())
+        below_surface = detector.get_relative_position(station.get_id(), channel.get_id())[2] < 0
+        key = (cache_key, antenna_model, tuple(antenna_orientation), below_surface, detector.get_site(station.get_id()),
+               len(freqs), channel.get_sampling_rate(), tuple(passband))
+        if key in self.__channel_noise_cache:
+            return self.__channel_noise_cache[key]
+
+        antenna_pattern = self.__antenna_pattern_provider.load_antenna_pattern(antenna_model)
+        d_f = freqs[2] - freqs[1]
+        passband_filter = (freqs > passband[0]) & (freqs < passband[1])
+        visible = zenith <= 90. * units.deg
+        zenith = zenith[visible]
+        azimuth = azimuth[visible]
+        noise_temperature = np.power(10, self.__temperature_interpolator(freqs[passband_filter])).T[visible]
+        # calculate spectral radiance of radio signal using rayleigh-jeans law
+        S = (2. * (scipy.constants.Boltzmann * units.joule / units.kelvin) * freqs[passband_filter]**2 / (scipy.constants.c * units.m / units.s)**2 * (noise_temperature) * self.__solid_angle)
+        S[np.isnan(S)] = 0
+        # calculate radiance per energy bin
+        S_per_bin = S * d_f
+        # calculate electric field per energy bin from the radiance per bin
+        E = np.sqrt(S_per_bin / (scipy.constants.c * units.m / units.s * scipy.constants.epsilon_0 * (units.coulomb / units.V / units.m))) / (d_f)
+
+        # consider signal reflection at ice surface
+        t_theta = np.ones_like(zenith)
+        t_phi = np.ones_like(zenith)
+        fresnel_zenith = np.array(zenith)
+        if below_surface:
+            n_ice = ice.get_refractive_index(-0.01, detector.get_site(station.get_id()))
+            for i_pixel in range(len(zenith)):
+                refracted_zenith = geometryUtilities.get_fresnel_angle(zenith[i_pixel], n_ice, 1.)
+                if refracted_zenith is None:
+                    # no contribution of this pixel
+                    t_theta[i_pixel] = 0
+                    t_phi[i_pixel] = 0
+                else:
+                    fresnel_zenith[i_pixel] = refracted_zenith
+                    t_theta[i_pixel] = geometryUtilities.get_fresnel_t_p(zenith[i_pixel], n_ice, 1)
+                    t_phi[i_pixel] = geometryUtilities.get_fresnel_t_s(zenith[i_pixel], n_ice, 1)
+        # fold electric field with antenna response
+        antenna_response = antenna_pattern.get_antenna_response_multiple_directions(freqs[passband_filter], fresnel_zenith, azimuth, *antenna_orientation)
+        channel_noise = {
+            'passband_filter': passband_filter,
+            'theta': antenna_response['theta'] * E * t_theta[:, None],
+            'phi': antenna_response['phi'] * E * t_phi[:, None]
+        }
+        if self.__debug:
+            channel_noise['noise_temperature'] = noise_temperature
+            channel_noise['S_per_bin'] = S_per_bin
+            channel_noise['E'] = E
+            channel_noise['visible'] = visible
+        self.__channel_noise_cache[key] = channel_noise
+        return channel_noise
 
     @register_run()
     def run(
@@ -79,6 +233,9 @@ class channelGalacticNoiseAdder:
         """
         Adds noise resulting from galactic radio emission to the channel traces
 
+        The sky in local coordinates and the noise projected onto the antennas are cached (see `begin`),
+        so that only the random phases and polarizations are drawn for every event.
+
         Parameters
         --------------
         event: Event object
@@ -93,130 +250,78 @@ class channelGalacticNoiseAdder:
         """
         if passband is None:
             passband = [10 * units.MHz, 1000 * units.MHz]
-        self.__gdsm = pygdsm.pygsm.GlobalSkyModel()
-        site_latitude, site_longitude = detector.get_site_coordinates(station.get_id())
-        site_location = astropy.coordinates.EarthLocation(lat=site_latitude * astropy.units.deg, lon=site_longitude * astropy.units.deg)
-        station_time = station.get_station_time()
-        station_time.format = 'iso'
-        noise_temperatures = np.zeros((len(self.__interpolaiton_frequencies), healpy.pixelfunc.nside2npix(self.__n_side)))
-        local_cs = astropy.coordinates.AltAz(location=site_location, obstime=station_time)
-        solid_angle = healpy.pixelfunc.nside2pixarea(self.__n_side, degrees=False)
-        pixel_longitudes, pixel_latitudes = healpy.pixelfunc.pix2ang(self.__n_side, range(healpy.pixelfunc.nside2npix(self.__n_side)), lonlat=True)
-        pixel_longitudes *= units.deg
-        pixel_latitudes *= units.deg
-        galactic_coordinates = astropy.coordinates.Galactic(l=pixel_longitudes * astropy.units.rad, b=pixel_latitudes * astropy.units.rad)
-        local_coordinates = galactic_coordinates.transform_to(local_cs)
-        n_ice = ice.get_refractive_index(-0.01, detector.get_site(station.get_id()))
-        # save noise temperatures for all directions and frequencies
-        for i_freq, noise_freq in enumerate(self.__interpolaiton_frequencies):
-            radio_sky = self.__gdsm.generate(noise_freq / units.MHz)
-            radio_sky = healpy.pixelfunc.ud_grade(radio_sky, self.__n_side)
-            noise_temperatures[i_freq] = radio_sky
+        if self.__noise_temperatures is None:
+            self.__calculate_noise_temperatures()
+        local_coordinates = self.__get_local_coordinates(detector, station)
 
         for channel in station.iter_channels():
-            antenna_pattern = self.__antenna_pattern_provider.load_antenna_pattern(detector.get_antenna_model(station.get_id(), channel.get_id()))
+            channel_noise = self.__get_channel_noise(detector, station, channel, passband, local_coordinates)
+            passband_filter = channel_noise['passband_filter']
             freqs = channel.get_frequencies()
-            d_f = freqs[2] - freqs[1]
             sampling_rate = channel.get_sampling_rate()
             channel_spectrum = channel.get_frequency_spectrum()
-            passband_filter = (freqs > passband[0]) & (freqs < passband[1])
-            noise_spec_sum = np.zeros_like(channel.get_frequency_spectrum())
-            flux_sum = np.zeros(freqs[passband_filter].shape)
-            efield_sum = np.zeros((3, freqs.shape[0]), dtype=np.complex)
-            if self.__debug:
-                plt.close('all')
-                fig = plt.figure(figsize=(12, 8))
-                ax_1 = fig.add_subplot(221)
-                ax_2 = fig.add_subplot(222)
-                ax_3 = fig.add_subplot(223)
-                ax_4 = fig.add_subplot(224)
-                ax_1.grid()
-                ax_1.set_yscale('log')
-                ax_2.grid()
-                ax_2.set_yscale('log')
-                ax_3.grid()
-                ax_3.set_yscale('log')
-                ax_4.grid()
-                ax_4.set_yscale('log')
-                ax_1.set_xlabel('f [MHz]')
-                ax_2.set_xlabel('f [MHz]')
-                ax_3.set_xlabel('f [MHz]')
-                ax_4.set_xlabel('f [MHz]')
-                ax_1.set_ylabel('T [K]')
-                ax_2.set_ylabel('S [W/m²/MHz]')
-                ax_3.set_ylabel('E [V/m]')
-                ax_4.set_ylabel('U [V]')
-                ax_4.plot(channel.get_frequencies() / units.MHz, np.abs(channel.get_frequency_spectrum()), c='C0')
-                ax_4.set_ylim([1.e-8, None])
-                fig1 = plt.figure()
-                ax1 = fig1.add_subplot(211)
-                ax2 = fig1.add_subplot(212)
-                ax1.plot(channel.get_times(), channel.get_trace(), label='original trace')
-                ax2.plot(channel.get_frequencies() / units.MHz, np.abs(channel.get_frequency_spectrum()), label='original spectrum')
-                ax1.grid()
-                ax2.grid()
-            for i_pixel in range(healpy.pixelfunc.nside2npix(self.__n_side)):
-                azimuth = local_coordinates[i_pixel].az.rad
-                zenith = np.pi / 2. - local_coordinates[i_pixel].alt.rad
-                if zenith > 90. * units.deg:
-                    continue
-                temperature_interpolator = scipy.interpolate.interp1d(self.__interpolaiton_frequencies, np.log10(noise_temperatures[:, i_pixel]), kind='quadratic')
-                noise_temperature = np.power(10, temperature_interpolator(freqs[passband_filter]))
-                # calculate spectral radiance of radio signal using rayleigh-jeans law
-                S = (2. * (scipy.constants.Boltzmann * units.joule / units.kelvin) * freqs[passband_filter]**2 / (scipy.constants.c * units.m / units.s)**2 * (noise_temperature) * solid_angle)
-                S[np.isnan(S)] = 0
-                # calculate radiance per energy bin
-                S_per_bin = S * d_f
-                flux_sum += S_per_bin
-                # calculate electric field per energy bin from the radiance per bin
-                E = np.sqrt(S_per_bin / (scipy.constants.c * units.m / units.s * scipy.constants.epsilon_0 * (units.coulomb / units.V / units.m))) / (d_f)
-                if self.__debug:
-                    ax_1.scatter(self.__interpolaiton_frequencies / units.MHz, noise_temperatures[:, i_pixel] / units.kelvin, c='k', alpha=.01)
-                    ax_1.plot(freqs[passband_filter] / units.MHz, noise_temperature, c='k', alpha=.02)
-                    ax_2.plot(freqs[passband_filter] / units.MHz, S_per_bin / d_f / (units.watt / units.m**2 / units.MHz), c='k', alpha=.02)
-                    ax_3.plot(freqs[passband_filter] / units.MHz, E / (units.V / units.m), c='k', alpha=.02)
-
-                # assign random phases and polarizations to electric field
-                noise_spectrum = np.zeros((3, freqs.shape[0]), dtype=np.complex)
-                phases = np.random.uniform(0, 2. * np.pi, len(S))
-                polarizations = np.random.uniform(0, 2. * np.pi, len(S))
-
-                noise_spectrum[1][passband_filter] = np.exp(1j * phases) * E * np.cos(polarizations)
-                noise_spectrum[2][passband_filter] = np.exp(1j * phases) * E * np.sin(polarizations)
-                efield_sum += noise_spectrum
-                antenna_orientation = detector.get_antenna_orientation(station.get_id(), channel.get_id())
-                # consider signal reflection at ice surface
-                if detector.get_relative_position(station.get_id(), channel.get_id())[2] < 0:
-                    t_theta = geometryUtilities.get_fresnel_t_p(zenith, n_ice, 1)
-                    t_phi = geometryUtilities.get_fresnel_t_s(zenith, n_ice, 1)
-                    fresnel_zenith = geometryUtilities.get_fresnel_angle(zenith, n_ice, 1.)
-                    if fresnel_zenith is None:
-                        continue
-                else:
-                    t_theta = 1
-                    t_phi = 1
-                    fresnel_zenith = zenith
-                # fold electric field with antenna response
-                antenna_response = antenna_pattern.get_antenna_response_vectorized(freqs, fresnel_zenith, azimuth, *antenna_orientation)
-                channel_noise_spectrum = antenna_response['theta'] * noise_spectrum[1] * t_theta + antenna_response['phi'] * noise_spectrum[2] * t_phi
-                if self.__debug:
-                    ax_4.plot(freqs / units.MHz, np.abs(channel_noise_spectrum) / units.V, c='k', alpha=.01)
-                channel_spectrum += channel_noise_spectrum
-                noise_spec_sum += channel_noise_spectrum
+            n_pixels, n_frequencies = channel_noise['theta'].shape
+            # assign random phases and polarizations to the electric field of every pixel (phases and polarizations
+            # are drawn one pixel after the other)
+            random_numbers = np.random.uniform(0, 2. * np.pi, (n_pixels, 2, n_frequencies))
+            phases = random_numbers[:, 0]
+            polarizations = random_numbers[:, 1]
+            pixel_noise_spectra = np.exp(1j * phases) * (channel_noise['theta'] * np.cos(polarizations) + channel_noise['phi'] * np.sin(polarizations))
+            noise_spec_sum = np.zeros_like(channel_spectrum)
+            noise_spec_sum[passband_filter] = np.sum(pixel_noise_spectra, axis=0)
+            channel_spectrum = channel_spectrum + noise_spec_sum
             channel.set_frequency_spectrum(channel_spectrum, sampling_rate)
             if self.__debug:
-                ax_2.plot(freqs[passband_filter] / units.MHz, flux_sum / d_f / (units.watt / units.m**2 / units.MHz), c='C0', label='total flux')
-                ax_3.plot(freqs[passband_filter] / units.MHz, np.sqrt(np.abs(efield_sum[1])**2 + np.abs(efield_sum[2])**2)[passband_filter] / (units.V / units.m), c='k', linestyle='-', label='sum of E-fields')
-                ax_3.plot(freqs[passband_filter] / units.MHz, np.sqrt(flux_sum / (scipy.constants.c * (units.m / units.s)) / (scipy.constants.epsilon_0 * (units.farad / units.m))) / d_f / (units.V / units.m), c='C2', label='E-field from total flux')
-                ax_4.plot(channel.get_frequencies() / units.MHz, np.abs(noise_spec_sum), c='k', linestyle=':', label='total noise')
-                ax_2.legend()
-                ax_3.legend()
-                ax_4.legend()
-                fig.tight_layout()
-                ax1.plot(channel.get_times(), channel.get_trace(), label='new trace')
-                ax1.plot(channel.get_times(), fft.freq2time(noise_spec_sum, channel.get_sampling_rate()), label='noise')
-                ax2.plot(channel.get_frequencies() / units.MHz, np.abs(channel.get_frequency_spectrum()), label='new spectrum')
-                ax2.plot(channel.get_frequencies() / units.MHz, np.abs(noise_spec_sum), label='noise')
-                ax1.legend()
-                ax2.legend()
-                plt.show()
+                self.__plot_debug(channel, channel_noise, freqs, phases, polarizations, pixel_noise_spectra, noise_spec_sum)
+
+    def __plot_debug(self, channel, channel_noise, freqs, phases, polarizations, pixel_noise_spectra, noise_spec_sum):
+        passband_filter = channel_noise['passband_filter']
+        d_f = freqs[2] - freqs[1]
+        plt.close('all')
+        fig = plt.figure(figsize=(12, 8))
+        ax_1 = fig.add_subplot(221)
+        ax_2 = fig.add_subplot(222)
+        ax_3 = fig.add_subplot(223)
+        ax_4 = fig.add_subplot(224)
+        for ax in [ax_1, ax_2, ax_3, ax_4]:
+            ax.grid()
+            ax.set_yscale('log')
+            ax.set_xlabel('f [MHz]')
+        ax_1.set_ylabel('T [K]')
+        ax_2.set_ylabel('S [W/m²/MHz]')
+        ax_3.set_ylabel('E [V/m]')
+        ax_4.set_ylabel('U [V]')
+        original_spectrum = channel.get_frequency_spectrum() - noise_spec_sum
+        ax_4.plot(freqs / units.MHz, np.abs(original_spectrum), c='C0')
+        ax_4.set_ylim([1.e-8, None])
+        fig1 = plt.figure()
+        ax1 = fig1.add_subplot(211)
+        ax2 = fig1.add_subplot(212)
+        ax1.plot(channel.get_times(), fft.freq2time(original_spectrum, channel.get_sampling_rate()), label='original trace')
+        ax2.plot(freqs / units.MHz, np.abs(original_spectrum), label='original spectrum')
+        ax1.grid()
+        ax2.grid()
+        for i_pixel in range(len(channel_noise['E'])):
+            ax_1.scatter(self.__interpolaiton_frequencies / units.MHz, self.__noise_temperatures[:, channel_noise['visible']][:, i_pixel] / units.kelvin, c='k', alpha=.01)
+            ax_1.plot(freqs[passband_filter] / units.MHz, channel_noise['noise_temperature'][i_pixel], c='k', alpha=.02)
+            ax_2.plot(freqs[passband_filter] / units.MHz, channel_noise['S_per_bin'][i_pixel] / d_f / (units.watt / units.m**2 / units.MHz), c='k', alpha=.02)
+            ax_3.plot(freqs[passband_filter] / units.MHz, channel_noise['E'][i_pixel] / (units.V / units.m), c='k', alpha=.02)
+            ax_4.plot(freqs[passband_filter] / units.MHz, np.abs(pixel_noise_spectra[i_pixel]) / units.V, c='k', alpha=.01)
+        flux_sum = np.sum(channel_noise['S_per_bin'], axis=0)
+        efield_sum_theta = np.sum(np.exp(1j * phases) * channel_noise['E'] * np.cos(polarizations), axis=0)
+        efield_sum_phi = np.sum(np.exp(1j * phases) * channel_noise['E'] * np.sin(polarizations), axis=0)
+        ax_2.plot(freqs[passband_filter] / units.MHz, flux_sum / d_f / (units.watt / units.m**2 / units.MHz), c='C0', label='total flux')
+        ax_3.plot(freqs[passband_filter] / units.MHz, np.sqrt(np.abs(efield_sum_theta)**2 + np.abs(efield_sum_phi)**2) / (units.V / units.m), c='k', linestyle='-', label='sum of E-fields')
+        ax_3.plot(freqs[passband_filter] / units.MHz, np.sqrt(flux_sum / (scipy.constants.c * (units.m / units.s)) / (scipy.constants.epsilon_0 * (units.farad / units.m))) / d_f / (units.V / units.m), c='C2', label='E-field from total flux')
+        ax_4.plot(freqs / units.MHz, np.abs(noise_spec_sum), c='k', linestyle=':', label='total noise')
+        ax_2.legend()
+        ax_3.legend()
+        ax_4.legend()
+        fig.tight_layout()
+        ax1.plot(channel.get_times(), channel.get_trace(), label='new trace')
+        ax1.plot(channel.get_times(), fft.freq2time(noise_spec_sum, channel.get_sampling_rate()), label='noise')
+        ax2.plot(freqs / units.MHz, np.abs(channel.get_frequency_spectrum()), label='new spectrum')
+        ax2.plot(freqs / units.MHz, np.abs(noise_spec_sum), label='noise')
+        ax1.legend()
+        ax2.legend()
+        plt.show()
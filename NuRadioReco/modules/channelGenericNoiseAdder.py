@@ -4,6 +4,8 @@ import numpy as np
 from NuRadioReco.utilities import units, fft
 import numpy.random
 import logging
+import json
+import os
 
 
 class channelGenericNoiseAdder:
@@ -106,37 +108,16 @@ class channelGenericNoiseAdder:
         *   Add 'multi_white' noise option on 20-Sept-2018 (RL)
 
         """
-        frequencies = np.fft.rfftfreq(n_samples, 1. / sampling_rate)
-
-        n_samples_freq = len(frequencies)
-
-        if min_freq is None or min_freq == 0:
-            # remove DC component; fftfreq returns the DC component as 0-th element and the negative
-            # frequencies at the end, so frequencies[1] should be the lowest frequency; it seems safer,
-            # to take the difference between two frequencies to determine the minimum frequency, in case
-            # future versions of numpy change the order and maybe put the negative frequencies first
-            min_freq = 0.5 * (frequencies[2] - frequencies[1])
-            self.logger.info(' Set min_freq from None to {} MHz!'.format(min_freq / units.MHz))
-        if max_freq is None:
-            # sample up to Nyquist frequency
-            max_freq = max(frequencies)
-            self.logger.info(' Set max_freq from None to {} GHz!'.format(max_freq / units.GHz))
-        selection = (frequencies >= min_freq) & (frequencies <= max_freq)
-
-        nbinsactive = np.sum(selection)
-        self.logger.debug('Total number of frequency bins (bilateral spectrum) : {} , of those active: {} '.format(n_samples, nbinsactive))
-
-        # Debug plots
-#         f1 = plt.figure()
-#         plt.plot (frequencies/max(frequencies))
-#         plt.plot(fbinsactive,'kx')
+        parameters = self._get_noise_parameters(min_freq, max_freq, n_samples, sampling_rate, bandwidth)
+        n_samples_freq = parameters['n_samples_freq']
+        selection = parameters['selection']
+        nbinsactive = parameters['nbinsactive']
 
         if(bandwidth is not None):
-            sampling_bandwidth = min(0.5 * sampling_rate, max_freq) - min_freq
-            amplitude *= 1. / (bandwidth / (sampling_bandwidth)) ** 0.5  # normalize noise level to the bandwidth its generated for
+            amplitude *= parameters['bandwidth_factor']  # normalize noise level to the bandwidth its generated for
 
         ampl = np.zeros(n_samples_freq)
-        sigscale = (1. * n_samples) / np.sqrt(nbinsactive)
+        sigscale = parameters['sigscale']
         if type == 'perfect_white':
             ampl[selection] = amplitude * sigscale
         elif type == 'rayleigh':
@@ -155,6 +136,201 @@ class channelGenericNoiseAdder:
         else:
             return noise
 
+    def _get_noise_parameters(self, min_freq, max_freq, n_samples, sampling_rate, bandwidth=None):
+        """
+        returns the frequency selection and normalization used for the noise generation. The parameters only depend
+        on the arguments (not on the amplitude), so they are calculated once and cached.
+        """
+        key = (min_freq, max_freq, n_samples, sampling_rate, bandwidth)
+        if(key not in self.__noise_parameters):
+            frequencies = np.fft.rfftfreq(n_samples, 1. / sampling_rate)
+            if min_freq is None or min_freq == 0:
+                # remove DC component; fftfreq returns the DC component as 0-th element and the negative
+                # frequencies at the end, so frequencies[1] should be the lowest frequency; it seems safer,
+                # to take the difference between two frequencies to determine the minimum frequency, in case
+                # future versions of numpy change the order and maybe put the negative frequencies first
+                min_freq = 0.5 * (frequencies[2] - frequencies[1])
+                self.logger.info(' Set min_freq from None to {} MHz!'.format(min_freq / units.MHz))
+            if max_freq is None:
+                # sample up to Nyquist frequency
+                max_freq = max(frequencies)
+                self.logger.info(' Set max_freq from None to {} GHz!'.format(max_freq / units.GHz))
+            selection = (frequencies >= min_freq) & (frequencies <= max_freq)
+            nbinsactive = np.sum(selection)
+            self.logger.debug('Total number of frequency bins (bilateral spectrum) : {} , of those active: {} '.format(n_samples, nbinsactive))
+            bandwidth_factor = 1.
+            if(bandwidth is not None):
+                sampling_bandwidth = min(0.5 * sampling_rate, max_freq) - min_freq
+                bandwidth_factor = 1. / (bandwidth / (sampling_bandwidth)) ** 0.5
+            self.__noise_parameters[key] = {
+                "n_samples_freq": len(frequencies),
+                "selection": selection,
+                "nbinsactive": nbinsactive,
+                "sigscale": (1. * n_samples) / np.sqrt(nbinsactive),
+                "bandwidth_factor": bandwidth_factor
+            }
+        return self.__noise_parameters[key]
+
+    def bandlimited_noise_multi_channel(self, min_freq, max_freq, n_samples, sampling_rate, amplitudes,
+                                        type='perfect_white', time_domain=True, bandwidth=None):
+        """
+        Generating noise of n_samples in a bandwidth [min_freq,max_freq] for several channels at once.
+
+        The random numbers for all channels are drawn in one call and transformed with one batched inverse FFT.
+        The random numbers are drawn in the same order as in consecutive calls of `bandlimited_noise` for
+        the individual channels, i.e., the same noise realization is obtained (up to numerical rounding).
+
+        Parameters
+        ----------
+
+        min_freq: float
+            Minimum frequency of passband for noise generation, see `bandlimited_noise`
+        max_freq: float
+            Maximum frequency of passband for noise generation, see `bandlimited_noise`
+        n_samples: int
+            number of samples in the time domain
+        sampling_rate: float
+            desired sampling rate of data
+        amplitudes: array of floats
+            desired voltage of noise as V_rms for each channel
+        type: string
+            perfect_white: flat frequency spectrum
+            rayleigh: Amplitude of each frequency bin is drawn from a Rayleigh distribution
+        time_domain: bool (default True)
+            if True returns noise in the time domain, if False it returns the noise in the frequency domain.
+        bandwidth: float or None (default)
+            if this parameter is specified, the amplitude is interpreted as the amplitude for the bandwidth specified here,
+            see `bandlimited_noise`
+
+        Returns
+        -------
+        np.array of shape (n_channels, n_samples) (or (n_channels, n_frequencies) if time_domain is False)
+        """
+        parameters = self._get_noise_parameters(min_freq, max_freq, n_samples, sampling_rate, bandwidth)
+        selection = parameters['selection']
+        nbinsactive = parameters['nbinsactive']
+        amplitudes = np.array(amplitudes, dtype=float).reshape(-1)
+        if(bandwidth is not None):
+            amplitudes *= parameters['bandwidth_factor']  # normalize noise level to the bandwidth its generated for
+        n_channels = len(amplitudes)
+        Np = (n_samples - 1) // 2
+
+        ampl = np.zeros((n_channels, parameters['n_samples_freq']))
+        if type == 'perfect_white':
+            ampl[:, selection] = (amplitudes * parameters['sigscale'])[:, None]
+            phases = self.__random_generator.rand(n_channels, Np)
+        elif type == 'rayleigh':
+            fsigma = amplitudes * parameters['sigscale'] / np.sqrt(2.)
+            # the amplitudes and phases of one channel are consecutive in the random number stream
+            random_numbers = self.__random_generator.rand(n_channels, nbinsactive + Np)
+            ampl[:, selection] = fsigma[:, None] * np.sqrt(-2. * np.log1p(-random_numbers[:, :nbinsactive]))
+            phases = random_numbers[:, nbinsactive:]
+        else:
+            self.logger.error("Other types of noise not yet implemented.")
+            raise NotImplementedError("Other types of noise not yet implemented.")
+
+        noise = np.array(ampl, dtype='complex')
+        phases = phases * 2 * np.pi
+        noise[:, 1:Np + 1] *= np.cos(phases) + 1j * np.sin(phases)
+        noise /= sampling_rate
+        if(time_domain):
+            return fft.freq2time(noise, sampling_rate, n=n_samples)
+        else:
+            return noise
+
+    def create_noise_bank(self, n_samples, sampling_rate, min_freq, max_freq, type='perfect_white',
+                          bandwidth=None, n_traces=1, seed=None, filename=None):
+        """
+        Generates a bank of long noise traces with unit amplitude. If a noise bank is set, the `run` method
+        cuts the noise for each channel out of a random trace of the bank at a random (circular) offset
+        and scales it to the requested amplitude instead of generating new noise.
+
+        Parameters
+        ----------
+        n_samples: int
+            number of samples of each trace of the bank, should be much larger than the number of samples of the channels
+        sampling_rate: float
+            sampling rate of the noise, needs to match the sampling rate of the channels
+        min_freq: float
+            Minimum frequency of passband for noise generation, see `bandlimited_noise`
+        max_freq: float
+            Maximum frequency of passband for noise generation, see `bandlimited_noise`
+        type: string
+            perfect_white or rayleigh, see `bandlimited_noise`
+        bandwidth: float or None (default)
+            see `bandlimited_noise`
+        n_traces: int (default 1)
+            number of traces in the bank
+        seed: int or None
+            the seed of the noise bank. The random generator of the module is not affected.
+        filename: string or None
+            if not None, the bank is saved to this file (numpy .npy format) and a json file with the noise parameters
+            is saved next to it. The bank can be loaded memory mapped with `load_noise_bank`.
+        """
+        random_generator = self.__random_generator
+        self.__random_generator = np.random.RandomState(seed)
+        try:
+            bank = self.bandlimited_noise_multi_channel(min_freq, max_freq, n_samples, sampling_rate, np.ones(n_traces),
+                                                        type=type, bandwidth=bandwidth)
+        finally:
+            self.__random_generator = random_generator
+        parameters = {'sampling_rate': sampling_rate, 'min_freq': min_freq, 'max_freq': max_freq, 'type': type,
+                      'bandwidth': bandwidth}
+        if(filename is not None):
+            np.save(filename, bank)
+            with open(os.path.splitext(filename)[0] + '.json', 'w') as fout:
+                json.dump(parameters, fout)
+        self.__noise_bank = bank
+        self.__noise_bank_parameters = parameters
+
+    def load_noise_bank(self, filename, mmap_mode='r'):
+        """
+        Loads a noise bank that was saved with `create_noise_bank`. By default, the file is memory mapped, i.e.
+        only the parts of the bank that are used are read from disk.
+
+        The `run` method raises a ValueError if the noise is requested with other parameters (sampling rate,
+        min_freq, max_freq, type or bandwidth) than the ones the noise bank was generated for, or if the
+        channels have more samples than the traces of the bank.
+
+        Parameters
+        ----------
+        filename: string
+            the filename of the noise bank (.npy file)
+        mmap_mode: string or None
+            passed to `numpy.load`
+        """
+        with open(os.path.splitext(filename)[0] + '.json', 'r') as fin:
+            self.__noise_bank_parameters = json.load(fin)
+        self.__noise_bank = np.load(filename, mmap_mode=mmap_mode)
+
+    def clear_noise_bank(self):
+        """
+        removes the noise bank, the `run` method generates new noise for every event afterwards
+        """
+        self.__noise_bank = None
+        self.__noise_bank_parameters = None
+
+    def _get_noise_from_bank(self, n_samples, sampling_rate, amplitudes, min_freq, max_freq, type, bandwidth):
+        """
+        cuts noise traces of length n_samples out of the noise bank at random positions
+        """
+        parameters = self.__noise_bank_parameters
+        if(parameters['sampling_rate'] != sampling_rate or parameters['min_freq'] != min_freq or parameters['max_freq'] != max_freq
+           or parameters['type'] != type or parameters['bandwidth'] != bandwidth):
+            msg = "the noise bank was generated for {}, but noise with sampling_rate = {}, min_freq = {}, max_freq = {}, type = {} and bandwidth = {} was requested".format(
+                parameters, sampling_rate, min_freq, max_freq, type, bandwidth)
+            self.logger.error(msg)
+            raise ValueError(msg)
+        if(self.__noise_bank.shape[1] < n_samples):
+            msg = "the noise bank traces have {} samples, but {} samples were requested".format(self.__noise_bank.shape[1], n_samples)
+            self.logger.error(msg)
+            raise ValueError(msg)
+        amplitudes = np.array(amplitudes, dtype=float).reshape(-1)
+        rows = self.__random_generator.randint(0, self.__noise_bank.shape[0], len(amplitudes))
+        offsets = self.__random_generator.randint(0, self.__noise_bank.shape[1], len(amplitudes))
+        indices = (offsets[:, None] + np.arange(n_samples)[None, :]) % self.__noise_bank.shape[1]
+        return np.asarray(self.__noise_bank[rows[:, None], indices]) * amplitudes[:, None]
+
     def precalculate_bandlimited_noise_parameters(self, min_freq, max_freq, n_samples, sampling_rate, amplitude, type='perfect_white',
                           bandwidth=None):
         """
@@ -227,6 +403,7 @@ class channelGenericNoiseAdder:
 
 
         self.precalculated_parameters = {
+                "amplitude": amplitude,
                 "n_samples_freq": n_samples_freq,
                 "selection": selection,
                 "nbinsactive": nbinsactive,
@@ -303,6 +480,9 @@ class channelGenericNoiseAdder:
     def __init__(self):
         self.__debug = None
         self.__random_generator = None
+        self.__noise_parameters = {}
+        self.__noise_bank = None
+        self.__noise_bank_parameters = None
         self.logger = logging.getLogger('NuRadioReco.channelGenericNoiseAdder')
         self.begin()
 
@@ -319,7 +499,8 @@ class channelGenericNoiseAdder:
             max_freq=2000 * units.MHz,
             type='perfect_white',
             excluded_channels=None,
-            bandwidth=None):
+            bandwidth=None,
+            vectorized=True):
 
         """
         Add noise to given event.
@@ -350,16 +531,23 @@ class channelGenericNoiseAdder:
             if this parameter is specified, the amplitude is interpreted as the amplitude for the bandwidth specified here
             Otherwise the amplitude is interpreted for the bandwidth of min(max_freq, 0.5 * sampling rate) - min_freq
             If `bandwidth` is larger then (min(max_freq, 0.5 * sampling rate) - min_freq) it has the same effect as `None`
+        vectorized: bool (default True)
+            if True, the noise of all channels with the same sampling rate and number of samples is generated in one
+            call (see `bandlimited_noise_multi_channel`). If a noise bank is set (see `create_noise_bank`), the noise
+            is taken from the noise bank. If False, the noise is generated channel by channel.
 
         """
         if excluded_channels is None:
             excluded_channels = []
+        if(vectorized and not self.__debug):
+            self._add_noise_vectorized(station, amplitude, min_freq, max_freq, type, excluded_channels, bandwidth)
+            return
         channels = station.iter_channels()
         for channel in channels:
             if(channel.get_id() in excluded_channels):
                 continue
 
-            trace = channel.get_trace()
+            trace = channel.get_trace(copy=False)
             sampling_rate = channel.get_sampling_rate()
 
             if(isinstance(amplitude, dict)):
@@ -393,8 +581,37 @@ class channelGenericNoiseAdder:
 
                 plt.show()
 
-            new_trace = trace + noise
-            channel.set_trace(new_trace, sampling_rate)
+            channel.add_to_trace(noise)
+
+    def _add_noise_vectorized(self, station, amplitude, min_freq, max_freq, type, excluded_channels, bandwidth):
+        """
+        adds noise to all channels, the noise of all channels with the same sampling rate and number of samples
+        is generated at once
+        """
+        channel_groups = {}
+        for channel in station.iter_channels():
+            if(channel.get_id() in excluded_channels):
+                continue
+            key = (channel.get_sampling_rate(), channel.get_number_of_samples())
+            if(key not in channel_groups):
+                channel_groups[key] = []
+            channel_groups[key].append(channel)
+
+        for (sampling_rate, n_samples), channels in channel_groups.items():
+            if(isinstance(amplitude, dict)):
+                amplitudes = np.array([amplitude[channel.get_id()] for channel in channels])
+            else:
+                amplitudes = np.full(len(channels), amplitude, dtype=float)
+            if(self.__noise_bank is not None):
+                noise = self._get_noise_from_bank(n_samples, sampling_rate, amplitudes, min_freq, max_freq, type, bandwidth)
+            else:
+                noise = self.bandlimited_noise_multi_channel(min_freq, max_freq, n_samples, sampling_rate, amplitudes,
+                                                             type=type, bandwidth=bandwidth)
+            if(station.uses_trace_buffer() and len(channels) == station.get_number_of_channels()):
+                station.get_trace_buffer()[:] += noise
+            else:
+                for iCh, channel in enumerate(channels):
+                    channel.add_to_trace(noise[iCh])
 
     def end(self):
         pass
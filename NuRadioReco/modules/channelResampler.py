@@ -1,4 +1,5 @@
 from NuRadioReco.modules.base.module import register_run
+from NuRadioReco.utilities import trace_utilities
 import logging
 
 
@@ -43,6 +44,14 @@ class channelResampler:
             In units 1/time provides the desired sampling rate of the data.
 
         """
+        if(station.uses_trace_buffer()):
+            channels = list(station.iter_channels())
+            if(len(channels) and len(set([(channel.get_sampling_rate(), channel.get_number_of_samples()) for channel in channels])) == 1):
+                # resample all channels at once
+                if(channels[0].get_sampling_rate() != sampling_rate):
+                    traces = trace_utilities.resample(station.get_trace_buffer(), channels[0].get_sampling_rate(), sampling_rate)
+                    station.set_traces(traces, sampling_rate)
+                return
         for channel in station.iter_channels():
             channel.resample(sampling_rate)
 
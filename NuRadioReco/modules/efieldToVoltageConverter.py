@@ -11,7 +11,6 @@ from NuRadioReco.utilities import ice
 from NuRadioReco.utilities import trace_utilities
 from NuRadioReco.framework.parameters import electricFieldParameters as efp
 from NuRadioReco.framework.parameters import stationParameters as stnp
-import copy
 
 
 class efieldToVoltageConverter():
@@ -156,14 +155,23 @@ class efieldToVoltageConverter():
             if(self.__debug):
                 from matplotlib import pyplot as plt
                 fig, axes = plt.subplots(2, 1)
-            for electric_field in sim_station.get_electric_fields_for_channels([channel_id]):
+            electric_fields = list(sim_station.get_electric_fields_for_channels([channel_id]))
+            # all electric fields are convolved with the antenna response on the same frequencies, so
+            # the antenna response is evaluated for the directions of all electric fields at once
+            ff = np.fft.rfftfreq(trace_length_samples, d=(1. / (1. / time_resolution)))
+            VELs = trace_utilities.get_efield_antenna_factors(
+                sim_station, ff, [channel_id], det,
+                np.array([electric_field[efp.zenith] for electric_field in electric_fields]),
+                np.array([electric_field[efp.azimuth] for electric_field in electric_fields]),
+                self.antenna_provider)
+            for i_efield, electric_field in enumerate(electric_fields):
 
                 # all simulated channels have a different trace start time
                 # in a measurement, all channels have the same physical start time
                 # so we need to create one long trace that can hold all the different channel times
                 # to achieve a good time resolution, we upsample the trace first.
                 new_efield = NuRadioReco.framework.base_trace.BaseTrace()  # create new data structure with new efield length
-                new_efield.set_trace(copy.copy(electric_field.get_trace()), electric_field.get_sampling_rate())
+                new_efield.set_trace(electric_field.get_trace(copy=False), electric_field.get_sampling_rate())
                 new_trace = np.zeros((3, trace_length_samples))
                 # calculate the start bin
                 if(not np.isnan(electric_field.get_trace_start_time())):
@@ -191,7 +199,7 @@ class efieldToVoltageConverter():
                     self.logger.debug('channel {}, start time {:.1f} = bin {:d}, ray solution {}'.format(channel_id, electric_field.get_trace_start_time() + cab_delay, start_bin, electric_field[efp.ray_path_type]))
                     new_efield.apply_time_shift(time_remainder)
 
-                    tr = new_efield.get_trace()
+                    tr = new_efield.get_trace(copy=False)
                     stop_bin = start_bin + new_efield.get_number_of_samples()
 
                     # if checks should never be true...
@@ -207,27 +215,20 @@ class efieldToVoltageConverter():
                         start_bin = 0
                     new_trace[:, start_bin:stop_bin] = tr
                 trace_object = NuRadioReco.framework.base_trace.BaseTrace()
-                trace_object.set_trace(new_trace, 1. / time_resolution)
+                trace_object.set_trace(new_trace, 1. / time_resolution, copy=False)
                 if(self.__debug):
                     axes[0].plot(trace_object.get_times(), new_trace[1], label="eTheta {}".format(electric_field[efp.ray_path_type]), c='C0')
                     axes[0].plot(trace_object.get_times(), new_trace[2], label="ePhi {}".format(electric_field[efp.ray_path_type]), c='C0', linestyle=':')
                     axes[0].plot(electric_field.get_times(), electric_field.get_trace()[1], c='C1', linestyle='-', alpha=.5)
                     axes[0].plot(electric_field.get_times(), electric_field.get_trace()[2], c='C1', linestyle=':', alpha=.5)
-                ff = trace_object.get_frequencies()
-                efield_fft = trace_object.get_frequency_spectrum()
+                efield_fft = trace_object.get_frequency_spectrum(copy=False)
 
                 zenith = electric_field[efp.zenith]
-                azimuth = electric_field[efp.azimuth]
 
-                # get antenna pattern for current channel
-                VEL = trace_utilities.get_efield_antenna_factor(sim_station, ff, [channel_id], det, zenith, azimuth, self.antenna_provider)
-
-                if VEL is None:  # this can happen if there is not signal path to the antenna
-                    voltage_fft = np.zeros_like(efield_fft[1])  # set voltage trace to zeros
-                else:
-                    # Apply antenna response to electric field
-                    VEL = VEL[0]  # we only requested the VEL for one channel, so selecting it
-                    voltage_fft = np.sum(VEL * np.array([efield_fft[1], efield_fft[2]]), axis=0)
+                # Apply antenna response to electric field, the antenna response is zero if there is no
+                # signal path to the antenna
+                VEL = VELs[i_efield, 0]  # we only requested the VEL for one channel, so selecting it
+                voltage_fft = np.sum(VEL * np.array([efield_fft[1], efield_fft[2]]), axis=0)
 
                 # Remove DC offset
                 voltage_fft[np.where(ff < 5 * units.MHz)] = 0.
@@ -253,7 +254,7 @@ class efieldToVoltageConverter():
                 # set the trace to zeros
                 channel.set_trace(np.zeros(trace_length_samples), 1. / time_resolution)
             else:
-                channel.set_frequency_spectrum(channel_spectrum, trace_object.get_sampling_rate())
+                channel.set_frequency_spectrum(channel_spectrum, trace_object.get_sampling_rate(), copy=False)
             channel.set_trace_start_time(times_min.min())
 
             station.add_channel(channel)
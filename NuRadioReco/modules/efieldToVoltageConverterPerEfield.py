@@ -41,7 +41,7 @@ class efieldToVoltageConverterPerEfield():
                                                                            ray_tracing_id=electric_field.get_ray_tracing_solution_id())
 
                 ff = electric_field.get_frequencies()
-                efield_fft = electric_field.get_frequency_spectrum()
+                efield_fft = electric_field.get_frequency_spectrum(copy=False)
 
                 zenith = electric_field[efp.zenith]
                 azimuth = electric_field[efp.azimuth]
@@ -80,7 +80,7 @@ class efieldToVoltageConverterPerEfield():
                     travel_time_shift = 0
 
                 # set the trace to zeros
-                sim_channel.set_frequency_spectrum(voltage_fft, electric_field.get_sampling_rate())
+                sim_channel.set_frequency_spectrum(voltage_fft, electric_field.get_sampling_rate(), copy=False)
                 sim_channel.set_trace_start_time(electric_field.get_trace_start_time() + travel_time_shift)
                 sim_station.add_channel(sim_channel)
 
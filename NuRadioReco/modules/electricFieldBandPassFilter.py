@@ -36,10 +36,8 @@ class electricFieldBandPassFilter:
             passband = [55 * units.MHz, 1000 * units.MHz]
         for efield in station.get_electric_fields():
             frequencies = efield.get_frequencies()
-            trace_fft = efield.get_frequency_spectrum()
             filter_response = bandpass_filter.get_filter_response(frequencies, passband, filter_type, order)
-            trace_fft *= filter_response
-            efield.set_frequency_spectrum(trace_fft, efield.get_sampling_rate())
+            efield.multiply_frequency_spectrum(filter_response)
 
     def end(self):
         pass
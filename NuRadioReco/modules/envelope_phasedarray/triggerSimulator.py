@@ -2,7 +2,7 @@ from NuRadioReco.modules.base.module import register_run
 from NuRadioReco.utilities import units
 from NuRadioReco.framework.trigger import EnvelopePhasedTrigger
 from NuRadioReco.modules.phasedarray.triggerSimulator import triggerSimulator as phasedTrigger
-from NuRadioReco.modules.phasedarray.triggerSimulator import get_beam_rolls, get_channel_trace_start_time
+from NuRadioReco.modules.phasedarray.triggerSimulator import get_beam_rolls, get_channel_trace_start_time, phase_traces
 from NuRadioReco.utilities.diodeSimulator import diodeSimulator
 from NuRadioReco.modules.analogToDigitalConverter import analogToDigitalConverter
 import numpy as np
@@ -118,23 +118,17 @@ class triggerSimulator(phasedTrigger):
 
             traces[channel_id] = trace[:]
 
-        for subbeam_rolls in beam_rolls:
+        # form all beams at once
+        channel_ids = list(traces.keys())
+        beam_delay_matrix = np.array([[subbeam_rolls[channel_id] for channel_id in channel_ids] for subbeam_rolls in beam_rolls], dtype=int)
+        phased_traces = phase_traces(np.array([traces[channel_id] for channel_id in channel_ids]), beam_delay_matrix)
 
-            phased_trace = None
-            # Number of antennas: primary beam antennas
-            Nant = len(beam_rolls[0])
+        # Number of antennas: primary beam antennas
+        Nant = len(beam_rolls[0])
+        low_trigger = power_mean - power_std * np.abs(threshold_factor)
+        low_trigger *= Nant
 
-            for channel_id in traces:
-
-                trace = traces[channel_id]
-
-                if(phased_trace is None):
-                    phased_trace = np.roll(trace, subbeam_rolls[channel_id])
-                else:
-                    phased_trace += np.roll(trace, subbeam_rolls[channel_id])
-
-            low_trigger = power_mean - power_std * np.abs(threshold_factor)
-            low_trigger *= Nant
+        for subbeam_rolls, phased_trace in zip(beam_rolls, phased_traces):
 
             threshold_passed = np.min(phased_trace) < low_trigger
 
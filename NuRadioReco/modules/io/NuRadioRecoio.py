@@ -5,10 +5,13 @@ import NuRadioReco.detector.generic_detector
 import NuRadioReco.modules.io.event_parser_factory
 import numpy as np
 import logging
+import pickle
 import time
+import os
 
 VERSION = 2
 VERSION_MINOR = 2
+INDEX_MAGIC = b'NURIDX'  # marks the end of files that contain an index of the events, see eventWriter
 
 
 class NuRadioRecoio(object):
@@ -119,7 +122,7 @@ class NuRadioRecoio(object):
             )
             if(self.__fail_on_minor_version_mismatch):
                 raise IOError
-        self.__scan_files = NuRadioReco.modules.io.event_parser_factory.scan_files_function(self.__file_version, self.__file_version_minor)
+        self.__scan_file = NuRadioReco.modules.io.event_parser_factory.scan_files_function(self.__file_version, self.__file_version_minor)
         self.__iter_events = NuRadioReco.modules.io.event_parser_factory.iter_events_function(self.__file_version, self.__file_version_minor)
 
     def openFile(self, filenames):
@@ -175,14 +178,107 @@ class NuRadioRecoio(object):
                     else:
                         self.__event_headers[station_id][key].append(value)
 
+    def _parse_detector_dict(self, iF, detector_dict):
+        if 'generic_detector' not in detector_dict.keys():
+            is_generic_detector = False
+        else:
+            is_generic_detector = detector_dict['generic_detector']
+        if iF not in self._detector_dicts.keys():
+            self._detector_dicts[iF] = {
+                'generic_detector': is_generic_detector,
+                'channels': {},
+                'stations': {}
+            }
+        if is_generic_detector:
+            # add default_station and default_channel to the dict to support older files using these
+            if 'default_station' not in detector_dict:
+                detector_dict['default_station'] = None
+            if 'default_channel' not in detector_dict:
+                detector_dict['default_channel'] = None
+            self._detector_dicts[iF]['default_station'] = detector_dict['default_station']
+            self._detector_dicts[iF]['default_channel'] = detector_dict['default_channel']
+        for station in detector_dict['stations'].values():
+            if len(self._detector_dicts[iF]['stations'].keys()) == 0:
+                index = 0
+            else:
+                index = max(self._detector_dicts[iF]['stations'].keys()) + 1
+            self._detector_dicts[iF]['stations'][index] = station
+        for channel in detector_dict['channels'].values():
+            if len(self._detector_dicts[iF]['channels'].keys()) == 0:
+                index = 0
+            else:
+                index = max(self._detector_dicts[iF]['channels'].keys()) + 1
+            self._detector_dicts[iF]['channels'][index] = channel
+
+    def _parse_detector_changes(self, iF, changes):
+        if iF not in self._event_specific_detector_changes.keys():
+            self._event_specific_detector_changes[iF] = []
+        for change in changes:
+            self._event_specific_detector_changes[iF].append(change)
+
+    def __read_index(self, iF):
+        """
+        reads the index that the eventWriter appends to the end of a file
+
+        Returns False if the file does not contain an index (e.g. files written with older versions or files
+        that were not closed properly). In this case the file needs to be scanned.
+        """
+        f = self._get_file(iF)
+        file_size = os.fstat(f.fileno()).st_size
+        if(file_size < 36):
+            return False
+        f.seek(file_size - 12)
+        trailer = f.read(12)
+        if(trailer[6:] != INDEX_MAGIC):
+            return False
+        index_position = int.from_bytes(trailer[:6], 'little')
+        if(index_position < 24 or index_position > file_size - 12):
+            return False
+        f.seek(index_position)
+        try:
+            index = pickle.loads(f.read(file_size - 12 - index_position))
+        except Exception:
+            self.logger.warning("index of file {} can not be read, scanning the file instead".format(self._filenames[iF]))
+            return False
+        self.logger.debug("reading index of file {}".format(self._filenames[iF]))
+        self._bytes_start_header[iF] = index['bytes_start_header']
+        self._bytes_length_header[iF] = index['bytes_length_header']
+        self._bytes_start[iF] = index['bytes_start']
+        self._bytes_length[iF] = index['bytes_length']
+        for evt_header in index['headers']:
+            self._parse_event_header(evt_header)
+        for object_type, bytes_start, bytes_length in index['objects']:
+            f.seek(bytes_start)
+            if(object_type == 1):
+                self._parse_detector_dict(iF, pickle.loads(f.read(bytes_length)))
+            elif(object_type == 2):
+                self._parse_detector_changes(iF, pickle.loads(f.read(bytes_length)))
+        return True
+
     def __scan_files(self):
-        current_byte = 12  # skip datafile header
-        iF = 0
-        while True:
+        self._bytes_start_header = []
+        self._bytes_length_header = []
+        self._bytes_start = []
+        self._bytes_length = []
+        self.__event_ids = []
+        self.__event_headers = {}
+        self._detector_dicts = {}
+        self._event_specific_detector_changes = {}
+        for iF in range(len(self._filenames)):
+            self._bytes_start_header.append([])
+            self._bytes_length_header.append([])
+            self._bytes_start.append([])
+            self._bytes_length.append([])
+            self._get_file(iF)  # opens the file and determines the file version
+            if(self.__read_index(iF)):
+                continue
+            current_byte = 12  # skip datafile header
             self._get_file(iF).seek(current_byte)
-            continue_loop, iF, current_byte = self.__scan_files(self, iF, current_byte)
-            if not continue_loop:
-                break
+            while True:
+                continue_loop, iF, current_byte = self.__scan_file(self, iF, current_byte)
+                if not continue_loop:
+                    break
+                self._get_file(iF).seek(current_byte)
 
         self.__event_ids = np.array(self.__event_ids)
         self.__file_scanned = True
@@ -1,7 +1,9 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import pickle
+import glob
+import os
 from NuRadioReco.modules.base.module import register_run
-from NuRadioReco.modules.io.NuRadioRecoio import VERSION, VERSION_MINOR
+from NuRadioReco.modules.io.NuRadioRecoio import VERSION, VERSION_MINOR, INDEX_MAGIC
 import logging
 from NuRadioReco.framework.parameters import stationParameters as stnp
 from NuRadioReco.detector import generic_detector
@@ -38,6 +40,8 @@ class eventWriter:
         self.__event_ids_and_runs = None
         self.__events_per_file = None
         self.__events_in_current_file = 0
+        self.__write_index = None
+        self.__index = None
 
     def __write_fout_header(self):
         if self.__number_of_files > 1:
@@ -49,8 +53,37 @@ class eventWriter:
         b.extend(VERSION_MINOR.to_bytes(6, 'little'))
         self.__fout.write(b)
         self.__header_written = True
+        self.__index = {
+            'bytes_start_header': [],
+            'bytes_length_header': [],
+            'bytes_start': [],
+            'bytes_length': [],
+            'headers': [],
+            'objects': []
+        }
+
+    def __close_file(self):
+        """
+        writes the index of the current file (if requested) and closes it
+
+        The index is written after an end-of-file marker (an object with length 0), so that readers that
+        scan the file sequentially stop before the index. The file ends with the byte position of the index
+        and a magic number, so that the index can be found without reading the file.
+        """
+        if self.__write_index:
+            index_string = pickle.dumps(self.__index, protocol=4)
+            b = bytearray()
+            b.extend((0).to_bytes(12, 'little'))  # end-of-file marker for sequential readers
+            index_position = self.__fout.tell() + len(b)
+            b.extend(index_string)
+            b.extend(index_position.to_bytes(6, 'little'))
+            b.extend(INDEX_MAGIC)
+            self.__fout.write(b)
+        self.__fout.close()
+        self.__header_written = False
 
-    def begin(self, filename, max_file_size=1024, check_for_duplicates=False, events_per_file=None, log_level=logging.WARNING):
+    def begin(self, filename, max_file_size=1024, check_for_duplicates=False, events_per_file=None, write_index=True,
+              log_level=logging.WARNING):
         """
         begin method
 
@@ -67,6 +100,10 @@ class eventWriter:
             Maximum number of events to be written into the same file. After more than events_per_file have been written
             into the same file, the output will be split into another file. If max_file_size and events_per_file are
             both set, the file will be split whenever any of the two conditions is fullfilled.
+        write_index: bool (default True)
+            if True, an index with the byte positions and headers of all events is appended to every file when it
+            is closed. It allows NuRadioRecoio to open the file without scanning it. Files with an index remain
+            readable by older versions of NuRadioRecoio.
         """
         logger.setLevel(log_level)
         if filename[-4:] == '.nur':
@@ -85,6 +122,7 @@ class eventWriter:
         self.__event_ids_and_runs = []  # Remember which event IDs are already in file to catch duplicates
         self.__header_written = False  # Remember if we still have to write the current file header
         self.__events_per_file = events_per_file
+        self.__write_index = write_index
 
     @register_run()
     def run(self, evt, det=None, mode=None):
@@ -120,7 +158,15 @@ class eventWriter:
         if not self.__header_written:
             self.__write_fout_header()
 
-        event_bytearray = self.__get_event_bytearray(evt, mode)
+        header = get_header(evt)
+        event_bytearray = self.__get_event_bytearray(evt, mode, header)
+        position = self.__fout.tell()
+        header_length = int.from_bytes(event_bytearray[6:12], 'little')
+        self.__index['bytes_start_header'].append(position + 12)
+        self.__index['bytes_length_header'].append(header_length)
+        self.__index['bytes_start'].append(position + 18 + header_length)
+        self.__index['bytes_length'].append(len(event_bytearray) - 18 - header_length)
+        self.__index['headers'].append(header)
         n_bytes_written = self.__fout.write(event_bytearray)
         logger.debug(f"{n_bytes_written} bytes written to diks")
         self.__current_file_size += event_bytearray.__sizeof__()
@@ -132,11 +178,13 @@ class eventWriter:
             detector_dict = self.__get_detector_dict(evt, det)  # returns None if detector is already saved
             if detector_dict is not None:
                 detector_bytearray = self.__get_detector_bytearray(detector_dict)
+                self.__index['objects'].append((1, self.__fout.tell() + 12, len(detector_bytearray) - 12))
                 self.__fout.write(detector_bytearray)
                 self.__current_file_size += detector_bytearray.__sizeof__()
             if isinstance(det, generic_detector.GenericDetector):
                 changes_bytearray = self.__get_detector_changes_byte_array(evt, det)
                 if changes_bytearray is not None:
+                    self.__index['objects'].append((2, self.__fout.tell() + 12, len(changes_bytearray) - 12))
                     self.__fout.write(changes_bytearray)
                     self.__current_file_size += changes_bytearray.__sizeof__()
 
@@ -146,7 +194,7 @@ class eventWriter:
         if(self.__current_file_size > self.__max_file_size or self.__events_in_current_file == self.__events_per_file):
             logger.info("current output file exceeds max file size -> closing current output file and opening new one")
             self.__current_file_size = 0
-            self.__fout.close()
+            self.__close_file()
             self.__number_of_files += 1
             # self.__filename = "{}_part{:02d}".format(self.__filename, self.__number_of_files)
             self.__stored_stations = []
@@ -155,8 +203,8 @@ class eventWriter:
             self.__header_written = False
             self.__events_in_current_file = 0
 
-    def __get_event_bytearray(self, event, mode):
-        evt_header_str = pickle.dumps(get_header(event), protocol=4)
+    def __get_event_bytearray(self, event, mode, header):
+        evt_header_str = pickle.dumps(header, protocol=4)
         b = bytearray()
         b.extend(evt_header_str)
         evt_header_length = len(b)
@@ -300,8 +348,70 @@ class eventWriter:
                 raise ValueError("An event with ID {} and run number {} already exists in the file\nif you don't want unique event ids enforced you can turn it of by passing `check_for_duplicates=True` to the begin method.".format(event_id, run_number))
         return
 
+    def get_checkpoint(self):
+        """
+        flushes the current output file and returns the internal state of the event writer
+
+        The returned dictionary can be passed to `resume_from_checkpoint` to continue writing
+        to the output file from this point on, e.g., after an interrupted simulation.
+        """
+        position = 0
+        if self.__header_written:
+            self.__fout.flush()
+            position = self.__fout.tell()
+        return {
+            'filename': self.__filename,
+            'position': position,
+            'number_of_events': self.__number_of_events,
+            'current_file_size': self.__current_file_size,
+            'number_of_files': self.__number_of_files,
+            'stored_stations': list(self.__stored_stations),
+            'stored_channels': list(self.__stored_channels),
+            'event_ids_and_runs': list(self.__event_ids_and_runs),
+            'header_written': self.__header_written,
+            'events_in_current_file': self.__events_in_current_file,
+            'index': None if self.__index is None else {key: list(value) for key, value in self.__index.items()}
+        }
+
+    def resume_from_checkpoint(self, checkpoint):
+        """
+        restores the state of the event writer from a checkpoint (see `get_checkpoint`). Everything that was
+        written to the current output file after the checkpoint was created is discarded, and the files that were
+        started after the checkpoint was created are removed. The `begin` method needs to be called before.
+
+        Parameters
+        ----------
+        checkpoint: dict
+            the state of the event writer as returned by `get_checkpoint`
+        """
+        self.__filename = checkpoint['filename']
+        self.__number_of_events = checkpoint['number_of_events']
+        self.__current_file_size = checkpoint['current_file_size']
+        self.__number_of_files = checkpoint['number_of_files']
+        self.__stored_stations = list(checkpoint['stored_stations'])
+        self.__stored_channels = list(checkpoint['stored_channels'])
+        self.__event_ids_and_runs = list(checkpoint['event_ids_and_runs'])
+        self.__header_written = checkpoint['header_written']
+        self.__events_in_current_file = checkpoint['events_in_current_file']
+        self.__index = checkpoint['index']
+        if self.__header_written:
+            if self.__number_of_files > 1:
+                filename = "{}_part{:02d}.nur".format(self.__filename, self.__number_of_files)
+            else:
+                filename = "{}.nur".format(self.__filename)
+            self.__fout = open(filename, 'r+b')
+            self.__fout.truncate(checkpoint['position'])
+            self.__fout.seek(checkpoint['position'])
+            logger.info(f"resuming to write to {filename} at byte {checkpoint['position']}")
+        # remove the files that were started after the checkpoint was created
+        for filename in glob.glob("{}_part*.nur".format(glob.escape(self.__filename))):
+            part = filename[len(self.__filename) + len("_part"):-len(".nur")]
+            if part.isdigit() and int(part) > self.__number_of_files:
+                logger.info(f"removing {filename} that was written after the checkpoint")
+                os.remove(filename)
+
     def end(self):
-        if(hasattr(self, "__fout")):
-            self.__fout.close()
-            self.debug(f"closing file.")
+        if(self.__header_written):
+            self.__close_file()
+            logger.debug("closing file.")
         return self.__number_of_events
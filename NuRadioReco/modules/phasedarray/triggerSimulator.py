@@ -17,6 +17,192 @@ main_high_angle = -1.0 * main_low_angle
 default_angles = np.arcsin(np.linspace(np.sin(main_low_angle), np.sin(main_high_angle), 11))
 
 
+def get_beam_delay_matrix(antenna_z, cable_delays, phasing_angles, ref_index, sampling_frequency):
+    """
+    Calculates the delays (in samples) needed for phasing a vertical string of antennas for all beams at once.
+
+    Parameters
+    ----------
+    antenna_z: array of floats
+        vertical positions of the phased antennas
+    cable_delays: array of floats
+        cable delays of the phased antennas
+    phasing_angles: array of floats
+        pointing angles of the beams
+    ref_index: float
+        refractive index for beam forming
+    sampling_frequency: float
+        sampling frequency of the traces that are phased
+
+    Returns
+    -------
+    beam_rolls: 2D array of ints
+        shape (n_beams, n_channels), the amount each channel is rolled for each beam
+    """
+    antenna_z = np.asarray(antenna_z, dtype=float)
+    cable_delays = np.asarray(cable_delays, dtype=float)
+    ref_z = np.max(antenna_z)
+    delays = -(antenna_z[None, :] - ref_z) / cspeed * ref_index * np.sin(np.atleast_1d(phasing_angles))[:, None] - cable_delays[None, :]
+    delays -= np.max(delays, axis=1, keepdims=True)
+    return np.round(delays / (1. / sampling_frequency)).astype(int)
+
+
+def get_phasing_indices(beam_rolls, n_samples):
+    """
+    Calculates the indices that roll each channel trace for each beam, i.e.
+    `traces[i, indices[j, i]]` equals `np.roll(traces[i], beam_rolls[j, i])`.
+
+    Parameters
+    ----------
+    beam_rolls: 2D array of ints
+        shape (n_beams, n_channels), the amount each channel is rolled for each beam
+    n_samples: int
+        number of samples of the traces
+
+    Returns
+    -------
+    indices: 3D array of ints
+        shape (n_beams, n_channels, n_samples)
+    """
+    beam_rolls = np.asarray(beam_rolls, dtype=int)
+    return (np.arange(n_samples)[None, None, :] - beam_rolls[:, :, None]) % n_samples
+
+
+def phase_traces(traces, beam_rolls=None, indices=None):
+    """
+    Forms all beams at once by rolling and summing the channel traces.
+
+    Parameters
+    ----------
+    traces: 2D array of floats
+        shape (n_channels, n_samples), the traces of the phased channels
+    beam_rolls: 2D array of ints or None
+        shape (n_beams, n_channels), the amount each channel is rolled for each beam
+    indices: 3D array of ints or None
+        precalculated output of `get_phasing_indices`. If given, `beam_rolls` is ignored.
+
+    Returns
+    -------
+    phased_traces: 2D array of floats
+        shape (n_beams, n_samples)
+    """
+    traces = np.asarray(traces)
+    if indices is None:
+        indices = get_phasing_indices(beam_rolls, traces.shape[1])
+    return np.sum(traces[np.arange(traces.shape[0])[None, :, None], indices], axis=1)
+
+
+def get_windowed_power(traces, window, step, adc_output='voltage'):
+    """
+    Calculates the power averaged over windows of `window` samples that start every `step` samples.
+    A cumulative sum is used, so that the computation time does not depend on the window length.
+
+    Parameters
+    ----------
+    traces: array of floats or ints
+        the (phased) traces, the windows are calculated along the last axis
+    window: int
+        Power integral window
+        Units of ADC time ticks
+    step: int
+        Time step in power integral. If equal to window, there is no time overlap
+        in between neighboring integration windows
+        Units of ADC time ticks.
+    adc_output: string
+
+        - 'voltage' to store the ADC output as discretised voltage trace
+        - 'counts' to store the ADC output in ADC counts
+
+    Returns
+    -------
+    power: array of floats
+        Integrated power in each integration window, the last axis has length num_frames
+    num_frames: int
+        Number of integration windows calculated
+    """
+    if(adc_output != 'voltage' and adc_output != 'counts'):
+        error_msg = 'ADC output type must be "counts" or "voltage". Currently set to:' + str(adc_output)
+        raise ValueError(error_msg)
+
+    traces = np.asarray(traces)
+    num_frames = int(np.floor((traces.shape[-1] - window) / step))
+    if(adc_output == 'voltage'):
+        squared = (traces * traces).astype(float)
+    else:
+        squared = (traces * traces).astype(int)
+    cumulative = np.zeros(traces.shape[:-1] + (traces.shape[-1] + 1,), dtype=squared.dtype)
+    np.cumsum(squared, axis=-1, out=cumulative[..., 1:])
+    starts = np.arange(num_frames) * step
+    power = cumulative[..., starts + window] - cumulative[..., starts]
+    return power.astype(float) / window, num_frames
+
+
+def get_channel_trace_start_time(station, triggered_channels):
+    """
+    Finds the start time of the desired traces.
+    Throws an error if all the channels dont have the same start time.
+
+    Parameters
+    ----------
+    station: Station object
+        Description of the current station
+    triggered_channels: array of ints
+        channels ids of the channels that form the primary phasing array
+        if None, all channels are taken
+
+    Returns
+    -------
+    channel_trace_start_time: float
+        Channel start time
+    """
+    channel_trace_start_time = None
+    for channel in station.iter_channels(use_channels=triggered_channels):
+        if channel_trace_start_time is None:
+            channel_trace_start_time = channel.get_trace_start_time()
+        elif channel_trace_start_time != channel.get_trace_start_time():
+            error_msg = 'Phased array channels do not have matching trace start times. '
+            error_msg += 'This module is not prepared for this case.'
+            raise ValueError(error_msg)
+
+    return channel_trace_start_time
+
+
+def get_beam_rolls(station, det, triggered_channels, phasing_angles=default_angles, ref_index=1.75,
+                   sampling_frequency=None):
+    """
+    Calculates the delays needed for phasing the array.
+
+    Parameters
+    ----------
+    station: Station object
+        Description of the current station
+    det: Detector object
+        Description of the current detector
+    triggered_channels: array of ints
+        channels ids of the channels that form the primary phasing array
+        if None, all channels are taken
+    phasing_angles: array of float
+        pointing angles for the primary beam
+    ref_index: float
+        refractive index for beam forming
+    sampling_frequency: float or None
+        Rate of the ADC used. If None, the sampling rate of the first triggered channel is used.
+
+    Returns
+    -------
+    beam_rolls: array of dicts of keys=antenna and content=delay
+    """
+    if(triggered_channels is None):
+        triggered_channels = [channel.get_id() for channel in station.iter_channels()]
+    channel_ids = [channel.get_id() for channel in station.iter_channels(use_channels=triggered_channels)]
+    if(sampling_frequency is None):
+        sampling_frequency = station.get_channel(channel_ids[0]).get_sampling_rate()
+    antenna_z = [det.get_relative_position(station.get_id(), channel_id)[2] for channel_id in channel_ids]
+    cable_delays = [det.get_cable_delay(station.get_id(), channel_id) for channel_id in channel_ids]
+    beam_delay_matrix = get_beam_delay_matrix(antenna_z, cable_delays, phasing_angles, ref_index, sampling_frequency)
+    return [dict(zip(channel_ids, rolls)) for rolls in beam_delay_matrix]
+
+
 class triggerSimulator:
     """
     Calculates the trigger for a phased array with a primary beam.
@@ -31,6 +217,8 @@ class triggerSimulator:
         self.__t = 0
         self.__pre_trigger_time = None
         self.__debug = None
+        # the beam delays and phasing indices only depend on the station geometry and are reused for all events
+        self.__beamforming_cache = {}
         logger.setLevel(log_level)
         self.begin()
 
@@ -100,37 +288,10 @@ class triggerSimulator:
         if(triggered_channels is None):
             triggered_channels = [channel.get_id() for channel in station.iter_channels()]
 
-        time_step = 1. / sampling_frequency
-
-        ant_z = self.get_antenna_positions(station, det, triggered_channels, 2)
-
         self.check_vertical_string(station, det, triggered_channels)
-        ref_z = np.max(np.fromiter(ant_z.values(), dtype=float))
-
-        # Need to add in delay for trigger delay
-        cable_delays = {}
-        for channel in station.iter_channels(use_channels=triggered_channels):
-            cable_delays[channel.get_id()] = det.get_cable_delay(station.get_id(), channel.get_id())
-
-        beam_rolls = []
-        for angle in phasing_angles:
-
-            delays = []
-            for key in ant_z:
-                delays += [-(ant_z[key] - ref_z) / cspeed * ref_index * np.sin(angle) - cable_delays[key]]
-
-            delays -= np.max(delays)
-
-            roll = np.array(np.round(np.array(delays) / time_step)).astype(int)
-
-            subbeam_rolls = dict(zip(triggered_channels, roll))
-
-            # logger.debug("angle:", angle / units.deg)
-            # logger.debug(subbeam_rolls)
 
-            beam_rolls.append(subbeam_rolls)
-
-        return beam_rolls
+        return get_beam_rolls(station, det, triggered_channels, phasing_angles, ref_index=ref_index,
+                              sampling_frequency=sampling_frequency)
 
     def get_channel_trace_start_time(self, station, triggered_channels):
         """
@@ -151,16 +312,7 @@ class triggerSimulator:
             Channel start time
         """
 
-        channel_trace_start_time = None
-        for channel in station.iter_channels(use_channels=triggered_channels):
-            if channel_trace_start_time is None:
-                channel_trace_start_time = channel.get_trace_start_time()
-            elif channel_trace_start_time != channel.get_trace_start_time():
-                error_msg = 'Phased array channels do not have matching trace start times. '
-                error_msg += 'This module is not prepared for this case.'
-                raise ValueError(error_msg)
-
-        return channel_trace_start_time
+        return get_channel_trace_start_time(station, triggered_channels)
 
     def check_vertical_string(self, station, det, triggered_channels):
         """
@@ -215,22 +367,7 @@ class triggerSimulator:
 
         """
 
-        if(adc_output != 'voltage' and adc_output != 'counts'):
-            error_msg = 'ADC output type must be "counts" or "voltage". Currently set to:' + str(adc_output)
-            raise ValueError(error_msg)
-
-        num_frames = int(np.floor((len(coh_sum) - window) / step))
-
-        if(adc_output == 'voltage'):
-            coh_sum_squared = (coh_sum * coh_sum).astype(np.float)
-        elif(adc_output == 'counts'):
-            coh_sum_squared = (coh_sum * coh_sum).astype(int)
-
-        coh_sum_windowed = np.lib.stride_tricks.as_strided(coh_sum_squared, (num_frames, window),
-                                                           (coh_sum_squared.strides[0] * step, coh_sum_squared.strides[0]))
-        power = np.sum(coh_sum_windowed, axis=1)
-
-        return power.astype(np.float) / window, num_frames
+        return get_windowed_power(coh_sum, window, step, adc_output=adc_output)
 
     def phase_signals(self, traces, beam_rolls):
         """
@@ -249,21 +386,27 @@ class triggerSimulator:
         phased_traces: array of arrays
         """
 
-        phased_traces = [[] for i in range(len(beam_rolls))]
-
-        running_i = 0
-        for subbeam_rolls in beam_rolls:
+        channel_ids = list(traces.keys())
+        beam_delay_matrix = np.array([[subbeam_rolls[channel_id] for channel_id in channel_ids] for subbeam_rolls in beam_rolls], dtype=int)
+        phased_traces = phase_traces(np.array([traces[channel_id] for channel_id in channel_ids]), beam_delay_matrix)
 
-            phased_trace = np.zeros(len(list(traces.values())[0]))
-            for channel_id in traces:
+        return list(phased_traces)
 
-                trace = traces[channel_id]
-                phased_trace += np.roll(trace, subbeam_rolls[channel_id])
-
-            phased_traces[running_i] = phased_trace
-            running_i += 1
-
-        return phased_traces
+    def _get_beamforming(self, station, det, channel_ids, phasing_angles, ref_index, sampling_frequency, n_samples):
+        """
+        Returns the beam rolls (as list of dicts and as matrix) and the phasing indices for a station geometry.
+        The results are cached, so that the beams of subsequent events are formed without recalculating them.
+        """
+        antenna_z = tuple(det.get_relative_position(station.get_id(), channel_id)[2] for channel_id in channel_ids)
+        cable_delays = tuple(det.get_cable_delay(station.get_id(), channel_id) for channel_id in channel_ids)
+        key = (tuple(channel_ids), antenna_z, cable_delays, tuple(np.atleast_1d(phasing_angles)), ref_index,
+               sampling_frequency, n_samples)
+        if key not in self.__beamforming_cache:
+            self.check_vertical_string(station, det, channel_ids)
+            beam_delay_matrix = get_beam_delay_matrix(antenna_z, cable_delays, phasing_angles, ref_index, sampling_frequency)
+            beam_rolls = [dict(zip(channel_ids, rolls)) for rolls in beam_delay_matrix]
+            self.__beamforming_cache[key] = (beam_rolls, beam_delay_matrix, get_phasing_indices(beam_delay_matrix, n_samples))
+        return self.__beamforming_cache[key]
 
     def phased_trigger(self, station, det,
                        Vrms=None,
@@ -352,20 +495,21 @@ class triggerSimulator:
 
         logger.debug(f"trigger channels: {triggered_channels}")
 
-        traces = {}
-        for channel in station.iter_channels(use_channels=triggered_channels):
-            channel_id = channel.get_id()
-
-            trace = np.array(channel.get_trace())
+        # all channels are digitised at once
+        channel_ids = [channel.get_id() for channel in station.iter_channels(use_channels=triggered_channels)]
+        digital_traces, adc_sampling_frequencies = ADC.get_digital_traces(station, det, channel_ids,
+                                                                          Vrms=Vrms,
+                                                                          trigger_adc=trigger_adc,
+                                                                          clock_offset=clock_offset,
+                                                                          return_sampling_frequency=True,
+                                                                          adc_type='perfect_floor_comparator',
+                                                                          adc_output=adc_output,
+                                                                          trigger_filter=None)
 
-            trace, adc_sampling_frequency = ADC.get_digital_trace(station, det, channel,
-                                                                  Vrms=Vrms,
-                                                                  trigger_adc=trigger_adc,
-                                                                  clock_offset=clock_offset,
-                                                                  return_sampling_frequency=True,
-                                                                  adc_type='perfect_floor_comparator',
-                                                                  adc_output=adc_output,
-                                                                  trigger_filter=None)
+        traces = {}
+        for channel_id in channel_ids:
+            trace = digital_traces[channel_id]
+            adc_sampling_frequency = adc_sampling_frequencies[channel_id]
 
             # Upsampling here, linear interpolate to mimic an FPGA internal upsampling
             if not isinstance(upsampling_factor, int):
@@ -411,23 +555,22 @@ class triggerSimulator:
 
             traces[channel_id] = trace[:]
 
-        beam_rolls = self.calculate_time_delays(station, det,
-                                                triggered_channels,
-                                                phasing_angles,
-                                                ref_index=ref_index,
-                                                sampling_frequency=adc_sampling_frequency)
+        channel_ids = list(traces.keys())
+        trace_array = np.array([traces[channel_id] for channel_id in channel_ids])
+        beam_rolls, beam_delay_matrix, phasing_indices = self._get_beamforming(station, det, channel_ids, phasing_angles,
+                                                                               ref_index, adc_sampling_frequency,
+                                                                               trace_array.shape[1])
 
-        phased_traces = self.phase_signals(traces, beam_rolls)
+        # form all beams at once and calculate the power in sliding windows for all of them
+        phased_traces = phase_traces(trace_array, indices=phasing_indices)
+        squared_means, num_frames = get_windowed_power(phased_traces, window=window, step=step, adc_output=adc_output)
 
         trigger_time = None
         trigger_times = {}
         channel_trace_start_time = self.get_channel_trace_start_time(station, triggered_channels)
 
         trigger_delays = {}
-        for iTrace, phased_trace in enumerate(phased_traces):
-
-            # Create a sliding window
-            squared_mean, num_frames = self.power_sum(coh_sum=phased_trace, window=window, step=step, adc_output=adc_output)
+        for iTrace, squared_mean in enumerate(squared_means):
 
             if True in (squared_mean > threshold):
                 trigger_delays[iTrace] = {}
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+import os
+import datetime
+import numpy as np
+from numpy import testing
+import astropy.time
+import NuRadioReco.framework.event
+import NuRadioReco.framework.station
+import NuRadioReco.framework.channel
+import NuRadioReco.modules.channelGalacticNoiseAdder
+from NuRadioReco.detector import detector
+from NuRadioReco.utilities import units
+
+"""
+this unit test compares the galactic noise of events that use the cached sky and antenna response of the
+previous event against the noise calculated by a new instance of the module, and checks that only the cache
+of the last station time is kept. The sky model is only evaluated in `begin` or in the first call of `run`.
+"""
+
+det = detector.Detector(json_filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'unit_test_detector.json'),
+                        antenna_by_depth=False, create_new=True)
+det.update(datetime.datetime(2019, 1, 1))
+station_id = 101
+n_samples = 512
+sampling_rate = 1 * units.GHz
+times = ['2019-01-01 00:00:00', '2019-01-01 00:00:00', '2019-01-01 06:00:00', '2019-01-01 06:00:00', '2019-01-01 00:00:00']
+
+
+def get_noise(noise_adder, station_time, seed):
+    event = NuRadioReco.framework.event.Event(0, 0)
+    station = NuRadioReco.framework.station.Station(station_id)
+    station.set_station_time(astropy.time.Time(station_time))
+    for channel_id in det.get_channel_ids(station_id):
+        channel = NuRadioReco.framework.channel.Channel(channel_id)
+        channel.set_trace(np.zeros(n_samples), sampling_rate)
+        station.add_channel(channel)
+    event.set_station(station)
+    np.random.seed(seed)
+    noise_adder.run(event, station, det, passband=[50 * units.MHz, 500 * units.MHz])
+    return np.array([channel.get_trace() for channel in station.iter_channels()])
+
+
+cached_noise_adder = NuRadioReco.modules.channelGalacticNoiseAdder.channelGalacticNoiseAdder()
+cached_noise_adder.begin(n_side=4)
+for seed, station_time in enumerate(times):
+    noise = get_noise(cached_noise_adder, station_time, seed)
+    noise_adder = NuRadioReco.modules.channelGalacticNoiseAdder.channelGalacticNoiseAdder()
+    noise_adder.begin(n_side=4)
+    reference = get_noise(noise_adder, station_time, seed)
+    testing.assert_equal(np.any(reference != 0), True)
+    testing.assert_allclose(noise, reference, rtol=1e-12, atol=1e-12 * np.max(np.abs(reference)))
+    # channels 0 and 1 have the same antenna model and orientation and share the cached antenna response,
+    # the cache of the previous station time was discarded
+    channel_noise_cache = cached_noise_adder._channelGalacticNoiseAdder__channel_noise_cache
+    testing.assert_equal(len(channel_noise_cache), 2)
+    testing.assert_equal(set([key[0][2] for key in channel_noise_cache.keys()]), set([astropy.time.Time(station_time).iso]))
+
+# the sky model is not evaluated when the module is created, `run` uses the default parameters of `begin`
+noise_adder = NuRadioReco.modules.channelGalacticNoiseAdder.channelGalacticNoiseAdder()
+testing.assert_equal(noise_adder._channelGalacticNoiseAdder__noise_temperatures is None, True)
+noise = get_noise(noise_adder, times[0], 0)
+reference_noise_adder = NuRadioReco.modules.channelGalacticNoiseAdder.channelGalacticNoiseAdder()
+reference_noise_adder.begin()
+testing.assert_equal(noise_adder._channelGalacticNoiseAdder__noise_temperatures,
+                     reference_noise_adder._channelGalacticNoiseAdder__noise_temperatures)
+testing.assert_allclose(noise, get_noise(reference_noise_adder, times[0], 0), rtol=1e-12, atol=1e-12 * np.max(np.abs(noise)))
+
+print('U01unit_test_galactic_noise_cache passed without issues')
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import os
+import numpy as np
+from numpy import testing
+from NuRadioReco.utilities import noise
+
+"""
+this unit test compares the phasing modes of the phased array noise generator: 'vectorized' forms the same beams
+as 'roll', and the same beams as the default 'slice' for all beams that do not delay the first channel
+"""
+
+detector_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../trigger_tests/trigger_test_detector.json')
+generator = noise.thermalNoiseGeneratorPhasedArray(detector_filename, 1, [0, 1, 2, 3], Vrms=1, threshold=20, ref_index=1.75)
+first_channel_not_shifted = generator.beam_time_delays[:, 0] == 0
+testing.assert_equal(np.any(first_channel_not_shifted), True)
+
+generator._traces = np.random.RandomState(0).normal(size=(4, generator.n_samples * generator.upsampling))
+phasing_functions = {'slice': generator._thermalNoiseGeneratorPhasedArray__phasing,
+                     'vectorized': generator._thermalNoiseGeneratorPhasedArray__phasing_vectorized,
+                     'roll': generator._thermalNoiseGeneratorPhasedArray__phasing_roll}
+phased_traces = {}
+for phasing_mode, phasing_function in phasing_functions.items():
+    phasing_function()
+    phased_traces[phasing_mode] = generator._phased_traces
+testing.assert_allclose(phased_traces['vectorized'], phased_traces['roll'], rtol=1e-12, atol=1e-12)
+testing.assert_allclose(phased_traces['vectorized'][first_channel_not_shifted], phased_traces['slice'][first_channel_not_shifted],
+                        rtol=1e-12, atol=1e-12)
+
+# the default phasing mode is 'slice'
+results = {}
+for phasing_mode in [None, 'slice']:
+    generator.noise.begin(seed=1)
+    if(phasing_mode is None):
+        results[phasing_mode] = generator.generate_noise()
+    else:
+        results[phasing_mode] = generator.generate_noise(phasing_mode=phasing_mode)
+for result, reference in zip(results[None], results['slice']):
+    testing.assert_equal(result, reference)
+
+print('U02unit_test_phased_array_noise passed without issues')
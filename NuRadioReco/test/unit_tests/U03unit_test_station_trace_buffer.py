@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+import numpy as np
+from numpy import testing
+import NuRadioReco.framework.event
+import NuRadioReco.framework.station
+import NuRadioReco.framework.channel
+import NuRadioReco.modules.channelBandPassFilter
+import NuRadioReco.modules.channelResampler
+from NuRadioReco.utilities import units, fft
+
+"""
+this unit test checks the station level trace storage: the channel traces are views into the array returned by
+`get_trace_buffer`, the array is rebuilt if a single channel is modified, and the modules that process all
+channels at once give the same result as the loop over the channels
+"""
+
+n_channels = 4
+n_samples = 512
+sampling_rate = 1 * units.GHz
+traces = np.random.RandomState(0).normal(size=(n_channels, n_samples))
+channelBandPassFilter = NuRadioReco.modules.channelBandPassFilter.channelBandPassFilter()
+channelResampler = NuRadioReco.modules.channelResampler.channelResampler()
+
+
+def get_station(use_trace_buffer):
+    event = NuRadioReco.framework.event.Event(0, 0)
+    station = NuRadioReco.framework.station.Station(101)
+    for channel_id in range(n_channels):
+        channel = NuRadioReco.framework.channel.Channel(channel_id)
+        channel.set_trace(traces[channel_id].copy(), sampling_rate)
+        station.add_channel(channel)
+    station.set_use_trace_buffer(use_trace_buffer)
+    event.set_station(station)
+    return event, station
+
+
+def get_traces(station):
+    return np.array([channel.get_trace() for channel in station.iter_channels()])
+
+
+# the channel traces are views into the trace buffer
+event, station = get_station(True)
+buffer = station.get_trace_buffer()
+testing.assert_equal(buffer.shape, (n_channels, n_samples))
+testing.assert_equal(buffer, traces)
+buffer[1] *= 2
+testing.assert_equal(station.get_channel(1).get_trace(), 2 * traces[1])
+testing.assert_equal(station.get_trace_buffer() is buffer, True)
+testing.assert_equal(station.get_trace_buffer(use_channels=[0, 2]), traces[[0, 2]])
+
+# modifying a single channel invalidates the buffer
+event, station = get_station(True)
+buffer = station.get_trace_buffer()
+station.get_channel(2).set_trace(np.ones(n_samples), sampling_rate)
+new_buffer = station.get_trace_buffer()
+testing.assert_equal(new_buffer is buffer, False)
+testing.assert_equal(new_buffer[2], np.ones(n_samples))
+testing.assert_equal(new_buffer[[0, 1, 3]], traces[[0, 1, 3]])
+station.get_channel(3).set_frequency_spectrum(2 * station.get_channel(3).get_frequency_spectrum(), sampling_rate)
+testing.assert_allclose(station.get_trace_buffer()[3], 2 * traces[3], atol=1e-12)
+testing.assert_equal(station.get_trace_buffer() is new_buffer, False)
+new_buffer = station.get_trace_buffer()
+new_buffer[0] = 0
+testing.assert_equal(station.get_channel(0).get_trace(), np.zeros(n_samples))
+
+# bulk functions
+event, station = get_station(True)
+station.set_traces(2 * traces, sampling_rate)
+testing.assert_equal(get_traces(station), 2 * traces)
+testing.assert_allclose(station.get_frequency_spectra(), fft.time2freq(2 * traces, sampling_rate), atol=1e-12)
+station.set_frequency_spectra(fft.time2freq(traces, sampling_rate))
+testing.assert_allclose(get_traces(station), traces, atol=1e-12)
+response = np.exp(-np.linspace(0, 1, n_samples // 2 + 1))
+station.multiply_frequency_spectra(response)
+for channel_id in range(n_channels):
+    expected = fft.freq2time(fft.time2freq(traces[channel_id], sampling_rate) * response, sampling_rate)
+    testing.assert_allclose(station.get_channel(channel_id).get_trace(), expected, atol=1e-12)
+
+# the modules give the same result with and without the trace buffer
+for filter_kwargs in [{'passband': [80 * units.MHz, 500 * units.MHz], 'filter_type': 'butter', 'order': 4},
+                      {'passband': [80 * units.MHz, 500 * units.MHz], 'filter_type': 'cheby1', 'order': 7, 'rp': 0.1},
+                      {'passband': {0: [80 * units.MHz, 500 * units.MHz], 1: [100 * units.MHz, 300 * units.MHz],
+                                    2: [50 * units.MHz, 800 * units.MHz], 3: [10 * units.MHz, 200 * units.MHz]},
+                       'filter_type': 'butter', 'order': {0: 2, 1: 4, 2: 6, 3: 8}}]:
+    results = []
+    for use_trace_buffer in [False, True]:
+        event, station = get_station(use_trace_buffer)
+        channelBandPassFilter.run(event, station, None, **filter_kwargs)
+        results.append(get_traces(station))
+    testing.assert_allclose(results[1], results[0], atol=1e-12)
+
+for new_sampling_rate in [2.4 * units.GHz, 0.5 * units.GHz]:
+    results = []
+    for use_trace_buffer in [False, True]:
+        event, station = get_station(use_trace_buffer)
+        channelResampler.run(event, station, None, new_sampling_rate)
+        for channel in station.iter_channels():
+            testing.assert_equal(channel.get_sampling_rate(), new_sampling_rate)
+        results.append(get_traces(station))
+    testing.assert_allclose(results[1], results[0], atol=1e-12)
+
+print('U03unit_test_station_trace_buffer passed without issues')
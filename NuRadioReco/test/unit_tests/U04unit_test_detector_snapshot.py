@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+import os
+import datetime
+import numpy as np
+from numpy import testing
+from NuRadioReco.detector import detector, generic_detector, detector_sys_uncertainties
+from NuRadioReco.utilities import units
+
+"""
+this unit test compares the station snapshots of the detector description against the detector itself, and checks
+that the snapshots are rebuilt if the detector description changes
+"""
+
+detector_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'unit_test_detector.json')
+station_id = 101
+
+
+def compare_snapshot(det):
+    snapshot = det.get_station_snapshot(station_id)
+    channel_ids = sorted(det.get_channel_ids(station_id))
+    testing.assert_equal(snapshot.channel_ids, channel_ids)
+    testing.assert_equal(snapshot.n_channels, len(channel_ids))
+    absolute_position = np.array(det.get_absolute_position(station_id))
+    testing.assert_equal(snapshot.absolute_position, absolute_position)
+    relative_positions = []
+    for i, channel_id in enumerate(channel_ids):
+        testing.assert_equal(snapshot.get_channel_index(channel_id), i)
+        relative_position = np.array(det.get_relative_position(station_id, channel_id))
+        relative_positions.append(relative_position)
+        testing.assert_equal(snapshot.get_relative_position(channel_id), relative_position)
+        testing.assert_equal(snapshot.relative_positions[i], relative_position)
+        testing.assert_equal(snapshot.get_absolute_channel_position(channel_id), relative_position + absolute_position)
+        testing.assert_equal(snapshot.get_antenna_orientation(channel_id), det.get_antenna_orientation(station_id, channel_id))
+        testing.assert_equal(snapshot.antenna_orientations[i], det.get_antenna_orientation(station_id, channel_id))
+        testing.assert_equal(snapshot.get_cable_delay(channel_id), det.get_cable_delay(station_id, channel_id))
+        testing.assert_equal(snapshot.get_sampling_frequency(channel_id), det.get_sampling_frequency(station_id, channel_id))
+        testing.assert_equal(snapshot.get_number_of_samples(channel_id), det.get_number_of_samples(station_id, channel_id))
+    testing.assert_allclose(snapshot.barycenter, np.mean(relative_positions, axis=0) + absolute_position)
+    testing.assert_equal(snapshot.relative_positions.flags.writeable, False)
+    # the snapshot is reused as long as the detector description does not change
+    testing.assert_equal(det.get_station_snapshot(station_id) is snapshot, True)
+    return snapshot
+
+
+det = detector.Detector(json_filename=detector_filename, antenna_by_depth=False, create_new=True)
+det.update(datetime.datetime(2019, 1, 1))
+compare_snapshot(det)
+
+# event specific changes of the generic detector
+det = generic_detector.GenericDetector(json_filename=detector_filename, antenna_by_depth=False, create_new=True)
+snapshot = compare_snapshot(det)
+det.add_station_properties_for_event({'pos_altitude': 10 * units.m}, station_id, 1, 2)
+det.set_event(1, 2)
+testing.assert_equal(det.get_station_snapshot(station_id) is snapshot, False)
+testing.assert_equal(compare_snapshot(det).absolute_position[2], 10 * units.m)
+
+# systematic offsets of the antenna orientations
+det = detector_sys_uncertainties.DetectorSysUncertainties(json_filename=detector_filename, antenna_by_depth=False, create_new=True)
+det.update(datetime.datetime(2019, 1, 1))
+snapshot = compare_snapshot(det)
+det.set_antenna_orientation_offsets(1 * units.deg, 2 * units.deg, 3 * units.deg, 4 * units.deg, station_id=station_id, channel_id=1)
+testing.assert_equal(det.get_station_snapshot(station_id) is snapshot, False)
+testing.assert_allclose(compare_snapshot(det).get_antenna_orientation(1) - snapshot.get_antenna_orientation(1),
+                        np.array([1, 2, 3, 4]) * units.deg)
+
+print('U04unit_test_detector_snapshot passed without issues')
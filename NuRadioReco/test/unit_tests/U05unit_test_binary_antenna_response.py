@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+import os
+import time
+import pickle
+import tempfile
+import numpy as np
+from numpy import testing
+from NuRadioReco.detector import antennapattern
+from NuRadioReco.utilities import units
+
+"""
+this unit test converts a small synthetic antenna model into the binary format and checks that the memory mapped
+response is identical to the pickle file, that the binary representation is rebuilt if the pickle file is
+replaced, that antenna models that are not tabulated on a regular grid are rejected and that the pickle file
+is used if the binary representation can not be created
+"""
+
+path = tempfile.mkdtemp()
+antenna_model = 'unit_test_antenna'
+os.makedirs(os.path.join(path, antenna_model))
+pickle_filename = os.path.join(path, antenna_model, '{}.pkl'.format(antenna_model))
+frequencies = np.arange(50, 550, 100) * units.MHz
+theta_angles = np.arange(0, 181, 15) * units.deg
+phi_angles = np.arange(0, 361, 30) * units.deg
+# the theta angle runs fastest and the frequency slowest
+ff, phis, thetas = [x.flatten() for x in np.meshgrid(frequencies, phi_angles, theta_angles, indexing='ij')]
+orientation = [0, 0, 90 * units.deg, 0]
+freq = np.linspace(0, 600, 31) * units.MHz
+zeniths = np.array([10, 60, 90, 135]) * units.deg
+azimuths = np.array([-30, 45, 200, 370]) * units.deg
+
+
+def write_pickle(seed, ff=ff, thetas=thetas, phis=phis):
+    random = np.random.RandomState(seed)
+    H_phi = random.normal(size=len(ff)) + 1j * random.normal(size=len(ff))
+    H_theta = random.normal(size=len(ff)) + 1j * random.normal(size=len(ff))
+    with open(pickle_filename, 'wb') as fout:
+        pickle.dump(orientation + [ff, thetas, phis, H_phi, H_theta], fout, protocol=4)
+    return H_phi, H_theta
+
+
+def get_response(antenna):
+    return antenna.get_antenna_response_multiple_directions(freq, zeniths, azimuths, 90 * units.deg, 0, 0, 0)
+
+
+# round trip
+H_phi, H_theta = write_pickle(0)
+antennapattern.save_binary_antenna_response(antenna_model, path)
+binary_orientation, binary_frequencies, binary_theta_angles, binary_phi_angles, response = \
+    antennapattern.load_binary_antenna_response(antenna_model, path)
+testing.assert_equal(isinstance(response, np.memmap), True)
+testing.assert_equal(binary_orientation, orientation)
+testing.assert_equal(binary_frequencies, frequencies)
+testing.assert_equal(binary_theta_angles, theta_angles)
+testing.assert_equal(binary_phi_angles, phi_angles)
+testing.assert_equal(response.shape, (2, len(frequencies), len(phi_angles), len(theta_angles)))
+testing.assert_equal(response[0].flatten(), H_theta)
+testing.assert_equal(response[1].flatten(), H_phi)
+
+binary_antenna = antennapattern.AntennaPattern(antenna_model, path)
+pickle_antenna = antennapattern.AntennaPattern(antenna_model, path, use_binary=False)
+testing.assert_equal(isinstance(binary_antenna.VEL_theta.base, np.memmap), True)
+for component in ['theta', 'phi']:
+    testing.assert_equal(get_response(binary_antenna)[component], get_response(pickle_antenna)[component])
+
+# the binary representation is rebuilt if the pickle file is newer
+H_phi, H_theta = write_pickle(1)
+filename_axes, filename_response = antennapattern._get_binary_antenna_response_filenames(antenna_model, path)
+now = time.time()
+os.utime(filename_response, (now - 10, now - 10))
+os.utime(pickle_filename, (now, now))
+testing.assert_raises(IOError, antennapattern.load_binary_antenna_response, antenna_model, path)
+binary_antenna = antennapattern.AntennaPattern(antenna_model, path)
+testing.assert_equal(binary_antenna.VEL_theta, H_theta)
+testing.assert_equal(binary_antenna.VEL_phi, H_phi)
+testing.assert_equal(antennapattern.load_binary_antenna_response(antenna_model, path)[4][0].flatten(), H_theta)
+
+# antenna models that are not tabulated on a regular grid are rejected
+swapped_thetas = thetas.copy()
+swapped_thetas[[1, 2]] = swapped_thetas[[2, 1]]
+write_pickle(2, thetas=swapped_thetas)
+testing.assert_raises(Exception, antennapattern.save_binary_antenna_response, antenna_model, path)
+testing.assert_raises(Exception, antennapattern.AntennaPattern, antenna_model, path, use_binary=False)
+write_pickle(2, ff=ff[:-1], thetas=thetas[:-1], phis=phis[:-1])
+testing.assert_raises(Exception, antennapattern.save_binary_antenna_response, antenna_model, path)
+
+# the pickle file is used if the binary representation can not be written
+H_phi, H_theta = write_pickle(3)
+os.remove(filename_axes)
+os.remove(filename_response)
+os.mkdir(filename_response)
+antenna = antennapattern.AntennaPattern(antenna_model, path)
+testing.assert_equal(isinstance(antenna.VEL_theta, np.memmap), False)
+testing.assert_equal(antenna.VEL_theta, H_theta)
+testing.assert_equal(antenna.VEL_phi, H_phi)
+
+print('U05unit_test_binary_antenna_response passed without issues')
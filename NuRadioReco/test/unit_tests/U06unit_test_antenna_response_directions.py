@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+import os
+import pickle
+import datetime
+import tempfile
+import numpy as np
+from numpy import testing
+import radiotools.helper as hp
+from radiotools import coordinatesystems as cs
+import NuRadioReco.framework.station
+from NuRadioReco.detector import antennapattern
+from NuRadioReco.detector import detector
+from NuRadioReco.utilities import units, trace_utilities
+
+"""
+this unit test compares the antenna response evaluated for many directions at once against the previous
+implementation that evaluated one direction after the other and transformed the vector effective length with
+the radiotools coordinate system class, for tabulated antenna models interpolated in the complex and the
+magnitude/phase domain and for the analytic antenna model. It also compares the antenna factors of many
+channels and directions against the antenna factors calculated for one channel and one direction at a time.
+"""
+
+path = tempfile.mkdtemp()
+frequencies = np.arange(50, 550, 100) * units.MHz
+theta_angles = np.arange(0, 181, 15) * units.deg
+phi_angles = np.arange(0, 361, 30) * units.deg
+ff, phis, thetas = [x.flatten() for x in np.meshgrid(frequencies, phi_angles, theta_angles, indexing='ij')]
+
+
+def write_antenna_model(antenna_model, seed):
+    os.makedirs(os.path.join(path, antenna_model))
+    random = np.random.RandomState(seed)
+    H_phi = random.normal(size=len(ff)) + 1j * random.normal(size=len(ff))
+    H_theta = random.normal(size=len(ff)) + 1j * random.normal(size=len(ff))
+    # the vector effective length is identical at phi = 0 and phi = 360deg
+    H_phi[phis == phi_angles[-1]] = H_phi[phis == phi_angles[0]]
+    H_theta[phis == phi_angles[-1]] = H_theta[phis == phi_angles[0]]
+    with open(os.path.join(path, antenna_model, '{}.pkl'.format(antenna_model)), 'wb') as fout:
+        pickle.dump([0, 0, 90 * units.deg, 0, ff, thetas, phis, H_phi, H_theta], fout, protocol=4)
+
+
+def get_reference_response(antenna, freq, zenith, azimuth, *orientation):
+    """
+    the antenna response of a single direction as calculated by the previous implementation
+    """
+    rot = antenna._get_antenna_rotation(*orientation)
+    theta, phi = hp.cartesian_to_spherical(*np.dot(rot, hp.spherical_to_cartesian(zenith, azimuth)))
+    Vtheta_raw, Vphi_raw = antenna._get_antenna_response_vectorized_raw(freq, theta, phi)
+    Vtheta_raw, Vphi_raw = np.broadcast_to(Vtheta_raw, freq.shape), np.broadcast_to(Vphi_raw, freq.shape)
+    V_xyz_raw = cs.cstrafo(zenith=theta, azimuth=phi).transform_from_onsky_to_ground(
+        np.array([np.zeros(len(freq)), Vtheta_raw, Vphi_raw]))
+    V_xyz = np.dot(np.linalg.inv(rot), V_xyz_raw)
+    V_onsky = cs.cstrafo(zenith=zenith, azimuth=azimuth).transform_from_ground_to_onsky(V_xyz)
+    return {'theta': V_onsky[1], 'phi': V_onsky[2]}
+
+
+write_antenna_model('unit_test_antenna_1', 0)
+write_antenna_model('unit_test_antenna_2', 1)
+antennas = {'complex': antennapattern.AntennaPattern('unit_test_antenna_1', path),
+            'magphase': antennapattern.AntennaPattern('unit_test_antenna_1', path, interpolation_method='magphase'),
+            'analytic': antennapattern.AntennaPatternAnalytic('analytic_LPDA')}
+# the frequencies extend beyond the frequency range of the tabulated antenna models, the analytic antenna model
+# is not defined at zero frequency
+freq = np.linspace(10, 610, 61) * units.MHz
+random = np.random.RandomState(2)
+zeniths = np.append(random.uniform(0, np.pi, 50), [0, 0.5 * np.pi, np.pi])
+# the azimuth angles cover several turns and the directions along the x axis where the phi angle of the antenna
+# model wraps around
+azimuths = np.append(random.uniform(-3 * np.pi, 3 * np.pi, 50), [0, 2 * np.pi, -np.pi])
+orientations = [[180 * units.deg, 0, 90 * units.deg, 0],
+                [90 * units.deg, 0, 0, 0],
+                [30 * units.deg, 45 * units.deg, 120 * units.deg, 45 * units.deg]]
+for name, antenna in antennas.items():
+    for orientation in orientations:
+        VEL = antenna.get_antenna_response_multiple_directions(freq, zeniths, azimuths, *orientation)
+        for iD, (zenith, azimuth) in enumerate(zip(zeniths, azimuths)):
+            reference = get_reference_response(antenna, freq, zenith, azimuth, *orientation)
+            VEL_single = antenna.get_antenna_response_vectorized(freq, zenith, azimuth, *orientation)
+            for component in ['theta', 'phi']:
+                atol = 1e-10 * np.max(np.abs(reference[component]))
+                testing.assert_allclose(VEL[component][iD], reference[component], rtol=1e-7, atol=atol,
+                                        err_msg='{} antenna model, {}'.format(name, component))
+                testing.assert_allclose(VEL_single[component], reference[component], rtol=1e-7, atol=atol,
+                                        err_msg='{} antenna model, {}'.format(name, component))
+
+# the antenna factors of all channels and directions are the same as the antenna factors of a single channel and
+# direction. The tabulated antenna models are used instead of the antenna models of the detector description
+antenna_pattern_provider = antennapattern.AntennaPatternProvider()
+antenna_pattern_provider._open_antenna_patterns['createLPDA_100MHz_InfFirn'] = antennas['complex']
+antenna_pattern_provider._open_antenna_patterns['bicone_v8_InfFirn'] = antennapattern.AntennaPattern('unit_test_antenna_2', path)
+det = detector.Detector(json_filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'unit_test_detector.json'),
+                        antenna_by_depth=False, create_new=True)
+det.update(datetime.datetime(2019, 1, 1))
+station_id = 101
+channel_ids = det.get_channel_ids(station_id)
+for is_cosmic_ray in [False, True]:
+    station = NuRadioReco.framework.station.Station(station_id)
+    if is_cosmic_ray:
+        # signals from above are refracted into the firn
+        station.set_is_cosmic_ray()
+    else:
+        station.set_is_neutrino()
+    efield_antenna_factors = trace_utilities.get_efield_antenna_factors(station, freq, channel_ids, det, zeniths, azimuths,
+                                                                        antenna_pattern_provider)
+    testing.assert_equal(efield_antenna_factors.shape, (len(zeniths), len(channel_ids), 2, len(freq)))
+    for iD, (zenith, azimuth) in enumerate(zip(zeniths, azimuths)):
+        for iCh, channel_id in enumerate(channel_ids):
+            reference = trace_utilities.get_efield_antenna_factor(station, freq, [channel_id], det, zenith, azimuth,
+                                                                  antenna_pattern_provider)
+            testing.assert_allclose(efield_antenna_factors[iD, iCh], reference[0], rtol=1e-12, atol=1e-12 * np.max(np.abs(reference)))
+
+print('U06unit_test_antenna_response_directions passed without issues')
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+import os
+import tempfile
+import numpy as np
+from numpy import testing
+import NuRadioReco.framework.event
+import NuRadioReco.framework.station
+import NuRadioReco.framework.channel
+import NuRadioReco.modules.channelGenericNoiseAdder
+from NuRadioReco.utilities import units
+
+"""
+this unit test checks that the noise of all channels generated at once is the same as the noise generated
+channel by channel for the same seed, that a noise bank gives the same noise after it was saved and loaded
+again, and that noise with other parameters than the ones of the noise bank can not be taken from the bank
+"""
+
+n_channels = 4
+n_samples = 512
+sampling_rate = 2 * units.GHz
+noise_kwargs = {'min_freq': 80 * units.MHz, 'max_freq': 800 * units.MHz}
+
+
+def get_noise(noise_adder, seed, use_trace_buffer=False, **kwargs):
+    event = NuRadioReco.framework.event.Event(0, 0)
+    station = NuRadioReco.framework.station.Station(101)
+    for channel_id in range(n_channels):
+        channel = NuRadioReco.framework.channel.Channel(channel_id)
+        channel.set_trace(np.zeros(n_samples), sampling_rate)
+        station.add_channel(channel)
+    station.set_use_trace_buffer(use_trace_buffer)
+    event.set_station(station)
+    noise_adder.begin(seed=seed)
+    noise_adder.run(event, station, None, **kwargs)
+    return np.array([channel.get_trace() for channel in station.iter_channels()])
+
+
+noise_adder = NuRadioReco.modules.channelGenericNoiseAdder.channelGenericNoiseAdder()
+for kwargs in [{'amplitude': 10 * units.mV, 'type': 'perfect_white'},
+               {'amplitude': 10 * units.mV, 'type': 'rayleigh'},
+               {'amplitude': {0: 1 * units.mV, 1: 2 * units.mV, 2: 3 * units.mV, 3: 4 * units.mV}, 'type': 'rayleigh',
+                'bandwidth': 300 * units.MHz},
+               {'amplitude': 10 * units.mV, 'type': 'perfect_white', 'excluded_channels': [1]},
+               {'amplitude': 10 * units.mV, 'type': 'perfect_white', 'min_freq': None, 'max_freq': None}]:
+    kwargs = dict(noise_kwargs, **kwargs)
+    reference = get_noise(noise_adder, 42, vectorized=False, **kwargs)
+    testing.assert_equal(np.all(np.std(reference, axis=1) > 0), 'excluded_channels' not in kwargs)
+    for use_trace_buffer in [False, True]:
+        noise = get_noise(noise_adder, 42, use_trace_buffer=use_trace_buffer, vectorized=True, **kwargs)
+        testing.assert_allclose(noise, reference, rtol=1e-10, atol=1e-10 * np.max(np.abs(reference)),
+                                err_msg='{}, trace buffer {}'.format(kwargs, use_trace_buffer))
+
+# the noise bank gives the same noise after it was saved and loaded again
+filename = os.path.join(tempfile.mkdtemp(), 'noise_bank.npy')
+noise_adder.create_noise_bank(8192, sampling_rate, type='rayleigh', n_traces=3, seed=1, filename=filename, **noise_kwargs)
+noise = get_noise(noise_adder, 42, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs)
+testing.assert_equal(np.all(np.std(noise, axis=1) > 0), True)
+testing.assert_equal(np.any(noise != get_noise(noise_adder, 43, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs)), True)
+for mmap_mode in ['r', None]:
+    loaded_noise_adder = NuRadioReco.modules.channelGenericNoiseAdder.channelGenericNoiseAdder()
+    loaded_noise_adder.load_noise_bank(filename, mmap_mode=mmap_mode)
+    testing.assert_equal(get_noise(loaded_noise_adder, 42, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs), noise)
+# the noise bank is reproducible with the same seed
+noise_adder.create_noise_bank(8192, sampling_rate, type='rayleigh', n_traces=3, seed=1, **noise_kwargs)
+testing.assert_equal(get_noise(noise_adder, 42, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs), noise)
+
+# noise with other parameters than the ones of the noise bank is not taken from the bank
+for kwargs in [{'type': 'perfect_white'},
+               {'min_freq': 100 * units.MHz},
+               {'max_freq': 500 * units.MHz},
+               {'bandwidth': 300 * units.MHz}]:
+    kwargs = dict(dict(noise_kwargs, type='rayleigh'), **kwargs)
+    testing.assert_raises(ValueError, get_noise, loaded_noise_adder, 42, amplitude=10 * units.mV, **kwargs)
+n_samples = 10000
+testing.assert_raises(ValueError, get_noise, loaded_noise_adder, 42, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs)
+
+# without the noise bank, new noise is generated
+loaded_noise_adder.clear_noise_bank()
+testing.assert_equal(get_noise(loaded_noise_adder, 42, amplitude=10 * units.mV, type='rayleigh', **noise_kwargs).shape, (n_channels, n_samples))
+
+print('U07unit_test_generic_noise passed without issues')
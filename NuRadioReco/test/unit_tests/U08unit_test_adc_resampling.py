@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+import numpy as np
+from numpy import testing
+from scipy.interpolate import interp1d
+from scipy.signal import resample
+import NuRadioReco.framework.station
+import NuRadioReco.framework.channel
+from NuRadioReco.modules import analogToDigitalConverter
+from NuRadioReco.utilities import units
+from NuRadioReco.utilities.trace_utilities import delay_trace
+
+"""
+this unit test compares the digitisation of the analogToDigitalConverter with the cached resampling kernel against
+the previous implementation that delayed, upsampled and interpolated (with scipy.interpolate.interp1d) every channel
+separately, for sampling rates that are not integer multiples of the ADC sampling rate, for clock offsets and ADC
+time delays, and in single precision
+"""
+
+
+class unit_test_detector:
+    """
+    returns the ADC parameters of the channels
+    """
+
+    def __init__(self, channels):
+        self.__channels = channels
+
+    def get_channel(self, station_id, channel_id):
+        return self.__channels[channel_id]
+
+
+def get_adc_timing(det_channel, clock_offset, trigger_adc=False):
+    """
+    returns the ADC sampling frequency and the time delay of the ADC clock including the clock offset
+    """
+    prefix = 'trigger_' if trigger_adc else ''
+    adc_sampling_frequency = det_channel[prefix + 'adc_sampling_frequency'] * units.GHz
+    return adc_sampling_frequency, det_channel.get(prefix + 'adc_time_delay', 0) * units.ns + clock_offset / adc_sampling_frequency
+
+
+def get_reference_trace(channel, det_channel, clock_offset, trigger_filter=None, trigger_adc=False):
+    """
+    the resampled (but not yet digitised) trace of the previous implementation
+    """
+    trace = channel.get_trace()
+    times = channel.get_times()
+    MC_sampling_frequency = channel.get_sampling_rate()
+    adc_sampling_frequency, adc_time_delay = get_adc_timing(det_channel, clock_offset, trigger_adc)
+    if trigger_filter is not None:
+        trace = np.fft.irfft(np.fft.rfft(trace) * trigger_filter)
+    delayed_samples = len(trace) - int(np.round(MC_sampling_frequency / adc_sampling_frequency)) - 1
+    trace = delay_trace(trace, MC_sampling_frequency, adc_time_delay, delayed_samples)
+    times = times + 1.0 / adc_sampling_frequency
+    times = times[:len(trace)]
+    upsampling_frequency = 5.0 * units.GHz
+    if(upsampling_frequency > MC_sampling_frequency):
+        upsampling_nsamples = int(upsampling_frequency * len(trace) / MC_sampling_frequency)
+        perfectly_upsampled_trace = resample(trace, upsampling_nsamples)
+        perfectly_upsampled_times = np.arange(len(perfectly_upsampled_trace)) / upsampling_frequency
+        perfectly_upsampled_times += times[0]
+    else:
+        perfectly_upsampled_trace = trace[:]
+        perfectly_upsampled_times = times[:]
+    interpolate_delayed_trace = interp1d(perfectly_upsampled_times, perfectly_upsampled_trace,
+                                         kind='linear',
+                                         fill_value=(perfectly_upsampled_trace[0], perfectly_upsampled_trace[-1]),
+                                         bounds_error=False)
+    new_n_samples = int((adc_sampling_frequency / MC_sampling_frequency) * len(trace))
+    resampled_times = np.arange(new_n_samples) / adc_sampling_frequency
+    resampled_times += channel.get_trace_start_time()
+    resampled_trace = interpolate_delayed_trace(resampled_times)
+    if(len(resampled_trace) % 2 == 1):
+        resampled_trace = resampled_trace[:-1]
+    return resampled_trace
+
+
+# the channels 0 and 1 share the resampling kernel, the sampling rate of channel 3 is above the upsampling frequency
+channel_parameters = {0: (2 * units.GHz, 1024), 1: (2 * units.GHz, 1024), 2: (3.2 * units.GHz, 2048), 3: (10 * units.GHz, 2000)}
+det_channels = {0: {'adc_sampling_frequency': 0.472, 'adc_time_delay': 0},
+                1: {'adc_sampling_frequency': 0.472, 'adc_time_delay': 0},
+                2: {'adc_sampling_frequency': 0.5, 'adc_time_delay': 1.3},
+                3: {'adc_sampling_frequency': 3, 'adc_time_delay': 0.25, 'trigger_adc_time_delay': 0.8}}
+for det_channel in det_channels.values():
+    det_channel.update({'adc_nbits': 8, 'adc_noise_nbits': 3, 'adc_reference_voltage': 1.,
+                        'trigger_adc_sampling_frequency': 0.3, 'trigger_adc_nbits': 4, 'trigger_adc_noise_nbits': 2,
+                        'trigger_adc_reference_voltage': 0.5})
+det = unit_test_detector(det_channels)
+station = NuRadioReco.framework.station.Station(101)
+random = np.random.RandomState(0)
+for channel_id, (sampling_rate, n_samples) in channel_parameters.items():
+    channel = NuRadioReco.framework.channel.Channel(channel_id)
+    channel.set_trace(random.normal(0, 0.1, n_samples), sampling_rate)
+    channel.set_trace_start_time(20 * units.ns)
+    station.add_channel(channel)
+
+adc = analogToDigitalConverter.analogToDigitalConverter()
+for clock_offset in [0, 0.37, 1.5]:
+    for trigger_adc in [False, True]:
+        prefix = 'trigger_' if trigger_adc else ''
+        references = {}
+        for channel_id, det_channel in det_channels.items():
+            channel = station.get_channel(channel_id)
+            resampled_trace = get_reference_trace(channel, det_channel, clock_offset, trigger_adc=trigger_adc)
+            # the resampling kernel gives the same trace before the digitisation
+            kernel = analogToDigitalConverter.get_resampling_kernel(channel.get_number_of_samples(), channel.get_sampling_rate(),
+                                                                    *get_adc_timing(det_channel, clock_offset, trigger_adc))
+            testing.assert_allclose(analogToDigitalConverter.apply_resampling_kernel(channel.get_trace(), kernel)[0],
+                                    resampled_trace, rtol=1e-9, atol=1e-12)
+            references[channel_id] = analogToDigitalConverter.perfect_floor_comparator(
+                resampled_trace, det_channel[prefix + 'adc_nbits'], det_channel[prefix + 'adc_reference_voltage'] * units.V, 'counts')
+
+        for dtype in [np.float64, np.float32]:
+            digital_traces, adc_sampling_frequencies = adc.get_digital_traces(
+                station, det, clock_offset=clock_offset, trigger_adc=trigger_adc, adc_output='counts',
+                return_sampling_frequency=True, dtype=dtype)
+            for channel_id, reference in references.items():
+                testing.assert_equal(adc_sampling_frequencies[channel_id], det_channels[channel_id][prefix + 'adc_sampling_frequency'] * units.GHz)
+                testing.assert_equal(digital_traces[channel_id].shape, reference.shape)
+                testing.assert_equal(np.any(reference != 0), True)
+                if dtype == np.float64:
+                    testing.assert_equal(digital_traces[channel_id], reference)
+                else:
+                    # the rounding errors of the single precision can change the digitised values by one count
+                    testing.assert_array_less(np.abs(digital_traces[channel_id] - reference), 1.5)
+                    testing.assert_array_less(np.mean(digital_traces[channel_id] != reference), 0.01)
+
+# the trigger filter is applied before the digitisation
+channel = station.get_channel(2)
+trigger_filter = np.exp(-np.linspace(0, 3, channel.get_number_of_samples() // 2 + 1))
+reference = analogToDigitalConverter.perfect_floor_comparator(
+    get_reference_trace(channel, det_channels[2], 0.37, trigger_filter=trigger_filter), 8, 1 * units.V, 'counts')
+testing.assert_equal(adc.get_digital_trace(station, det, channel, clock_offset=0.37, adc_output='counts', trigger_filter=trigger_filter),
+                     reference)
+testing.assert_raises(ValueError, adc.get_digital_trace, station, det, channel, trigger_filter=trigger_filter[:-1])
+
+print('U08unit_test_adc_resampling passed without issues')
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+import os
+import logging
+import tempfile
+import numpy as np
+from numpy import testing
+import astropy.time
+import NuRadioReco.framework.event
+import NuRadioReco.framework.station
+import NuRadioReco.framework.channel
+import NuRadioReco.modules.io.eventWriter
+from NuRadioReco.modules.io import NuRadioRecoio
+from NuRadioReco.detector import detector
+from NuRadioReco.framework.parameters import stationParameters as stnp
+from NuRadioReco.utilities import units
+
+"""
+this unit test writes events into several .nur files with and without the index at the end of the files, and checks
+that the events, headers and detector description are read back correctly by random access through the index, and
+by scanning the files without index
+"""
+
+det = detector.Detector(json_filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'unit_test_detector.json'),
+                        antenna_by_depth=False, create_new=True)
+station_time = astropy.time.Time('2019-01-01 00:00:00')
+det.update(station_time)
+station_id = 101
+n_events = 8
+events_per_file = 3
+output_directory = tempfile.mkdtemp()
+random = np.random.RandomState(0)
+
+
+def get_event(run_number, event_id):
+    event = NuRadioReco.framework.event.Event(run_number, event_id)
+    station = NuRadioReco.framework.station.Station(station_id)
+    station.set_station_time(station_time)
+    station.set_parameter(stnp.nu_energy, 1e18 * (event_id + 1))
+    for channel_id in det.get_channel_ids(station_id):
+        channel = NuRadioReco.framework.channel.Channel(channel_id)
+        channel.set_trace(random.normal(size=256), 1 * units.GHz)
+        station.add_channel(channel)
+    event.set_station(station)
+    return event
+
+
+class LogCollector(logging.Handler):
+    """
+    collects the log messages of the reader to check if the index was used
+    """
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+events = [get_event(1, event_id) for event_id in range(n_events)]
+filenames = {}
+for write_index in [True, False]:
+    filename = os.path.join(output_directory, 'index' if write_index else 'no_index')
+    event_writer = NuRadioReco.modules.io.eventWriter.eventWriter()
+    event_writer.begin(filename, events_per_file=events_per_file, write_index=write_index)
+    for event in events:
+        event_writer.run(event, det)
+    testing.assert_equal(event_writer.end(), n_events)
+    filenames[write_index] = [filename + '.nur'] + ['{}_part{:02d}.nur'.format(filename, i) for i in range(2, 4)]
+    for fname in filenames[write_index]:
+        with open(fname, 'rb') as fin:
+            fin.seek(-len(NuRadioRecoio.INDEX_MAGIC), os.SEEK_END)
+            testing.assert_equal(fin.read() == NuRadioRecoio.INDEX_MAGIC, write_index)
+
+log_collector = LogCollector()
+logging.getLogger('NuRadioReco.NuRadioRecoio').addHandler(log_collector)
+logging.getLogger('NuRadioReco.NuRadioRecoio').propagate = False  # the debug messages are only collected, not printed
+for write_index in [True, False]:
+    log_collector.messages = []
+    reader = NuRadioRecoio.NuRadioRecoio(filenames[write_index], log_level=logging.DEBUG)
+    testing.assert_equal(reader.get_n_events(), n_events)
+    # the files with index are not scanned
+    n_index_read = len([message for message in log_collector.messages if message.startswith('reading index')])
+    testing.assert_equal(n_index_read, len(filenames[write_index]) if write_index else 0)
+    testing.assert_equal(reader.get_event_ids(), [[1, event_id] for event_id in range(n_events)])
+    headers = reader.get_header()[station_id]
+    testing.assert_equal(headers[stnp.nu_energy], [1e18 * (event_id + 1) for event_id in range(n_events)])
+    testing.assert_equal(len(headers[stnp.station_time]), n_events)
+    # random access
+    for event_number in random.permutation(n_events):
+        event = reader.get_event_i(event_number)
+        testing.assert_equal(event.get_id(), event_number)
+        for channel in event.get_station(station_id).iter_channels():
+            testing.assert_equal(channel.get_trace(), events[event_number].get_station(station_id).get_channel(channel.get_id()).get_trace())
+        # every file contains the detector description
+        detector_from_file = reader.get_detector()
+        detector_from_file.update(station_time)
+        testing.assert_equal(detector_from_file.get_channel_ids(station_id), det.get_channel_ids(station_id))
+    testing.assert_equal(reader.get_event((1, 5)).get_id(), 5)
+    reader.close_files()
+
+    # reading the files sequentially stops before the index
+    for fname, event_ids in zip(filenames[write_index], [[0, 1, 2], [3, 4, 5], [6, 7]]):
+        reader = NuRadioRecoio.NuRadioRecoio(fname, log_level=logging.WARNING)
+        testing.assert_equal([event.get_id() for event in reader.get_events()], event_ids)
+        reader.close_files()
+
+print('U09unit_test_nur_file_index passed without issues')
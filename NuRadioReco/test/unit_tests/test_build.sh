@@ -0,0 +1,12 @@
+#!/bin/bash
+
+set -e
+NuRadioReco/test/unit_tests/U01unit_test_galactic_noise_cache.py
+NuRadioReco/test/unit_tests/U02unit_test_phased_array_noise.py
+NuRadioReco/test/unit_tests/U03unit_test_station_trace_buffer.py
+NuRadioReco/test/unit_tests/U04unit_test_detector_snapshot.py
+NuRadioReco/test/unit_tests/U05unit_test_binary_antenna_response.py
+NuRadioReco/test/unit_tests/U06unit_test_antenna_response_directions.py
+NuRadioReco/test/unit_tests/U07unit_test_generic_noise.py
+NuRadioReco/test/unit_tests/U08unit_test_adc_resampling.py
+NuRadioReco/test/unit_tests/U09unit_test_nur_file_index.py
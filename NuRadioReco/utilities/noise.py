@@ -2,8 +2,8 @@ import numpy as np
 from NuRadioReco.modules import channelGenericNoiseAdder
 from NuRadioReco.utilities import units, fft
 from NuRadioReco.modules.trigger.highLowThreshold import get_high_low_triggers
+from NuRadioReco.modules.phasedarray.triggerSimulator import get_beam_delay_matrix, get_phasing_indices, phase_traces, get_windowed_power
 from NuRadioReco.detector import detector
-from scipy import constants
 import datetime
 import copy
 import time
@@ -258,7 +258,6 @@ class thermalNoiseGeneratorPhasedArray():
         self.ant_z = {}
         for i, channel_id in enumerate(self.triggered_channels):
             self.ant_z[channel_id] = self.det.get_relative_position(station_id, channel_id)[2]
-        ref_z = np.max(np.fromiter(self.ant_z.values(), dtype=float))
         # Need to add in delay for trigger delay
         cable_delays = {}
         for channel_id in triggered_channels:
@@ -267,18 +266,11 @@ class thermalNoiseGeneratorPhasedArray():
         main_low_angle = np.deg2rad(-59.54968597864437)
         main_high_angle = np.deg2rad(59.54968597864437)
         phasing_angles_4ant = np.arcsin(np.linspace(np.sin(main_low_angle), np.sin(main_high_angle), 11))
-        cspeed = constants.c * units.m / units.s
-        self.beam_time_delays = np.zeros((len(phasing_angles_4ant), self.n_channels), dtype=np.int)
-        for iBeam, angle in enumerate(phasing_angles_4ant):
-
-            delays = []
-            for key in self.ant_z:
-                delays += [-(self.ant_z[key] - ref_z) / cspeed * ref_index * np.sin(angle) - cable_delays[key]]
-
-            delays -= np.max(delays)
-
-            roll = np.array(np.round(np.array(delays) * self.sampling_rate * self.upsampling)).astype(int)
-            self.beam_time_delays[iBeam] = roll
+        self.beam_time_delays = get_beam_delay_matrix([self.ant_z[channel_id] for channel_id in triggered_channels],
+                                                      [cable_delays[channel_id] for channel_id in triggered_channels],
+                                                      phasing_angles_4ant, ref_index, self.sampling_rate * self.upsampling)
+        # the indices to form all beams at once are the same for all generated noise traces
+        self._phasing_indices = get_phasing_indices(self.beam_time_delays, self.n_samples * self.upsampling)
 
         print(self.beam_time_delays)
         self.Vrms = Vrms
@@ -329,8 +321,13 @@ class thermalNoiseGeneratorPhasedArray():
             self._traces[iCh] = perfect_floor_comparator(trace, self.adc_n_bits, self.adc_ref_voltage)
 
 
+    def __phasing_vectorized(self):
+        """ separated phasing part for PA noise trigger, all beams are formed at once (same result as np.roll) """
+
+        self._phased_traces = phase_traces(self._traces, indices=self._phasing_indices)
+
     def __phasing(self):
-        """ separated phasing part for PA noise trigger """
+        """ separated phasing part for PA noise trigger via slicing """
 
         self._phased_traces = np.zeros((len(self.beam_time_delays), self.n_samples * self.upsampling))
         for iBeam, beam_time_delay in enumerate(self.beam_time_delays):
@@ -388,17 +385,12 @@ class thermalNoiseGeneratorPhasedArray():
         return False
 
     def __triggering_strided(self):
-        """ separated trigger part for PA noise trigger using np.lib.stride_tricks.as_strided """
+        """ separated trigger part for PA noise trigger using sliding windows (without wrapping around the trace) """
 
+        # power in sliding windows of all beams at once
+        squared_means, num_frames = get_windowed_power(self._phased_traces, self.window, self.step)
         self.max_amp = 0
-        for iBeam, phased_trace in enumerate(self._phased_traces):
-            # Create a sliding window
-            coh_sum_squared = phased_trace ** 2
-            num_frames = int(np.floor((len(phased_trace) - self.window) / self.step))
-            coh_sum_windowed = np.lib.stride_tricks.as_strided(coh_sum_squared, (num_frames, self.window),
-                                                       (coh_sum_squared.strides[0] * self.step, coh_sum_squared.strides[0]))
-            squared_mean = np.sum(coh_sum_windowed, axis=1) / self.window
-            #self.max_amp = max(squared_mean.max(), self.max_amp)
+        for iBeam, squared_mean in enumerate(squared_means):
             self.max_amp = max(squared_mean.max(), self.max_amp)
             if True in (squared_mean > self.threshold):
                 logger.info(f"triggered at beam {iBeam}")
@@ -422,11 +414,14 @@ class thermalNoiseGeneratorPhasedArray():
         Parameters
         ----------
         phasing_mode: string (default: "slice")
-            "slice" or "roll", two implementations for phasing by either slicing the array or using
-            np.roll. The default shows better performance, but "roll" is kept as an alternative
+            "slice", "vectorized" or "roll", implementations for phasing by slicing the array, by forming
+            all beams at once with precalculated indices or by using np.roll. "vectorized" and "roll" give
+            the same result and shift every channel with np.roll. "slice" assumes that the first channel
+            is not shifted, so the beams that delay the first channel differ.
         trigger_mode: string (default: "binned_sum")
-            "binned_sum" or "stride", two implementations for triggering
-            The default shows better performance, but "stride" is kept as an alternative
+            "binned_sum" or "stride", two implementations for triggering. "binned_sum" also includes the
+            windows that wrap around the end of the trace, "stride" calculates the power in sliding windows
+            for all beams at once using a cumulative sum
         debug:
             generate debug plot
         Returns
@@ -458,14 +453,16 @@ class thermalNoiseGeneratorPhasedArray():
             dt_generation += time.process_time() - tstart
             tstart = time.process_time()
 
-            if phasing_mode == "slice":
+            if phasing_mode == "vectorized":
+                self.__phasing_vectorized()
+            elif phasing_mode == "slice":
                 self.__phasing()
             elif phasing_mode == "roll":
                 # more time consuming attempt to do phasing compared to slicing the array
                 self.__phasing_roll()
             else:
-                logger.error(f"Requested phasing_mode {phasing_mode}. Only 'slice' and 'roll' are allowed")
-                raise NotImplementedError(f"Requested phasing_mode {phasing_mode}. Only 'slice' and 'roll' are allowed")
+                logger.error(f"Requested phasing_mode {phasing_mode}. Only 'vectorized', 'slice' and 'roll' are allowed")
+                raise NotImplementedError(f"Requested phasing_mode {phasing_mode}. Only 'vectorized', 'slice' and 'roll' are allowed")
 
             # time profiling phasing            
             dt_phasing += time.process_time() - tstart
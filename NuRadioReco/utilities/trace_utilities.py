@@ -1,4 +1,6 @@
 import numpy as np
+import fractions
+import decimal
 import scipy.constants
 import scipy.signal
 from NuRadioReco.utilities import units
@@ -30,37 +32,88 @@ def get_efield_antenna_factor(station, frequencies, channels, detector, zenith,
         incoming direction of the signal. Note that refraction and reflection at the ice/air boundary are taken into account
     antenna_pattern_provider: AntennaPatternProvider
     """
+    efield_antenna_factor, valid = _get_efield_antenna_factors(station, frequencies, channels, detector, np.array([zenith]),
+                                                               np.array([azimuth]), antenna_pattern_provider)
+    if not np.all(valid):
+        logger.warning("fresnel reflection at air-firn boundary leads to unphysical results, no reconstruction possible")
+        return None
+    return efield_antenna_factor[0]
+
+
+def get_efield_antenna_factors(station, frequencies, channels, detector, zenith, azimuth, antenna_pattern_provider):
+    """
+    Returns the antenna response to radio signals coming from many directions
+
+    Same as `get_efield_antenna_factor` but for arrays of directions. The antenna pattern of each channel is
+    evaluated for all directions at once.
+
+    Parameters
+    ---------------
+    station: Station
+    frequencies: array of complex
+        frequencies of the radio signal for which the antenna response is needed
+    channels: array of int
+        IDs of the channels
+    detector: Detector
+    zenith, azimuth: array of floats, array of floats
+        incoming directions of the signal. Note that refraction and reflection at the ice/air boundary are taken into account
+    antenna_pattern_provider: AntennaPatternProvider
+
+    Returns
+    -------
+    efield_antenna_factor: array of complex of shape (n_directions, n_channels, 2, n_frequencies)
+        the antenna response in e_theta and e_phi, the response is zero for directions
+        without a physical signal path to the antenna
+    """
+    return _get_efield_antenna_factors(station, frequencies, channels, detector, np.atleast_1d(zenith),
+                                       np.atleast_1d(azimuth), antenna_pattern_provider)[0]
+
+
+def _get_efield_antenna_factors(station, frequencies, channels, detector, zeniths, azimuths, antenna_pattern_provider):
+    """
+    calculates the antenna response for arrays of directions, see `get_efield_antenna_factors`
+
+    Returns
+    -------
+    efield_antenna_factor: array of complex of shape (n_directions, n_channels, 2, n_frequencies)
+    valid: array of bools
+        False for directions for which the fresnel reflection at air-firn boundary leads to unphysical results
+    """
     n_ice = ice.get_refractive_index(-0.01, detector.get_site(station.get_id()))
-    efield_antenna_factor = np.zeros((len(channels), 2, len(frequencies)), dtype=np.complex)  # from antenna model in e_theta, e_phi
+    efield_antenna_factor = np.zeros((len(zeniths), len(channels), 2, len(frequencies)), dtype=np.complex)  # from antenna model in e_theta, e_phi
+    valid = np.ones(len(zeniths), dtype=bool)
     for iCh, channel_id in enumerate(channels):
-        zenith_antenna = zenith
-        t_theta = 1.
-        t_phi = 1.
-        # first check case if signal comes from above
-        if zenith <= 0.5 * np.pi and station.is_cosmic_ray():
-            # is antenna below surface?
-            position = detector.get_relative_position(station.get_id(), channel_id)
-            if position[2] <= 0:
-                zenith_antenna = geo_utl.get_fresnel_angle(zenith, n_ice, 1)
-                t_theta = geo_utl.get_fresnel_t_p(zenith, n_ice, 1)
-                t_phi = geo_utl.get_fresnel_t_s(zenith, n_ice, 1)
-                logger.info("channel {:d}: electric field is refracted into the firn. theta {:.0f} -> {:.0f}. Transmission coefficient p (eTheta) {:.2f} s (ePhi) {:.2f}".format(iCh, zenith / units.deg, zenith_antenna / units.deg, t_theta, t_phi))
-        else:
-            # now the signal is coming from below, do we have an antenna above the surface?
-            position = detector.get_relative_position(station.get_id(), channel_id)
-            if(position[2] > 0):
-                zenith_antenna = geo_utl.get_fresnel_angle(zenith, 1., n_ice)
-        if(zenith_antenna is None):
-            logger.warning("fresnel reflection at air-firn boundary leads to unphysical results, no reconstruction possible")
-            return None
-
-        logger.debug("angles: zenith {0:.0f}, zenith antenna {1:.0f}, azimuth {2:.0f}".format(np.rad2deg(zenith), np.rad2deg(zenith_antenna), np.rad2deg(azimuth)))
-        antenna_model = detector.get_antenna_model(station.get_id(), channel_id, zenith_antenna)
-        antenna_pattern = antenna_pattern_provider.load_antenna_pattern(antenna_model)
+        position = detector.get_relative_position(station.get_id(), channel_id)
+        zenith_antenna = np.array(zeniths, dtype=float)
+        t_theta = np.ones(len(zeniths))
+        t_phi = np.ones(len(zeniths))
+        for iD, zenith in enumerate(zeniths):
+            # first check case if signal comes from above
+            if zenith <= 0.5 * np.pi and station.is_cosmic_ray():
+                # is antenna below surface?
+                if position[2] <= 0:
+                    zenith_antenna[iD] = geo_utl.get_fresnel_angle(zenith, n_ice, 1)
+                    t_theta[iD] = geo_utl.get_fresnel_t_p(zenith, n_ice, 1)
+                    t_phi[iD] = geo_utl.get_fresnel_t_s(zenith, n_ice, 1)
+                    logger.info("channel {:d}: electric field is refracted into the firn. theta {:.0f} -> {:.0f}. Transmission coefficient p (eTheta) {:.2f} s (ePhi) {:.2f}".format(iCh, zenith / units.deg, zenith_antenna[iD] / units.deg, t_theta[iD], t_phi[iD]))
+            else:
+                # now the signal is coming from below, do we have an antenna above the surface?
+                if(position[2] > 0):
+                    zenith_antenna[iD] = geo_utl.get_fresnel_angle(zenith, 1., n_ice)
+        # get_fresnel_angle returns None (converted to nan) if there is no physical solution
+        valid &= ~np.isnan(zenith_antenna)
+
+        # the antenna model can depend on the incoming direction, so the directions are grouped by antenna model
+        antenna_models = np.array([detector.get_antenna_model(station.get_id(), channel_id, z) if v else '' for z, v in zip(zenith_antenna, valid)])
         ori = detector.get_antenna_orientation(station.get_id(), channel_id)
-        VEL = antenna_pattern.get_antenna_response_vectorized(frequencies, zenith_antenna, azimuth, *ori)
-        efield_antenna_factor[iCh] = np.array([VEL['theta'] * t_theta, VEL['phi'] * t_phi])
-    return efield_antenna_factor
+        for antenna_model in np.unique(antenna_models[valid]):
+            idx = np.flatnonzero(valid & (antenna_models == antenna_model))
+            antenna_pattern = antenna_pattern_provider.load_antenna_pattern(antenna_model)
+            VEL = antenna_pattern.get_antenna_response_multiple_directions(frequencies, zenith_antenna[idx], azimuths[idx], *ori)
+            efield_antenna_factor[idx, iCh, 0] = VEL['theta'] * t_theta[idx, None]
+            efield_antenna_factor[idx, iCh, 1] = VEL['phi'] * t_phi[idx, None]
+    efield_antenna_factor[~valid] = 0
+    return efield_antenna_factor, valid
 
 
 def get_channel_voltage_from_efield(station, electric_field, channels, detector, zenith, azimuth, antenna_pattern_provider, return_spectrum=True):
@@ -111,6 +164,39 @@ def get_electric_field_energy_fluence(electric_field_trace, times, signal_window
     return f_signal * dt * conversion_factor_integrated_signal
 
 
+def resample(trace, sampling_rate, new_sampling_rate):
+    """
+    resamples a trace (or several traces at once) to a new sampling rate using the fourier method
+
+    The ratio of the sampling rates is approximated by a fraction. The trace is first upsampled by the numerator and
+    then downsampled by the denominator. If the resulting number of samples is odd, the last sample is dropped.
+
+    Parameters
+    ----------
+    trace: array of floats
+        the trace(s), the resampling is done along the last axis, i.e., the shape can be (n_samples) for a
+        single trace, (3, n_samples) for an electric field or (n_channels, n_samples) for several channels
+    sampling_rate: float
+        the sampling rate of the trace
+    new_sampling_rate: float
+        the requested sampling rate
+
+    Returns
+    -------
+    resampled_trace: array of floats
+    """
+    resampling_factor = fractions.Fraction(decimal.Decimal(new_sampling_rate / sampling_rate)).limit_denominator(5000)
+    resampled_trace = trace
+    if resampling_factor.numerator != 1:
+        resampled_trace = scipy.signal.resample(resampled_trace, resampling_factor.numerator * trace.shape[-1], axis=-1)
+    if resampling_factor.denominator != 1:
+        resampled_trace = scipy.signal.resample(resampled_trace, np.shape(resampled_trace)[-1] // resampling_factor.denominator, axis=-1)
+
+    if resampled_trace.shape[-1] % 2 != 0:
+        resampled_trace = resampled_trace.T[:-1].T
+    return resampled_trace
+
+
 def upsampling_fir(trace, original_sampling_frequency, int_factor=2, ntaps=2 ** 7):
     """
     This function performs an upsampling by inserting a number of zeroes